@@ -11,6 +11,8 @@ import uuid
 from config.settings import settings
 from database.database import get_db
 from database.models import User, UserStatus
+from repositories.user_repository import UserRepository
+from services.auth_cache import principal_cache
 
 # 密码加密上下文 - 使用pbkdf2_sha256算法，更稳定且没有长度限制问题
 pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
@@ -21,10 +23,7 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """验证密码"""
-    print(f"[DEBUG] 验证密码: plain_password长度={len(plain_password)}, hashed_password长度={len(hashed_password)}")
-    result = pwd_context.verify(plain_password, hashed_password)
-    print(f"[DEBUG] 密码验证结果: {result}")
-    return result
+    return pwd_context.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
@@ -34,7 +33,6 @@ def get_password_hash(password: str) -> str:
 
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """创建访问令牌"""
-    print(f"[DEBUG] 创建访问令牌: data={data}, expires_delta={expires_delta}")
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -43,7 +41,6 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta]
     
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    print(f"[DEBUG] 令牌创建成功，expire={expire}")
     return encoded_jwt
 
 
@@ -57,66 +54,36 @@ def decode_token(token: str) -> Optional[Dict[str, Any]]:
 
 
 async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    """获取当前用户"""
-    print(f"[DEBUG] 获取当前用户: token={token[:10]}...")
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="无法验证凭据",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
-    payload = decode_token(token)
-    if payload is None:
-        raise credentials_exception
-    
-    user_id: str = payload.get("sub")
-    if user_id is None:
-        raise credentials_exception
-    
-    # 验证UUID格式
-    try:
-        user_uuid = uuid.UUID(user_id)
-    except ValueError:
-        print(f"[DEBUG] 无效的 UUID 格式: {user_id}")
-        raise credentials_exception
-    
-    # 数据库存储的是带连字符的 UUID 字符串格式
-    user_id_str = str(user_uuid)
-    print(f"[DEBUG] 查询用户 ID: {user_id_str}")
-    
-    # 使用 text() 进行原始 SQL 查询获取完整用户数据
-    from sqlalchemy import text
-    from sqlalchemy.orm import Session
-    
-    result = db.execute(
-        text("""SELECT id, username, phone_number, password, role, status, 
-                created_at, updated_at, last_login_at 
-                FROM users WHERE id = :user_id LIMIT 1"""),
-        {"user_id": user_id_str}
-    ).fetchone()
-    
-    if result is None:
-        print(f"[DEBUG] 用户不存在: {user_id_str}")
-        raise credentials_exception
-    
-    print(f"[DEBUG] 找到用户: {result[1]}")  # username
-    
-    # 手动构建 User 对象，避免 ORM UUID 类型问题
-    user = User(
-        id=uuid.UUID(result[0]),
-        username=result[1],
-        phone_number=result[2],
-        password=result[3],
-        role=result[4],
-        status=result[5],
-        created_at=result[6],
-        updated_at=result[7],
-        last_login_at=result[8]
-    )
-    # 标记为已持久化（避免 SQLAlchemy 尝试插入）
-    from sqlalchemy import inspect
-    db.add(user)
-    db.expire(user)
+    """获取当前用户（认证结果按令牌缓存，见 services/auth_cache.py）"""
+    user = principal_cache.get_user(db, token)
+    
+    if user is None:
+        credentials_exception = HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="无法验证凭据",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+        
+        payload = decode_token(token)
+        if payload is None:
+            raise credentials_exception
+        
+        user_id: str = payload.get("sub")
+        if user_id is None:
+            raise credentials_exception
+        
+        # 验证UUID格式
+        try:
+            user_uuid = uuid.UUID(user_id)
+        except ValueError:
+            raise credentials_exception
+        
+        # 用户和档案在一条查询中加载，后续角色检查不再懒加载
+        user = UserRepository(db).get_with_profiles(user_uuid)
+        if user is None:
+            raise credentials_exception
+        
+        principal_cache.put(token, user, payload.get("exp"))
     
     # 检查用户状态
     if user.status != UserStatus.ACTIVE:
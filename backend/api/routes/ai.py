@@ -408,8 +408,9 @@ async def ai_consult_stream(request: StreamConsultRequest):
             from services.agents.multi_agent_service import multi_agent_service
             from services.spark_service import spark_service
             
-            # 先进行意图识别和工具调用
-            result = multi_agent_service.process(
+            # 先进行意图识别和工具调用（同步流程放到线程池，避免阻塞事件循环）
+            result = await asyncio.to_thread(
+                multi_agent_service.process,
                 user_input=request.user_input,
                 user_id=session_id,
                 user_role=request.user_role,
@@ -487,3 +488,19 @@ async def get_agents_info():
             "data": {"agents": [], "count": 0, "multi_agent_enabled": False},
             "message": f"获取智能体信息失败: {str(e)}"
         }
+
+
+@router.get("/agents/cache-stats")
+async def get_response_cache_stats():
+    """
+    获取智能体回答缓存的统计信息
+
+    包含精确/语义命中数、未命中数、跳过数（个性化上下文）和命中率
+    """
+    from services.agents.response_cache import response_cache
+    
+    return {
+        "status": "success",
+        "data": response_cache.get_stats(),
+        "message": "获取回答缓存统计成功"
+    }
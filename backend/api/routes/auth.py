@@ -134,31 +134,22 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
     
     使用OAuth2PasswordRequestForm，支持通过username或phone_number登录，并获取role参数
     """
-    print(f"[DEBUG] 登录请求: username={form_data.username}, password长度={len(form_data.password)}, scope={form_data.scopes}")
-    
     # 获取额外的role参数（从form_data中获取）
     role = form_data.scopes[0] if form_data.scopes else None
     
     # 查找用户 - 支持通过username或phone_number登录
-    print(f"[DEBUG] 查找用户: username={form_data.username}")
-    
     # 先尝试通过手机号查找
     user = db.query(User).filter(User.phone_number == form_data.username).first()
     
     # 如果通过手机号没找到，再尝试通过用户名查找
     if not user:
-        print(f"[DEBUG] 通过手机号未找到用户，尝试通过用户名查找")
         user = db.query(User).filter(User.username == form_data.username).first()
     
     if user:
-        print(f"[DEBUG] 找到用户: id={user.id}, username={user.username}, phone={user.phone_number}, role={user.role}")
         # 密码验证
-        print(f"[DEBUG] 准备验证密码: 明文密码长度={len(form_data.password)}, 哈希密码长度={len(user.password)}")
         password_valid = verify_password(form_data.password, user.password)
-        print(f"[DEBUG] 密码验证结果: {password_valid}")
         
         if not password_valid:
-            print(f"[DEBUG] 密码验证失败")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail={"error_code": 4011,
@@ -167,7 +158,6 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
                 headers={"WWW-Authenticate": "Bearer"},
             )
     else:
-        print(f"[DEBUG] 未找到用户")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail={"error_code": 4011,
@@ -255,23 +245,16 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
 @router.post("/login/json", response_model=UserLoginResponse)
 def login_json(user_data: UserLogin, db: Session = Depends(get_db)):
     """用户登录(JSON格式)"""
-    print(f"[DEBUG-JSON] 登录请求: phone_number={user_data.phone_number}, password长度={len(user_data.password)}")
-    
     # 查找用户
-    print(f"[DEBUG-JSON] 通过手机号查找用户: {user_data.phone_number}")
     user = db.query(User).filter(
         User.phone_number == user_data.phone_number
     ).first()
     
     if user:
-        print(f"[DEBUG-JSON] 找到用户: id={user.id}, username={user.username}, phone={user.phone_number}, role={user.role}")
         # 密码验证
-        print(f"[DEBUG-JSON] 准备验证密码: 明文密码长度={len(user_data.password)}, 哈希密码长度={len(user.password)}")
         password_valid = verify_password(user_data.password, user.password)
-        print(f"[DEBUG-JSON] 密码验证结果: {password_valid}")
         
         if not password_valid:
-            print(f"[DEBUG-JSON] 密码验证失败")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail={"error_code": 4011,
@@ -280,7 +263,6 @@ def login_json(user_data: UserLogin, db: Session = Depends(get_db)):
                 headers={"WWW-Authenticate": "Bearer"},
             )
     else:
-        print(f"[DEBUG-JSON] 未找到用户")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail={"error_code": 4011,
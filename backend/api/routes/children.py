@@ -5,7 +5,7 @@ from sqlalchemy.orm import Session
 import logging
 from datetime import datetime
 
-from database.database import get_db
+from database.database import get_db, get_async_db, AsyncSession
 from database.models import User
 from schemas.models import (
     ChildrenProfileCreate, ChildrenProfileUpdate, ChildrenProfileResponse,
@@ -17,13 +17,14 @@ from schemas.models import (
     ReminderCreate, ReminderCreateResponse, ReminderData
 )
 from dependencies.get_current_user import (
-    get_current_user, get_children_user, get_elderly_or_caretaker
+    get_current_user, get_current_user_async, get_children_user, get_elderly_or_caretaker
 )
 from repositories.children_repository import ChildrenRepository
 from repositories.user_repository import UserRepository
 from repositories.elderly_repository import ElderlyRepository
 from utils.common_utils import ResponseUtils, DataUtils
 from middlewares.error_middleware import BusinessError
+from services.latest_vitals_cache import latest_vitals_cache
 
 # 获取日志记录器
 logger = logging.getLogger(__name__)
@@ -192,13 +193,17 @@ async def get_my_elderly_list(
     try:
         # 获取关联的老人列表
         children_repo = ChildrenRepository(db)
-        elderly_list = children_repo.get_elderly_by_children(current_user.id)
+        elderly_list = ElderlyRepository(db).get_elderly_by_children(current_user.id)
+        
+        # 批量获取健康数据统计（查询次数与老人数量无关）
+        stats_map = children_repo.get_elderly_health_statistics_batch(
+            [elderly.id for elderly in elderly_list]
+        )
         
         # 构建响应数据
         items = []
         for elderly in elderly_list:
-            # 获取健康数据统计
-            health_stats = children_repo.get_elderly_health_statistics(elderly.id)
+            health_stats = stats_map.get(elderly.id, {})
             
             # 构建响应
             elderly_data = ElderlyWithStatsResponse.from_orm(elderly)
@@ -463,8 +468,7 @@ async def get_elderly_health_summary(
 
 @router.get("/elders/list", response_model=ElderListResponse)
 async def get_elders_list(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async)
 ) -> dict:
     """获取绑定的老人列表
     
@@ -531,8 +535,7 @@ async def get_elders_list(
 @router.get("/elders/{elder_id}/detail", response_model=ElderDetailResponse)
 async def get_elder_detail(
     elder_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async)
 ) -> dict:
     """获取老人详细信息
     
@@ -626,30 +629,37 @@ async def get_elder_detail(
 @router.get("/monitor/{elder_id}/realtime", response_model=RealtimeMonitorResponse)
 async def get_realtime_monitor(
     elder_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ) -> dict:
     """获取老人实时监控数据
     
     返回当前时刻的生命体征和位置信息
     """
     import random
+    import uuid
     
     try:
         logger.info(f"用户 {current_user.id} 获取实时监控: {elder_id}")
         
-        # TODO: 从设备/数据库获取真实实时数据
-        # 目前返回模拟数据
+        # 生命体征取自最新生命体征快照（轮询频繁，走读缓存）；没有数据的指标和位置暂时使用模拟数据
+        snapshot = None
+        try:
+            snapshot = await latest_vitals_cache.get_async(db, uuid.UUID(elder_id))
+        except ValueError:
+            pass
+        vitals = snapshot or {}
+        
         monitor_data = {
             "elderId": elder_id,
-            "timestamp": datetime.now().isoformat(),
-            "heartRate": random.randint(65, 85),
+            "timestamp": (vitals.get("last_recorded_at") or datetime.now()).isoformat(),
+            "heartRate": vitals.get("heart_rate") or random.randint(65, 85),
             "bloodPressure": {
-                "systolic": random.randint(115, 135),
-                "diastolic": random.randint(70, 88)
+                "systolic": vitals.get("systolic_pressure") or random.randint(115, 135),
+                "diastolic": vitals.get("diastolic_pressure") or random.randint(70, 88)
             },
-            "bloodOxygen": random.randint(95, 99),
-            "temperature": round(random.uniform(36.2, 36.8), 1),
+            "bloodOxygen": int(vitals.get("blood_oxygen") or random.randint(95, 99)),
+            "temperature": vitals.get("temperature") or round(random.uniform(36.2, 36.8), 1),
             "location": {
                 "name": "家中",
                 "latitude": 39.9042 + random.uniform(-0.001, 0.001),
@@ -4,7 +4,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File,
 from sqlalchemy.orm import Session
 import logging
 
-from database.database import get_db
+from database.database import get_db, get_async_db, AsyncSession
 from database.models import User, ElderlyProfile
 from schemas.models import (
     ElderlyCreate, ElderlyUpdate, ElderlyResponse, ElderlyListResponse,
@@ -23,13 +23,15 @@ from schemas.models import (
     MoodRecord, MoodRecordResponse, MoodRecordData
 )
 from dependencies.get_current_user import (
-    get_current_user, get_admin_or_community_admin, get_elderly_or_caretaker
+    get_current_user, get_current_user_async, get_admin_or_community_admin, get_elderly_or_caretaker
 )
 from repositories.elderly_repository import ElderlyRepository
 from repositories.health_repository import HealthRepository
+from repositories.latest_vitals_repository import LatestVitalsRepository
 from repositories.user_repository import UserRepository
 from utils.common_utils import ResponseUtils, DataUtils, ValidationUtils, FileUtils
 from middlewares.error_middleware import BusinessError
+from services.latest_vitals_cache import latest_vitals_cache
 
 # 获取日志记录器
 logger = logging.getLogger(__name__)
@@ -453,16 +455,16 @@ async def upload_elderly_avatar(
 
 @router.get("/health/today", response_model=TodayHealthResponse)
 async def get_today_health_data(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ) -> dict:
     """获取今日健康数据
     
     需要 JWT Token 认证，从 Token 中提取用户信息
     
     Args:
-        current_user: 当前登录用户（从 Token 中提取）
-        db: 数据库会话
+        current_user: 当前登录用户（从 Token 中提取，已预加载老人档案）
+        db: 异步数据库会话
         
     Returns:
         TodayHealthResponse: 今日健康数据响应
@@ -474,9 +476,7 @@ async def get_today_health_data(
         logger.info(f"获取用户 {current_user.id} 的今日健康数据")
         
         # 获取用户的老人档案
-        elderly_profile = db.query(ElderlyProfile).filter(
-            ElderlyProfile.user_id == current_user.id
-        ).first()
+        elderly_profile = current_user.elderly_profile
         
         if not elderly_profile:
             raise HTTPException(
@@ -484,13 +484,13 @@ async def get_today_health_data(
                 detail="未找到老人档案，请先完善个人信息"
             )
         
-        # TODO: 从数据库获取真实健康数据
-        # 目前使用模拟数据
+        # 从最新生命体征快照中取今日数据，今天没有测量的指标暂时使用模拟数据
+        snapshot = await latest_vitals_cache.get_async(db, elderly_profile.id)
+        today_values = LatestVitalsRepository.today_values(snapshot)
         
-        # 生成模拟的健康数据（实际应从 health_records 表获取）
-        systolic = random.randint(110, 140)
-        diastolic = random.randint(70, 90)
-        heart_rate = random.randint(60, 100)
+        systolic = today_values.get("systolic_pressure") or random.randint(110, 140)
+        diastolic = today_values.get("diastolic_pressure") or random.randint(70, 90)
+        heart_rate = today_values.get("heart_rate") or random.randint(60, 100)
         
         # 判断健康状态
         health_status = "normal"
@@ -511,12 +511,14 @@ async def get_today_health_data(
             systolic=systolic,
             diastolic=diastolic,
             heart_rate=heart_rate,
-            blood_oxygen=random.randint(95, 99),
-            blood_sugar=round(random.uniform(4.5, 7.0), 1),
-            temperature=round(random.uniform(36.3, 36.8), 1),
-            steps=random.randint(1000, 8000),
+            blood_oxygen=int(today_values.get("blood_oxygen") or random.randint(95, 99)),
+            blood_sugar=today_values.get("blood_sugar") or round(random.uniform(4.5, 7.0), 1),
+            temperature=today_values.get("temperature") or round(random.uniform(36.3, 36.8), 1),
+            steps=today_values.get("steps") or random.randint(1000, 8000),
             sleep_hours=round(random.uniform(5.5, 8.5), 1),
-            last_updated=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            last_updated=(
+                snapshot["last_recorded_at"] if today_values and snapshot.get("last_recorded_at") else datetime.now()
+            ).strftime("%Y-%m-%d %H:%M:%S"),
             health_status=health_status,
             health_tips=health_tips
         )
@@ -787,8 +789,7 @@ def _generate_ai_analysis(data_type: str, time_range: str) -> dict:
 @router.get("/health/charts/heartrate", response_model=HeartRateChartResponse)
 async def get_heartrate_chart(
     period: str = Query("today", description="时间段: today, week, month"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async)
 ) -> dict:
     """获取心率趋势图数据"""
     import random
@@ -846,8 +847,7 @@ async def get_heartrate_chart(
 @router.get("/health/charts/sleep", response_model=SleepChartResponse)
 async def get_sleep_chart(
     period: str = Query("week", description="时间段: week, month"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async)
 ) -> dict:
     """获取睡眠分析图表数据"""
     import random
@@ -895,8 +895,7 @@ async def get_sleep_chart(
 @router.get("/health/charts/bloodpressure", response_model=BloodPressureChartResponse)
 async def get_bloodpressure_chart(
     period: str = Query("week", description="时间段: week, month"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async)
 ) -> dict:
     """获取血压趋势图表数据"""
     import random
@@ -940,8 +939,7 @@ async def get_bloodpressure_chart(
 
 @router.get("/health/charts/radar", response_model=RadarChartResponse)
 async def get_health_radar(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async)
 ) -> dict:
     """获取健康雷达图数据"""
     import random
@@ -978,8 +976,7 @@ async def get_health_radar(
 
 @router.get("/reports/current", response_model=CurrentReportResponse)
 async def get_current_report(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async)
 ) -> dict:
     """获取当前健康报告"""
     import uuid
@@ -989,9 +986,7 @@ async def get_current_report(
         logger.info(f"用户 {current_user.id} 获取当前健康报告")
         
         # 获取用户名
-        elderly_profile = db.query(ElderlyProfile).filter(
-            ElderlyProfile.user_id == current_user.id
-        ).first()
+        elderly_profile = current_user.elderly_profile
         user_name = elderly_profile.name if elderly_profile else "用户"
         
         report = {
@@ -4,17 +4,21 @@
 """
 
 from fastapi import APIRouter, HTTPException, Depends, Query
-from sqlalchemy.orm import Session
 from sqlalchemy import func, desc
 from datetime import datetime, timedelta
 from typing import Optional, List
 from pydantic import BaseModel
 import uuid
 
-from database.database import get_db
+from database.database import get_async_db, AsyncSession
 from database.models import (
     User, ElderlyProfile, HealthRecord, SleepData, HealthRecordStatus
 )
+from repositories.elderly_repository import AsyncElderlyRepository
+from repositories.health_repository import AsyncHealthRepository
+from repositories.latest_vitals_repository import LatestVitalsRepository
+from repositories.user_repository import AsyncUserRepository
+from services.latest_vitals_cache import latest_vitals_cache
 
 router = APIRouter()
 
@@ -65,41 +69,21 @@ class ChartDataResponse(BaseModel):
 @router.get("/today")
 async def get_today_health(
     user_id: str = Query(..., description="用户ID"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """获取今日健康数据"""
     try:
         # 查找老人档案
-        elderly = db.query(ElderlyProfile).filter(
-            ElderlyProfile.user_id == user_id
-        ).first()
-        
-        # 如果按 user_id 找不到，尝试按 username 匹配
-        if not elderly:
-            user = db.query(User).filter(
-                User.username.like(f"%{user_id}%")
-            ).first()
-            if user:
-                elderly = db.query(ElderlyProfile).filter(
-                    ElderlyProfile.user_id == user.id
-                ).first()
+        elderly = await find_elderly_by_user(db, user_id)
         
         if not elderly:
             # 返回默认数据
             return get_default_health_data()
         
-        # 获取今日最新的健康记录
-        today = datetime.now().date()
-        latest_record = db.query(HealthRecord).filter(
-            HealthRecord.elderly_id == elderly.id,
-            func.date(HealthRecord.recorded_at) == today
-        ).order_by(desc(HealthRecord.recorded_at)).first()
-        
-        # 获取今日步数总和
-        today_steps = db.query(func.max(HealthRecord.steps)).filter(
-            HealthRecord.elderly_id == elderly.id,
-            func.date(HealthRecord.recorded_at) == today
-        ).scalar() or 0
+        # 从最新生命体征快照中取今日数据（不再逐项扫描 health_records）
+        snapshot = await latest_vitals_cache.get_async(db, elderly.id)
+        today_values = LatestVitalsRepository.today_values(snapshot)
+        today_steps = today_values.get("steps") or 0
         
         # 计算 BMI
         height_m = (elderly.height or 170) / 100
@@ -107,42 +91,42 @@ async def get_today_health(
         bmi = round(weight / (height_m ** 2), 1)
         bmi_status = get_bmi_status(bmi)
         
-        if latest_record:
+        if today_values:
             data = {
                 "userId": user_id,
                 "userName": elderly.name,
                 "vitalSigns": {
                     "temperature": {
-                        "value": latest_record.temperature or 36.5,
+                        "value": today_values.get("temperature") or 36.5,
                         "unit": "°C",
                         "change": 0,
-                        "status": get_temp_status(latest_record.temperature or 36.5)
+                        "status": get_temp_status(today_values.get("temperature") or 36.5)
                     },
                     "bloodSugar": {
-                        "value": latest_record.blood_sugar or 5.2,
+                        "value": today_values.get("blood_sugar") or 5.2,
                         "unit": "mmol/L",
-                        "status": get_blood_sugar_status(latest_record.blood_sugar or 5.2),
+                        "status": get_blood_sugar_status(today_values.get("blood_sugar") or 5.2),
                         "testType": "空腹"
                     },
                     "bloodPressure": {
-                        "systolic": latest_record.systolic_pressure or 120,
-                        "diastolic": latest_record.diastolic_pressure or 80,
+                        "systolic": today_values.get("systolic_pressure") or 120,
+                        "diastolic": today_values.get("diastolic_pressure") or 80,
                         "unit": "mmHg",
                         "status": get_bp_status(
-                            latest_record.systolic_pressure or 120,
-                            latest_record.diastolic_pressure or 80
+                            today_values.get("systolic_pressure") or 120,
+                            today_values.get("diastolic_pressure") or 80
                         )
                     },
                     "heartRate": {
-                        "value": latest_record.heart_rate or 72,
+                        "value": today_values.get("heart_rate") or 72,
                         "unit": "bpm",
                         "change": 0,
-                        "status": get_hr_status(latest_record.heart_rate or 72)
+                        "status": get_hr_status(today_values.get("heart_rate") or 72)
                     },
                     "spo2": {
-                        "value": latest_record.blood_oxygen or 98,
+                        "value": today_values.get("blood_oxygen") or 98,
                         "unit": "%",
-                        "status": get_spo2_status(latest_record.blood_oxygen or 98)
+                        "status": get_spo2_status(today_values.get("blood_oxygen") or 98)
                     }
                 },
                 "activity": {
@@ -173,39 +157,23 @@ async def get_today_health(
 async def get_chart_data(
     user_id: str = Query(..., description="用户ID"),
     days: int = Query(7, description="天数"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """获取图表数据"""
     try:
         # 查找老人档案
-        elderly = db.query(ElderlyProfile).filter(
-            ElderlyProfile.user_id == user_id
-        ).first()
-        
-        if not elderly:
-            user = db.query(User).filter(
-                User.username.like(f"%{user_id}%")
-            ).first()
-            if user:
-                elderly = db.query(ElderlyProfile).filter(
-                    ElderlyProfile.user_id == user.id
-                ).first()
+        elderly = await find_elderly_by_user(db, user_id)
         
         if not elderly:
             return get_default_chart_data()
         
         # 获取历史健康记录
         start_date = datetime.now() - timedelta(days=days)
-        records = db.query(HealthRecord).filter(
-            HealthRecord.elderly_id == elderly.id,
-            HealthRecord.recorded_at >= start_date
-        ).order_by(HealthRecord.recorded_at).all()
+        health_repo = AsyncHealthRepository(db)
+        records = await health_repo.get_records_since(elderly.id, start_date)
         
         # 获取睡眠数据
-        sleep_records = db.query(SleepData).filter(
-            SleepData.elderly_id == elderly.id,
-            SleepData.date >= start_date.date()
-        ).order_by(SleepData.date).all()
+        sleep_records = await health_repo.get_sleep_records_since(elderly.id, start_date.date())
         
         # 处理心率数据
         heart_rate_data = []
@@ -275,8 +243,7 @@ async def get_chart_data(
 
 @router.get("/visualization")
 async def get_visualization_data(
-    user_id: str = Query(..., description="用户ID"),
-    db: Session = Depends(get_db)
+    user_id: str = Query(..., description="用户ID")
 ):
     """获取可视化数据"""
     return {
@@ -308,6 +275,22 @@ async def get_visualization_data(
 # 辅助函数
 # ============================================================================
 
+async def find_elderly_by_user(db: AsyncSession, user_id: str) -> Optional[ElderlyProfile]:
+    """按用户ID查找老人档案，找不到时按用户名匹配"""
+    elderly_repo = AsyncElderlyRepository(db)
+    elderly = None
+    try:
+        elderly = await elderly_repo.get_by_user_id(uuid.UUID(user_id))
+    except ValueError:
+        pass
+    
+    if not elderly:
+        user = await AsyncUserRepository(db).find_by_username(user_id)
+        if user:
+            elderly = await elderly_repo.get_by_user_id(user.id)
+    return elderly
+
+
 def get_default_health_data():
     """返回默认健康数据"""
     return {
@@ -13,12 +13,15 @@
   - 体温传感器
 """
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from datetime import datetime
 import logging
 
+from services.iot_ingestion_service import iot_ingestion_pipeline, IngestionBackpressureError
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/iot", tags=["IoT设备"])
@@ -75,11 +78,13 @@ class BatchVitalSigns(BaseModel):
 
 # 导入数据采集器（延迟导入避免循环依赖）
 _data_collector = None
+_data_collector_loaded = False  # 只尝试加载一次，避免每批数据都重复导入
 
 def get_data_collector():
     """获取数据采集器实例（延迟初始化）"""
-    global _data_collector
-    if _data_collector is None:
+    global _data_collector, _data_collector_loaded
+    if not _data_collector_loaded:
+        _data_collector_loaded = True
         try:
             import sys
             sys.path.insert(0, 'frontend/health_assessment_system')
@@ -87,141 +92,112 @@ def get_data_collector():
             _data_collector = DataCollector()
             logger.info("✅ IoT 数据已接入数据清洗流水线")
         except ImportError as e:
-            logger.warning(f"数据清洗流水线未加载: {e}，使用内存缓存")
+            logger.warning(f"数据清洗流水线未加载: {e}，数据仅写入健康记录")
             _data_collector = None
     return _data_collector
 
 
-# 内存缓存（用于快速查询，同时作为流水线的备份）
-_vital_signs_cache: List[dict] = []
-_blood_pressure_cache: List[dict] = []
-_temperature_cache: List[dict] = []
-
-MAX_CACHE_SIZE = 1000  # 最大缓存条数
-
-# 设备绑定表（device_id -> user_id）
-_device_user_mapping: dict = {
-    # 示例：STM32_MAX30102_001 绑定到 elderly_001
-    # 实际应从数据库加载
-}
-
-
-def bind_device(device_id: str, user_id: str):
-    """绑定设备到用户"""
-    _device_user_mapping[device_id] = user_id
-    logger.info(f"🔗 设备 {device_id} 已绑定到用户 {user_id}")
-
-
-def get_user_by_device(device_id: str) -> Optional[str]:
-    """根据设备ID获取用户ID"""
-    return _device_user_mapping.get(device_id)
-
-
-def store_vital_sign(data: dict):
+def forward_to_data_collector(batch: List[Tuple[str, dict]]):
     """
-    存储生命体征数据
+    将已写库的一批数据接入数据清洗流水线（在写入线程中调用）
     
-    数据流：IoT设备 → 内存缓存 + 数据清洗流水线
+    数据流：IoT设备 → 写入队列 → HealthRecord + 数据清洗流水线
     """
-    global _vital_signs_cache
+    collector = get_data_collector()
+    if not collector:
+        return
     
-    # 1. 存入内存缓存（快速查询）
-    _vital_signs_cache.append(data)
-    if len(_vital_signs_cache) > MAX_CACHE_SIZE:
-        _vital_signs_cache = _vital_signs_cache[-MAX_CACHE_SIZE:]
+    from core.data_pipeline import DataSource
     
-    # 2. 接入数据清洗流水线
-    collector = get_data_collector()
-    if collector:
+    for kind, data in batch:
         try:
             # 尝试根据设备ID查找用户
             user_id = data.get('user_id') or get_user_by_device(data.get('device_id', ''))
             if not user_id:
                 user_id = 'unknown_user'  # 未绑定设备暂存
+            timestamp = datetime.fromtimestamp(data.get('timestamp') or datetime.now().timestamp())
             
-            # 心率数据
-            if data.get('heart_rate'):
-                from core.data_pipeline import DataSource
-                success, record, error = collector.collect_single(
-                    user_id=user_id,
-                    data_type='heart_rate',
-                    values={'value': data['heart_rate']},
-                    source=DataSource.SENSOR,
-                    timestamp=datetime.fromtimestamp(data.get('timestamp', datetime.now().timestamp())),
-                    device_id=data.get('device_id')
-                )
-                if success:
-                    logger.debug(f"✅ 心率数据已进入清洗流水线: {record.record_id}")
-                else:
-                    logger.warning(f"⚠️ 心率数据校验失败: {error}")
+            if kind == 'vitals':
+                # 心率数据
+                if data.get('heart_rate'):
+                    success, record, error = collector.collect_single(
+                        user_id=user_id,
+                        data_type='heart_rate',
+                        values={'value': data['heart_rate']},
+                        source=DataSource.SENSOR,
+                        timestamp=timestamp,
+                        device_id=data.get('device_id')
+                    )
+                    if not success:
+                        logger.warning(f"⚠️ 心率数据校验失败: {error}")
+                
+                # 血氧数据
+                if data.get('spo2'):
+                    collector.collect_single(
+                        user_id=user_id,
+                        data_type='spo2',
+                        values={'value': data['spo2']},
+                        source=DataSource.SENSOR,
+                        timestamp=timestamp,
+                        device_id=data.get('device_id')
+                    )
             
-            # 血氧数据
-            if data.get('spo2'):
-                from core.data_pipeline import DataSource
+            elif kind == 'blood_pressure':
                 success, record, error = collector.collect_single(
                     user_id=user_id,
-                    data_type='spo2',
-                    values={'value': data['spo2']},
+                    data_type='blood_pressure',
+                    values={
+                        'systolic': data['systolic'],
+                        'diastolic': data['diastolic'],
+                        'pulse': data.get('pulse')
+                    },
                     source=DataSource.SENSOR,
-                    timestamp=datetime.fromtimestamp(data.get('timestamp', datetime.now().timestamp())),
+                    timestamp=timestamp,
                     device_id=data.get('device_id')
                 )
-                if success:
-                    logger.debug(f"✅ 血氧数据已进入清洗流水线: {record.record_id}")
-                    
+                if not success:
+                    logger.warning(f"⚠️ 血压数据校验失败: {error}")
+        
         except Exception as e:
             logger.error(f"数据清洗流水线处理失败: {e}")
-    
-    logger.info(f"💓 收到心率数据: HR={data.get('heart_rate')} SpO2={data.get('spo2')} from {data.get('device_id')}")
 
 
-def store_blood_pressure(data: dict):
-    """
-    存储血压数据
-    
-    数据流：IoT设备 → 内存缓存 + 数据清洗流水线
-    """
-    global _blood_pressure_cache
-    
-    # 1. 存入内存缓存
-    _blood_pressure_cache.append(data)
-    if len(_blood_pressure_cache) > MAX_CACHE_SIZE:
-        _blood_pressure_cache = _blood_pressure_cache[-MAX_CACHE_SIZE:]
-    
-    # 2. 接入数据清洗流水线
-    collector = get_data_collector()
-    if collector:
-        try:
-            user_id = data.get('user_id') or get_user_by_device(data.get('device_id', '')) or 'unknown_user'
-            
-            from core.data_pipeline import DataSource
-            success, record, error = collector.collect_single(
-                user_id=user_id,
-                data_type='blood_pressure',
-                values={
-                    'systolic': data['systolic'],
-                    'diastolic': data['diastolic'],
-                    'pulse': data.get('pulse')
-                },
-                source=DataSource.SENSOR,
-                timestamp=datetime.fromtimestamp(data.get('timestamp', datetime.now().timestamp())),
-                device_id=data.get('device_id')
-            )
-            if success:
-                logger.debug(f"✅ 血压数据已进入清洗流水线: {record.record_id}")
-            else:
-                logger.warning(f"⚠️ 血压数据校验失败: {error}")
-                
-        except Exception as e:
-            logger.error(f"数据清洗流水线处理失败: {e}")
-    
-    logger.info(f"🩸 收到血压数据: {data.get('systolic')}/{data.get('diastolic')} from {data.get('device_id')}")
+# 写入流水线：环形缓冲（最新值）→ 有界队列 → 微批写入 HealthRecord
+iot_ingestion_pipeline.on_batch = forward_to_data_collector
+
+
+def bind_device(device_id: str, user_id: str):
+    """绑定设备到用户（写入数据库，同步）"""
+    binding = iot_ingestion_pipeline.bindings.bind(device_id, user_id)
+    if binding is None:
+        raise RuntimeError(f"设备 {device_id} 绑定失败")
+    logger.info(f"🔗 设备 {device_id} 已绑定到用户 {user_id}")
+    return binding
+
+
+def get_user_by_device(device_id: str) -> Optional[str]:
+    """根据设备ID获取用户ID（带缓存，同步）"""
+    user_id, _ = iot_ingestion_pipeline.bindings.get(device_id)
+    return user_id
+
+
+async def _submit(kind: str, records: List[dict]):
+    """提交到写入队列，队列满时返回 503 让设备稍后重试"""
+    try:
+        await iot_ingestion_pipeline.submit_many(kind, records)
+    except IngestionBackpressureError as e:
+        logger.warning(f"IoT 写入背压: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="服务繁忙，请稍后重试",
+            headers={"Retry-After": "1"}
+        )
 
 
 # ============== API 路由 ==============
 
 @router.post("/vitals/upload", summary="上传生命体征数据")
-async def upload_vitals(data: VitalSign, background_tasks: BackgroundTasks):
+async def upload_vitals(data: VitalSign):
     """
     接收 STM32 + MAX30102 上传的心率/血氧数据
     
@@ -241,8 +217,9 @@ async def upload_vitals(data: VitalSign, background_tasks: BackgroundTasks):
             record["timestamp"] = int(datetime.now().timestamp())
         record["received_at"] = datetime.now().isoformat()
         
-        # 异步存储（不阻塞响应）
-        background_tasks.add_task(store_vital_sign, record)
+        # 进入写入队列（由后台任务批量写库，不阻塞响应）
+        await _submit("vitals", [record])
+        logger.debug(f"💓 收到心率数据: HR={data.heart_rate} SpO2={data.spo2} from {data.device_id}")
         
         # 心率异常检测
         alert = None
@@ -260,24 +237,30 @@ async def upload_vitals(data: VitalSign, background_tasks: BackgroundTasks):
             "alert": alert
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"数据存储失败: {e}")
         raise HTTPException(status_code=500, detail=f"存储失败: {str(e)}")
 
 
 @router.post("/vitals/batch", summary="批量上传生命体征数据")
-async def upload_vitals_batch(data: BatchVitalSigns, background_tasks: BackgroundTasks):
+async def upload_vitals_batch(data: BatchVitalSigns):
     """
     批量上传数据（适用于 STM32 网络不稳定时缓存后批量发送）
     """
-    count = 0
+    received_at = datetime.now().isoformat()
+    records = []
     for record in data.records:
         record_dict = record.model_dump()
         record_dict["device_id"] = data.device_id
         record_dict["user_id"] = data.user_id
-        record_dict["received_at"] = datetime.now().isoformat()
-        background_tasks.add_task(store_vital_sign, record_dict)
-        count += 1
+        record_dict["received_at"] = received_at
+        records.append(record_dict)
+    count = len(records)
+    
+    # 整批进入写入队列（队列容量不足时整批拒绝，设备可原样重发）
+    await _submit("vitals", records)
     
     return {
         "status": "success",
@@ -287,14 +270,15 @@ async def upload_vitals_batch(data: BatchVitalSigns, background_tasks: Backgroun
 
 
 @router.post("/blood-pressure/upload", summary="上传血压数据")
-async def upload_blood_pressure(data: BloodPressureData, background_tasks: BackgroundTasks):
+async def upload_blood_pressure(data: BloodPressureData):
     """接收血压计模块上传的血压数据"""
     record = data.model_dump()
     if not record.get("timestamp"):
         record["timestamp"] = int(datetime.now().timestamp())
     record["received_at"] = datetime.now().isoformat()
     
-    background_tasks.add_task(store_blood_pressure, record)
+    await _submit("blood_pressure", [record])
+    logger.debug(f"🩸 收到血压数据: {data.systolic}/{data.diastolic} from {data.device_id}")
     
     # 血压异常检测
     alert = None
@@ -312,23 +296,20 @@ async def upload_blood_pressure(data: BloodPressureData, background_tasks: Backg
 
 @router.get("/vitals/latest", summary="获取最新生命体征")
 async def get_latest_vitals(device_id: Optional[str] = None, limit: int = 10):
-    """获取最新的生命体征数据"""
-    records = _vital_signs_cache
-    if device_id:
-        records = [r for r in records if r.get("device_id") == device_id]
+    """获取最新的生命体征数据（来自各设备的环形缓冲，不访问数据库）"""
+    records = iot_ingestion_pipeline.ring("vitals").latest(device_id, limit)
     return {
-        "count": len(records[-limit:]),
-        "records": records[-limit:]
+        "count": len(records),
+        "records": records
     }
 
 
 @router.get("/devices/status", summary="获取设备状态")
 async def get_device_status():
     """获取所有已连接设备的状态"""
-    # 统计各设备最后一次上传时间
+    # 各设备最后一次上传的数据
     devices = {}
-    for record in _vital_signs_cache:
-        device_id = record.get("device_id")
+    for device_id, record in iot_ingestion_pipeline.ring("vitals").last_per_device().items():
         if device_id:
             devices[device_id] = {
                 "last_seen": record.get("received_at"),
@@ -355,9 +336,13 @@ async def bind_device_to_user(data: DeviceBindRequest):
     """
     将 IoT 设备绑定到指定用户
     
-    绑定后，该设备上传的数据会自动关联到用户，进入数据清洗流水线
+    绑定后，该设备上传的数据会自动关联到用户，写入健康记录并进入数据清洗流水线
     """
-    bind_device(data.device_id, data.user_id)
+    try:
+        await run_in_threadpool(bind_device, data.device_id, data.user_id)
+    except Exception as e:
+        logger.error(f"设备绑定失败: {e}")
+        raise HTTPException(status_code=500, detail=f"绑定失败: {str(e)}")
     return {
         "status": "success",
         "message": f"设备 {data.device_id} 已绑定到用户 {data.user_id}",
@@ -369,16 +354,18 @@ async def bind_device_to_user(data: DeviceBindRequest):
 @router.get("/devices/bindings", summary="获取设备绑定列表")
 async def get_device_bindings():
     """获取所有设备与用户的绑定关系"""
+    bindings = await run_in_threadpool(iot_ingestion_pipeline.bindings.list_bindings)
     return {
-        "count": len(_device_user_mapping),
-        "bindings": _device_user_mapping
+        "count": len(bindings),
+        "bindings": bindings
     }
 
 
 @router.get("/pipeline/status", summary="获取数据流水线状态")
 async def get_pipeline_status():
-    """查看数据清洗流水线的运行状态"""
+    """查看写入流水线和数据清洗流水线的运行状态"""
     collector = get_data_collector()
+    ingestion = iot_ingestion_pipeline.get_stats()
     
     if collector:
         buffer_size = len(collector._buffer) if hasattr(collector, '_buffer') else 0
@@ -386,17 +373,14 @@ async def get_pipeline_status():
             "status": "connected",
             "message": "IoT 数据已接入数据清洗流水线",
             "buffer_size": buffer_size,
-            "supported_types": list(collector.DATA_SCHEMAS.keys())
+            "supported_types": list(collector.DATA_SCHEMAS.keys()),
+            "ingestion": ingestion
         }
     else:
         return {
             "status": "disconnected",
-            "message": "数据清洗流水线未加载，使用内存缓存",
-            "cache_sizes": {
-                "vital_signs": len(_vital_signs_cache),
-                "blood_pressure": len(_blood_pressure_cache),
-                "temperature": len(_temperature_cache)
-            }
+            "message": "数据清洗流水线未加载，数据直接写入健康记录",
+            "ingestion": ingestion
         }
 
 
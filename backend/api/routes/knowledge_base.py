@@ -118,7 +118,7 @@ async def search_knowledge_base(query: str, top_k: int = 5):
     搜索知识库
     """
     try:
-        results = knowledge_base.search(query, top_k=top_k)
+        results = await knowledge_base.asearch(query, top_k=top_k)
         
         return {
             "status": "success",
@@ -3,12 +3,18 @@
 支持：实时转写、自动VAD、流式TTS、打断
 """
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, status
+from typing import Optional
 import asyncio
 import json
 import logging
+import uuid
 
+from database.database import get_async_db
+from dependencies.get_current_user import get_current_user_async
+from repositories.elderly_repository import AsyncElderlyRepository
 from services.realtime_voice_service import realtime_voice_service
+from services.reminder_scheduler import reminder_scheduler
 
 logger = logging.getLogger(__name__)
 
@@ -45,11 +51,26 @@ class ConnectionManager:
 manager = ConnectionManager()
 
 
+async def _authenticate_elderly(token: str) -> Optional[uuid.UUID]:
+    """验证连接令牌，返回用户的老人档案ID（非老人用户返回 None）"""
+    dependency = get_async_db()
+    db = await dependency.__anext__()
+    try:
+        user = await get_current_user_async(token=token, db=db)
+        profile = await AsyncElderlyRepository(db).get_by_user_id(user.id)
+        return profile.id if profile is not None else None
+    finally:
+        await dependency.aclose()
+
+
 @router.websocket("/ws/voice")
-async def voice_websocket(websocket: WebSocket):
+async def voice_websocket(websocket: WebSocket, token: Optional[str] = None):
     """
     实时语音 WebSocket 端点
     
+    查询参数 token 为登录令牌：老人用户携带令牌连接时接收本人的提醒推送
+    （离线期间的提醒在连接后补发），不携带令牌只能使用语音功能。
+    
     客户端消息格式:
     - {"action": "start_listening"} - 开始监听（自动VAD）
     - {"action": "stop_listening"} - 停止监听
@@ -69,8 +90,19 @@ async def voice_websocket(websocket: WebSocket):
     - {"type": "tts_interrupted"} - 播放被打断
     - {"type": "error", "message": "..."} - 错误
     - {"type": "status", ...} - 状态信息
+    - {"type": "reminder", "reminders": [...], "text": "..."} - 提醒（仅推送给令牌对应的老人）
     """
+    elderly_id = None
+    if token:
+        try:
+            elderly_id = await _authenticate_elderly(token)
+        except HTTPException as e:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e.detail))
+            return
+    
     await manager.connect(websocket)
+    if elderly_id is not None:
+        await reminder_scheduler.connect(elderly_id, websocket.send_json)
     
     # 消息推送任务
     async def push_messages():
@@ -154,6 +186,8 @@ async def voice_websocket(websocket: WebSocket):
         logger.error(f"WebSocket 错误: {e}")
     finally:
         push_task.cancel()
+        if elderly_id is not None:
+            reminder_scheduler.disconnect(elderly_id, websocket.send_json)
         manager.disconnect(websocket)
         realtime_voice_service.stop_listening()
         realtime_voice_service.stop_speaking()
@@ -42,15 +42,13 @@ async def stream_voice_websocket(websocket: WebSocket):
     await websocket.accept()
     logger.info("流式语音 WebSocket 已连接")
     
-    # 音频缓冲区
-    audio_buffer = b""
     is_recording = False
     is_speaking = False
     tts_task = None
     
-    # 初始化 ASR 模型
-    if HAS_FASTER_WHISPER:
-        streaming_asr_service.init_model()
+    # 初始化 ASR 模型（加载较慢，放到线程中执行）
+    if HAS_FASTER_WHISPER and not streaming_asr_service.is_initialized:
+        await asyncio.to_thread(streaming_asr_service.init_model)
     
     async def send_json(data: dict):
         try:
@@ -58,20 +56,11 @@ async def stream_voice_websocket(websocket: WebSocket):
         except Exception as e:
             logger.error(f"发送消息失败: {e}")
     
-    async def process_audio_buffer():
-        """处理音频缓冲区"""
-        nonlocal audio_buffer
-        
-        if len(audio_buffer) < 32000:  # 至少1秒数据 (16000Hz * 2bytes)
-            return
-            
-        # 识别
-        text = streaming_asr_service.transcribe_audio(audio_buffer)
-        if text:
-            await send_json({"type": "partial", "text": text})
-        
-        # 保留最后0.5秒作为上下文
-        audio_buffer = audio_buffer[-16000:]
+    async def send_partial(text: str):
+        await send_json({"type": "partial", "text": text})
+    
+    # 增量识别器：音频写入环形缓冲，识别在专用线程池中进行，部分结果异步推送
+    recognizer = streaming_asr_service.create_recognizer(on_partial=send_partial)
     
     async def tts_stream(text: str):
         """流式TTS"""
@@ -140,7 +129,7 @@ async def stream_voice_websocket(websocket: WebSocket):
                 if msg_type == "start":
                     # 开始录音
                     is_recording = True
-                    audio_buffer = b""
+                    recognizer.reset()
                     await send_json({"type": "status", "recording": True})
                     logger.info("开始接收音频流")
                     
@@ -148,12 +137,11 @@ async def stream_voice_websocket(websocket: WebSocket):
                     # 停止录音，处理最后的音频
                     is_recording = False
                     
-                    if len(audio_buffer) > 8000:  # 至少0.25秒
-                        text = streaming_asr_service.transcribe_audio(audio_buffer)
-                        if text:
-                            await send_json({"type": "final", "text": text})
+                    text = await recognizer.finish()
+                    if text:
+                        await send_json({"type": "final", "text": text})
                     
-                    audio_buffer = b""
+                    recognizer.reset()
                     await send_json({"type": "status", "recording": False})
                     logger.info("停止接收音频流")
                     
@@ -161,10 +149,9 @@ async def stream_voice_websocket(websocket: WebSocket):
                     # 接收音频数据
                     if is_recording:
                         audio_data = base64.b64decode(data.get("data", ""))
-                        audio_buffer += audio_data
                         
-                        # 实时处理
-                        await process_audio_buffer()
+                        # 写入缓冲，按需在后台识别（不阻塞接收）
+                        recognizer.feed(audio_data)
                         
                 elif msg_type == "speak":
                     # TTS播放
@@ -183,8 +170,7 @@ async def stream_voice_websocket(websocket: WebSocket):
             elif "bytes" in message:
                 # 直接接收二进制音频数据
                 if is_recording:
-                    audio_buffer += message["bytes"]
-                    await process_audio_buffer()
+                    recognizer.feed(message["bytes"])
                     
     except WebSocketDisconnect:
         logger.info("WebSocket 断开")
@@ -193,6 +179,7 @@ async def stream_voice_websocket(websocket: WebSocket):
     finally:
         is_recording = False
         is_speaking = False
+        recognizer.reset()
         logger.info("流式语音 WebSocket 已关闭")
 
 
@@ -204,4 +191,5 @@ async def get_streaming_status():
         "asr_available": HAS_FASTER_WHISPER,
         "model_initialized": streaming_asr_service.is_initialized,
         "model_size": streaming_asr_service.model_size,
+        **streaming_asr_service.get_stats(),
     }
@@ -9,6 +9,7 @@ import os
 
 from services.voice_service import voice_service
 from api.auth import get_current_active_user
+from dependencies.get_current_user import get_admin_user
 from database.models import User
 
 logger = logging.getLogger(__name__)
@@ -166,10 +167,11 @@ async def get_audio(audio_id: str):
     获取音频文件
     
     根据音频ID返回音频文件，支持流式传输。
+    音频ID由文本和语音参数决定，内容不会变化，允许浏览器缓存。
     """
-    audio_path = Path(f"./audio_cache/{audio_id}.mp3")
+    audio_path = voice_service.tts_cache.get_path(audio_id)
     
-    if not audio_path.exists():
+    if audio_path is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="音频文件不存在或已过期"
@@ -178,7 +180,8 @@ async def get_audio(audio_id: str):
     return FileResponse(
         path=str(audio_path),
         media_type="audio/mpeg",
-        filename=f"{audio_id}.mp3"
+        filename=f"{audio_id}.mp3",
+        headers={"Cache-Control": "public, max-age=86400"}
     )
 
 
@@ -255,13 +258,15 @@ async def asr_status():
 @router.delete("/audio/{audio_id}")
 async def delete_audio(
     audio_id: str,
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_admin_user)
 ):
-    """删除音频文件"""
-    audio_path = Path(f"./audio_cache/{audio_id}.mp3")
-    
-    if audio_path.exists():
-        audio_path.unlink()
+    """删除音频文件（管理员功能；音频按内容缓存、所有用户共用，预合成的固定音频不能删除）"""
+    if voice_service.tts_cache.is_pinned(audio_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="预合成的固定音频不能删除"
+        )
+    if voice_service.tts_cache.remove(audio_id):
         return {"status": "success", "message": "音频已删除"}
     
     return {"status": "success", "message": "音频不存在"}
@@ -274,3 +279,9 @@ async def cleanup_audio(
     """清理过期音频文件（管理员功能）"""
     voice_service.cleanup_old_audio(max_age_hours=24)
     return {"status": "success", "message": "清理完成"}
+
+
+@router.get("/tts/cache-stats")
+async def tts_cache_stats():
+    """TTS 音频缓存统计（命中率、容量、实际合成次数）"""
+    return {"status": "success", "data": voice_service.get_cache_stats()}
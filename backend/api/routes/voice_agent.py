@@ -4,15 +4,19 @@
 
 提供语音与多Agent系统集成的接口：
 - 语音对话（ASR + 多Agent + TTS）
+- 流式语音对话（边生成边播报，支持打断）
 - 语音情感分析
 - 唤醒词检测
 - 适老化语音设置
 """
 
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, status
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, WebSocket, WebSocketDisconnect, status
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 from typing import Optional
+import asyncio
+import base64
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -116,13 +120,12 @@ async def text_command(request: TextCommandRequest):
                 result["automation_scene"] = matched_scene.name
                 result["frontend_events"] = scene_result.get("frontend_events", [])
                 
-                # 生成TTS
+                # 生成TTS（场景播报为固定内容，不随情感调整，命中预合成的缓存）
                 if result["response"]:
                     try:
                         from services.voice_service import voice_service
                         voice_params = voice_agent_service.voice_settings.get_voice_settings(
-                            style=request.voice_style,
-                            emotion=emotion
+                            style=request.voice_style
                         )
                         audio_id, _ = await voice_service.text_to_speech(
                             result["response"],
@@ -160,7 +163,8 @@ async def text_command(request: TextCommandRequest):
             # 非控制命令，走多Agent
             try:
                 from services.agents.multi_agent_service import multi_agent_service
-                agent_result = multi_agent_service.process(
+                agent_result = await asyncio.to_thread(
+                    multi_agent_service.process,
                     user_input=text,
                     user_id="default",
                     user_role=request.user_role,
@@ -260,6 +264,141 @@ async def voice_dialog(
         )
 
 
+@router.websocket("/ws/dialog")
+async def voice_dialog_websocket(websocket: WebSocket):
+    """
+    流式语音对话 WebSocket 端点
+    
+    回复边生成边逐句合成，第一句生成后即开始推送音频；用户开口说话时可打断播报。
+    
+    客户端消息格式:
+    - {"type": "start", "user_id": "...", "user_role": "...", "voice_style": "...", "require_wake_word": false}
+      设置会话参数（可选）
+    - 二进制消息 - 一句话的音频数据（可分多块发送）；正在播报时收到音频视为打断
+    - {"type": "audio_end"} - 音频发送完毕，开始识别并回复
+    - {"type": "text", "text": "..."} - 直接发送文本（浏览器端语音识别的结果）
+    - {"type": "barge_in"} - 打断当前播报
+    
+    服务端消息格式:
+    - {"type": "recognized", "text": "..."} - 识别的文本
+    - {"type": "sentence", "index": 0, "text": "..."} - 开始播报一句（字幕）
+    - {"type": "tts_audio", "index": 0, "data": "<base64 MP3>"} - 音频数据，按顺序播放
+    - {"type": "reply_done", "interrupted": false, ...} - 回复结束，附带与 /dialog 相同的结果字段
+    - {"type": "tts_stopped"} - 播报已被打断
+    - {"type": "error", "message": "..."} - 错误
+    """
+    await websocket.accept()
+    
+    session = {
+        "user_id": "default",
+        "user_role": "elderly",
+        "voice_style": "default",
+        "require_wake_word": False,
+    }
+    audio_buffer = bytearray()
+    reply_task: Optional[asyncio.Task] = None
+    cancel_event: Optional[asyncio.Event] = None
+    
+    async def send_json(data: dict):
+        try:
+            await websocket.send_json(data)
+        except Exception as e:
+            logger.error(f"发送消息失败: {e}")
+    
+    async def reply(audio_data: Optional[bytes], text: Optional[str], cancel: asyncio.Event):
+        try:
+            async for event in voice_agent_service.process_voice_input_stream(
+                audio_data=audio_data,
+                text=text,
+                cancel_event=cancel,
+                **session
+            ):
+                if event["type"] == "audio":
+                    await send_json({
+                        "type": "tts_audio",
+                        "index": event["index"],
+                        "data": base64.b64encode(event["data"]).decode()
+                    })
+                elif event["type"] == "done":
+                    result = dict(event["result"])
+                    result.pop("audio_url", None)
+                    await send_json({"type": "reply_done", "interrupted": event["interrupted"], **result})
+                else:
+                    await send_json(event)
+        except Exception as e:
+            logger.error(f"流式语音对话处理失败: {e}", exc_info=True)
+            await send_json({"type": "error", "message": str(e)})
+    
+    async def interrupt():
+        """打断正在进行的回复"""
+        if reply_task is not None and not reply_task.done():
+            cancel_event.set()
+            await reply_task
+            await send_json({"type": "tts_stopped"})
+    
+    async def start_reply(audio_data: Optional[bytes] = None, text: Optional[str] = None):
+        nonlocal reply_task, cancel_event
+        await interrupt()
+        cancel_event = asyncio.Event()
+        reply_task = asyncio.create_task(reply(audio_data, text, cancel_event))
+    
+    if not HAS_SERVICE:
+        await send_json({"type": "error", "message": "语音智能体服务不可用"})
+        await websocket.close()
+        return
+    
+    try:
+        while True:
+            message = await websocket.receive()
+            
+            if message["type"] == "websocket.disconnect":
+                break
+            
+            if message.get("bytes") is not None:
+                # 用户开口说话时打断播报
+                if not audio_buffer:
+                    await interrupt()
+                audio_buffer.extend(message["bytes"])
+                continue
+            
+            if message.get("text") is None:
+                continue
+            
+            data = json.loads(message["text"])
+            msg_type = data.get("type")
+            
+            if msg_type == "start":
+                for key in session:
+                    if key in data:
+                        session[key] = data[key]
+                audio_buffer.clear()
+                
+            elif msg_type == "audio_end":
+                audio_data = bytes(audio_buffer)
+                audio_buffer.clear()
+                if len(audio_data) < 1000:
+                    await send_json({"type": "error", "message": "音频数据太短"})
+                    continue
+                await start_reply(audio_data=audio_data)
+                
+            elif msg_type == "text":
+                text = (data.get("text") or "").strip()
+                if text:
+                    await start_reply(text=text)
+                    
+            elif msg_type == "barge_in":
+                await interrupt()
+                
+    except WebSocketDisconnect:
+        logger.info("流式语音对话 WebSocket 断开")
+    except Exception as e:
+        logger.error(f"流式语音对话 WebSocket 错误: {e}")
+    finally:
+        if reply_task is not None and not reply_task.done():
+            cancel_event.set()
+            reply_task.cancel()
+
+
 @router.post("/tts/emotional")
 async def emotional_tts(request: TextToSpeechRequest):
     """
@@ -19,14 +19,39 @@ class Settings(BaseSettings):
     
     # 数据库配置
     DATABASE_URL: str = Field(..., description="数据库连接URL")
+    # 异步数据库连接URL（asyncpg），为空时由 DATABASE_URL 推导
+    DATABASE_ASYNC_URL: Optional[str] = Field(default=None, description="异步数据库连接URL")
     
     # Redis配置
     REDIS_URL: str = Field(default="redis://localhost:6379/0")
     
+    # 会话存储配置（对话历史、用户档案、多轮对话状态）
+    SESSION_STORE_BACKEND: str = Field(default="redis", description="会话存储后端: redis（不可用时降级到内存）, memory")
+    SESSION_STORE_MAX_MB: int = Field(default=256, description="每类会话数据在进程内存中的上限（MB），超过后按LRU淘汰")
+    
+    # 最新生命体征快照的进程内读缓存有效期（秒），0 表示关闭
+    LATEST_VITALS_CACHE_SECONDS: float = Field(default=2.0)
+    
+    # 健康记录存储：按月分区（仅 PostgreSQL，首次建表时生效）与原始记录保留天数（0 表示永久保留）
+    HEALTH_RECORDS_PARTITIONED: bool = Field(default=False)
+    HEALTH_RECORD_RETENTION_DAYS: int = Field(default=0, description="超过天数的原始记录汇总为日汇总后删除")
+    # 个人基线窗口天数：写入健康记录时增量更新 health_baselines，0 表示关闭
+    HEALTH_BASELINE_DAYS: int = Field(default=90)
+    # 在线变点检测：写入健康记录时按日均值更新检测器，检测到变点时写入预警
+    CHANGE_POINT_DETECTION_ENABLED: bool = Field(default=True)
+    
+    # 提醒调度：提前加载未来多少秒内到期的提醒到内存时间轮；到期后是否在本机语音播报
+    REMINDER_SCHEDULER_ENABLED: bool = Field(default=True)
+    REMINDER_HORIZON_SECONDS: int = Field(default=600)
+    REMINDER_SPEAK: bool = Field(default=False, description="到期提醒通过本机 TTS 播报（单机终端部署时开启）")
+    
     # 认证配置
     SECRET_KEY: str = Field(..., description="JWT密钥")
     ALGORITHM: str = Field(default="HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(default=60)
+    # 认证结果缓存（按令牌），有效期（秒）内不再查询用户，0 表示关闭
+    AUTH_CACHE_SECONDS: float = Field(default=30.0)
+    AUTH_CACHE_MAX_ENTRIES: int = Field(default=10000)
     
     # CORS配置
     BACKEND_CORS_ORIGINS: List[str] = Field(default=["*"])
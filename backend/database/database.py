@@ -2,13 +2,23 @@
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from typing import Any, AsyncGenerator, Generator, Optional
 import logging
 
+from starlette.concurrency import run_in_threadpool
+
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# 异步数据库依赖（sqlalchemy[asyncio] + asyncpg/aiosqlite），不可用时退回线程池中的同步会话
+try:
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+    HAS_ASYNC_DB = True
+except ImportError:
+    HAS_ASYNC_DB = False
+    AsyncSession = Any
+
 # 创建数据库引擎
 engine = create_engine(
     settings.DATABASE_URL,
@@ -25,6 +35,51 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def _async_database_url(url: str) -> Optional[str]:
+    """由同步连接URL推导异步驱动的URL"""
+    if settings.DATABASE_ASYNC_URL:
+        return settings.DATABASE_ASYNC_URL
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return None
+
+
+def _create_async_engine():
+    """创建异步引擎，驱动不可用时返回 None"""
+    if not HAS_ASYNC_DB:
+        logger.warning("未安装 sqlalchemy[asyncio]，异步路由将使用线程池中的同步会话")
+        return None
+    url = _async_database_url(settings.DATABASE_URL)
+    if url is None:
+        logger.warning("无法从 DATABASE_URL 推导异步连接URL，异步路由将使用线程池中的同步会话")
+        return None
+    try:
+        if url.startswith("sqlite"):
+            return create_async_engine(url)
+        return create_async_engine(
+            url,
+            pool_pre_ping=True,
+            pool_size=10,
+            max_overflow=20,
+            pool_recycle=3600,
+        )
+    except ImportError as e:
+        logger.warning(f"异步数据库驱动不可用，异步路由将使用线程池中的同步会话: {e}")
+        return None
+
+
+# 异步引擎和会话工厂（与同步引擎各自维护连接池）
+async_engine = _create_async_engine()
+# 提交后不过期对象：异步会话中访问过期属性会触发隐式 IO
+AsyncSessionLocal = (
+    async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+    if async_engine is not None else None
+)
+
+
 def get_db() -> Generator[Session, None, None]:
     """获取数据库会话的依赖项"""
     db = SessionLocal()
@@ -37,6 +92,160 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+class ThreadPoolSession:
+    """异步驱动不可用时代替 AsyncSession 的同步会话包装
+
+    提供异步路由和 AsyncXxxRepository 用到的 AsyncSession 方法，
+    每次数据库操作在线程池中执行，不阻塞事件循环。
+    """
+
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    def add(self, instance: Any) -> None:
+        self.sync_session.add(instance)
+
+    def add_all(self, instances: Any) -> None:
+        self.sync_session.add_all(instances)
+
+    async def execute(self, statement: Any, *args: Any, **kwargs: Any) -> Any:
+        return await run_in_threadpool(self.sync_session.execute, statement, *args, **kwargs)
+
+    async def scalar(self, statement: Any, *args: Any, **kwargs: Any) -> Any:
+        return await run_in_threadpool(self.sync_session.scalar, statement, *args, **kwargs)
+
+    async def get(self, entity: Any, ident: Any, **kwargs: Any) -> Any:
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kwargs)
+
+    async def merge(self, instance: Any, load: bool = True) -> Any:
+        return await run_in_threadpool(self.sync_session.merge, instance, load=load)
+
+    async def delete(self, instance: Any) -> None:
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def refresh(self, instance: Any, attribute_names: Any = None) -> None:
+        await run_in_threadpool(self.sync_session.refresh, instance, attribute_names)
+
+    async def flush(self) -> None:
+        await run_in_threadpool(self.sync_session.flush)
+
+    async def commit(self) -> None:
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self) -> None:
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def close(self) -> None:
+        await run_in_threadpool(self.sync_session.close)
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """获取异步数据库会话的依赖项
+
+    查询在事件循环中等待 IO，不会阻塞同一 worker 上的其他请求和 WebSocket。
+    异步驱动不可用时（如 SQLite 未安装 aiosqlite）退回线程池中的同步会话。
+    """
+    if AsyncSessionLocal is None:
+        db = ThreadPoolSession(SessionLocal())
+        try:
+            yield db
+        except Exception as e:
+            logger.error(f"数据库会话错误: {str(e)}")
+            await db.rollback()
+            raise
+        finally:
+            await db.close()
+        return
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception as e:
+            logger.error(f"数据库会话错误: {str(e)}")
+            await db.rollback()
+            raise
+
+
+def create_tables() -> None:
+    """
+    创建所有表和索引（已存在的跳过）
+    
+    - HEALTH_RECORDS_PARTITIONED 开启时，health_records 首次创建为按月分区表
+    - create_all 不会给已存在的表补建索引，这里逐个检查补建
+      （数据量很大的已有表建议先手动 CREATE INDEX CONCURRENTLY，避免建索引时锁表）
+    - 最新生命体征快照表、个人基线表、变点检测器表为空时从已有健康记录回填
+    """
+    from database import models  # noqa: F401  确保所有模型已注册
+    
+    with engine.begin() as conn:
+        if settings.HEALTH_RECORDS_PARTITIONED:
+            from database.partitioning import create_partitioned_tables, ensure_month_partitions
+            if not create_partitioned_tables(conn):
+                ensure_month_partitions(conn)
+        
+        Base.metadata.create_all(bind=conn)
+        
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
+    logger.info("数据库表创建成功")
+    
+    _backfill_latest_vitals()
+    _backfill_health_baselines()
+    _backfill_change_point_detectors()
+
+
+def _backfill_latest_vitals() -> None:
+    """首次创建最新生命体征快照表时，从已有健康记录回填"""
+    from database.models import HealthRecord, LatestVitals
+    
+    db = SessionLocal()
+    try:
+        if db.query(LatestVitals).first() is None and db.query(HealthRecord.id).first() is not None:
+            from repositories.latest_vitals_repository import LatestVitalsRepository
+            count = LatestVitalsRepository(db).rebuild()
+            logger.info(f"最新生命体征快照回填完成: {count} 位老人")
+    except Exception as e:
+        logger.error(f"回填最新生命体征快照失败: {str(e)}")
+    finally:
+        db.close()
+
+
+def _backfill_health_baselines() -> None:
+    """首次创建个人基线表时，从基线窗口内的健康记录回填"""
+    from database.models import HealthBaseline, HealthRecord
+    
+    if settings.HEALTH_BASELINE_DAYS <= 0:
+        return
+    db = SessionLocal()
+    try:
+        if db.query(HealthBaseline).first() is None and db.query(HealthRecord.id).first() is not None:
+            from repositories.health_baseline_repository import HealthBaselineRepository
+            count = HealthBaselineRepository(db).rebuild()
+            logger.info(f"个人基线回填完成: {count} 项")
+    except Exception as e:
+        logger.error(f"回填个人基线失败: {str(e)}")
+    finally:
+        db.close()
+
+
+def _backfill_change_point_detectors() -> None:
+    """首次创建变点检测器表时，回放近期健康记录（回放出的历史变点不生成预警）"""
+    from database.models import ChangePointDetectorState, HealthRecord
+    
+    if not settings.CHANGE_POINT_DETECTION_ENABLED:
+        return
+    db = SessionLocal()
+    try:
+        if db.query(ChangePointDetectorState).first() is None and db.query(HealthRecord.id).first() is not None:
+            from repositories.change_point_repository import ChangePointRepository
+            count = ChangePointRepository(db).rebuild()
+            logger.info(f"变点检测器回填完成: {count} 个变点")
+    except Exception as e:
+        logger.error(f"回填变点检测器失败: {str(e)}")
+    finally:
+        db.close()
+
+
 def init_db() -> None:
     """初始化数据库，创建所有表"""
     try:
@@ -53,12 +262,17 @@ def init_db() -> None:
             AIQuery,
             Community,
             CommunityReport,
-            AlertResolution
+            AlertResolution,
+            DeviceBinding,
+            LatestVitals,
+            HealthRecordDaily,
+            HealthBaseline,
+            ChangePointDetectorState,
+            HealthChangePoint
         )
         
         # 创建所有表
-        Base.metadata.create_all(bind=engine)
-        logger.info("数据库表创建成功")
+        create_tables()
         
         # 检查是否需要初始化默认数据
         db = SessionLocal()
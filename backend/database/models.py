@@ -1,7 +1,10 @@
 """数据库模型定义"""
 from sqlalchemy import (
     Column,
+    Date,
+    Index,
     Integer,
+    JSON,
     String,
     Float,
     Boolean,
@@ -246,10 +249,57 @@ class HealthRecord(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     recorded_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    __table_args__ = (
+        # 按老人查时间窗口/最新记录（开启分区时按 recorded_at 按月分区，见 database/partitioning.py）
+        Index("ix_health_records_elderly_recorded", "elderly_id", "recorded_at"),
+    )
+    
     # 关系
     elderly = relationship("ElderlyProfile", back_populates="health_records")
 
 
+class HealthRecordDaily(Base):
+    """健康记录日汇总表（超过保留期的原始记录汇总到这里后删除）"""
+    __tablename__ = "health_record_daily"
+    
+    elderly_id = Column(UUID(as_uuid=True), ForeignKey("elderly_profiles.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    record_count = Column(Integer, nullable=False, default=0)
+    abnormal_count = Column(Integer, nullable=False, default=0)  # 状态不是 normal 的记录数
+    # 每个指标保存 sum/count/min/max，重复汇总同一天时可直接合并，平均值 = sum / count
+    heart_rate_sum = Column(Float, nullable=True)
+    heart_rate_count = Column(Integer, nullable=False, default=0)
+    heart_rate_min = Column(Float, nullable=True)
+    heart_rate_max = Column(Float, nullable=True)
+    systolic_pressure_sum = Column(Float, nullable=True)
+    systolic_pressure_count = Column(Integer, nullable=False, default=0)
+    systolic_pressure_min = Column(Float, nullable=True)
+    systolic_pressure_max = Column(Float, nullable=True)
+    diastolic_pressure_sum = Column(Float, nullable=True)
+    diastolic_pressure_count = Column(Integer, nullable=False, default=0)
+    diastolic_pressure_min = Column(Float, nullable=True)
+    diastolic_pressure_max = Column(Float, nullable=True)
+    blood_sugar_sum = Column(Float, nullable=True)
+    blood_sugar_count = Column(Integer, nullable=False, default=0)
+    blood_sugar_min = Column(Float, nullable=True)
+    blood_sugar_max = Column(Float, nullable=True)
+    temperature_sum = Column(Float, nullable=True)
+    temperature_count = Column(Integer, nullable=False, default=0)
+    temperature_min = Column(Float, nullable=True)
+    temperature_max = Column(Float, nullable=True)
+    blood_oxygen_sum = Column(Float, nullable=True)
+    blood_oxygen_count = Column(Integer, nullable=False, default=0)
+    blood_oxygen_min = Column(Float, nullable=True)
+    blood_oxygen_max = Column(Float, nullable=True)
+    weight_sum = Column(Float, nullable=True)
+    weight_count = Column(Integer, nullable=False, default=0)
+    weight_min = Column(Float, nullable=True)
+    weight_max = Column(Float, nullable=True)
+    steps_max = Column(Integer, nullable=True)  # 当天最大步数
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
 class SleepData(Base):
     """睡眠数据表"""
     __tablename__ = "sleep_data"
@@ -269,6 +319,96 @@ class SleepData(Base):
     elderly = relationship("ElderlyProfile", back_populates="sleep_data")
 
 
+class DeviceBinding(Base):
+    """IoT设备绑定表"""
+    __tablename__ = "device_bindings"
+    
+    device_id = Column(String(100), primary_key=True)  # 传感器设备ID，如 STM32_MAX30102_001
+    user_id = Column(String(100), nullable=False, index=True)  # 设备上报/绑定时使用的用户标识
+    elderly_id = Column(UUID(as_uuid=True), ForeignKey("elderly_profiles.id"), nullable=True, index=True)  # 解析出的老人档案
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class LatestVitals(Base):
+    """老人最新生命体征快照表（每位老人一行，写入健康记录时在同一事务中更新）"""
+    __tablename__ = "latest_vitals"
+    
+    elderly_id = Column(UUID(as_uuid=True), ForeignKey("elderly_profiles.id"), primary_key=True)
+    heart_rate = Column(Integer, nullable=True)
+    heart_rate_at = Column(DateTime(timezone=True), nullable=True)
+    systolic_pressure = Column(Integer, nullable=True)
+    diastolic_pressure = Column(Integer, nullable=True)
+    blood_pressure_at = Column(DateTime(timezone=True), nullable=True)
+    blood_sugar = Column(Float, nullable=True)
+    blood_sugar_at = Column(DateTime(timezone=True), nullable=True)
+    temperature = Column(Float, nullable=True)
+    temperature_at = Column(DateTime(timezone=True), nullable=True)
+    blood_oxygen = Column(Float, nullable=True)
+    blood_oxygen_at = Column(DateTime(timezone=True), nullable=True)
+    weight = Column(Float, nullable=True)
+    weight_at = Column(DateTime(timezone=True), nullable=True)
+    steps = Column(Integer, nullable=True)  # 当天最大步数（跨天后重新计）
+    steps_at = Column(DateTime(timezone=True), nullable=True)
+    status = Column(Enum(HealthRecordStatus), nullable=True)  # 最近一条记录的状态
+    last_recorded_at = Column(DateTime(timezone=True), nullable=True)  # 最近一条记录的时间
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class HealthBaseline(Base):
+    """老人个人基线表（每位老人每项指标一行，写入健康记录时在同一事务中增量更新）"""
+    __tablename__ = "health_baselines"
+    
+    elderly_id = Column(UUID(as_uuid=True), ForeignKey("elderly_profiles.id"), primary_key=True)
+    metric = Column(String(32), primary_key=True)  # systolic_bp、diastolic_bp、blood_sugar、heart_rate、weight
+    window_days = Column(Integer, nullable=False)
+    window_end = Column(Date, nullable=True)  # 窗口最后一天（最近一条读数的日期）
+    # 窗口统计（读取时直接使用，不再扫描历史记录）
+    sample_count = Column(Integer, nullable=False, default=0)
+    mean = Column(Float, nullable=True)
+    std = Column(Float, nullable=True)
+    p25 = Column(Float, nullable=True)
+    p75 = Column(Float, nullable=True)
+    min_value = Column(Float, nullable=True)
+    max_value = Column(Float, nullable=True)
+    cv = Column(Float, nullable=True)
+    # 流式统计状态（日桶、Welford、极值队列、分位数草图），见 services/health_assessment/streaming_baseline.py
+    state = Column(JSON, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class ChangePointDetectorState(Base):
+    """在线变点检测器状态表（每位老人每项指标一行，写入健康记录时在同一事务中更新）"""
+    __tablename__ = "change_point_detectors"
+    
+    elderly_id = Column(UUID(as_uuid=True), ForeignKey("elderly_profiles.id"), primary_key=True)
+    metric = Column(String(32), primary_key=True)  # 与 health_baselines.metric 相同
+    # 检测器状态（当天累加、参考统计、两侧累积和），见 services/health_assessment/online_change_point.py
+    state = Column(JSON, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class HealthChangePoint(Base):
+    """健康指标变点表（在线检测到的均值突变，报告直接读取）"""
+    __tablename__ = "health_change_points"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    elderly_id = Column(UUID(as_uuid=True), ForeignKey("elderly_profiles.id"), nullable=False)
+    metric = Column(String(32), nullable=False)
+    change_date = Column(Date, nullable=False)  # 变化开始的日期
+    detected_date = Column(Date, nullable=False)  # 判定变点时结算的日期
+    direction = Column(String(8), nullable=False)  # up / down
+    before_mean = Column(Float, nullable=False)
+    after_mean = Column(Float, nullable=False)
+    change_percent = Column(Float, nullable=False)
+    alert_id = Column(UUID(as_uuid=True), ForeignKey("alerts.id"), nullable=True)  # 回放历史时为空
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        Index("ix_health_change_points_elderly_date", "elderly_id", "change_date"),
+    )
+
+
 class Alert(Base):
     """预警信息表"""
     __tablename__ = "alerts"
@@ -283,6 +423,15 @@ class Alert(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
+    __table_args__ = (
+        Index("ix_alerts_elderly_status_created", "elderly_id", "status", "created_at"),
+        # 待处理告警只占少数，部分索引更小
+        Index(
+            "ix_alerts_active_elderly_created", "elderly_id", "created_at",
+            postgresql_where=(status == AlertStatus.ACTIVE)
+        ),
+    )
+    
     # 关系
     elderly = relationship("ElderlyProfile", back_populates="alerts")
     health_record = relationship("HealthRecord")
@@ -321,6 +470,11 @@ class Reminder(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
+    __table_args__ = (
+        Index("ix_reminders_status_next_time", "status", "next_reminder_time"),
+        Index("ix_reminders_elderly_next_time", "elderly_id", "next_reminder_time"),
+    )
+    
     # 关系
     elderly = relationship("ElderlyProfile", back_populates="reminders")
     creator = relationship("User")
@@ -356,6 +510,11 @@ class ChildrenElderlyRelation(Base):
     relationship_type = Column(Enum(RelationshipType), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    __table_args__ = (
+        Index("ix_children_elderly_relations_children", "children_id", "created_at"),
+        Index("ix_children_elderly_relations_elderly", "elderly_id"),
+    )
+    
     # 关系
     children = relationship("ChildrenProfile", back_populates="elderly_relations")
     elderly = relationship("ElderlyProfile", back_populates="children_relations")
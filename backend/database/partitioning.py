@@ -0,0 +1,146 @@
+"""
+health_records 按月范围分区（仅 PostgreSQL，可选）
+
+开启 HEALTH_RECORDS_PARTITIONED 后，首次建表时 health_records 创建为按 recorded_at
+的 RANGE 分区表：
+1. 每月一个分区 health_records_YYYY_MM，另有默认分区兜底，启动时和保留任务中预建未来几个月的分区
+2. 分区表的主键必须包含分区键，因此主键为 (id, recorded_at)；
+   alerts.health_record_id 无法再引用 health_records(id)，分区模式下不建这个外键
+3. 按时间窗口查询时只扫描相关分区；超过保留期的整月数据直接删除分区，不需要逐行 DELETE
+
+已存在的非分区表不会自动转换（需要停机迁移数据），此时只记录警告。
+"""
+import logging
+import re
+from datetime import date
+from typing import List, Optional
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateTable
+
+from database.models import Alert, HealthRecord
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "health_records"
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+_PARTITION_NAME = re.compile(rf"^{PARENT_TABLE}_(\d{{4}})_(\d{{2}})$")
+
+
+def _add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_{month.year:04d}_{month.month:02d}"
+
+
+def is_partitioned(conn: Connection) -> bool:
+    """health_records 是否为分区表"""
+    if conn.dialect.name != "postgresql":
+        return False
+    return conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = :name"
+    ), {"name": PARENT_TABLE}).first() is not None
+
+
+def create_partitioned_tables(conn: Connection, months_ahead: int = 3) -> bool:
+    """
+    在 create_all 之前创建分区的 health_records（以及不带对应外键的 alerts）
+
+    Returns:
+        bool: 是否创建了分区表（表已存在或非 PostgreSQL 时返回 False）
+    """
+    if conn.dialect.name != "postgresql":
+        logger.warning("health_records 分区只支持 PostgreSQL，已跳过")
+        return False
+
+    existing = set(inspect(conn).get_table_names())
+    if PARENT_TABLE in existing:
+        if not is_partitioned(conn):
+            logger.warning("health_records 已存在且未分区，需手动迁移后才能启用分区")
+        return False
+
+    # 枚举类型由 create_all 的建表事件创建，这里直接执行 DDL，需要先建好
+    HealthRecord.__table__.c.status.type.create(conn, checkfirst=True)
+
+    ddl = str(CreateTable(HealthRecord.__table__).compile(dialect=conn.dialect)).rstrip()
+    primary_key = "PRIMARY KEY (id)"
+    if primary_key not in ddl:
+        raise RuntimeError("health_records 的建表语句与预期不符，无法创建分区表")
+    ddl = ddl.replace(primary_key, "PRIMARY KEY (id, recorded_at)")
+    conn.execute(text(f"{ddl} PARTITION BY RANGE (recorded_at)"))
+    conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT"))
+
+    if "alerts" not in existing:
+        for column in ("alert_type", "severity", "status"):
+            Alert.__table__.c[column].type.create(conn, checkfirst=True)
+        foreign_keys = [
+            constraint for constraint in Alert.__table__.foreign_key_constraints
+            if constraint.referred_table.name != PARENT_TABLE
+        ]
+        conn.execute(CreateTable(Alert.__table__, include_foreign_key_constraints=foreign_keys))
+
+    ensure_month_partitions(conn, months_ahead=months_ahead)
+    logger.info("health_records 已创建为按月分区表")
+    return True
+
+
+def ensure_month_partitions(conn: Connection, months_ahead: int = 3,
+                            start: Optional[date] = None) -> List[str]:
+    """预建从 start（默认本月）起未来 months_ahead 个月的分区，返回新建的分区名"""
+    if not is_partitioned(conn):
+        return []
+
+    first = (start or date.today()).replace(day=1)
+    existing = set(list_month_partitions(conn))
+    created = []
+    for i in range(months_ahead + 1):
+        month = _add_months(first, i)
+        name = partition_name(month)
+        if name in existing:
+            continue
+        # 默认分区中已有这个月的数据时无法直接建分区，留在默认分区
+        try:
+            with conn.begin_nested():
+                conn.execute(text(
+                    f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} "
+                    f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+                ))
+            created.append(name)
+        except Exception as e:
+            logger.warning(f"创建分区 {name} 失败: {e}")
+    if created:
+        logger.info(f"已创建 health_records 分区: {', '.join(created)}")
+    return created
+
+
+def list_month_partitions(conn: Connection) -> List[str]:
+    """按月份排序的分区名（不含默认分区）"""
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :name"
+    ), {"name": PARENT_TABLE}).scalars().all()
+    return sorted(name for name in rows if _PARTITION_NAME.match(name))
+
+
+def partitions_before(conn: Connection, cutoff: date) -> List[str]:
+    """整月都早于 cutoff 的分区（可以整体删除）"""
+    result = []
+    for name in list_month_partitions(conn):
+        year, month = map(int, _PARTITION_NAME.match(name).groups())
+        if _add_months(date(year, month, 1), 1) <= cutoff:
+            result.append(name)
+    return result
+
+
+def drop_partition(conn: Connection, name: str) -> None:
+    """删除一个月份分区（先解除挂载，避免长时间锁住父表）"""
+    if not _PARTITION_NAME.match(name):
+        raise ValueError(f"不是 health_records 的月份分区: {name}")
+    conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+    conn.execute(text(f"DROP TABLE {name}"))
@@ -1,17 +1,19 @@
 """获取当前用户的依赖注入"""
-from typing import Optional, Union, List
+from typing import Optional, Union, List, Tuple
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
 import logging
+import uuid
 
 from config.settings import settings
-from database.database import get_db
-from database.models import User
+from database.database import get_db, get_async_db, AsyncSession
+from database.models import User, UserStatus
 from schemas.models import UserResponse, ElderlyResponse, ChildrenResponse
 from utils.password_utils import JWTUtils
-from repositories.user_repository import UserRepository
+from repositories.user_repository import UserRepository, AsyncUserRepository
+from services.auth_cache import principal_cache
 
 # 获取日志记录器
 logger = logging.getLogger(__name__)
@@ -23,28 +25,17 @@ oauth2_scheme = OAuth2PasswordBearer(
 )
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
-    """获取当前用户
-    
-    Args:
-        token: JWT令牌
-        db: 数据库会话
-        
-    Returns:
-        User: 用户模型实例
-        
-    Raises:
-        HTTPException: 认证失败时抛出
-    """
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="无法验证凭据",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+
+def _decode_token(token: str) -> Tuple[uuid.UUID, Optional[float]]:
+    """验证JWT令牌，取出用户ID（UUID）和过期时间"""
+    credentials_exception = _credentials_exception()
     try:
         # 验证JWT令牌
         payload = JWTUtils.decode_token(token)
@@ -59,24 +50,22 @@ async def get_current_user(
         logger.warning(f"JWT令牌验证失败: {token}, 错误: {e}")
         raise credentials_exception
     
-    # 查询用户（user_id 是 UUID 字符串）
-    import uuid
-    user_repo = UserRepository(db)
     try:
-        user_uuid = uuid.UUID(user_id_str)
-        user = user_repo.get_by_id(user_uuid)
+        return uuid.UUID(user_id_str), payload.get("exp")
     except ValueError:
         logger.warning(f"无效的用户ID格式: {user_id_str}")
         raise credentials_exception
-    
+
+
+def _check_user(user: Optional[User], user_id: uuid.UUID) -> User:
+    """检查用户存在且未被禁用"""
     if user is None:
-        logger.warning(f"用户不存在: {user_id_str}")
-        raise credentials_exception
+        logger.warning(f"用户不存在: {user_id}")
+        raise _credentials_exception()
     
     # 检查用户状态（使用 status 枚举字段）
-    from database.models import UserStatus
     if user.status != UserStatus.ACTIVE:
-        logger.warning(f"用户已被禁用: {user_id_str}, 状态: {user.status}")
+        logger.warning(f"用户已被禁用: {user_id}, 状态: {user.status}")
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="用户账号已被禁用"
@@ -85,6 +74,64 @@ async def get_current_user(
     return user
 
 
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> User:
+    """获取当前用户
+    
+    认证结果按令牌缓存（见 services/auth_cache.py），命中时不查询数据库；
+    老人/子女/社区档案随用户一起加载。
+    
+    Args:
+        token: JWT令牌
+        db: 数据库会话
+        
+    Returns:
+        User: 用户模型实例
+        
+    Raises:
+        HTTPException: 认证失败时抛出
+    """
+    user = principal_cache.get_user(db, token)
+    if user is not None:
+        return _check_user(user, user.id)
+    
+    user_id, expires_at = _decode_token(token)
+    user = _check_user(UserRepository(db).get_with_profiles(user_id), user_id)
+    principal_cache.put(token, user, expires_at)
+    return user
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """获取当前用户（AsyncSession 版本）
+    
+    查询不阻塞事件循环；老人/子女/社区档案已预加载，可直接访问
+    current_user.elderly_profile 等关系属性。
+    
+    Args:
+        token: JWT令牌
+        db: 异步数据库会话
+        
+    Returns:
+        User: 用户模型实例
+        
+    Raises:
+        HTTPException: 认证失败时抛出
+    """
+    user = await principal_cache.get_user_async(db, token)
+    if user is not None:
+        return _check_user(user, user.id)
+    
+    user_id, expires_at = _decode_token(token)
+    user = _check_user(await AsyncUserRepository(db).get_with_profiles(user_id), user_id)
+    principal_cache.put(token, user, expires_at)
+    return user
+
+
 # 直接定义角色检查函数
 async def get_admin_user(current_user: User = Depends(get_current_user)):
     if current_user.role != "admin":
@@ -1,5 +1,6 @@
 """智慧健康管理系统后端服务主入口"""
 import os
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
@@ -27,17 +28,51 @@ async def lifespan(app: FastAPI):
     
     # 数据库初始化
     try:
-        from database.database import engine, Base
-        Base.metadata.create_all(bind=engine)
-        logger.info("数据库表创建成功")
+        from database.database import create_tables
+        create_tables()
     except Exception as e:
         logger.error(f"数据库初始化失败: {str(e)}")
         raise
     
+    # 启动 IoT 数据写入流水线
+    from services.iot_ingestion_service import iot_ingestion_pipeline
+    iot_ingestion_pipeline.start()
+    
+    # 健康记录保留期清理与分区维护（每天一次）
+    from services.health_retention_service import health_retention_service
+    health_retention_service.start()
+    
+    # 提醒调度（时间轮），多 worker 部署时只在一个进程中开启
+    from services.reminder_scheduler import reminder_scheduler
+    if settings.REMINDER_SCHEDULER_ENABLED:
+        reminder_scheduler.start()
+    
+    # 后台预合成固定播报内容（唤醒应答、自动化场景），不阻塞启动
+    from services.voice_agent_service import voice_agent_service
+    tts_warm_task = asyncio.create_task(voice_agent_service.warm_tts_cache())
+    
     yield
     
     # 关闭时执行
     logger.info("正在关闭智慧健康管理系统后端服务...")
+    
+    if not tts_warm_task.done():
+        tts_warm_task.cancel()
+    
+    # 写完队列中剩余的 IoT 数据
+    await iot_ingestion_pipeline.stop()
+    
+    await health_retention_service.stop()
+    await reminder_scheduler.stop()
+    
+    # 关闭大模型服务的共享HTTP连接池
+    from services.http_client import close_all_clients
+    await close_all_clients()
+    
+    # 关闭异步数据库连接池
+    from database.database import async_engine
+    if async_engine is not None:
+        await async_engine.dispose()
 
 
 # 创建FastAPI应用实例
@@ -10,6 +10,7 @@ from config.settings import settings
 from database.database import get_db
 from repositories.user_repository import UserRepository
 from repositories.community_repository import CommunityRepository
+from services.auth_cache import principal_cache
 
 # OAuth2 认证方案
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
@@ -24,8 +25,8 @@ class AuthMiddleware:
         try:
             payload = jwt.decode(
                 token,
-                settings.JWT_SECRET_KEY,
-                algorithms=[settings.JWT_ALGORITHM]
+                settings.SECRET_KEY,
+                algorithms=[settings.ALGORITHM]
             )
             return payload
         except JWTError:
@@ -37,7 +38,12 @@ class AuthMiddleware:
     
     @staticmethod
     async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-        """获取当前用户"""
+        """获取当前用户（认证结果按令牌缓存）"""
+        user = principal_cache.get_user(db, token)
+        if user is not None:
+            AuthMiddleware._check_status(user)
+            return user
+        
         credentials_exception = HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="无效的认证凭据",
@@ -50,23 +56,27 @@ class AuthMiddleware:
             if user_id is None:
                 raise credentials_exception
             
-            # 获取用户信息
+            # 获取用户信息（连同档案）
             user_repo = UserRepository(db)
-            user = user_repo.get_by_id(uuid.UUID(user_id))
+            user = user_repo.get_with_profiles(uuid.UUID(user_id))
             
             if user is None:
                 raise credentials_exception
-            
-            # 检查用户状态
-            if user.status != "active":
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="用户账号已被禁用"
-                )
-            
-            return user
-        except JWTError:
+        except (JWTError, ValueError):
             raise credentials_exception
+        
+        principal_cache.put(token, user, payload.get("exp"))
+        AuthMiddleware._check_status(user)
+        return user
+    
+    @staticmethod
+    def _check_status(user) -> None:
+        """检查用户状态"""
+        if user.status != "active":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="用户账号已被禁用"
+            )
     
     @staticmethod
     async def get_current_active_user(current_user = Depends(get_current_user)):
@@ -122,9 +132,13 @@ class PermissionChecker:
         if current_user.role == "super_admin":
             return True
         
-        # 检查是否是该社区的管理员
+        # 检查是否是该社区的管理员（可管理的社区ID集合按用户缓存）
         community_repo = CommunityRepository(db)
-        return community_repo.check_admin_permission(community_id, current_user.id)
+        admin_ids = principal_cache.community_admin_ids(
+            current_user.id,
+            lambda: community_repo.get_admin_community_ids(current_user.id)
+        )
+        return community_id in admin_ids
 
 
 # 角色依赖
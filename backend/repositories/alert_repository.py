@@ -1,12 +1,16 @@
 """告警和提醒相关的Repository类"""
-from typing import Optional, List, Dict, Any
-from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, TYPE_CHECKING
+from datetime import date, datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc, or_
+from sqlalchemy import and_, desc, or_, func, case, select
 import uuid
 
-from repositories.base import BaseRepository
-from database.models import Alert, Reminder, ElderlyProfile
+from repositories.base import BaseRepository, AsyncBaseRepository
+from database.models import Alert, AlertStatus, Reminder, ReminderStatus, ElderlyProfile
+from utils.common_utils import DateUtils
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
 
 
 class AlertRepository(BaseRepository[Alert]):
@@ -169,54 +173,38 @@ class AlertRepository(BaseRepository[Alert]):
         }
         
         try:
-            # 总告警数
-            total_alerts = self.db.query(func.count(Alert.id)).filter(
-                Alert.alert_time >= start_date,
-                Alert.alert_time <= end_date
-            ).scalar()
-            
-            # 未处理告警数
-            pending_alerts = self.db.query(func.count(Alert.id)).filter(
-                Alert.alert_time >= start_date,
-                Alert.alert_time <= end_date,
-                Alert.status == "未处理"
-            ).scalar()
-            
-            # 已处理告警数
-            processed_alerts = total_alerts - pending_alerts
-            
-            stats["total_alerts"] = total_alerts
-            stats["pending_alerts"] = pending_alerts
-            stats["processed_alerts"] = processed_alerts
-            
-            # 按告警类型统计
-            alert_type_stats = self.db.query(
+            # 一次分组查询：按日期、状态、告警类型统计数量
+            alert_day = func.date(Alert.created_at)
+            grouped_rows = self.db.query(
+                alert_day.label('day'),
+                Alert.status,
                 Alert.alert_type,
                 func.count(Alert.id).label('count')
             ).filter(
-                Alert.alert_time >= start_date,
-                Alert.alert_time <= end_date
-            ).group_by(Alert.alert_type).all()
-            
-            for alert_type, count in alert_type_stats:
-                stats["alert_types"][alert_type] = count
+                Alert.created_at >= start_date,
+                Alert.created_at <= end_date
+            ).group_by(alert_day, Alert.status, Alert.alert_type).all()
             
-            # 按天统计告警数
-            current_date = start_date
-            while current_date <= end_date:
-                next_day = current_date + timedelta(days=1)
+            daily_counts: Dict[date, int] = {}
+            for day, status, alert_type, count in grouped_rows:
+                stats["total_alerts"] += count
                 
-                daily_count = self.db.query(func.count(Alert.id)).filter(
-                    Alert.alert_time >= current_date,
-                    Alert.alert_time < next_day
-                ).scalar()
+                # 未处理告警数
+                if status == AlertStatus.ACTIVE:
+                    stats["pending_alerts"] += count
                 
-                stats["daily_alerts"].append({
-                    "date": current_date.date(),
-                    "count": daily_count
-                })
+                # 按告警类型统计
+                type_key = alert_type.value
+                stats["alert_types"][type_key] = stats["alert_types"].get(type_key, 0) + count
                 
-                current_date = next_day
+                day = _as_date(day)
+                daily_counts[day] = daily_counts.get(day, 0) + count
+            
+            # 已处理告警数
+            stats["processed_alerts"] = stats["total_alerts"] - stats["pending_alerts"]
+            
+            # 按天统计告警数，缺失的日期补0
+            stats["daily_alerts"] = _zero_fill_daily(daily_counts, start_date.date(), end_date.date())
             
             return stats
         
@@ -384,45 +372,33 @@ class ReminderRepository(BaseRepository[Reminder]):
         }
         
         try:
-            # 总提醒数
-            total_reminders = self.db.query(func.count(Reminder.id)).filter(
-                Reminder.elderly_id == elderly_id,
-                Reminder.reminder_time >= start_date,
-                Reminder.reminder_time <= end_date
-            ).scalar()
-            
-            # 已完成的提醒数
-            completed_reminders = self.db.query(func.count(Reminder.id)).filter(
-                Reminder.elderly_id == elderly_id,
-                Reminder.reminder_time >= start_date,
-                Reminder.reminder_time <= end_date,
-                Reminder.status == "已完成"
-            ).scalar()
-            
-            # 未完成且已过期的提醒（错过的提醒）
-            missed_reminders = self.db.query(func.count(Reminder.id)).filter(
-                Reminder.elderly_id == elderly_id,
-                Reminder.reminder_time < datetime.now(),
-                Reminder.reminder_time >= start_date,
-                Reminder.status == "待提醒"
-            ).scalar()
-            
-            stats["total_reminders"] = total_reminders
-            stats["completed_reminders"] = completed_reminders
-            stats["missed_reminders"] = missed_reminders
-            
-            # 按提醒类型统计
-            reminder_type_stats = self.db.query(
+            # 一次分组查询：按状态、提醒类型以及是否已过提醒时间统计数量
+            now = datetime.now()
+            is_past = case((Reminder.next_reminder_time < now, True), else_=False)
+            grouped_rows = self.db.query(
+                Reminder.status,
                 Reminder.reminder_type,
+                is_past.label('is_past'),
                 func.count(Reminder.id).label('count')
             ).filter(
                 Reminder.elderly_id == elderly_id,
-                Reminder.reminder_time >= start_date,
-                Reminder.reminder_time <= end_date
-            ).group_by(Reminder.reminder_type).all()
+                Reminder.next_reminder_time >= start_date,
+                Reminder.next_reminder_time <= end_date
+            ).group_by(Reminder.status, Reminder.reminder_type, is_past).all()
             
-            for reminder_type, count in reminder_type_stats:
-                stats["reminder_types"][reminder_type] = count
+            for status, reminder_type, past, count in grouped_rows:
+                stats["total_reminders"] += count
+                
+                # 已完成的提醒数
+                if status == ReminderStatus.COMPLETED:
+                    stats["completed_reminders"] += count
+                # 已过期，或仍有效但已过提醒时间的提醒（错过的提醒）
+                elif status == ReminderStatus.EXPIRED or (status == ReminderStatus.ACTIVE and past):
+                    stats["missed_reminders"] += count
+                
+                # 按提醒类型统计
+                type_key = reminder_type.value
+                stats["reminder_types"][type_key] = stats["reminder_types"].get(type_key, 0) + count
             
             return stats
         
@@ -452,8 +428,8 @@ class ReminderRepository(BaseRepository[Reminder]):
             elif reminder.recurring_rule == "weekly":
                 next_reminder_time = reminder.reminder_time + timedelta(weeks=1)
             elif reminder.recurring_rule == "monthly":
-                # 简单处理，加30天
-                next_reminder_time = reminder.reminder_time + timedelta(days=30)
+                # 下个月同一天（没有该日时取月末）
+                next_reminder_time = DateUtils.add_months(reminder.reminder_time, 1)
             elif reminder.recurring_rule.startswith("custom:"):
                 rule_value = reminder.recurring_rule.split(":")[1]
                 
@@ -495,5 +471,60 @@ class ReminderRepository(BaseRepository[Reminder]):
             return None
 
 
-# 导入缺失的func
-from sqlalchemy import func
\ No newline at end of file
+def _as_date(value: Any) -> date:
+    """将数据库返回的日期值统一转换为date（SQLite的date()返回字符串）"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
+
+
+def _zero_fill_daily(daily_counts: Dict[date, int], first_day: date, last_day: date) -> List[Dict[str, Any]]:
+    """按天展开统计结果，没有数据的日期计数为0"""
+    result = []
+    current_day = first_day
+    while current_day <= last_day:
+        result.append({
+            "date": current_day,
+            "count": daily_counts.get(current_day, 0)
+        })
+        current_day += timedelta(days=1)
+    return result
+
+
+class AsyncAlertRepository(AsyncBaseRepository[Alert]):
+    """告警数据访问类（AsyncSession 版本）"""
+    
+    def __init__(self, db: "AsyncSession"):
+        super().__init__(db, Alert)
+    
+    async def get_active_alerts(self, elderly_id: uuid.UUID, limit: int = 20) -> List[Alert]:
+        """获取老人未处理的告警（最新的在前）"""
+        try:
+            result = await self.db.execute(
+                select(Alert).where(
+                    Alert.elderly_id == elderly_id,
+                    Alert.status == AlertStatus.ACTIVE
+                ).order_by(desc(Alert.created_at)).limit(limit)
+            )
+            return list(result.scalars().all())
+        except Exception as e:
+            print(f"Error getting active alerts: {e}")
+            return []
+    
+    async def count_active_alerts(self, elderly_ids: List[uuid.UUID]) -> Dict[uuid.UUID, int]:
+        """批量统计多位老人未处理的告警数"""
+        if not elderly_ids:
+            return {}
+        try:
+            result = await self.db.execute(
+                select(Alert.elderly_id, func.count(Alert.id)).where(
+                    Alert.elderly_id.in_(elderly_ids),
+                    Alert.status == AlertStatus.ACTIVE
+                ).group_by(Alert.elderly_id)
+            )
+            return {elderly_id: count for elderly_id, count in result.all()}
+        except Exception as e:
+            print(f"Error counting active alerts: {e}")
+            return {}
@@ -1,13 +1,29 @@
 """基础Repository类"""
-from typing import Generic, TypeVar, List, Optional, Dict, Any, Type
+from typing import Generic, TypeVar, List, Optional, Dict, Any, Type, TYPE_CHECKING
 from sqlalchemy.orm import Session, Query
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import select, func
 import uuid
 from database.database import Base
 
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
 ModelType = TypeVar('ModelType', bound=Base)
 
 
+def insert_construct(db: Session):
+    """当前数据库方言的 insert（支持 on_conflict_do_update），用于批量 upsert"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"upsert 不支持数据库: {dialect}")
+    return insert
+
+
 class BaseRepository(Generic[ModelType]):
     """基础数据访问类"""
     
@@ -126,4 +142,104 @@ class BaseRepository(Generic[ModelType]):
     
     def get_query(self) -> Query:
         """获取基础查询对象"""
-        return self.db.query(self.model)
\ No newline at end of file
+        return self.db.query(self.model)
+
+
+class AsyncBaseRepository(Generic[ModelType]):
+    """基础数据访问类（AsyncSession 版本）
+
+    与 BaseRepository 方法同名、行为一致，供异步路由使用。
+    异步会话不支持关系属性的懒加载，需要的关系请在查询中用 selectinload 预加载。
+    """
+    
+    def __init__(self, db: "AsyncSession", model: Type[ModelType]):
+        self.db = db
+        self.model = model
+    
+    @staticmethod
+    def _filters(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        # 过滤掉None值的条件
+        return {k: v for k, v in kwargs.items() if v is not None}
+    
+    async def get_by_id(self, id: uuid.UUID) -> Optional[ModelType]:
+        """根据ID获取单个实体"""
+        try:
+            return await self.db.get(self.model, id)
+        except SQLAlchemyError as e:
+            print(f"Error getting {self.model.__name__} by id: {e}")
+            return None
+    
+    async def get_one(self, **kwargs) -> Optional[ModelType]:
+        """根据条件获取单个实体"""
+        try:
+            result = await self.db.execute(
+                select(self.model).filter_by(**self._filters(kwargs)).limit(1)
+            )
+            return result.scalars().first()
+        except SQLAlchemyError as e:
+            print(f"Error getting one {self.model.__name__}: {e}")
+            return None
+    
+    async def filter_by(self, **kwargs) -> List[ModelType]:
+        """根据条件过滤实体列表"""
+        try:
+            result = await self.db.execute(select(self.model).filter_by(**self._filters(kwargs)))
+            return list(result.scalars().all())
+        except SQLAlchemyError as e:
+            print(f"Error filtering {self.model.__name__}: {e}")
+            return []
+    
+    async def count(self, **kwargs) -> int:
+        """统计符合条件的实体数量"""
+        try:
+            result = await self.db.execute(
+                select(func.count()).select_from(self.model).filter_by(**self._filters(kwargs))
+            )
+            return result.scalar() or 0
+        except SQLAlchemyError as e:
+            print(f"Error counting {self.model.__name__}: {e}")
+            return 0
+    
+    async def exists(self, **kwargs) -> bool:
+        """检查是否存在符合条件的实体"""
+        return await self.get_one(**kwargs) is not None
+    
+    async def create(self, obj_in: Dict[str, Any]) -> Optional[ModelType]:
+        """创建新实体"""
+        try:
+            db_obj = self.model(**obj_in)
+            self.db.add(db_obj)
+            await self.db.commit()
+            await self.db.refresh(db_obj)
+            return db_obj
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            print(f"Error creating {self.model.__name__}: {e}")
+            return None
+    
+    async def update(self, db_obj: ModelType, obj_in: Dict[str, Any]) -> Optional[ModelType]:
+        """更新实体"""
+        try:
+            update_data = {k: v for k, v in obj_in.items() if v is not None}
+            for field, value in update_data.items():
+                setattr(db_obj, field, value)
+            
+            self.db.add(db_obj)
+            await self.db.commit()
+            await self.db.refresh(db_obj)
+            return db_obj
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            print(f"Error updating {self.model.__name__}: {e}")
+            return None
+    
+    async def delete(self, db_obj: ModelType) -> bool:
+        """删除实体"""
+        try:
+            await self.db.delete(db_obj)
+            await self.db.commit()
+            return True
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            print(f"Error deleting {self.model.__name__}: {e}")
+            return False
@@ -0,0 +1,228 @@
+"""在线变点检测相关的Repository类"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from datetime import date, datetime, time
+from sqlalchemy.orm import Session
+from sqlalchemy import insert, update
+import uuid
+
+from repositories.base import BaseRepository, insert_construct
+from repositories.health_baseline_repository import HealthBaselineRepository
+from database.models import (
+    Alert, AlertSeverity, AlertStatus, AlertType, ChangePointDetectorState, HealthChangePoint, HealthRecord
+)
+from services.health_assessment.online_change_point import OnlineChangePointDetector
+
+
+class ChangePointRepository(BaseRepository[HealthChangePoint]):
+    """变点数据访问类
+
+    change_point_detectors 每位老人每项指标一行检测器状态，健康记录写入时在同一事务中更新；
+    检测到的变点写入 health_change_points，同时生成一条预警，报告按日期范围直接读取变点。
+    """
+
+    # 指标名 → (中文名, 单位)，与 analyze_all_change_points 一致
+    METRIC_LABELS = {
+        "systolic_bp": ("收缩压", "mmHg"),
+        "diastolic_bp": ("舒张压", "mmHg"),
+        "blood_sugar": ("血糖", "mmol/L"),
+        "heart_rate": ("心率", "次/分"),
+        "weight": ("体重", "kg"),
+    }
+
+    # 变化幅度达到该百分比时预警为高
+    HIGH_SEVERITY_PERCENT = 20.0
+
+    def __init__(self, db: Session, enabled: Optional[bool] = None):
+        super().__init__(db, HealthChangePoint)
+        if enabled is None:
+            from config.settings import settings
+            enabled = settings.CHANGE_POINT_DETECTION_ENABLED
+        self.enabled = enabled
+
+    # ------------------------------------------------------------------
+    # 写入
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _feed(detector: OnlineChangePointDetector, values: Iterable[Tuple[float, int]]) -> List[Dict[str, Any]]:
+        events = []
+        for value, day in values:
+            event = detector.add(value, day)
+            if event is not None:
+                events.append(event)
+        return events
+
+    def _event_rows(self, elderly_id: uuid.UUID, metric: str, event: Dict[str, Any],
+                    with_alert: bool) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        change_date = date.fromordinal(event["change_day"])
+        alert_row = None
+        if with_alert:
+            name, unit = self.METRIC_LABELS[metric]
+            trend = "上升" if event["direction"] == "up" else "下降"
+            verb = "升至" if event["direction"] == "up" else "降至"
+            alert_row = {
+                "id": uuid.uuid4(),
+                "elderly_id": elderly_id,
+                "alert_type": AlertType.OTHER,
+                "alert_message": (
+                    f"{name}自{change_date.month}月{change_date.day}日起明显{trend}"
+                    f"（从{event['before_mean']:.1f}{verb}{event['after_mean']:.1f}{unit}，"
+                    f"变化{event['change_percent']:.0f}%）"
+                ),
+                "severity": (AlertSeverity.HIGH if event["change_percent"] >= self.HIGH_SEVERITY_PERCENT
+                             else AlertSeverity.MEDIUM),
+                "status": AlertStatus.ACTIVE,
+            }
+        change_point_row = {
+            "id": uuid.uuid4(),
+            "elderly_id": elderly_id,
+            "metric": metric,
+            "change_date": change_date,
+            "detected_date": date.fromordinal(event["detected_day"]),
+            "direction": event["direction"],
+            "before_mean": event["before_mean"],
+            "after_mean": event["after_mean"],
+            "change_percent": event["change_percent"],
+            "alert_id": alert_row["id"] if alert_row else None,
+        }
+        return change_point_row, alert_row
+
+    def update_from_rows(self, rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """根据新写入的健康记录更新检测器（不提交，由调用方与记录写入放在同一事务）
+
+        与个人基线相同，先 INSERT ... ON CONFLICT DO NOTHING 保证行存在，再 SELECT ... FOR UPDATE 读出状态。
+        检测到的变点写入 health_change_points 并生成预警。
+
+        Args:
+            rows: HealthRecord 列字典（elderly_id、systolic_pressure、recorded_at 等）
+
+        Returns:
+            List[Dict]: 本次写入的变点行（health_change_points 列字典）
+        """
+        if not self.enabled:
+            return []
+        readings = HealthBaselineRepository.group_readings(rows)
+        if not readings:
+            return []
+
+        dialect_insert = insert_construct(self.db)
+        self.db.execute(dialect_insert(ChangePointDetectorState).values([
+            {"elderly_id": elderly_id, "metric": metric} for elderly_id, metric in readings
+        ]).on_conflict_do_nothing(index_elements=["elderly_id", "metric"]))
+
+        states = {
+            (row.elderly_id, row.metric): row.state
+            for row in self.db.query(
+                ChangePointDetectorState.elderly_id, ChangePointDetectorState.metric, ChangePointDetectorState.state
+            ).filter(
+                ChangePointDetectorState.elderly_id.in_({elderly_id for elderly_id, _ in readings}),
+                ChangePointDetectorState.metric.in_({metric for _, metric in readings})
+            ).with_for_update()
+        }
+
+        updates, change_point_rows, alert_rows = [], [], []
+        for (elderly_id, metric), values in readings.items():
+            state = states.get((elderly_id, metric))
+            detector = OnlineChangePointDetector.from_state(state) if state else OnlineChangePointDetector()
+            for event in self._feed(detector, values):
+                change_point_row, alert_row = self._event_rows(elderly_id, metric, event, with_alert=True)
+                change_point_rows.append(change_point_row)
+                alert_rows.append(alert_row)
+            updates.append({"elderly_id": elderly_id, "metric": metric, "state": detector.to_state()})
+
+        self.db.execute(update(ChangePointDetectorState), updates)
+        if alert_rows:
+            self.db.execute(insert(Alert), alert_rows)
+            self.db.execute(insert(HealthChangePoint), change_point_rows)
+        return change_point_rows
+
+    def rebuild(self, elderly_ids: Optional[List[uuid.UUID]] = None, as_of: Optional[date] = None,
+                days: Optional[int] = None) -> int:
+        """由最近 days 天的健康记录回放检测器并重写变点（首次建表或数据修复），并提交
+
+        回放得到的历史变点不生成预警。
+
+        Args:
+            elderly_ids: 要重建的老人，默认全部
+            as_of: 回放截止日期，默认今天
+            days: 回放天数，默认个人基线窗口天数
+
+        Returns:
+            int: 写入的变点数
+        """
+        as_of = as_of or date.today()
+        if days is None:
+            from config.settings import settings
+            days = settings.HEALTH_BASELINE_DAYS or 90
+        start = datetime.combine(date.fromordinal(as_of.toordinal() - days + 1), time.min)
+        end = datetime.combine(date.fromordinal(as_of.toordinal() + 1), time.min)
+        try:
+            query = self.db.query(
+                HealthRecord.elderly_id, HealthRecord.recorded_at,
+                *[getattr(HealthRecord, column) for column in HealthBaselineRepository.METRICS]
+            ).filter(HealthRecord.recorded_at >= start, HealthRecord.recorded_at < end)
+            if elderly_ids is not None:
+                query = query.filter(HealthRecord.elderly_id.in_(elderly_ids))
+
+            state_rows, change_point_rows = [], []
+            for (elderly_id, metric), values in HealthBaselineRepository.group_readings(
+                    dict(row._mapping) for row in query).items():
+                detector = OnlineChangePointDetector()
+                for event in self._feed(detector, values):
+                    change_point_rows.append(self._event_rows(elderly_id, metric, event, with_alert=False)[0])
+                state_rows.append({"elderly_id": elderly_id, "metric": metric, "state": detector.to_state()})
+
+            for model in (ChangePointDetectorState, HealthChangePoint):
+                delete_query = self.db.query(model)
+                if elderly_ids is not None:
+                    delete_query = delete_query.filter(model.elderly_id.in_(elderly_ids))
+                delete_query.delete(synchronize_session=False)
+            if state_rows:
+                self.db.execute(insert(ChangePointDetectorState), state_rows)
+            if change_point_rows:
+                self.db.execute(insert(HealthChangePoint), change_point_rows)
+            self.db.commit()
+            return len(change_point_rows)
+
+        except Exception as e:
+            self.db.rollback()
+            print(f"Error rebuilding change points: {e}")
+            raise
+
+    # ------------------------------------------------------------------
+    # 读取
+    # ------------------------------------------------------------------
+
+    def get_change_points(self, elderly_id: uuid.UUID, start: date,
+                          end: Optional[date] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        读取老人在 [start, end] 内开始的变点
+
+        Returns:
+            Dict: 历史数组键（systolic_bp_history 等，与 analyze_all_change_points 一致）→ 变点列表，
+                  可直接作为 analyze_all_change_points 的 detected；
+                  变点的键与 detect_change_points 一致，index 为变化开始日相对 start 的天数
+        """
+        end = end or date.today()
+        # 在线检测的指标都返回（没有变点时为空列表），报告据此不再对这些指标重新检测
+        results: Dict[str, List[Dict[str, Any]]] = {f"{metric}_history": [] for metric in self.METRIC_LABELS}
+        try:
+            rows = self.db.query(HealthChangePoint).filter(
+                HealthChangePoint.elderly_id == elderly_id,
+                HealthChangePoint.change_date >= start,
+                HealthChangePoint.change_date <= end
+            ).order_by(HealthChangePoint.change_date).all()
+        except Exception as e:
+            print(f"Error getting change points: {e}")
+            return results
+
+        for row in rows:
+            results.setdefault(f"{row.metric}_history", []).append({
+                'index': (row.change_date - start).days,
+                'date': row.change_date.isoformat(),
+                'direction': row.direction,
+                'before_mean': row.before_mean,
+                'after_mean': row.after_mean,
+                'change_percent': row.change_percent,
+            })
+        return results
@@ -6,7 +6,9 @@ from sqlalchemy import and_, desc, or_, func
 import uuid
 
 from repositories.base import BaseRepository
-from database.models import User, ElderlyProfile, ChildrenElderlyRelation, HealthRecord, Alert
+from database.models import (
+    User, ElderlyProfile, ChildrenElderlyRelation, HealthRecord, HealthRecordStatus, Alert, AlertStatus, Reminder
+)
 
 
 class ChildrenRepository(BaseRepository[User]):
@@ -120,36 +122,22 @@ class ChildrenRepository(BaseRepository[User]):
                     )
                 )
             
-            elderly_list = query.order_by(desc(ChildrenElderlyRelation.created_at)).offset(skip).limit(limit).all()
+            rows = query.add_columns(
+                ChildrenElderlyRelation.relationship_type
+            ).order_by(desc(ChildrenElderlyRelation.created_at)).offset(skip).limit(limit).all()
+            
+            # 批量获取最新健康记录和待处理告警数量
+            elderly_ids = [elderly.id for elderly, _ in rows]
+            latest_records = self.get_latest_health_records(elderly_ids)
+            pending_alerts = self.get_pending_alert_counts(elderly_ids)
             
             result = []
-            for elderly in elderly_list:
-                # 获取关系类型
-                relation = self.db.query(ChildrenElderlyRelation).filter(
-                    and_(
-                        ChildrenElderlyRelation.children_id == children_id,
-                        ChildrenElderlyRelation.elderly_id == elderly.id
-                    )
-                ).first()
-                
-                # 获取最新健康记录
-                latest_health = self.db.query(HealthRecord).filter(
-                    HealthRecord.elderly_id == elderly.id
-                ).order_by(desc(HealthRecord.record_time)).first()
-                
-                # 获取待处理告警数量
-                pending_alerts_count = self.db.query(func.count(Alert.id)).filter(
-                    and_(
-                        Alert.elderly_id == elderly.id,
-                        Alert.status == "pending"
-                    )
-                ).scalar()
-                
+            for elderly, relationship_type in rows:
                 result.append({
                     "elderly": elderly,
-                    "relationship_type": relation.relationship_type if relation else None,
-                    "latest_health": latest_health,
-                    "pending_alerts_count": pending_alerts_count
+                    "relationship_type": relationship_type,
+                    "latest_health": latest_records.get(elderly.id),
+                    "pending_alerts_count": pending_alerts.get(elderly.id, 0)
                 })
             
             return result
@@ -215,7 +203,7 @@ class ChildrenRepository(BaseRepository[User]):
                 pending_alerts = self.db.query(func.count(Alert.id)).filter(
                     and_(
                         Alert.elderly_id.in_(elderly_ids),
-                        Alert.status == "pending"
+                        Alert.status == AlertStatus.ACTIVE
                     )
                 ).scalar()
                 dashboard_data["pending_alerts"] = pending_alerts
@@ -230,7 +218,7 @@ class ChildrenRepository(BaseRepository[User]):
                 ).filter(
                     HealthRecord.elderly_id.in_(elderly_ids)
                 ).order_by(
-                    desc(HealthRecord.record_time)
+                    desc(HealthRecord.recorded_at)
                 ).limit(10).all()
                 
                 dashboard_data["recent_health_records"] = [
@@ -241,34 +229,32 @@ class ChildrenRepository(BaseRepository[User]):
                     for record, elderly_name in recent_records
                 ]
                 
-                # 获取每位老人的健康状态摘要
+                # 获取每位老人的健康状态摘要（每类数据一次批量查询）
+                elderly_map = {
+                    elderly.id: elderly
+                    for elderly in self.db.query(ElderlyProfile).filter(
+                        ElderlyProfile.id.in_(elderly_ids)
+                    ).all()
+                }
+                latest_records = self.get_latest_health_records(elderly_ids)
+                pending_alerts = self.get_pending_alert_counts(elderly_ids)
+                last_24h_counts = dict(self.db.query(
+                    HealthRecord.elderly_id,
+                    func.count(HealthRecord.id)
+                ).filter(
+                    and_(
+                        HealthRecord.elderly_id.in_(elderly_ids),
+                        HealthRecord.recorded_at >= datetime.now() - timedelta(hours=24)
+                    )
+                ).group_by(HealthRecord.elderly_id).all())
+                
                 for elderly_id in elderly_ids:
-                    # 获取老人信息
-                    elderly = self.db.query(ElderlyProfile).filter(
-                        ElderlyProfile.id == elderly_id
-                    ).first()
+                    elderly = elderly_map.get(elderly_id)
                     
                     if elderly:
-                        # 获取最新健康记录
-                        latest_health = self.db.query(HealthRecord).filter(
-                            HealthRecord.elderly_id == elderly_id
-                        ).order_by(desc(HealthRecord.record_time)).first()
-                        
-                        # 获取待处理告警数量
-                        elderly_pending_alerts = self.db.query(func.count(Alert.id)).filter(
-                            and_(
-                                Alert.elderly_id == elderly_id,
-                                Alert.status == "pending"
-                            )
-                        ).scalar()
-                        
-                        # 获取24小时内的健康记录数量
-                        last_24h_records = self.db.query(func.count(HealthRecord.id)).filter(
-                            and_(
-                                HealthRecord.elderly_id == elderly_id,
-                                HealthRecord.record_time >= datetime.now() - timedelta(hours=24)
-                            )
-                        ).scalar()
+                        latest_health = latest_records.get(elderly_id)
+                        elderly_pending_alerts = pending_alerts.get(elderly_id, 0)
+                        last_24h_records = last_24h_counts.get(elderly_id, 0)
                         
                         # 判断健康状态
                         health_status = "normal"
@@ -276,9 +262,7 @@ class ChildrenRepository(BaseRepository[User]):
                             health_status = "alert"
                         elif not latest_health or last_24h_records == 0:
                             health_status = "inactive"
-                        elif latest_health and (latest_health.blood_pressure_abnormal or 
-                                              latest_health.heart_rate_abnormal or 
-                                              latest_health.blood_sugar_abnormal):
+                        elif latest_health.status not in (None, HealthRecordStatus.NORMAL):
                             health_status = "abnormal"
                         
                         dashboard_data["elderly_status_summary"].append({
@@ -286,7 +270,7 @@ class ChildrenRepository(BaseRepository[User]):
                             "elderly_name": elderly.name,
                             "health_status": health_status,
                             "pending_alerts": elderly_pending_alerts,
-                            "latest_record_time": latest_health.record_time if latest_health else None,
+                            "latest_record_time": latest_health.recorded_at if latest_health else None,
                             "age": elderly.age
                         })
             
@@ -296,6 +280,92 @@ class ChildrenRepository(BaseRepository[User]):
             print(f"Error getting children elderly dashboard: {e}")
             return dashboard_data
     
+    def get_latest_health_records(self, elderly_ids: List[uuid.UUID]) -> Dict[uuid.UUID, HealthRecord]:
+        """批量获取每位老人的最新健康记录（窗口函数，一次查询）"""
+        if not elderly_ids:
+            return {}
+        
+        ranked = self.db.query(
+            HealthRecord.id.label("id"),
+            func.row_number().over(
+                partition_by=HealthRecord.elderly_id,
+                order_by=desc(HealthRecord.recorded_at)
+            ).label("rank")
+        ).filter(
+            HealthRecord.elderly_id.in_(elderly_ids)
+        ).subquery()
+        
+        records = self.db.query(HealthRecord).join(
+            ranked,
+            HealthRecord.id == ranked.c.id
+        ).filter(
+            ranked.c.rank == 1
+        ).all()
+        
+        return {record.elderly_id: record for record in records}
+    
+    def get_pending_alert_counts(self, elderly_ids: List[uuid.UUID]) -> Dict[uuid.UUID, int]:
+        """批量统计每位老人的待处理告警数量（分组计数，一次查询）"""
+        if not elderly_ids:
+            return {}
+        
+        return dict(self.db.query(
+            Alert.elderly_id,
+            func.count(Alert.id)
+        ).filter(
+            and_(
+                Alert.elderly_id.in_(elderly_ids),
+                Alert.status == AlertStatus.ACTIVE
+            )
+        ).group_by(Alert.elderly_id).all())
+    
+    def get_today_reminder_counts(self, elderly_ids: List[uuid.UUID]) -> Dict[uuid.UUID, int]:
+        """批量统计每位老人今天的提醒数量（分组计数，一次查询）"""
+        if not elderly_ids:
+            return {}
+        
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        return dict(self.db.query(
+            Reminder.elderly_id,
+            func.count(Reminder.id)
+        ).filter(
+            and_(
+                Reminder.elderly_id.in_(elderly_ids),
+                Reminder.next_reminder_time >= today,
+                Reminder.next_reminder_time < today + timedelta(days=1)
+            )
+        ).group_by(Reminder.elderly_id).all())
+    
+    def get_elderly_health_statistics_batch(self, elderly_ids: List[uuid.UUID]) -> Dict[uuid.UUID, Dict[str, Any]]:
+        """
+        批量获取老人健康数据统计
+        
+        无论老人数量多少，都只执行三次查询（最新记录、待处理告警、今日提醒）
+        
+        Returns:
+            老人ID → {"latest_record", "today_reminders_count", "pending_alerts_count"}
+        """
+        try:
+            latest_records = self.get_latest_health_records(elderly_ids)
+            pending_alerts = self.get_pending_alert_counts(elderly_ids)
+            today_reminders = self.get_today_reminder_counts(elderly_ids)
+        except Exception as e:
+            print(f"Error getting elderly health statistics: {e}")
+            latest_records, pending_alerts, today_reminders = {}, {}, {}
+        
+        return {
+            elderly_id: {
+                "latest_record": latest_records.get(elderly_id),
+                "today_reminders_count": today_reminders.get(elderly_id, 0),
+                "pending_alerts_count": pending_alerts.get(elderly_id, 0)
+            }
+            for elderly_id in elderly_ids
+        }
+    
+    def get_elderly_health_statistics(self, elderly_id: uuid.UUID) -> Dict[str, Any]:
+        """获取单个老人的健康数据统计"""
+        return self.get_elderly_health_statistics_batch([elderly_id])[elderly_id]
+    
     def update_children_profile(self, children_id: uuid.UUID, **kwargs) -> Optional[User]:
         """更新子女用户资料"""
         try:
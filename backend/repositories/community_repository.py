@@ -62,19 +62,25 @@ class CommunityRepository(BaseRepository[Community]):
             
             communities = query.order_by(desc(Community.created_at)).offset(skip).limit(limit).all()
             
+            # 一次分组查询统计各社区老人数量
+            community_ids = [community.id for community in communities]
+            elderly_counts = {}
+            if community_ids:
+                elderly_counts = dict(self.db.query(
+                    ElderlyProfile.community_id,
+                    func.count(ElderlyProfile.id)
+                ).filter(
+                    ElderlyProfile.community_id.in_(community_ids)
+                ).group_by(ElderlyProfile.community_id).all())
+            
             result = []
             for community in communities:
-                # 获取社区老人数量
-                elderly_count = self.db.query(func.count(ElderlyProfile.id)).filter(
-                    ElderlyProfile.community_id == community.id
-                ).scalar()
-                
                 # 获取社区管理员数量
                 admin_count = 0  # 暂时设为0，实际应该查询CommunityProfile
                 
                 result.append({
                     "community": community,
-                    "elderly_count": elderly_count,
+                    "elderly_count": elderly_counts.get(community.id, 0),
                     "admin_count": admin_count
                 })
             
@@ -210,6 +216,18 @@ class CommunityRepository(BaseRepository[Community]):
             print(f"Error getting user communities: {e}")
             return []
     
+    def get_admin_community_ids(self, user_id: uuid.UUID) -> List[uuid.UUID]:
+        """获取用户有管理权限的社区ID（与 check_admin_permission 判断一致）"""
+        try:
+            rows = self.db.query(CommunityProfile.id).filter(
+                CommunityProfile.user_id == user_id
+            ).all()
+            return [row[0] for row in rows]
+        
+        except Exception as e:
+            print(f"Error getting admin communities: {e}")
+            return []
+    
     def check_admin_permission(self, community_id: uuid.UUID, user_id: uuid.UUID) -> bool:
         """检查用户是否有社区管理权限（基于CommunityProfile）"""
         try:
@@ -248,33 +266,14 @@ class CommunityRepository(BaseRepository[Community]):
             
             elderly_list = query.order_by(desc(ElderlyProfile.created_at)).offset(skip).limit(limit).all()
             
+            # 一次查询预取所有老人的子女信息
+            children_map = self.get_elderly_children_map([elderly.id for elderly in elderly_list])
+            
             result = []
             for elderly in elderly_list:
-                # 获取子女信息
-                children_relations = self.db.query(
-                    User.id,
-                    User.username,
-                    User.phone_number,
-                    ChildrenElderlyRelation.relationship_type
-                ).join(
-                    ChildrenElderlyRelation,
-                    User.id == ChildrenElderlyRelation.children_id
-                ).filter(
-                    ChildrenElderlyRelation.elderly_id == elderly.id
-                ).all()
-                
-                children_list = []
-                for child in children_relations:
-                    children_list.append({
-                        "user_id": child.id,
-                        "username": child.username,
-                        "phone_number": child.phone_number,
-                        "relationship_type": child.relationship_type
-                    })
-                
                 result.append({
                     "elderly": elderly,
-                    "children_list": children_list
+                    "children_list": children_map.get(elderly.id, [])
                 })
             
             return result
@@ -283,6 +282,35 @@ class CommunityRepository(BaseRepository[Community]):
             print(f"Error getting community elderly list: {e}")
             return []
     
+    def get_elderly_children_map(self, elderly_ids: List[uuid.UUID]) -> Dict[uuid.UUID, List[Dict[str, Any]]]:
+        """批量获取老人的子女信息（IN 查询，一次完成）"""
+        if not elderly_ids:
+            return {}
+        
+        children_relations = self.db.query(
+            ChildrenElderlyRelation.elderly_id,
+            User.id,
+            User.username,
+            User.phone_number,
+            ChildrenElderlyRelation.relationship_type
+        ).join(
+            ChildrenElderlyRelation,
+            User.id == ChildrenElderlyRelation.children_id
+        ).filter(
+            ChildrenElderlyRelation.elderly_id.in_(elderly_ids)
+        ).all()
+        
+        children_map: Dict[uuid.UUID, List[Dict[str, Any]]] = {}
+        for child in children_relations:
+            children_map.setdefault(child.elderly_id, []).append({
+                "user_id": child.id,
+                "username": child.username,
+                "phone_number": child.phone_number,
+                "relationship_type": child.relationship_type
+            })
+        
+        return children_map
+    
     def get_community_statistics(self, community_id: uuid.UUID) -> Dict[str, Any]:
         """获取社区统计信息"""
         stats = {
@@ -354,8 +382,8 @@ class CommunityRepository(BaseRepository[Community]):
                 "90+": 0
             }
             
-            # 获取所有老人的出生日期
-            elderly_list = self.db.query(ElderlyProfile).filter(
+            # 获取所有老人的出生日期（只取需要的列）
+            elderly_list = self.db.query(ElderlyProfile.birth_date).filter(
                 ElderlyProfile.community_id == community_id
             ).all()
             
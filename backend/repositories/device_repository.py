@@ -0,0 +1,67 @@
+"""IoT设备相关的Repository类"""
+from typing import Optional, List
+from sqlalchemy.orm import Session
+from sqlalchemy import or_
+import uuid
+
+from repositories.base import BaseRepository
+from database.models import DeviceBinding, ElderlyProfile
+
+
+class DeviceBindingRepository(BaseRepository[DeviceBinding]):
+    """设备绑定数据访问类"""
+
+    def __init__(self, db: Session):
+        super().__init__(db, DeviceBinding)
+
+    def get_by_device_id(self, device_id: str) -> Optional[DeviceBinding]:
+        """根据设备ID获取绑定关系"""
+        return self.get_one(device_id=device_id)
+
+    def list_bindings(self) -> List[DeviceBinding]:
+        """获取全部绑定关系"""
+        try:
+            return self.db.query(DeviceBinding).order_by(DeviceBinding.device_id).all()
+        except Exception as e:
+            print(f"Error listing device bindings: {e}")
+            return []
+
+    def resolve_elderly_id(self, user_id: str) -> Optional[uuid.UUID]:
+        """
+        将设备上报的用户标识解析为老人档案ID
+
+        支持老人档案ID或老人的用户ID（UUID字符串），无法解析时返回None
+        """
+        try:
+            value = uuid.UUID(str(user_id))
+        except (ValueError, TypeError):
+            return None
+
+        try:
+            profile_id = self.db.query(ElderlyProfile.id).filter(
+                or_(ElderlyProfile.id == value, ElderlyProfile.user_id == value)
+            ).scalar()
+            return profile_id
+        except Exception as e:
+            print(f"Error resolving elderly id for {user_id}: {e}")
+            return None
+
+    def bind(self, device_id: str, user_id: str) -> Optional[DeviceBinding]:
+        """绑定设备到用户（已绑定则更新）"""
+        try:
+            elderly_id = self.resolve_elderly_id(user_id)
+            binding = self.get_by_device_id(device_id)
+            if binding:
+                binding.user_id = user_id
+                binding.elderly_id = elderly_id
+            else:
+                binding = DeviceBinding(device_id=device_id, user_id=user_id, elderly_id=elderly_id)
+                self.db.add(binding)
+
+            self.db.commit()
+            self.db.refresh(binding)
+            return binding
+        except Exception as e:
+            self.db.rollback()
+            print(f"Error binding device {device_id}: {e}")
+            return None
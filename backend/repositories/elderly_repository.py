@@ -1,13 +1,16 @@
 """老人相关的Repository类"""
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, TYPE_CHECKING
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, desc
+from sqlalchemy import and_, desc, select
 import uuid
 
-from repositories.base import BaseRepository
+from repositories.base import BaseRepository, AsyncBaseRepository
 from database.models import ElderlyProfile, HealthRecord, Alert, Reminder, ChildrenElderlyRelation
 
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
 
 class ElderlyRepository(BaseRepository[ElderlyProfile]):
     """老人档案数据访问类"""
@@ -230,4 +233,29 @@ class ElderlyRepository(BaseRepository[ElderlyProfile]):
         
         except Exception as e:
             print(f"Error getting today reminders: {e}")
-            return []
\ No newline at end of file
+            return []
+
+
+class AsyncElderlyRepository(AsyncBaseRepository[ElderlyProfile]):
+    """老人档案数据访问类（AsyncSession 版本）"""
+    
+    def __init__(self, db: "AsyncSession"):
+        super().__init__(db, ElderlyProfile)
+    
+    async def get_by_user_id(self, user_id: uuid.UUID) -> Optional[ElderlyProfile]:
+        """根据用户ID获取老人档案"""
+        return await self.get_one(user_id=user_id)
+    
+    async def get_elderly_by_children(self, children_id: uuid.UUID) -> List[ElderlyProfile]:
+        """获取关联到指定子女的所有老人"""
+        try:
+            elderly_ids = select(ChildrenElderlyRelation.elderly_id).where(
+                ChildrenElderlyRelation.children_id == children_id
+            )
+            result = await self.db.execute(
+                select(ElderlyProfile).where(ElderlyProfile.id.in_(elderly_ids))
+            )
+            return list(result.scalars().all())
+        except Exception as e:
+            print(f"Error getting elderly by children: {e}")
+            return []
@@ -0,0 +1,107 @@
+"""批量健康评估相关的Repository类"""
+from typing import Any, Dict, List
+from datetime import datetime
+from sqlalchemy.orm import Session
+from sqlalchemy import delete, insert
+import uuid
+
+from repositories.base import BaseRepository
+from database.models import ElderlyProfile, HealthAssessment, HealthRecord, SleepData
+
+
+class HealthAssessmentRepository(BaseRepository[HealthAssessment]):
+    """健康评估结果数据访问类
+
+    批量评估按老人分组：一组老人的评估窗口数据用两条查询读出（健康记录、睡眠数据），
+    评估结果在同一事务中先删除同一评估日期的旧结果再批量写入，重跑同一组不会产生重复行。
+    """
+
+    # 每条 INSERT 的最大行数
+    BULK_INSERT_CHUNK_SIZE = 1000
+
+    def __init__(self, db: Session):
+        super().__init__(db, HealthAssessment)
+
+    # ------------------------------------------------------------------
+    # 读取
+    # ------------------------------------------------------------------
+
+    def get_all_elderly_ids(self) -> List[uuid.UUID]:
+        """所有老人ID（按ID排序）"""
+        return [row[0] for row in self.db.query(ElderlyProfile.id).order_by(ElderlyProfile.id)]
+
+    def load_assessment_inputs(self, elderly_ids: List[uuid.UUID], start: datetime,
+                               end: datetime) -> Dict[uuid.UUID, List[Dict[str, Any]]]:
+        """读取一组老人在 [start, end] 内的健康记录和睡眠数据
+
+        Returns:
+            Dict: 老人ID → 按时间排序的记录列表，键与评估引擎的健康记录一致
+                  （check_time、systolic_bp、diastolic_bp、heart_rate、blood_sugar、
+                  steps、weight_kg、sleep_hours）；没有数据的老人不在结果中
+        """
+        inputs: Dict[uuid.UUID, List[Dict[str, Any]]] = {}
+        if not elderly_ids:
+            return inputs
+
+        records = self.db.query(
+            HealthRecord.elderly_id, HealthRecord.recorded_at,
+            HealthRecord.systolic_pressure, HealthRecord.diastolic_pressure,
+            HealthRecord.heart_rate, HealthRecord.blood_sugar,
+            HealthRecord.steps, HealthRecord.weight
+        ).filter(
+            HealthRecord.elderly_id.in_(elderly_ids),
+            HealthRecord.recorded_at >= start,
+            HealthRecord.recorded_at <= end
+        )
+        for row in records:
+            inputs.setdefault(row.elderly_id, []).append({
+                "check_time": row.recorded_at,
+                "systolic_bp": row.systolic_pressure,
+                "diastolic_bp": row.diastolic_pressure,
+                "heart_rate": row.heart_rate,
+                "blood_sugar": row.blood_sugar,
+                "steps": row.steps,
+                "weight_kg": row.weight,
+            })
+
+        sleep = self.db.query(SleepData.elderly_id, SleepData.date, SleepData.total_hours).filter(
+            SleepData.elderly_id.in_(elderly_ids),
+            SleepData.date >= start,
+            SleepData.date <= end
+        )
+        for row in sleep:
+            inputs.setdefault(row.elderly_id, []).append({
+                "check_time": row.date,
+                "sleep_hours": row.total_hours,
+            })
+
+        # 在内存中排序（不依赖数据库对 IN 列表的排序）
+        for rows in inputs.values():
+            rows.sort(key=lambda item: item["check_time"])
+        return inputs
+
+    # ------------------------------------------------------------------
+    # 写入
+    # ------------------------------------------------------------------
+
+    def replace_assessments(self, elderly_ids: List[uuid.UUID], assessment_date: datetime,
+                            rows: List[Dict[str, Any]]) -> int:
+        """替换一组老人在 assessment_date 的评估结果（不提交）
+
+        Args:
+            elderly_ids: 本组全部老人ID（包括没有写入结果的）
+            assessment_date: 本次批量评估的评估日期
+            rows: HealthAssessment 列字典
+
+        Returns:
+            int: 写入的行数
+        """
+        if elderly_ids:
+            self.db.execute(delete(HealthAssessment).where(
+                HealthAssessment.elderly_id.in_(elderly_ids),
+                HealthAssessment.assessment_date == assessment_date
+            ))
+        chunk_size = self.BULK_INSERT_CHUNK_SIZE
+        for i in range(0, len(rows), chunk_size):
+            self.db.execute(insert(HealthAssessment), rows[i:i + chunk_size])
+        return len(rows)
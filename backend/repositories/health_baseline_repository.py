@@ -0,0 +1,237 @@
+"""个人基线相关的Repository类"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from datetime import date, datetime, time
+from sqlalchemy.orm import Session, defer
+from sqlalchemy import update
+import uuid
+
+from repositories.base import BaseRepository, insert_construct
+from database.models import HealthBaseline, HealthRecord
+from services.health_assessment.streaming_baseline import MetricBaseline, exact_summary
+
+
+class HealthBaselineRepository(BaseRepository[HealthBaseline]):
+    """个人基线数据访问类
+
+    health_baselines 每位老人每项指标一行：窗口统计列供读取，state 列保存流式统计状态。
+    健康记录写入时在同一事务中读出状态、加入新读数、写回，读取时不再扫描历史记录。
+    """
+
+    # health_records 列 → 基线指标名（与 calculate_personal_baseline 的键一致）
+    METRICS = {
+        "systolic_pressure": "systolic_bp",
+        "diastolic_pressure": "diastolic_bp",
+        "blood_sugar": "blood_sugar",
+        "heart_rate": "heart_rate",
+        "weight": "weight",
+    }
+
+    # 与 calculate_personal_baseline 一致：少于 3 条读数不生成该指标的基线
+    MIN_SAMPLES = 3
+
+    # 窗口统计列 ← MetricBaseline.summary() 的键
+    SUMMARY_COLUMNS = {
+        "sample_count": "count", "mean": "mean", "std": "std", "p25": "p25", "p75": "p75",
+        "min_value": "min", "max_value": "max", "cv": "cv",
+    }
+
+    def __init__(self, db: Session, window_days: Optional[int] = None):
+        super().__init__(db, HealthBaseline)
+        if window_days is None:
+            from config.settings import settings
+            window_days = settings.HEALTH_BASELINE_DAYS
+        self.window_days = window_days
+
+    # ------------------------------------------------------------------
+    # 写入
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def group_readings(cls, rows: Iterable[Dict[str, Any]]) -> Dict[Tuple[uuid.UUID, str], List[Tuple[float, int]]]:
+        """将 HealthRecord 列字典按 (老人, 指标) 分组为按日期排序的 (读数, 日序号) 列表"""
+        readings: Dict[Tuple[uuid.UUID, str], List[Tuple[float, int]]] = {}
+        today = date.today().toordinal()
+        for row in rows:
+            elderly_id = row.get("elderly_id")
+            if elderly_id is None:
+                continue
+            recorded_at = row.get("recorded_at")
+            day = recorded_at.date().toordinal() if recorded_at is not None else today
+            for column, metric in cls.METRICS.items():
+                value = row.get(column)
+                if value is not None:
+                    readings.setdefault((elderly_id, metric), []).append((float(value), day))
+        for values in readings.values():
+            values.sort(key=lambda item: item[1])
+        return readings
+
+    def _row_values(self, elderly_id: uuid.UUID, metric: str, baseline: MetricBaseline) -> Dict[str, Any]:
+        summary = baseline.summary()
+        values = {
+            "elderly_id": elderly_id,
+            "metric": metric,
+            "window_days": baseline.window_days,
+            "window_end": date.fromordinal(baseline.end_day) if baseline.end_day is not None else None,
+            "state": baseline.to_state(),
+        }
+        for column, key in self.SUMMARY_COLUMNS.items():
+            values[column] = summary.get(key)
+        return values
+
+    def update_from_rows(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """根据新写入的健康记录增量更新基线（不提交，由调用方与记录写入放在同一事务）
+
+        先 INSERT ... ON CONFLICT DO NOTHING 保证行存在，再 SELECT ... FOR UPDATE 读出状态，
+        多个 worker 并发写入同一位老人时按行串行，不会丢失更新。
+
+        Args:
+            rows: HealthRecord 列字典（elderly_id、systolic_pressure、recorded_at 等）
+
+        Returns:
+            int: 更新的 (老人, 指标) 数
+        """
+        if self.window_days <= 0:
+            return 0
+        readings = self.group_readings(rows)
+        if not readings:
+            return 0
+
+        insert = insert_construct(self.db)
+        self.db.execute(insert(HealthBaseline).values([
+            {"elderly_id": elderly_id, "metric": metric, "window_days": self.window_days, "sample_count": 0}
+            for elderly_id, metric in readings
+        ]).on_conflict_do_nothing(index_elements=["elderly_id", "metric"]))
+
+        states = {
+            (row.elderly_id, row.metric): row.state
+            for row in self.db.query(HealthBaseline.elderly_id, HealthBaseline.metric, HealthBaseline.state).filter(
+                HealthBaseline.elderly_id.in_({elderly_id for elderly_id, _ in readings}),
+                HealthBaseline.metric.in_({metric for _, metric in readings})
+            ).with_for_update()
+        }
+
+        updates = []
+        for (elderly_id, metric), values in readings.items():
+            state = states.get((elderly_id, metric))
+            baseline = MetricBaseline.from_state(state, self.window_days) if state else MetricBaseline(self.window_days)
+            baseline.add_many(values)
+            updates.append(self._row_values(elderly_id, metric, baseline))
+
+        # 按主键的批量 UPDATE（executemany）
+        self.db.execute(update(HealthBaseline), updates)
+        return len(updates)
+
+    def _window_readings(self, elderly_ids: Optional[List[uuid.UUID]],
+                         as_of: date) -> Dict[Tuple[uuid.UUID, str], List[Tuple[float, int]]]:
+        """读取窗口内的健康记录并分组（重建和校验使用）"""
+        start = datetime.combine(date.fromordinal(as_of.toordinal() - self.window_days + 1), time.min)
+        end = datetime.combine(date.fromordinal(as_of.toordinal() + 1), time.min)
+        query = self.db.query(
+            HealthRecord.elderly_id, HealthRecord.recorded_at,
+            *[getattr(HealthRecord, column) for column in self.METRICS]
+        ).filter(HealthRecord.recorded_at >= start, HealthRecord.recorded_at < end)
+        if elderly_ids is not None:
+            query = query.filter(HealthRecord.elderly_id.in_(elderly_ids))
+        return self.group_readings(dict(row._mapping) for row in query)
+
+    def rebuild(self, elderly_ids: Optional[List[uuid.UUID]] = None, as_of: Optional[date] = None) -> int:
+        """由窗口内的健康记录精确重建基线（首次建表、修改窗口天数或数据修复），并提交
+
+        Args:
+            elderly_ids: 要重建的老人，默认全部
+            as_of: 窗口最后一天，默认今天
+
+        Returns:
+            int: 写入的 (老人, 指标) 数
+        """
+        as_of = as_of or date.today()
+        try:
+            rows = []
+            for (elderly_id, metric), values in self._window_readings(elderly_ids, as_of).items():
+                baseline = MetricBaseline(self.window_days)
+                baseline.add_many(values)
+                baseline.advance(as_of.toordinal())
+                rows.append(self._row_values(elderly_id, metric, baseline))
+
+            query = self.db.query(HealthBaseline)
+            if elderly_ids is not None:
+                query = query.filter(HealthBaseline.elderly_id.in_(elderly_ids))
+            query.delete(synchronize_session=False)
+            if rows:
+                self.db.execute(HealthBaseline.__table__.insert(), rows)
+            self.db.commit()
+            return len(rows)
+
+        except Exception as e:
+            self.db.rollback()
+            print(f"Error rebuilding health baselines: {e}")
+            raise
+
+    # ------------------------------------------------------------------
+    # 读取
+    # ------------------------------------------------------------------
+
+    def _summary_as_of(self, row: HealthBaseline, as_of: date) -> Dict[str, Any]:
+        """窗口截止到 as_of 的统计：窗口没有过期时直接使用统计列，否则由状态滑动窗口后计算"""
+        if row.window_end is None:
+            return {"count": 0}
+        if row.window_end >= as_of and row.window_days == self.window_days:
+            return {key: getattr(row, column) for column, key in self.SUMMARY_COLUMNS.items()}
+        if not row.state:
+            return {"count": 0}
+        baseline = MetricBaseline.from_state(row.state, self.window_days)
+        baseline.advance(as_of.toordinal())
+        return baseline.summary()
+
+    def get_baseline_data(self, elderly_id: uuid.UUID, as_of: Optional[date] = None) -> Dict[str, Any]:
+        """
+        读取老人的个人基线
+
+        返回格式与 YangShengReportGenerator.calculate_personal_baseline 一致
+        （{'baseline_days': 90, 'systolic_bp': {'mean', 'std', 'p25', 'p75', 'min', 'max', 'cv'}, ...}），
+        报告生成（YangShengReportGenerator.load_personal_baseline）和
+        PersonalizedEvaluator.from_stored_baseline 由此读取，不再由历史记录重新计算。
+        """
+        as_of = as_of or date.today()
+        baseline: Dict[str, Any] = {'baseline_days': self.window_days}
+        try:
+            rows = self.db.query(HealthBaseline).options(defer(HealthBaseline.state)).filter(
+                HealthBaseline.elderly_id == elderly_id
+            ).all()
+        except Exception as e:
+            print(f"Error getting health baselines: {e}")
+            return baseline
+
+        for row in rows:
+            summary = self._summary_as_of(row, as_of)
+            if summary["count"] >= self.MIN_SAMPLES:
+                baseline[row.metric] = {key: summary[key] for key in ("mean", "std", "p25", "p75", "min", "max", "cv")}
+        return baseline
+
+    def verify(self, elderly_id: uuid.UUID, as_of: Optional[date] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        与窗口内健康记录的精确计算对比（校验用）
+
+        Returns:
+            Dict: 指标名 → {'stored', 'exact', 'max_error'（均值/标准差/极值/CV 的最大绝对误差）,
+                  'quantile_error'（p25/p75 的最大绝对误差）}
+        """
+        as_of = as_of or date.today()
+        rows = {row.metric: row for row in self.db.query(HealthBaseline).filter(HealthBaseline.elderly_id == elderly_id)}
+        exact = {
+            metric: exact_summary(value for value, _ in values)
+            for (_, metric), values in self._window_readings([elderly_id], as_of).items()
+        }
+
+        report = {}
+        for metric in sorted(set(rows) | set(exact)):
+            stored = self._summary_as_of(rows[metric], as_of) if metric in rows else {"count": 0}
+            expected = exact.get(metric, {"count": 0})
+            item = {"stored": stored, "exact": expected, "max_error": None, "quantile_error": None}
+            if stored["count"] and stored["count"] == expected["count"]:
+                item["max_error"] = max(abs(stored[key] - expected[key]) for key in ("mean", "std", "min", "max", "cv"))
+                item["quantile_error"] = max(abs(stored[key] - expected[key]) for key in ("p25", "p75"))
+            elif stored["count"] or expected["count"]:
+                item["max_error"] = float("inf")
+            report[metric] = item
+        return report
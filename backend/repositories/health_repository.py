@@ -1,12 +1,21 @@
 """健康记录相关的Repository类"""
-from typing import Optional, List, Dict, Any, Tuple
-from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Tuple, TYPE_CHECKING
+from datetime import date, datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc, func, extract
+from sqlalchemy import and_, case, desc, func, extract, insert, select
+import numpy as np
 import uuid
 
-from repositories.base import BaseRepository
-from database.models import HealthRecord, Alert
+from repositories.base import BaseRepository, AsyncBaseRepository
+from database.models import (
+    Alert, AlertSeverity, AlertStatus, AlertType, HealthRecord, HealthRecordStatus, SleepData
+)
+from repositories.latest_vitals_repository import LatestVitalsRepository
+from repositories.health_baseline_repository import HealthBaselineRepository
+from repositories.change_point_repository import ChangePointRepository
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
 
 
 class HealthRepository(BaseRepository[HealthRecord]):
@@ -19,9 +28,6 @@ class HealthRepository(BaseRepository[HealthRecord]):
                          value: float, record_time: Optional[datetime] = None) -> HealthRecord:
         """添加健康记录"""
         try:
-            # 检查是否有相同类型的最新记录
-            latest_record = self.get_latest_record(elderly_id, data_type)
-            
             # 确定健康记录是否正常
             is_normal = self._check_health_normal(data_type, value)
             
@@ -61,22 +67,45 @@ class HealthRepository(BaseRepository[HealthRecord]):
             print(f"Error getting latest record: {e}")
             return None
     
+    # 指标类型 → (latest_vitals 数值列, 测量时间列)
+    LATEST_METRIC_COLUMNS = {
+        "heart_rate": (("heart_rate",), "heart_rate_at"),
+        "blood_pressure": (("systolic_pressure", "diastolic_pressure"), "blood_pressure_at"),
+        "systolic_pressure": (("systolic_pressure",), "blood_pressure_at"),
+        "diastolic_pressure": (("diastolic_pressure",), "blood_pressure_at"),
+        "blood_sugar": (("blood_sugar",), "blood_sugar_at"),
+        "temperature": (("temperature",), "temperature_at"),
+        "blood_oxygen": (("blood_oxygen",), "blood_oxygen_at"),
+        "weight": (("weight",), "weight_at"),
+        "steps": (("steps",), "steps_at"),
+        "step_count": (("steps",), "steps_at"),
+    }
+    
     def get_latest_records_by_types(self, elderly_id: uuid.UUID, 
-                                  data_types: List[str]) -> Dict[str, Optional[HealthRecord]]:
-        """获取多种类型的最新健康记录"""
-        result = {}
+                                  data_types: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """获取多种指标的最新值（读取 latest_vitals 快照，一次主键查询）
         
-        try:
-            for data_type in data_types:
-                record = self.get_latest_record(elderly_id, data_type)
-                result[data_type] = record
-            
+        Returns:
+            指标类型 → {数值列: 值, ..., "recorded_at": 测量时间}；没有数据或不支持的类型为 None
+        """
+        result = {data_type: None for data_type in data_types}
+        
+        snapshot = LatestVitalsRepository(self.db).get_by_elderly_id(elderly_id)
+        if snapshot is None:
             return result
         
-        except Exception as e:
-            print(f"Error getting latest records by types: {e}")
-            # 返回空的结果字典，避免调用方出错
-            return {data_type: None for data_type in data_types}
+        for data_type in data_types:
+            columns = self.LATEST_METRIC_COLUMNS.get(data_type)
+            if columns is None:
+                continue
+            value_columns, at_column = columns
+            recorded_at = getattr(snapshot, at_column)
+            values = {column: getattr(snapshot, column) for column in value_columns}
+            if recorded_at is None or all(value is None for value in values.values()):
+                continue
+            result[data_type] = {**values, "recorded_at": recorded_at}
+        
+        return result
     
     def get_records_by_date_range(self, elderly_id: uuid.UUID, data_type: str,
                                 start_date: datetime, end_date: datetime, 
@@ -94,105 +123,151 @@ class HealthRepository(BaseRepository[HealthRecord]):
             print(f"Error getting records by date range: {e}")
             return []
     
-    def get_daily_summary(self, elderly_id: uuid.UUID, date: datetime) -> Dict[str, Any]:
-        """获取指定日期的健康数据汇总"""
-        # 定义一天的时间范围
-        start_of_day = date.replace(hour=0, minute=0, second=0, microsecond=0)
-        end_of_day = date.replace(hour=23, minute=59, second=59, microsecond=999999)
-        
-        # 定义需要统计的数据类型
-        data_types = ["heart_rate", "blood_pressure", "blood_sugar", "temperature", "step_count", "sleep_time"]
-        
-        summary = {
-            "date": date.date(),
-            "data_count": 0,
-            "has_abnormal": False,
-            "health_metrics": {}
-        }
+    # 根据不同的健康数据类型设置不同的正常范围
+    NORMAL_RANGES = {
+        "heart_rate": (60, 100),  # 心率：60-100次/分
+        "blood_pressure": (80, 140),  # 收缩压：90-140mmHg，舒张压：60-90mmHg
+        "blood_sugar": (3.9, 6.1),  # 血糖：3.9-6.1mmol/L（空腹）
+        "temperature": (36.0, 37.5),  # 体温：36.0-37.5℃
+        "step_count": (5000, 15000),  # 步数：5000-15000步/天
+        "sleep_time": (6, 9)  # 睡眠时间：6-9小时/天
+    }
+    
+    # 告警描述模板
+    ALERT_DESCRIPTIONS = {
+        "heart_rate": "心率异常: {value}次/分",
+        "blood_pressure": "血压异常: {value}mmHg",
+        "blood_sugar": "血糖异常: {value}mmol/L",
+        "temperature": "体温异常: {value}℃",
+        "step_count": "步数异常: {value}步",
+        "sleep_time": "睡眠时间异常: {value}小时"
+    }
+    
+    # 批量写入时每条INSERT语句包含的最大行数
+    BULK_INSERT_CHUNK_SIZE = 1000
+    
+    # 每日汇总/趋势统计的指标列
+    SUMMARY_METRICS = [
+        "heart_rate", "systolic_pressure", "diastolic_pressure", "blood_sugar",
+        "temperature", "blood_oxygen", "weight", "steps"
+    ]
+    
+    # 按指标列的正常范围（没有列出的指标不判断异常）
+    METRIC_NORMAL_RANGES = {
+        "heart_rate": (60, 100),  # 心率：60-100次/分
+        "systolic_pressure": (90, 140),  # 收缩压：90-140mmHg
+        "diastolic_pressure": (60, 90),  # 舒张压：60-90mmHg
+        "blood_sugar": (3.9, 6.1),  # 血糖：3.9-6.1mmol/L（空腹）
+        "temperature": (36.0, 37.5),  # 体温：36.0-37.5℃
+        "blood_oxygen": (94, 100)  # 血氧：低于94%为异常
+    }
+    
+    def _fetch_daily_aggregates(self, elderly_id: uuid.UUID, start_time: datetime,
+                                end_time: datetime) -> List[Any]:
+        """一次 GROUP BY 日期查询取出窗口内每天每个指标的 min/max/sum/count"""
+        day = func.date(HealthRecord.recorded_at)
+        columns = [
+            day.label("day"),
+            func.count(HealthRecord.id).label("record_count"),
+            func.sum(case((HealthRecord.status != HealthRecordStatus.NORMAL, 1), else_=0)).label("abnormal_count")
+        ]
+        for metric in self.SUMMARY_METRICS:
+            column = getattr(HealthRecord, metric)
+            columns.extend([
+                func.min(column).label(f"{metric}_min"),
+                func.max(column).label(f"{metric}_max"),
+                func.sum(column).label(f"{metric}_sum"),
+                func.count(column).label(f"{metric}_count")
+            ])
+        
+        return self.db.query(*columns).filter(
+            HealthRecord.elderly_id == elderly_id,
+            HealthRecord.recorded_at >= start_time,
+            HealthRecord.recorded_at <= end_time
+        ).group_by(day).all()
+    
+    def _metric_abnormal(self, metric: str, min_value: float, max_value: float) -> bool:
+        """当天该指标是否有超出正常范围的读数（由当天的最小/最大值判断）"""
+        normal_range = self.METRIC_NORMAL_RANGES.get(metric)
+        if normal_range is None:
+            return False
+        return min_value < normal_range[0] or max_value > normal_range[1]
+    
+    def get_daily_summaries(self, elderly_id: uuid.UUID, start_date: datetime,
+                            end_date: datetime) -> List[Dict[str, Any]]:
+        """获取日期范围内（含首尾两天）逐日的健康数据汇总
+        
+        整个窗口只查询一次数据库：按 recorded_at 的日期分组，在 SQL 中聚合各指标列。
+        """
+        first_day = start_date.date()
+        num_days = (end_date.date() - first_day).days + 1
+        if num_days <= 0:
+            return []
+        
+        summaries = [
+            {
+                "date": first_day + timedelta(days=i),
+                "data_count": 0,
+                "has_abnormal": False,
+                "health_metrics": {}
+            }
+            for i in range(num_days)
+        ]
+        
+        window_start = datetime.combine(first_day, datetime.min.time())
+        window_end = datetime.combine(end_date.date(), datetime.max.time())
+        if start_date.tzinfo is not None:
+            window_start = window_start.replace(tzinfo=start_date.tzinfo)
+            window_end = window_end.replace(tzinfo=start_date.tzinfo)
         
         try:
-            for data_type in data_types:
-                # 查询该类型当天的所有记录
-                records = self.db.query(HealthRecord).filter(
-                    HealthRecord.elderly_id == elderly_id,
-                    HealthRecord.data_type == data_type,
-                    HealthRecord.record_time >= start_of_day,
-                    HealthRecord.record_time <= end_of_day
-                ).all()
-                
-                if records:
-                    summary["data_count"] += len(records)
-                    
-                    # 检查是否有异常记录
-                    has_abnormal = any(not record.is_normal for record in records)
-                    summary["has_abnormal"] = summary["has_abnormal"] or has_abnormal
-                    
-                    # 血压特殊处理，分别统计收缩压和舒张压
-                    if data_type == "blood_pressure":
-                        # 这里需要从记录中提取收缩压和舒张压（假设值存储为字符串 "收缩压/舒张压"）
-                        systolic_values = []
-                        diastolic_values = []
-                        
-                        for record in records:
-                            try:
-                                # 假设值存储格式为 "收缩压,舒张压"
-                                systolic, diastolic = map(float, str(record.value).split(','))
-                                systolic_values.append(systolic)
-                                diastolic_values.append(diastolic)
-                            except (ValueError, AttributeError, TypeError):
-                                # 处理可能的格式错误
-                                pass
-                        
-                        if systolic_values and diastolic_values:
-                            summary["health_metrics"]["systolic_pressure"] = {
-                                "min": min(systolic_values),
-                                "max": max(systolic_values),
-                                "avg": sum(systolic_values) / len(systolic_values),
-                                "count": len(systolic_values),
-                                "has_abnormal": any(v > 140 or v < 90 for v in systolic_values)
-                            }
-                            
-                            summary["health_metrics"]["diastolic_pressure"] = {
-                                "min": min(diastolic_values),
-                                "max": max(diastolic_values),
-                                "avg": sum(diastolic_values) / len(diastolic_values),
-                                "count": len(diastolic_values),
-                                "has_abnormal": any(v > 90 or v < 60 for v in diastolic_values)
-                            }
-                    else:
-                        # 其他数据类型的处理
-                        values = [record.value for record in records]
-                        summary["health_metrics"][data_type] = {
-                            "min": min(values),
-                            "max": max(values),
-                            "avg": sum(values) / len(values),
-                            "count": len(values),
-                            "has_abnormal": has_abnormal
-                        }
+            rows = self._fetch_daily_aggregates(elderly_id, window_start, window_end)
+        except Exception as e:
+            print(f"Error getting daily summaries: {e}")
+            return summaries
+        
+        for row in rows:
+            # SQLite 的 date() 返回字符串，PostgreSQL 返回 date
+            day = date.fromisoformat(row.day) if isinstance(row.day, str) else row.day
+            offset = (day - first_day).days
+            if offset < 0 or offset >= num_days:
+                continue
+            summary = summaries[offset]
+            summary["data_count"] = int(row.record_count)
+            summary["has_abnormal"] = bool(row.abnormal_count)
             
-            return summary
+            for metric in self.SUMMARY_METRICS:
+                count = getattr(row, f"{metric}_count")
+                if not count:
+                    continue
+                min_value = float(getattr(row, f"{metric}_min"))
+                max_value = float(getattr(row, f"{metric}_max"))
+                summary["health_metrics"][metric] = {
+                    "min": min_value,
+                    "max": max_value,
+                    "avg": float(getattr(row, f"{metric}_sum")) / count,
+                    "count": int(count),
+                    "has_abnormal": self._metric_abnormal(metric, min_value, max_value)
+                }
         
-        except Exception as e:
-            print(f"Error getting daily summary: {e}")
-            return summary
+        return summaries
+    
+    def get_daily_summary(self, elderly_id: uuid.UUID, date: datetime) -> Dict[str, Any]:
+        """获取指定日期的健康数据汇总"""
+        return self.get_daily_summaries(elderly_id, date, date)[0]
     
     def get_weekly_trend(self, elderly_id: uuid.UUID, data_type: str, days: int = 7) -> List[Dict[str, Any]]:
         """获取指定健康指标的周趋势数据"""
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
         
-        trend_data = []
-        
         try:
-            # 按天分组获取统计数据
-            current_date = start_date
-            while current_date <= end_date:
-                daily_summary = self.get_daily_summary(elderly_id, current_date)
-                
-                if data_type in daily_summary["health_metrics"]:
-                    metric_data = daily_summary["health_metrics"][data_type]
+            trend_data = []
+            for daily_summary in self.get_daily_summaries(elderly_id, start_date, end_date):
+                metric_data = daily_summary["health_metrics"].get(data_type)
+                if metric_data:
                     trend_data.append({
-                        "date": current_date.date(),
+                        "date": daily_summary["date"],
                         "value": metric_data["avg"],
                         "max": metric_data["max"],
                         "min": metric_data["min"],
@@ -201,14 +276,12 @@ class HealthRepository(BaseRepository[HealthRecord]):
                 else:
                     # 如果当天没有数据，添加一个空记录
                     trend_data.append({
-                        "date": current_date.date(),
+                        "date": daily_summary["date"],
                         "value": None,
                         "max": None,
                         "min": None,
                         "has_abnormal": False
                     })
-                
-                current_date += timedelta(days=1)
             
             return trend_data
         
@@ -278,15 +351,7 @@ class HealthRepository(BaseRepository[HealthRecord]):
     
     def _check_health_normal(self, data_type: str, value: float) -> bool:
         """检查健康数据是否在正常范围内"""
-        # 根据不同的健康数据类型设置不同的正常范围
-        normal_ranges = {
-            "heart_rate": (60, 100),  # 心率：60-100次/分
-            "blood_pressure": (80, 140),  # 收缩压：90-140mmHg，舒张压：60-90mmHg
-            "blood_sugar": (3.9, 6.1),  # 血糖：3.9-6.1mmol/L（空腹）
-            "temperature": (36.0, 37.5),  # 体温：36.0-37.5℃
-            "step_count": (5000, 15000),  # 步数：5000-15000步/天
-            "sleep_time": (6, 9)  # 睡眠时间：6-9小时/天
-        }
+        normal_ranges = self.NORMAL_RANGES
         
         # 检查是否为有效范围
         if data_type not in normal_ranges:
@@ -316,16 +381,7 @@ class HealthRepository(BaseRepository[HealthRecord]):
         """创建健康告警"""
         try:
             # 构建告警描述
-            alert_descriptions = {
-                "heart_rate": f"心率异常: {value}次/分",
-                "blood_pressure": f"血压异常: {value}mmHg",
-                "blood_sugar": f"血糖异常: {value}mmol/L",
-                "temperature": f"体温异常: {value}℃",
-                "step_count": f"步数异常: {value}步",
-                "sleep_time": f"睡眠时间异常: {value}小时"
-            }
-            
-            description = alert_descriptions.get(data_type, f"健康指标异常: {data_type} = {value}")
+            description = self._build_alert_description(data_type, value)
             
             # 检查是否已有相同类型的未处理告警，如果有则不重复创建
             existing_alert = self.db.query(Alert).filter(
@@ -356,52 +412,270 @@ class HealthRepository(BaseRepository[HealthRecord]):
             print(f"Error creating health alert: {e}")
             return None
     
-    def batch_add_health_records(self, records: List[Dict[str, Any]]) -> List[HealthRecord]:
-        """批量添加健康记录"""
-        created_records = []
+    def _build_alert_description(self, data_type: str, value: Any) -> str:
+        """构建告警描述"""
+        template = self.ALERT_DESCRIPTIONS.get(data_type)
+        if template is None:
+            return f"健康指标异常: {data_type} = {value}"
+        return template.format(value=value)
+    
+    # 指标超出正常范围时的预警：指标列 → (偏低类型, 偏高类型, 中文名, 单位, 记录状态)
+    METRIC_ALERTS = {
+        "heart_rate": (AlertType.HEART_RATE_LOW, AlertType.HEART_RATE_HIGH, "心率", "次/分",
+                       HealthRecordStatus.WARNING),
+        "systolic_pressure": (AlertType.BLOOD_PRESSURE_LOW, AlertType.BLOOD_PRESSURE_HIGH, "收缩压", "mmHg",
+                              HealthRecordStatus.WARNING),
+        "diastolic_pressure": (AlertType.BLOOD_PRESSURE_LOW, AlertType.BLOOD_PRESSURE_HIGH, "舒张压", "mmHg",
+                               HealthRecordStatus.WARNING),
+        "blood_sugar": (AlertType.BLOOD_SUGAR_LOW, AlertType.BLOOD_SUGAR_HIGH, "血糖", "mmol/L",
+                        HealthRecordStatus.WARNING),
+        "temperature": (AlertType.TEMPERATURE_LOW, AlertType.TEMPERATURE_HIGH, "体温", "℃",
+                        HealthRecordStatus.WARNING),
+        # 血氧只有偏低预警，不检查上限
+        "blood_oxygen": (AlertType.BLOOD_OXYGEN_LOW, None, "血氧", "%", HealthRecordStatus.DANGER)
+    }
+    
+    # 记录状态 → 预警严重程度
+    STATUS_SEVERITY = {
+        HealthRecordStatus.WARNING: AlertSeverity.MEDIUM,
+        HealthRecordStatus.DANGER: AlertSeverity.HIGH
+    }
+    
+    def _check_metrics_batch(self, records: List[Dict[str, Any]]) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """批量检查各指标列是否超出正常范围
         
-        try:
-            for record_data in records:
-                # 验证必要字段
-                if 'elderly_id' not in record_data or 'data_type' not in record_data or 'value' not in record_data:
-                    continue
-                
-                # 检查是否有相同类型的最新记录
-                latest_record = self.get_latest_record(record_data['elderly_id'], record_data['data_type'])
-                
-                # 确定健康记录是否正常
-                is_normal = self._check_health_normal(record_data['data_type'], record_data['value'])
-                
-                # 创建健康记录
-                health_record = HealthRecord(
-                    elderly_id=record_data['elderly_id'],
-                    data_type=record_data['data_type'],
-                    value=record_data['value'],
-                    record_time=record_data.get('record_time', datetime.now()),
-                    is_normal=is_normal
-                )
-                
-                self.db.add(health_record)
-                created_records.append(health_record)
-                
-                # 如果异常，创建告警
-                if not is_normal:
-                    self._create_health_alert(
-                        record_data['elderly_id'],
-                        record_data['data_type'],
-                        record_data['value'],
-                        health_record.record_time
-                    )
+        每个指标列构造成数组后一次性与上下限比较，空值视为正常；没有偏高预警类型的指标只比较下限。
+        
+        Returns:
+            Dict: 指标列 → (偏低掩码, 偏高掩码)
+        """
+        masks = {}
+        for metric, (min_value, max_value) in self.METRIC_NORMAL_RANGES.items():
+            values = np.asarray(
+                [np.nan if record.get(metric) is None else float(record[metric]) for record in records],
+                dtype=float
+            )
+            with np.errstate(invalid="ignore"):
+                low_mask = values < min_value
+                if self.METRIC_ALERTS[metric][1] is None:
+                    high_mask = np.zeros(len(values), dtype=bool)
+                else:
+                    high_mask = values > max_value
+            masks[metric] = (low_mask, high_mask)
+        return masks
+    
+    def _validate_batch(self, records: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+        """校验批量记录，返回有效记录和被丢弃的数量"""
+        valid_records = []
+        skipped = 0
+        
+        for record_data in records:
+            # 必须有老人ID和至少一项指标
+            present = [metric for metric in self.SUMMARY_METRICS if record_data.get(metric) is not None]
+            if record_data.get('elderly_id') is None or not present:
+                skipped += 1
+                continue
             
-            self.db.commit()
+            # 指标值必须能转换为数字
+            try:
+                for metric in present:
+                    float(record_data[metric])
+            except (TypeError, ValueError):
+                skipped += 1
+                continue
             
-            # 刷新所有创建的记录
-            for record in created_records:
-                self.db.refresh(record)
+            valid_records.append(record_data)
+        
+        return valid_records, skipped
+    
+    def _get_open_alert_keys(self, elderly_ids: List[uuid.UUID]) -> set:
+        """一次性预取这些老人的未处理告警，返回 (elderly_id, alert_type) 集合"""
+        if not elderly_ids:
+            return set()
+        
+        rows = self.db.query(Alert.elderly_id, Alert.alert_type).filter(
+            Alert.elderly_id.in_(elderly_ids),
+            Alert.status == AlertStatus.ACTIVE
+        ).distinct().all()
+        
+        return {(elderly_id, alert_type) for elderly_id, alert_type in rows}
+    
+    def _prepare_batch(self, records: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], int]:
+        """校验批量记录，并生成待写入的健康记录行和去重后的告警行"""
+        valid_records, skipped = self._validate_batch(records)
+        if not valid_records:
+            return [], [], skipped
+        
+        masks = self._check_metrics_batch(valid_records)
+        
+        # 与已有的未处理告警以及本批次内已生成的告警去重
+        open_alert_keys = self._get_open_alert_keys(
+            list({record['elderly_id'] for record in valid_records})
+        )
+        
+        now = datetime.now()
+        record_rows = []
+        alert_rows = []
+        for i, record_data in enumerate(valid_records):
+            # 多行INSERT要求每行的列相同
+            row = {
+                "id": uuid.uuid4(),
+                "elderly_id": record_data['elderly_id'],
+                "notes": record_data.get('notes'),
+                "status": HealthRecordStatus.NORMAL,
+                "recorded_at": record_data.get('recorded_at') or now
+            }
+            for metric in self.SUMMARY_METRICS:
+                row[metric] = record_data.get(metric)
+            record_rows.append(row)
+            
+            for metric, (low_mask, high_mask) in masks.items():
+                if not (low_mask[i] or high_mask[i]):
+                    continue
+                low_type, high_type, name, unit, status = self.METRIC_ALERTS[metric]
+                # 记录状态取最严重的一项
+                if status == HealthRecordStatus.DANGER or row["status"] == HealthRecordStatus.NORMAL:
+                    row["status"] = status
+                
+                alert_type = high_type if high_mask[i] else low_type
+                alert_key = (row["elderly_id"], alert_type)
+                if alert_key in open_alert_keys:
+                    continue
+                open_alert_keys.add(alert_key)
+                alert_rows.append({
+                    "id": uuid.uuid4(),
+                    "elderly_id": row["elderly_id"],
+                    "alert_type": alert_type,
+                    "alert_message": f"{name}{'偏高' if high_mask[i] else '偏低'}: {row[metric]}{unit}",
+                    "severity": self.STATUS_SEVERITY[status],
+                    "status": AlertStatus.ACTIVE,
+                    "health_record_id": row["id"],
+                    "created_at": row["recorded_at"]
+                })
+        
+        return record_rows, alert_rows, skipped
+    
+    def bulk_ingest_health_records(self, records: List[Dict[str, Any]]) -> Dict[str, int]:
+        """高吞吐批量写入健康记录
+        
+        整批只做一次告警预取，并以多行INSERT写入记录和告警，在同一事务中提交。
+        不返回ORM对象，适用于可穿戴网关等大批量上传场景。
+        
+        Args:
+            records: 健康记录列表，每项需包含 elderly_id 和至少一项指标列
+                     （heart_rate、systolic_pressure 等），可选 recorded_at、notes
             
-            return created_records
+        Returns:
+            Dict[str, int]: 写入记录数、被丢弃的无效记录数、新建告警数
+        """
+        try:
+            record_rows, alert_rows, skipped = self._prepare_batch(records)
+        except Exception as e:
+            self.db.rollback()
+            print(f"Error bulk ingesting health records: {e}")
+            raise
         
+        self.bulk_insert_records(record_rows, alert_rows)
+        return {"inserted": len(record_rows), "skipped": skipped, "alerts_created": len(alert_rows)}
+    
+    def bulk_insert_records(self, rows: List[Dict[str, Any]],
+                            alert_rows: Optional[List[Dict[str, Any]]] = None) -> int:
+        """按列直接批量写入健康记录，并更新最新生命体征快照、个人基线和变点检测器（用于 IoT 写入流水线）
+
+        Args:
+            rows: HealthRecord 列字典（elderly_id、heart_rate、blood_oxygen、recorded_at 等）
+            alert_rows: 与记录在同一事务中写入的 Alert 列字典（可选）
+
+        Returns:
+            int: 写入的记录数
+        """
+        if not rows:
+            return 0
+
+        try:
+            chunk_size = self.BULK_INSERT_CHUNK_SIZE
+            for i in range(0, len(rows), chunk_size):
+                self.db.execute(insert(HealthRecord).values(rows[i:i + chunk_size]))
+            # 告警引用记录ID，在记录之后写入
+            alert_rows = alert_rows or []
+            for i in range(0, len(alert_rows), chunk_size):
+                self.db.execute(insert(Alert).values(alert_rows[i:i + chunk_size]))
+            # 最新生命体征快照与记录在同一事务中更新
+            LatestVitalsRepository(self.db).upsert_rows(rows)
+            HealthBaselineRepository(self.db).update_from_rows(rows)
+            # 检测到的变点与记录在同一事务中写入预警
+            ChangePointRepository(self.db).update_from_rows(rows)
+            self.db.commit()
+            return len(rows)
+
+        except Exception as e:
+            self.db.rollback()
+            print(f"Error bulk inserting health records: {e}")
+            raise
+
+    def batch_add_health_records(self, records: List[Dict[str, Any]]) -> List[HealthRecord]:
+        """批量添加健康记录"""
+        try:
+            record_rows, alert_rows, _ = self._prepare_batch(records)
         except Exception as e:
             self.db.rollback()
             print(f"Error batch adding health records: {e}")
-            raise
\ No newline at end of file
+            raise
+        
+        if not record_rows:
+            return []
+        self.bulk_insert_records(record_rows, alert_rows)
+        
+        # 写入后一次查询取回ORM对象，按输入顺序返回
+        ids = [row["id"] for row in record_rows]
+        created = {record.id: record for record in self.db.query(HealthRecord).filter(HealthRecord.id.in_(ids))}
+        return [created[record_id] for record_id in ids]
+
+
+class AsyncHealthRepository(AsyncBaseRepository[HealthRecord]):
+    """健康记录数据访问类（AsyncSession 版本，供仪表盘等高频异步路由使用）"""
+    
+    def __init__(self, db: "AsyncSession"):
+        super().__init__(db, HealthRecord)
+    
+    async def get_records_since(self, elderly_id: uuid.UUID, start_time: datetime,
+                                limit: int = 5000) -> List[HealthRecord]:
+        """获取老人从 start_time 起的健康记录（按测量时间升序）"""
+        try:
+            result = await self.db.execute(
+                select(HealthRecord).where(
+                    HealthRecord.elderly_id == elderly_id,
+                    HealthRecord.recorded_at >= start_time
+                ).order_by(HealthRecord.recorded_at).limit(limit)
+            )
+            return list(result.scalars().all())
+        except Exception as e:
+            print(f"Error getting health records since {start_time}: {e}")
+            return []
+    
+    async def get_latest_record(self, elderly_id: uuid.UUID) -> Optional[HealthRecord]:
+        """获取老人最新的一条健康记录"""
+        try:
+            result = await self.db.execute(
+                select(HealthRecord).where(
+                    HealthRecord.elderly_id == elderly_id
+                ).order_by(desc(HealthRecord.recorded_at)).limit(1)
+            )
+            return result.scalars().first()
+        except Exception as e:
+            print(f"Error getting latest health record: {e}")
+            return None
+    
+    async def get_sleep_records_since(self, elderly_id: uuid.UUID, start_date: date) -> List[SleepData]:
+        """获取老人从 start_date 起的睡眠数据"""
+        try:
+            result = await self.db.execute(
+                select(SleepData).where(
+                    SleepData.elderly_id == elderly_id,
+                    SleepData.date >= start_date
+                ).order_by(SleepData.date)
+            )
+            return list(result.scalars().all())
+        except Exception as e:
+            print(f"Error getting sleep records: {e}")
+            return []
@@ -0,0 +1,215 @@
+"""健康记录日汇总与保留期清理相关的Repository类"""
+from typing import List, Dict, Any
+from datetime import date, datetime, timedelta
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, case, func, select, text, update, delete
+import uuid
+
+from repositories.base import BaseRepository, insert_construct
+from database.models import HealthRecord, HealthRecordDaily, HealthRecordStatus, Alert
+from database import partitioning
+
+
+class HealthRollupRepository(BaseRepository[HealthRecordDaily]):
+    """健康记录日汇总数据访问类
+
+    超过保留期的原始记录按 (老人, 日期) 汇总到 health_record_daily 后删除。
+    每个时间段的汇总和删除在同一事务中完成，任务中断后重跑不会重复计数。
+    """
+
+    # 汇总的数值指标（health_record_daily 中对应 _sum/_count/_min/_max 列）
+    METRICS = [
+        "heart_rate", "systolic_pressure", "diastolic_pressure",
+        "blood_sugar", "temperature", "blood_oxygen", "weight"
+    ]
+
+    # 逐行删除时每条 DELETE 的最大行数
+    DELETE_BATCH_SIZE = 50000
+
+    def __init__(self, db: Session):
+        super().__init__(db, HealthRecordDaily)
+
+    # ------------------------------------------------------------------
+    # 汇总
+    # ------------------------------------------------------------------
+
+    def rollup_range(self, start: datetime, end: datetime) -> int:
+        """将 [start, end) 内的原始记录汇总并合并到日汇总表（不提交）
+
+        Returns:
+            int: 写入/合并的 (老人, 日期) 行数
+        """
+        columns = ["elderly_id", "day", "record_count", "abnormal_count"]
+        aggregates = [
+            HealthRecord.elderly_id,
+            func.date(HealthRecord.recorded_at),
+            func.count(),
+            func.sum(case((HealthRecord.status != HealthRecordStatus.NORMAL, 1), else_=0)),
+        ]
+        for metric in self.METRICS:
+            column = getattr(HealthRecord, metric)
+            columns.extend([f"{metric}_sum", f"{metric}_count", f"{metric}_min", f"{metric}_max"])
+            aggregates.extend([func.sum(column), func.count(column), func.min(column), func.max(column)])
+        columns.append("steps_max")
+        aggregates.append(func.max(HealthRecord.steps))
+
+        source = select(*aggregates).where(
+            HealthRecord.recorded_at >= start,
+            HealthRecord.recorded_at < end
+        ).group_by(HealthRecord.elderly_id, func.date(HealthRecord.recorded_at))
+
+        insert = insert_construct(self.db)
+        stmt = insert(HealthRecordDaily).from_select(columns, source)
+        new, old = stmt.excluded, HealthRecordDaily.__table__.c
+
+        def add(name):
+            return case(
+                (old[name].is_(None), new[name]),
+                (new[name].is_(None), old[name]),
+                else_=old[name] + new[name]
+            )
+
+        def pick(name, smaller: bool):
+            better = new[name] < old[name] if smaller else new[name] > old[name]
+            return case(
+                (old[name].is_(None), new[name]),
+                (new[name].is_(None), old[name]),
+                (better, new[name]),
+                else_=old[name]
+            )
+
+        updates = {
+            "record_count": old.record_count + new.record_count,
+            "abnormal_count": old.abnormal_count + new.abnormal_count,
+            "steps_max": pick("steps_max", smaller=False),
+            "updated_at": func.now(),
+        }
+        for metric in self.METRICS:
+            updates[f"{metric}_sum"] = add(f"{metric}_sum")
+            updates[f"{metric}_count"] = old[f"{metric}_count"] + new[f"{metric}_count"]
+            updates[f"{metric}_min"] = pick(f"{metric}_min", smaller=True)
+            updates[f"{metric}_max"] = pick(f"{metric}_max", smaller=False)
+
+        result = self.db.execute(stmt.on_conflict_do_update(
+            index_elements=["elderly_id", "day"], set_=updates
+        ))
+        return max(result.rowcount or 0, 0)
+
+    # ------------------------------------------------------------------
+    # 清理
+    # ------------------------------------------------------------------
+
+    def _detach_alerts(self, start: datetime, end: datetime) -> None:
+        """解除告警对将被删除记录的引用"""
+        record_ids = select(HealthRecord.id).where(
+            HealthRecord.recorded_at >= start,
+            HealthRecord.recorded_at < end
+        )
+        self.db.execute(
+            update(Alert).where(Alert.health_record_id.in_(record_ids)).values(health_record_id=None)
+        )
+
+    def purge_range(self, start: datetime, end: datetime) -> int:
+        """分批删除 [start, end) 内的原始记录（不提交），返回删除行数"""
+        self._detach_alerts(start, end)
+        deleted = 0
+        while True:
+            batch_ids = select(HealthRecord.id).where(
+                HealthRecord.recorded_at >= start,
+                HealthRecord.recorded_at < end
+            ).limit(self.DELETE_BATCH_SIZE)
+            result = self.db.execute(
+                delete(HealthRecord).where(HealthRecord.id.in_(batch_ids)).execution_options(synchronize_session=False)
+            )
+            deleted += result.rowcount or 0
+            if not result.rowcount or result.rowcount < self.DELETE_BATCH_SIZE:
+                return deleted
+
+    def archive_before(self, cutoff: date) -> Dict[str, int]:
+        """
+        将 cutoff 之前的原始记录汇总到日汇总表并删除
+
+        分区表中整月早于 cutoff 的分区汇总后整体删除，其余数据按天汇总并删除。
+        每个分区/每天一个事务。
+
+        Returns:
+            Dict[str, int]: 汇总行数、删除的记录数、删除的分区数
+        """
+        stats = {"rolled_up": 0, "deleted": 0, "partitions_dropped": 0}
+        cutoff_time = datetime.combine(cutoff, datetime.min.time())
+
+        try:
+            conn = self.db.connection()
+            if partitioning.is_partitioned(conn):
+                for name in partitioning.partitions_before(conn, cutoff):
+                    year, month = map(int, name.rsplit("_", 2)[1:])
+                    start = datetime(year, month, 1)
+                    end = datetime(year + month // 12, month % 12 + 1, 1)
+                    stats["rolled_up"] += self.rollup_range(start, end)
+                    self._detach_alerts(start, end)
+                    stats["deleted"] += self.db.execute(
+                        text(f"SELECT count(*) FROM {name}")
+                    ).scalar() or 0
+                    partitioning.drop_partition(self.db.connection(), name)
+                    self.db.commit()
+                    stats["partitions_dropped"] += 1
+
+            # 逐个有数据的日期处理，跳过没有记录的日期
+            day_start = datetime.min
+            while True:
+                oldest = self.db.query(func.min(HealthRecord.recorded_at)).filter(
+                    HealthRecord.recorded_at >= day_start,
+                    HealthRecord.recorded_at < cutoff_time
+                ).scalar()
+                if oldest is None:
+                    return stats
+                day_start = datetime.combine(oldest.date(), datetime.min.time())
+                day_end = min(day_start + timedelta(days=1), cutoff_time)
+                stats["rolled_up"] += self.rollup_range(day_start, day_end)
+                stats["deleted"] += self.purge_range(day_start, day_end)
+                self.db.commit()
+                day_start = day_end
+
+        except Exception as e:
+            self.db.rollback()
+            print(f"Error archiving health records: {e}")
+            raise
+
+    # ------------------------------------------------------------------
+    # 读取
+    # ------------------------------------------------------------------
+
+    def get_daily(self, elderly_id: uuid.UUID, start_day: date, end_day: date) -> List[HealthRecordDaily]:
+        """获取老人在 [start_day, end_day] 内的日汇总"""
+        try:
+            return self.db.query(HealthRecordDaily).filter(
+                and_(
+                    HealthRecordDaily.elderly_id == elderly_id,
+                    HealthRecordDaily.day >= start_day,
+                    HealthRecordDaily.day <= end_day
+                )
+            ).order_by(HealthRecordDaily.day).all()
+        except Exception as e:
+            print(f"Error getting daily rollups: {e}")
+            return []
+
+    @classmethod
+    def to_dict(cls, daily: HealthRecordDaily) -> Dict[str, Any]:
+        """日汇总转为与 HealthRepository 日汇总相近的结构（指标给出 min/max/avg/count）"""
+        metrics = {}
+        for metric in cls.METRICS:
+            count = getattr(daily, f"{metric}_count") or 0
+            if count:
+                metrics[metric] = {
+                    "min": getattr(daily, f"{metric}_min"),
+                    "max": getattr(daily, f"{metric}_max"),
+                    "avg": getattr(daily, f"{metric}_sum") / count,
+                    "count": count,
+                }
+        return {
+            "date": daily.day,
+            "data_count": daily.record_count,
+            "has_abnormal": daily.abnormal_count > 0,
+            "steps": daily.steps_max,
+            "health_metrics": metrics,
+        }
@@ -0,0 +1,252 @@
+"""最新生命体征快照相关的Repository类"""
+from typing import Optional, List, Dict, Any, Iterable, TYPE_CHECKING
+from datetime import datetime
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_, case, desc, func
+import uuid
+
+from repositories.base import BaseRepository, AsyncBaseRepository, insert_construct
+from database.models import LatestVitals, HealthRecord
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class LatestVitalsRepository(BaseRepository[LatestVitals]):
+    """最新生命体征快照数据访问类
+
+    latest_vitals 每位老人一行，每个指标保存最新值及其测量时间。
+    健康记录写入时在同一事务中 upsert，"最新/今日"类查询只读这一行，
+    不再按指标逐个 ORDER BY ... LIMIT 1 扫描 health_records。
+    """
+
+    # 指标组：时间戳列 → 该组的数值列（同组一起更新，如收缩压和舒张压）
+    METRIC_GROUPS = {
+        "heart_rate_at": ("heart_rate",),
+        "blood_pressure_at": ("systolic_pressure", "diastolic_pressure"),
+        "blood_sugar_at": ("blood_sugar",),
+        "temperature_at": ("temperature",),
+        "blood_oxygen_at": ("blood_oxygen",),
+        "weight_at": ("weight",),
+        "steps_at": ("steps",),
+    }
+
+    def __init__(self, db: Session):
+        super().__init__(db, LatestVitals)
+
+    # ------------------------------------------------------------------
+    # 写入
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def merge_rows(cls, rows: Iterable[Dict[str, Any]]) -> Dict[uuid.UUID, Dict[str, Any]]:
+        """将一批 HealthRecord 列字典合并为每位老人一行快照
+
+        每个指标取测量时间最新的非空值；步数取当天的最大值。
+        """
+        snapshots: Dict[uuid.UUID, Dict[str, Any]] = {}
+        now = datetime.now()
+
+        for row in rows:
+            elderly_id = row.get("elderly_id")
+            if elderly_id is None:
+                continue
+            recorded_at = row.get("recorded_at") or now
+            snapshot = snapshots.setdefault(elderly_id, {"elderly_id": elderly_id})
+
+            for at_column, value_columns in cls.METRIC_GROUPS.items():
+                values = {column: row.get(column) for column in value_columns}
+                if all(value is None for value in values.values()):
+                    continue
+                current_at = snapshot.get(at_column)
+                if at_column == "steps_at" and current_at is not None \
+                        and current_at.date() == recorded_at.date():
+                    snapshot["steps"] = max(snapshot["steps"], values["steps"])
+                    snapshot["steps_at"] = max(current_at, recorded_at)
+                elif current_at is None or recorded_at >= current_at:
+                    snapshot.update(values)
+                    snapshot[at_column] = recorded_at
+
+            if row.get("status") is not None:
+                last_recorded_at = snapshot.get("last_recorded_at")
+                if last_recorded_at is None or recorded_at >= last_recorded_at:
+                    snapshot["status"] = row["status"]
+                    snapshot["last_recorded_at"] = recorded_at
+
+        return snapshots
+
+    def upsert_rows(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """根据新写入的健康记录更新快照（不提交，由调用方与记录写入放在同一事务）
+
+        INSERT ... ON CONFLICT DO UPDATE 按指标比较测量时间，只有更新的数据会覆盖，
+        乱序到达或多个 worker 并发写入时结果一致。
+
+        Args:
+            rows: HealthRecord 列字典（elderly_id、heart_rate、recorded_at 等）
+
+        Returns:
+            int: 更新的老人数
+        """
+        snapshots = self.merge_rows(rows)
+        if not snapshots:
+            return 0
+
+        # 多行 VALUES 要求每行的列相同
+        columns = ["elderly_id", "status", "last_recorded_at"]
+        for at_column, value_columns in self.METRIC_GROUPS.items():
+            columns.extend(value_columns)
+            columns.append(at_column)
+        values = [{column: snapshot.get(column) for column in columns} for snapshot in snapshots.values()]
+
+        insert = insert_construct(self.db)
+        stmt = insert(LatestVitals).values(values)
+        new, old = stmt.excluded, LatestVitals.__table__.c
+
+        def newer(at_column: str):
+            return and_(
+                new[at_column].isnot(None),
+                or_(old[at_column].is_(None), new[at_column] >= old[at_column])
+            )
+
+        updates = {}
+        for at_column, value_columns in self.METRIC_GROUPS.items():
+            if at_column == "steps_at":
+                continue
+            is_newer = newer(at_column)
+            for column in value_columns + (at_column,):
+                updates[column] = case((is_newer, new[column]), else_=old[column])
+
+        # 步数：同一天取最大值，新的一天直接替换
+        new_day, old_day = func.date(new.steps_at), func.date(old.steps_at)
+        updates["steps"] = case(
+            (new.steps_at.is_(None), old.steps),
+            (old.steps_at.is_(None), new.steps),
+            (new_day > old_day, new.steps),
+            (new_day < old_day, old.steps),
+            (new.steps > old.steps, new.steps),
+            else_=old.steps
+        )
+        updates["steps_at"] = case((newer("steps_at"), new.steps_at), else_=old.steps_at)
+
+        is_newer = newer("last_recorded_at")
+        updates["status"] = case((is_newer, new.status), else_=old.status)
+        updates["last_recorded_at"] = case((is_newer, new.last_recorded_at), else_=old.last_recorded_at)
+        updates["updated_at"] = func.now()
+
+        self.db.execute(stmt.on_conflict_do_update(index_elements=["elderly_id"], set_=updates))
+        return len(snapshots)
+
+    def rebuild(self, elderly_ids: Optional[List[uuid.UUID]] = None) -> int:
+        """从 health_records 重建快照（用于首次建表或数据修复），并提交
+
+        每个指标组一次窗口函数查询取最新值，步数取当天的最大值。
+        """
+        try:
+            rows: List[Dict[str, Any]] = []
+
+            def scoped(query):
+                if elderly_ids is not None:
+                    query = query.filter(HealthRecord.elderly_id.in_(elderly_ids))
+                return query
+
+            def latest_rows(value_columns, condition):
+                ranked = scoped(self.db.query(
+                    HealthRecord.elderly_id.label("elderly_id"),
+                    *[getattr(HealthRecord, column).label(column) for column in value_columns],
+                    HealthRecord.recorded_at.label("recorded_at"),
+                    func.row_number().over(
+                        partition_by=HealthRecord.elderly_id,
+                        order_by=desc(HealthRecord.recorded_at)
+                    ).label("rank")
+                ).filter(condition)).subquery()
+                return self.db.query(ranked).filter(ranked.c.rank == 1).all()
+
+            for at_column, value_columns in self.METRIC_GROUPS.items():
+                if at_column == "steps_at":
+                    continue
+                condition = or_(*[getattr(HealthRecord, column).isnot(None) for column in value_columns])
+                for row in latest_rows(value_columns, condition):
+                    rows.append(dict(row._mapping))
+
+            for row in latest_rows(("status",), HealthRecord.status.isnot(None)):
+                rows.append(dict(row._mapping))
+
+            today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+            steps = scoped(self.db.query(
+                HealthRecord.elderly_id,
+                func.max(HealthRecord.steps),
+                func.max(HealthRecord.recorded_at)
+            ).filter(
+                HealthRecord.steps.isnot(None),
+                HealthRecord.recorded_at >= today
+            )).group_by(HealthRecord.elderly_id).all()
+            for elderly_id, max_steps, recorded_at in steps:
+                rows.append({"elderly_id": elderly_id, "steps": max_steps, "recorded_at": recorded_at})
+
+            count = self.upsert_rows(rows)
+            self.db.commit()
+            return count
+
+        except Exception as e:
+            self.db.rollback()
+            print(f"Error rebuilding latest vitals: {e}")
+            raise
+
+    # ------------------------------------------------------------------
+    # 读取
+    # ------------------------------------------------------------------
+
+    def get_by_elderly_id(self, elderly_id: uuid.UUID) -> Optional[LatestVitals]:
+        """获取老人的最新生命体征快照"""
+        try:
+            return self.db.query(LatestVitals).filter(LatestVitals.elderly_id == elderly_id).first()
+        except Exception as e:
+            print(f"Error getting latest vitals: {e}")
+            return None
+
+    def get_by_elderly_ids(self, elderly_ids: List[uuid.UUID]) -> Dict[uuid.UUID, LatestVitals]:
+        """批量获取多位老人的最新生命体征快照"""
+        if not elderly_ids:
+            return {}
+        try:
+            snapshots = self.db.query(LatestVitals).filter(LatestVitals.elderly_id.in_(elderly_ids)).all()
+            return {snapshot.elderly_id: snapshot for snapshot in snapshots}
+        except Exception as e:
+            print(f"Error getting latest vitals: {e}")
+            return {}
+
+    @classmethod
+    def today_values(cls, snapshot: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """从快照字典中取出今天测量的指标值，不是今天测量的指标不包含在内"""
+        if not snapshot:
+            return {}
+        today = datetime.now().date()
+        values = {}
+        for at_column, value_columns in cls.METRIC_GROUPS.items():
+            measured_at = snapshot.get(at_column)
+            if measured_at is not None and measured_at.date() == today:
+                values.update({column: snapshot.get(column) for column in value_columns})
+        return values
+    
+    @staticmethod
+    def to_dict(snapshot: LatestVitals) -> Dict[str, Any]:
+        """快照转为字典（可在会话关闭后缓存）"""
+        return {
+            column.name: getattr(snapshot, column.name)
+            for column in LatestVitals.__table__.columns
+        }
+
+
+class AsyncLatestVitalsRepository(AsyncBaseRepository[LatestVitals]):
+    """最新生命体征快照数据访问类（AsyncSession 版本，只读）"""
+
+    def __init__(self, db: "AsyncSession"):
+        super().__init__(db, LatestVitals)
+
+    async def get_by_elderly_id(self, elderly_id: uuid.UUID) -> Optional[LatestVitals]:
+        """获取老人的最新生命体征快照"""
+        try:
+            return await self.db.get(LatestVitals, elderly_id)
+        except Exception as e:
+            print(f"Error getting latest vitals: {e}")
+            return None
@@ -0,0 +1,114 @@
+"""提醒调度相关的Repository类"""
+from typing import Any, Dict, Iterator, List, Optional
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_, update
+
+from repositories.base import BaseRepository
+from database.models import Reminder, ReminderFrequency, ReminderStatus
+from utils.common_utils import DateUtils
+
+
+def next_occurrence(current: datetime, frequency: ReminderFrequency,
+                    after: Optional[datetime] = None) -> Optional[datetime]:
+    """计算重复提醒的下一次时间（日历运算）
+
+    每天/每周按天数相加，保留原来的时分秒；每月取下个月同一天，没有该日时取月末。
+    after 不为空时跳过已经错过的周期，返回第一个晚于 after 的时间。
+    一次性和自定义频率的提醒不自动展开，返回 None。
+    """
+    if after is not None:
+        # 与 current 统一为带时区/本地无时区的同一种形式再比较
+        if current.tzinfo is not None:
+            after = after.astimezone(current.tzinfo)
+        elif after.tzinfo is not None:
+            after = after.astimezone().replace(tzinfo=None)
+
+    if frequency == ReminderFrequency.DAILY:
+        step = timedelta(days=1)
+    elif frequency == ReminderFrequency.WEEKLY:
+        step = timedelta(weeks=1)
+    elif frequency == ReminderFrequency.MONTHLY:
+        step = None
+    else:
+        return None
+
+    if step is not None:
+        periods = 1
+        if after is not None and after >= current:
+            periods = (after - current) // step + 1
+        return current + step * periods
+
+    months = 1
+    if after is not None and after >= current:
+        months = max((after.year - current.year) * 12 + after.month - current.month, 1)
+    result = DateUtils.add_months(current, months)
+    while after is not None and result <= after:
+        months += 1
+        result = DateUtils.add_months(current, months)
+    return result
+
+
+class ReminderScheduleRepository(BaseRepository[Reminder]):
+    """提醒调度数据访问类
+
+    只读取 (status, next_reminder_time) 索引范围内的提醒，按 (时间, ID) 键集分页，
+    到期后一次 executemany 批量推进下一次时间或标记完成。
+    """
+
+    # 调度只需要的列（不加载完整实体，不进入会话的标识映射）
+    SCHEDULE_COLUMNS = (
+        Reminder.id, Reminder.elderly_id, Reminder.title, Reminder.description,
+        Reminder.reminder_type, Reminder.frequency, Reminder.next_reminder_time
+    )
+
+    def __init__(self, db: Session):
+        super().__init__(db, Reminder)
+
+    def iter_active_due_before(self, until: datetime, batch_size: int = 1000) -> Iterator[Any]:
+        """按到期时间顺序遍历 until 之前到期的活跃提醒（包括已错过的），返回 SCHEDULE_COLUMNS 行"""
+        last_time, last_id = None, None
+        while True:
+            query = self.db.query(*self.SCHEDULE_COLUMNS).filter(
+                Reminder.status == ReminderStatus.ACTIVE,
+                Reminder.next_reminder_time < until
+            )
+            if last_time is not None:
+                query = query.filter(or_(
+                    Reminder.next_reminder_time > last_time,
+                    and_(Reminder.next_reminder_time == last_time, Reminder.id > last_id)
+                ))
+            batch = query.order_by(Reminder.next_reminder_time, Reminder.id).limit(batch_size).all()
+            yield from batch
+            if len(batch) < batch_size:
+                return
+            last_time, last_id = batch[-1].next_reminder_time, batch[-1].id
+
+    def advance_fired(self, fired: List[Dict[str, Any]], now: datetime) -> List[Dict[str, Any]]:
+        """批量推进已触发的提醒（不提交）
+
+        Args:
+            fired: 已触发的提醒，每项包含 id、frequency、next_reminder_time
+            now: 当前时间，错过的周期直接跳过
+
+        Returns:
+            List[Dict]: 每项包含 id 和新的 next_reminder_time（不再重复的提醒为 None）
+        """
+        if not fired:
+            return []
+        updates, completed = [], []
+        for item in fired:
+            next_time = next_occurrence(item["next_reminder_time"], item["frequency"], after=now)
+            if next_time is None:
+                completed.append(item["id"])
+            else:
+                updates.append({"id": item["id"], "next_reminder_time": next_time})
+
+        if updates:
+            # 按主键的批量 UPDATE（executemany）
+            self.db.execute(update(Reminder), updates)
+        if completed:
+            self.db.query(Reminder).filter(Reminder.id.in_(completed)).update(
+                {Reminder.status: ReminderStatus.COMPLETED}, synchronize_session=False
+            )
+        return updates + [{"id": reminder_id, "next_reminder_time": None} for reminder_id in completed]
@@ -1,11 +1,15 @@
 """用户相关的Repository类"""
-from typing import Optional, List, Dict, Any
-from sqlalchemy.orm import Session
+from typing import Optional, List, Dict, Any, TYPE_CHECKING
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select
 import uuid
 
-from repositories.base import BaseRepository
+from repositories.base import BaseRepository, AsyncBaseRepository
 from database.models import User, UserStatus, ElderlyProfile, ChildrenProfile, CommunityProfile
 
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
 
 class UserRepository(BaseRepository[User]):
     """用户数据访问类"""
@@ -75,6 +79,18 @@ class UserRepository(BaseRepository[User]):
         
         return {"user": user, "profile": profile}
     
+    def get_with_profiles(self, user_id: uuid.UUID) -> Optional[User]:
+        """获取用户并在同一条查询中加载老人/子女/社区档案（认证时使用）"""
+        try:
+            return self.db.query(User).options(
+                joinedload(User.elderly_profile),
+                joinedload(User.children_profile),
+                joinedload(User.community_profile)
+            ).filter(User.id == user_id).first()
+        except Exception as e:
+            print(f"Error getting user with profiles: {e}")
+            return None
+    
     def search_users(self, keyword: str, role: Optional[str] = None, 
                     skip: int = 0, limit: int = 100) -> List[User]:
         """搜索用户（根据手机号或角色）"""
@@ -135,4 +151,41 @@ class UserRepository(BaseRepository[User]):
             return query.first() is not None
         except Exception as e:
             print(f"Error checking phone number existence: {e}")
-            return False
\ No newline at end of file
+            return False
+
+
+class AsyncUserRepository(AsyncBaseRepository[User]):
+    """用户数据访问类（AsyncSession 版本）"""
+    
+    def __init__(self, db: "AsyncSession"):
+        super().__init__(db, User)
+    
+    async def get_by_phone_number(self, phone_number: str) -> Optional[User]:
+        """根据手机号获取用户"""
+        return await self.get_one(phone_number=phone_number)
+    
+    async def get_with_profiles(self, user_id: uuid.UUID) -> Optional[User]:
+        """获取用户并预加载老人/子女/社区档案（异步会话中不能懒加载关系）"""
+        try:
+            result = await self.db.execute(
+                select(User).options(
+                    joinedload(User.elderly_profile),
+                    joinedload(User.children_profile),
+                    joinedload(User.community_profile)
+                ).where(User.id == user_id)
+            )
+            return result.scalars().first()
+        except Exception as e:
+            print(f"Error getting user with profiles: {e}")
+            return None
+    
+    async def find_by_username(self, keyword: str) -> Optional[User]:
+        """按用户名模糊匹配第一个用户"""
+        try:
+            result = await self.db.execute(
+                select(User).where(User.username.like(f"%{keyword}%")).limit(1)
+            )
+            return result.scalars().first()
+        except Exception as e:
+            print(f"Error finding user by username: {e}")
+            return None
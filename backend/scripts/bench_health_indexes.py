@@ -0,0 +1,271 @@
+"""
+健康记录索引/分区性能测试（需要 PostgreSQL，使用 settings.DATABASE_URL）
+
+在独立的 bench_health schema 中生成合成数据，对比建索引前后常用查询的执行计划和耗时：
+  1. 某位老人最新一条记录
+  2. 某位老人最近 7 天的记录
+  3. 某位老人未处理的告警
+  4. 到期提醒
+
+数值分布参照 data-creation/generate_fake_data.py（高血压/糖尿病老人血压、血糖偏高，
+测量时间集中在早晚）。该脚本在导入时就会生成 SQL 文件，且只有 3 位老人，
+因此这里不直接导入，而是用 generate_series 在数据库端按同样的分布生成，5000 万行也无需经过 Python。
+
+用法:
+    python scripts/bench_health_indexes.py                       # 5000 万行
+    python scripts/bench_health_indexes.py --rows 2000000 --partitioned
+    python scripts/bench_health_indexes.py --keep                # 保留 bench_health schema
+"""
+import argparse
+import statistics
+import sys
+import time
+from datetime import date
+sys.path.insert(0, '.')
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+
+from config.settings import settings
+from database.models import Alert, HealthRecord, Reminder
+
+SCHEMA = "bench_health"
+BATCH_ROWS = 1_000_000
+
+parser = argparse.ArgumentParser(description="健康记录索引/分区性能测试")
+parser.add_argument("--rows", type=int, default=50_000_000, help="健康记录行数")
+parser.add_argument("--elderly", type=int, default=20_000, help="老人数")
+parser.add_argument("--days", type=int, default=365, help="数据覆盖的天数")
+parser.add_argument("--partitioned", action="store_true", help="health_records 按月分区")
+parser.add_argument("--runs", type=int, default=20, help="每个查询的计时次数")
+parser.add_argument("--keep", action="store_true", help="结束后保留测试数据")
+args = parser.parse_args()
+
+engine = create_engine(settings.DATABASE_URL)
+if engine.dialect.name != "postgresql":
+    print("该测试需要 PostgreSQL（DATABASE_URL）")
+    sys.exit(1)
+
+
+def execute(conn, sql, **params):
+    return conn.execute(text(sql), params)
+
+
+def month_start(months_ago: int) -> date:
+    today = date.today()
+    month = today.year * 12 + today.month - 1 - months_ago
+    return date(month // 12, month % 12 + 1, 1)
+
+
+# ----------------------------------------------------------------------
+# 建表和生成数据
+# ----------------------------------------------------------------------
+
+def create_schema(conn):
+    execute(conn, f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    execute(conn, f"CREATE SCHEMA {SCHEMA}")
+    execute(conn, f"SET search_path TO {SCHEMA}")
+
+    # 老人：与 generate_fake_data.py 一样按慢病标签决定指标分布
+    execute(conn, """
+        CREATE TABLE elderly AS
+        SELECT gen_random_uuid() AS id,
+               random() < 0.5 AS hypertension,
+               random() < 0.25 AS diabetes
+        FROM generate_series(1, :n)
+    """, n=args.elderly)
+    execute(conn, "ALTER TABLE elderly ADD COLUMN seq serial")
+
+    partition_clause = "PARTITION BY RANGE (recorded_at)" if args.partitioned else ""
+    primary_key = "PRIMARY KEY (id, recorded_at)" if args.partitioned else "PRIMARY KEY (id)"
+    execute(conn, f"""
+        CREATE TABLE health_records (
+            id uuid NOT NULL DEFAULT gen_random_uuid(),
+            elderly_id uuid NOT NULL,
+            heart_rate integer,
+            systolic_pressure integer,
+            diastolic_pressure integer,
+            blood_sugar double precision,
+            temperature double precision,
+            blood_oxygen double precision,
+            steps integer,
+            status text NOT NULL,
+            recorded_at timestamptz NOT NULL,
+            created_at timestamptz DEFAULT now(),
+            {primary_key}
+        ) {partition_clause}
+    """)
+    if args.partitioned:
+        months = args.days // 28 + 2
+        for i in range(-1, months):
+            start, end = month_start(i), month_start(i - 1)
+            execute(conn, f"""
+                CREATE TABLE health_records_{start.year:04d}_{start.month:02d}
+                PARTITION OF health_records FOR VALUES FROM ('{start}') TO ('{end}')
+            """)
+        execute(conn, "CREATE TABLE health_records_default PARTITION OF health_records DEFAULT")
+
+    execute(conn, """
+        CREATE TABLE alerts (
+            id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+            elderly_id uuid NOT NULL,
+            status text NOT NULL,
+            title text,
+            created_at timestamptz NOT NULL
+        )
+    """)
+    execute(conn, """
+        CREATE TABLE reminders (
+            id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+            elderly_id uuid NOT NULL,
+            title text,
+            status text NOT NULL,
+            next_reminder_time timestamptz NOT NULL
+        )
+    """)
+
+
+def generate_data(conn):
+    generated = 0
+    started = time.perf_counter()
+    while generated < args.rows:
+        batch = min(BATCH_ROWS, args.rows - generated)
+        execute(conn, """
+            INSERT INTO health_records (elderly_id, heart_rate, systolic_pressure, diastolic_pressure,
+                                        blood_sugar, temperature, blood_oxygen, steps, status, recorded_at)
+            SELECT e.id,
+                   60 + (random() * 40)::int,
+                   CASE WHEN e.hypertension AND r < 0.6 THEN 140 + (random() * 25)::int
+                        WHEN e.hypertension AND r < 0.9 THEN 125 + (random() * 14)::int
+                        WHEN e.hypertension THEN 166 + (random() * 14)::int
+                        ELSE 110 + (random() * 24)::int END,
+                   CASE WHEN e.hypertension AND r < 0.6 THEN 88 + (random() * 12)::int
+                        ELSE 70 + (random() * 17)::int END,
+                   CASE WHEN e.diabetes AND r < 0.7 THEN round((7.0 + random() * 2.5)::numeric, 1)
+                        WHEN e.diabetes THEN round((6.1 + random() * 0.8)::numeric, 1)
+                        ELSE round((4.4 + random() * 1.6)::numeric, 1) END,
+                   round((36.0 + random() * 1.2)::numeric, 1),
+                   round((94 + random() * 5)::numeric, 1),
+                   (random() * 8000)::int,
+                   CASE WHEN r < 0.85 THEN 'NORMAL' WHEN r < 0.97 THEN 'WARNING' ELSE 'DANGER' END,
+                   date_trunc('day', now()) - (floor(random() * :days) || ' days')::interval
+                       + CASE WHEN random() < 0.6 THEN interval '7 hours' ELSE interval '18 hours' END
+                       + (random() * 240 || ' minutes')::interval
+            FROM (
+                SELECT (g % :elderly) + 1 AS seq, random() AS r
+                FROM generate_series(1, :batch) g
+            ) s
+            JOIN elderly e ON e.seq = s.seq
+        """, batch=batch, days=args.days, elderly=args.elderly)
+        conn.commit()
+        generated += batch
+        rate = generated / (time.perf_counter() - started)
+        print(f"  health_records: {generated:,}/{args.rows:,}（{rate:,.0f} 行/秒）", flush=True)
+
+    # 告警约为记录数的 1%，其中 10% 未处理
+    execute(conn, """
+        INSERT INTO alerts (elderly_id, status, title, created_at)
+        SELECT e.id,
+               CASE WHEN random() < 0.1 THEN 'ACTIVE' WHEN random() < 0.8 THEN 'RESOLVED' ELSE 'DISMISSED' END,
+               '血压偏高',
+               now() - (random() * :days || ' days')::interval
+        FROM generate_series(1, :n) g
+        JOIN elderly e ON e.seq = (g % :elderly) + 1
+    """, n=max(args.rows // 100, 1), days=args.days, elderly=args.elderly)
+    # 每位老人 5 个提醒，时间分布在前后一周
+    execute(conn, """
+        INSERT INTO reminders (elderly_id, title, status, next_reminder_time)
+        SELECT e.id, '按时服药',
+               CASE WHEN random() < 0.7 THEN 'ACTIVE' ELSE 'COMPLETED' END,
+               now() + ((random() * 14 - 7) || ' days')::interval
+        FROM elderly e, generate_series(1, 5)
+    """)
+    conn.commit()
+    execute(conn, "ANALYZE")
+
+
+# ----------------------------------------------------------------------
+# 查询
+# ----------------------------------------------------------------------
+
+QUERIES = {
+    "最新一条记录": """
+        SELECT * FROM health_records WHERE elderly_id = :elderly_id
+        ORDER BY recorded_at DESC LIMIT 1
+    """,
+    "最近7天记录": """
+        SELECT * FROM health_records
+        WHERE elderly_id = :elderly_id AND recorded_at >= now() - interval '7 days'
+        ORDER BY recorded_at
+    """,
+    "未处理告警": """
+        SELECT * FROM alerts WHERE elderly_id = :elderly_id AND status = 'ACTIVE'
+        ORDER BY created_at DESC LIMIT 20
+    """,
+    "到期提醒": """
+        SELECT * FROM reminders WHERE status = 'ACTIVE' AND next_reminder_time <= now()
+        ORDER BY next_reminder_time LIMIT 100
+    """,
+}
+
+
+def run_queries(conn, label):
+    sample = [row[0] for row in execute(conn, "SELECT id FROM elderly ORDER BY random() LIMIT :n", n=args.runs)]
+    results = {}
+    print(f"\n{'=' * 60}\n{label}\n{'=' * 60}")
+    for name, sql in QUERIES.items():
+        plan = execute(conn, f"EXPLAIN (ANALYZE, BUFFERS) {sql}", elderly_id=sample[0]).scalars().all()
+        print(f"\n--- {name} ---")
+        print("\n".join(plan))
+
+        timings = []
+        for elderly_id in sample:
+            start = time.perf_counter()
+            execute(conn, sql, elderly_id=elderly_id).fetchall()
+            timings.append((time.perf_counter() - start) * 1000)
+        results[name] = statistics.median(timings)
+    return results
+
+
+def create_indexes(conn):
+    """按模型中声明的索引建索引（分区表上的索引会自动建到每个分区）"""
+    for table in (HealthRecord.__table__, Alert.__table__, Reminder.__table__):
+        for index in table.indexes:
+            ddl = str(CreateIndex(index).compile(dialect=postgresql.dialect()))
+            print(f"  {ddl}")
+            started = time.perf_counter()
+            execute(conn, ddl)
+            print(f"    耗时 {time.perf_counter() - started:.1f}s")
+    conn.commit()
+    execute(conn, "ANALYZE")
+
+
+with engine.connect() as conn:
+    print(f"生成 {args.rows:,} 行健康记录（{args.elderly:,} 位老人，{args.days} 天，"
+          f"{'分区' if args.partitioned else '不分区'}）...")
+    create_schema(conn)
+    conn.commit()
+    generate_data(conn)
+
+    size = execute(conn, "SELECT pg_size_pretty(pg_total_relation_size('health_records'))").scalar()
+    if args.partitioned:
+        size = execute(conn, """
+            SELECT pg_size_pretty(sum(pg_total_relation_size(inhrelid)))
+            FROM pg_inherits WHERE inhparent = 'health_records'::regclass
+        """).scalar()
+    print(f"health_records 大小: {size}")
+
+    before = run_queries(conn, "建索引前")
+    print("\n创建索引...")
+    create_indexes(conn)
+    after = run_queries(conn, "建索引后")
+
+    print(f"\n{'=' * 60}\n中位耗时（{args.runs} 位老人）\n{'=' * 60}")
+    for name in QUERIES:
+        print(f"{name:<10} 建索引前 {before[name]:>10.2f} ms   建索引后 {after[name]:>8.2f} ms   "
+              f"提升 {before[name] / max(after[name], 1e-6):>8.1f}x")
+
+    if not args.keep:
+        execute(conn, f"DROP SCHEMA {SCHEMA} CASCADE")
+        conn.commit()
@@ -0,0 +1,70 @@
+"""意图规则匹配性能测试（逐关键词扫描 vs 多模式自动机）"""
+import re
+import sys
+import time
+sys.path.insert(0, '.')
+
+from services.agents.intent_recognizer import IntentRecognizer
+
+recognizer = IntentRecognizer()
+
+utterances = [
+    "查看血压", "看看今天的数据", "打开报告", "我血压150/95高吗", "血糖6.5正常吗",
+    "提醒我明天早上吃药", "打电话给儿子", "我头晕胸闷怎么办", "播放音乐", "声音大一点",
+    "老年人怎么锻炼", "我最近很焦虑睡不着", "你好", "心率80体温37.5", "帮我测一下血压",
+    "返回首页", "取消提醒", "最近饮食要注意什么", "体重65公斤算胖吗", "我想聊聊天",
+]
+
+
+def legacy_analyze(text):
+    """重构前的实现：逐个意图、逐个关键词做子串判断，每次调用 re.search"""
+    control_verbs = recognizer.control_verbs
+    has_control_verb = any(v in text for v in control_verbs)
+    matches = []
+    for intent, keywords in recognizer.intent_rules.items():
+        match_count = sum(1 for kw in keywords if kw in text)
+        if match_count > 0:
+            confidence = min(0.5 + match_count * 0.15, 0.95)
+            if has_control_verb and intent.value.startswith("control_"):
+                confidence = min(confidence + 0.2, 0.98)
+            matches.append((intent, confidence))
+    entities = {}
+    for entity_name, pattern in recognizer.entity_patterns.items():
+        match = re.search(pattern, text)
+        if match:
+            if entity_name == "blood_pressure":
+                entities["systolic"] = match.group(1)
+                entities["diastolic"] = match.group(2)
+            else:
+                entities[entity_name] = match.group(1)
+    return matches, entities
+
+
+def new_analyze(text):
+    return recognizer._rule_match(text), recognizer._extract_entities(text)
+
+
+def bench(func, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in utterances:
+            func(text)
+    return (time.perf_counter() - start) / (rounds * len(utterances)) * 1e6
+
+
+# 结果一致性检查
+for text in utterances:
+    assert legacy_analyze(text) == new_analyze(text), f"结果不一致: {text}"
+print(f"一致性检查通过（{len(utterances)} 条语句）")
+
+keyword_count = sum(len(kws) for kws in recognizer.intent_rules.values())
+print(f"意图数: {len(recognizer.intent_rules)}，关键词数: {keyword_count}")
+
+rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+legacy_us = bench(legacy_analyze, rounds)
+new_us = bench(new_analyze, rounds)
+cached_us = bench(recognizer._analyze_cached, rounds)
+
+print(f"逐关键词扫描:   {legacy_us:8.1f} µs/条")
+print(f"多模式自动机:   {new_us:8.1f} µs/条  ({legacy_us / new_us:.1f}x)")
+print(f"自动机 + 缓存: {cached_us:8.1f} µs/条  ({legacy_us / cached_us:.1f}x)")
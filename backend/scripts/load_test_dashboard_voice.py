@@ -0,0 +1,185 @@
+"""
+仪表盘 + 语音混合负载测试（需要先启动后端服务）
+
+模拟多个仪表盘客户端并发轮询高频接口，同时保持若干语音 WebSocket 连接，
+统计仪表盘的请求吞吐/延迟，以及语音连接上一次消息往返的延迟。
+数据库查询阻塞事件循环时，语音往返延迟会随仪表盘并发明显上升。
+
+对比方法：分别对改造前（同步会话）和改造后（异步会话）的服务运行本脚本，参数相同。
+
+用法:
+    python scripts/load_test_dashboard_voice.py --phone 13800000001 --password 123456 \\
+        --user-id <老人用户ID> --elder-id <老人档案ID>
+    python scripts/load_test_dashboard_voice.py --token <JWT> --concurrency 100 --voice-clients 20 --duration 60
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+import httpx
+
+try:
+    import websockets
+    HAS_WEBSOCKETS = True
+except ImportError:
+    HAS_WEBSOCKETS = False
+
+parser = argparse.ArgumentParser(description="仪表盘 + 语音混合负载测试")
+parser.add_argument("--base-url", default="http://localhost:8000")
+parser.add_argument("--token", help="JWT（不提供时用 --phone/--password 登录）")
+parser.add_argument("--phone", help="登录手机号或用户名")
+parser.add_argument("--password", help="登录密码")
+parser.add_argument("--user-id", help="/api/health/today 的 user_id（老人用户ID）")
+parser.add_argument("--elder-id", help="实时监控的老人档案ID")
+parser.add_argument("--concurrency", type=int, default=50, help="仪表盘并发客户端数")
+parser.add_argument("--voice-clients", type=int, default=10, help="语音 WebSocket 连接数")
+parser.add_argument("--voice-interval", type=float, default=0.02, help="语音消息间隔（秒），默认约为一帧音频")
+parser.add_argument("--duration", type=float, default=30.0, help="测试时长（秒）")
+args = parser.parse_args()
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def summarize(name: str, latencies: List[float], errors: int, elapsed: float) -> None:
+    count = len(latencies)
+    print(f"{name}")
+    print(f"  请求数 {count}，错误 {errors}，吞吐 {count / elapsed:.1f} 次/秒")
+    if latencies:
+        print(f"  延迟 p50 {percentile(latencies, 0.5):.1f} ms  p95 {percentile(latencies, 0.95):.1f} ms  "
+              f"p99 {percentile(latencies, 0.99):.1f} ms  max {max(latencies):.1f} ms  "
+              f"avg {statistics.mean(latencies):.1f} ms")
+
+
+async def login(client: httpx.AsyncClient) -> str:
+    response = await client.post(
+        "/api/v1/auth/login",
+        data={"username": args.phone, "password": args.password}
+    )
+    response.raise_for_status()
+    body = response.json()
+    token = (body.get("data") or {}).get("access_token") or body.get("access_token")
+    if not token:
+        raise RuntimeError(f"登录响应中没有 access_token: {body}")
+    return token
+
+
+def dashboard_endpoints() -> List[str]:
+    """仪表盘轮询的高频接口"""
+    endpoints = [
+        "/api/v1/elderly/health/today",
+        "/api/v1/elderly/health/charts/heartrate?period=today",
+        "/api/v1/children/elders/list",
+    ]
+    if args.user_id:
+        endpoints.append(f"/api/health/today?user_id={args.user_id}")
+        endpoints.append(f"/api/health/charts?user_id={args.user_id}&days=7")
+    if args.elder_id:
+        endpoints.append(f"/api/v1/children/monitor/{args.elder_id}/realtime")
+    return endpoints
+
+
+async def dashboard_worker(client: httpx.AsyncClient, endpoints: List[str], offset: int,
+                           deadline: float, stats: Dict[str, list]) -> None:
+    i = offset
+    while time.perf_counter() < deadline:
+        path = endpoints[i % len(endpoints)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code >= 400:
+                stats["errors"].append(f"{path} -> {response.status_code}")
+                continue
+        except httpx.HTTPError as e:
+            stats["errors"].append(f"{path} -> {type(e).__name__}")
+            continue
+        stats["latencies"].append((time.perf_counter() - start) * 1000)
+
+
+async def voice_worker(deadline: float, stats: Dict[str, list]) -> None:
+    """保持一个流式语音连接，循环发送控制消息并等待回执，测量往返延迟"""
+    url = args.base_url.replace("http", "ws", 1) + "/api/v1/streaming/ws/stream"
+    try:
+        async with websockets.connect(url) as ws:
+            await ws.recv()  # 初始状态
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                await ws.send(json.dumps({"type": "stop_speak"}))
+                while True:
+                    message = json.loads(await ws.recv())
+                    if message.get("type") == "tts_stopped":
+                        break
+                stats["latencies"].append((time.perf_counter() - start) * 1000)
+                await asyncio.sleep(args.voice_interval)
+    except Exception as e:
+        stats["errors"].append(f"websocket -> {type(e).__name__}: {e}")
+
+
+async def voice_probe_worker(client: httpx.AsyncClient, deadline: float, stats: Dict[str, list]) -> None:
+    """未安装 websockets 时，用不访问数据库的语音状态接口代替，同样反映事件循环的排队延迟"""
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            await client.get("/api/v1/streaming/status")
+            stats["latencies"].append((time.perf_counter() - start) * 1000)
+        except httpx.HTTPError as e:
+            stats["errors"].append(f"status -> {type(e).__name__}")
+        await asyncio.sleep(args.voice_interval)
+
+
+async def main() -> None:
+    limits = httpx.Limits(max_connections=args.concurrency + args.voice_clients + 10)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=30.0, limits=limits) as client:
+        token = args.token
+        if not token:
+            if not (args.phone and args.password):
+                print("请提供 --token 或 --phone/--password")
+                sys.exit(1)
+            token = await login(client)
+        client.headers["Authorization"] = f"Bearer {token}"
+
+        endpoints = dashboard_endpoints()
+        print(f"仪表盘接口: {', '.join(endpoints)}")
+        print(f"并发 {args.concurrency}，语音连接 {args.voice_clients}"
+              f"（{'WebSocket' if HAS_WEBSOCKETS else '状态接口探测，未安装 websockets'}），时长 {args.duration}s\n")
+
+        # 预热：建立连接、填充缓存
+        for path in endpoints:
+            await client.get(path)
+
+        dashboard = {"latencies": [], "errors": []}
+        voice = {"latencies": [], "errors": []}
+        started = time.perf_counter()
+        deadline = started + args.duration
+
+        tasks = [
+            dashboard_worker(client, endpoints, i, deadline, dashboard)
+            for i in range(args.concurrency)
+        ]
+        for _ in range(args.voice_clients):
+            if HAS_WEBSOCKETS:
+                tasks.append(voice_worker(deadline, voice))
+            else:
+                tasks.append(voice_probe_worker(client, deadline, voice))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    print("=" * 60)
+    summarize("仪表盘", dashboard["latencies"], len(dashboard["errors"]), elapsed)
+    summarize("语音往返", voice["latencies"], len(voice["errors"]), elapsed)
+    for errors in (dashboard["errors"], voice["errors"]):
+        for message in sorted(set(errors))[:5]:
+            print(f"  错误示例: {message}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
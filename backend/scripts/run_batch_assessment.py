@@ -0,0 +1,45 @@
+"""
+批量健康评估（使用 settings.DATABASE_URL）
+
+对全部或指定老人运行定期评估并写入 health_assessments，说明见
+services/health_assessment/batch_runner.py。
+
+用法:
+    python scripts/run_batch_assessment.py                                  # 全部老人
+    python scripts/run_batch_assessment.py --ids-file elderly_ids.txt       # 每行一个老人ID
+    python scripts/run_batch_assessment.py --workers 8 --chunk-size 1000 --checkpoint batch.json
+"""
+import argparse
+import logging
+import sys
+import uuid
+sys.path.insert(0, '.')
+
+from services.health_assessment.batch_runner import BatchAssessmentRunner
+
+parser = argparse.ArgumentParser(description="批量健康评估")
+parser.add_argument("--ids-file", help="老人ID文件（每行一个），默认全部老人")
+parser.add_argument("--workers", type=int, default=None, help="工作进程数，0 表示在当前进程中执行，默认 CPU 核数")
+parser.add_argument("--chunk-size", type=int, default=500, help="每组老人数")
+parser.add_argument("--window-days", type=int, default=30, help="评估窗口天数")
+parser.add_argument("--checkpoint", help="检查点文件，中断后用同样的参数重跑会跳过已完成的组（全部完成后删除）")
+args = parser.parse_args()
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+elderly_ids = None
+if args.ids_file:
+    with open(args.ids_file, "r", encoding="utf-8") as f:
+        elderly_ids = [uuid.UUID(line.strip()) for line in f if line.strip()]
+
+runner = BatchAssessmentRunner(
+    workers=args.workers,
+    chunk_size=args.chunk_size,
+    window_days=args.window_days,
+    checkpoint_path=args.checkpoint
+)
+stats = runner.run(elderly_ids)
+print(
+    f"完成：{stats['elderly']} 位老人，写入 {stats['written']}，无数据 {stats['no_data']}，"
+    f"失败 {stats['failed']}，{stats['users_per_second']} 人/秒，用时 {stats['elapsed_seconds']} 秒"
+)
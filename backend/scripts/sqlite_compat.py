@@ -0,0 +1,12 @@
+"""SQLite 测试辅助：让 UUID 列能在 SQLite 上建表
+
+requirements 固定的 sqlalchemy==2.0.23 在 SQLite 上无法渲染 UUID 类型（2.0.35 起才支持），
+测试脚本导入本模块即可用 CHAR(32) 建表；值的读写仍由 UUID 类型按十六进制字符串处理。
+"""
+from sqlalchemy import UUID
+from sqlalchemy.ext.compiler import compiles
+
+
+@compiles(UUID, "sqlite")
+def _compile_uuid_sqlite(type_, compiler, **kw):
+    return "CHAR(32)"
@@ -0,0 +1,124 @@
+"""测试多智能体并发处理：超时、select_best 提前结束、取消慢智能体（使用假智能体，无需大模型）"""
+import sys
+import threading
+import time
+sys.path.insert(0, '.')
+
+from services.agents.agent_coordinator import AgentCoordinator
+from services.agents.base_agent import AgentMemory, AgentMessage, AgentRole, BaseAgent
+
+
+class FakeAgent(BaseAgent):
+    """按设定延迟返回固定回答的智能体"""
+
+    def __init__(self, role, confidence, delay, fail=False):
+        super().__init__(name=role.value, role=role, description="假智能体")
+        self.confidence = confidence
+        self.delay = delay
+        self.fail = fail
+        self.started = threading.Event()
+        self.finished = threading.Event()
+
+    def can_handle(self, message, context):
+        return self.confidence
+
+    def process(self, message, memory, user_role="elderly", session_id=None):
+        self.started.set()
+        time.sleep(self.delay)
+        self.finished.set()
+        if self.fail:
+            raise RuntimeError("处理失败")
+        return AgentMessage(role=self.role, content=f"{self.name} 的回答")
+
+
+def make_coordinator(*agents, max_parallel_agents=8):
+    coordinator = AgentCoordinator(max_parallel_agents=max_parallel_agents)
+    for agent in agents:
+        coordinator.register_agent(agent)
+    return coordinator
+
+
+def run(coordinator, **kwargs):
+    start = time.monotonic()
+    responses = coordinator.multi_agent_process("血压有点高怎么办", AgentMemory(user_id="test"), **kwargs)
+    return responses, time.monotonic() - start
+
+
+print("=" * 50)
+print("并发与顺序测试")
+print("=" * 50)
+
+butler = FakeAgent(AgentRole.HEALTH_BUTLER, 0.7, 0.3)
+expert = FakeAgent(AgentRole.CHRONIC_EXPERT, 0.9, 0.1)
+coach = FakeAgent(AgentRole.LIFESTYLE_COACH, 0.8, 0.2)
+responses, elapsed = run(make_coordinator(butler, expert, coach))
+assert [r.metadata["processed_by"] for r in responses] == ["health_butler", "chronic_expert", "lifestyle_coach"]
+assert [r.metadata["confidence"] for r in responses] == [0.7, 0.9, 0.8]
+assert elapsed < 0.5, elapsed
+print(f"✓ 3 个智能体并发执行，耗时 {elapsed:.2f}s（串行需 0.6s），结果保持候选顺序")
+
+print("\n" + "=" * 50)
+print("超时测试")
+print("=" * 50)
+
+fast = FakeAgent(AgentRole.HEALTH_BUTLER, 0.7, 0.05)
+slow = FakeAgent(AgentRole.CHRONIC_EXPERT, 0.9, 1.0)
+failing = FakeAgent(AgentRole.EMOTIONAL_CARE, 0.8, 0.05, fail=True)
+responses, elapsed = run(make_coordinator(fast, slow, failing), agent_timeout=0.3)
+assert [r.metadata["processed_by"] for r in responses] == ["health_butler"]
+assert 0.3 <= elapsed < 0.6, elapsed
+print(f"✓ 超时 0.3s 后返回已完成的结果（耗时 {elapsed:.2f}s），超时和出错的智能体被跳过")
+
+running = FakeAgent(AgentRole.HEALTH_BUTLER, 0.7, 0.5)
+waiting = FakeAgent(AgentRole.CHRONIC_EXPERT, 0.9, 0.05)
+responses, _ = run(make_coordinator(running, waiting, max_parallel_agents=1), agent_timeout=0.1)
+assert responses == []
+running.finished.wait(2)
+time.sleep(0.1)
+assert not waiting.started.is_set()
+print("✓ 超时后排队中的智能体不再调用")
+
+print("\n" + "=" * 50)
+print("select_best 提前结束测试")
+print("=" * 50)
+
+winner = FakeAgent(AgentRole.CHRONIC_EXPERT, 0.9, 0.1)
+slower = FakeAgent(AgentRole.HEALTH_BUTLER, 0.7, 1.0)
+queued = FakeAgent(AgentRole.LIFESTYLE_COACH, 0.8, 1.0)
+# 线程池只有 2 个线程，第三个智能体还在排队
+coordinator = make_coordinator(slower, winner, queued, max_parallel_agents=2)
+responses, elapsed = run(coordinator, strategy="select_best")
+assert [r.metadata["processed_by"] for r in responses] == ["chronic_expert"]
+assert elapsed < 0.5, elapsed
+assert slower.started.is_set() and not slower.finished.is_set()
+print(f"✓ 置信度最高的智能体完成后立即返回（耗时 {elapsed:.2f}s），不等待较慢的智能体")
+
+assert coordinator.synthesize_responses(responses, "select_best") == "chronic_expert 的回答"
+print("✓ 整合结果为置信度最高的回答")
+
+slower.finished.wait(2)
+time.sleep(0.1)
+assert not queued.started.is_set()
+print("✓ 尚未开始的智能体被取消，不再调用")
+
+print("\n" + "=" * 50)
+print("select_best 不提前结束的情况")
+print("=" * 50)
+
+best = FakeAgent(AgentRole.CHRONIC_EXPERT, 0.9, 0.3)
+quick = FakeAgent(AgentRole.HEALTH_BUTLER, 0.7, 0.05)
+responses, elapsed = run(make_coordinator(quick, best), strategy="select_best")
+assert [r.metadata["processed_by"] for r in responses] == ["health_butler", "chronic_expert"]
+assert make_coordinator().synthesize_responses(responses, "select_best") == "chronic_expert 的回答"
+print("✓ 先完成的不是最佳智能体时继续等待，最终选出置信度最高的回答")
+
+best = FakeAgent(AgentRole.CHRONIC_EXPERT, 0.9, 0.3)
+quick = FakeAgent(AgentRole.HEALTH_BUTLER, 0.7, 0.05)
+responses, _ = run(
+    make_coordinator(quick, best), strategy="select_best",
+    agent_roles=[AgentRole.HEALTH_BUTLER, AgentRole.CHRONIC_EXPERT]
+)
+assert len(responses) == 2 and "confidence" not in responses[0].metadata
+print("✓ 指定智能体时没有置信度，等待全部完成")
+
+print("\n全部测试通过")
@@ -0,0 +1,108 @@
+"""测试告警和提醒统计（使用内存 SQLite，无需 PostgreSQL）"""
+import sys
+import uuid
+from datetime import datetime, timedelta
+sys.path.insert(0, '.')
+
+import scripts.sqlite_compat  # noqa: F401  SQLite 上渲染 UUID 列
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from database.database import Base
+from database.models import (
+    Alert, AlertSeverity, AlertStatus, AlertType, Reminder, ReminderStatus, ReminderType
+)
+from repositories.alert_repository import AlertRepository, ReminderRepository
+
+engine = create_engine("sqlite://")
+Base.metadata.create_all(engine, tables=[Alert.__table__, Reminder.__table__])
+db = sessionmaker(bind=engine)()
+
+elderly_a, elderly_b = uuid.uuid4(), uuid.uuid4()
+now = datetime.now().replace(microsecond=0)
+queries = []
+
+
+def count_query(conn, cursor, statement, *args):
+    queries.append(statement)
+
+
+def alert(days_ago, alert_type, status):
+    return Alert(
+        elderly_id=elderly_a, alert_type=alert_type, alert_message="测试预警", severity=AlertSeverity.MEDIUM,
+        status=status, created_at=now - timedelta(days=days_ago, minutes=1)
+    )
+
+
+def reminder(elderly_id, hours_from_now, reminder_type, status):
+    return Reminder(
+        elderly_id=elderly_id, created_by=uuid.uuid4(), title="测试提醒", reminder_type=reminder_type,
+        next_reminder_time=now + timedelta(hours=hours_from_now), status=status
+    )
+
+
+print("=" * 50)
+print("告警统计测试")
+print("=" * 50)
+
+db.add_all([
+    alert(0, AlertType.HEART_RATE_HIGH, AlertStatus.ACTIVE),
+    alert(0, AlertType.HEART_RATE_HIGH, AlertStatus.ACTIVE),
+    alert(0, AlertType.BLOOD_OXYGEN_LOW, AlertStatus.RESOLVED),
+    alert(2, AlertType.HEART_RATE_HIGH, AlertStatus.DISMISSED),
+    alert(2, AlertType.FALL_DETECTED, AlertStatus.ACTIVE),
+    alert(5, AlertType.OTHER, AlertStatus.RESOLVED),
+    alert(40, AlertType.OTHER, AlertStatus.ACTIVE),  # 超出统计窗口
+])
+db.commit()
+
+event.listen(engine, "before_cursor_execute", count_query)
+stats = AlertRepository(db).get_alert_statistics(days=7)
+event.remove(engine, "before_cursor_execute", count_query)
+assert len(queries) == 1, queries
+
+assert stats["total_alerts"] == 6
+assert stats["pending_alerts"] == 3 and stats["processed_alerts"] == 3
+assert stats["alert_types"] == {"heart_rate_high": 3, "blood_oxygen_low": 1, "fall_detected": 1, "other": 1}
+print(f"✓ 一次查询：共 {stats['total_alerts']} 条，未处理 {stats['pending_alerts']}，已处理 {stats['processed_alerts']}")
+
+daily = stats["daily_alerts"]
+assert len(daily) == 8
+assert daily[0]["date"] == (now - timedelta(days=7)).date() and daily[-1]["date"] == now.date()
+counts = {item["date"]: item["count"] for item in daily}
+assert counts[now.date()] == 3
+assert counts[(now - timedelta(days=2)).date()] == 2
+assert counts[(now - timedelta(days=5)).date()] == 1
+assert sum(counts.values()) == 6 and list(counts.values()).count(0) == 5
+print(f"✓ 逐日计数，无告警的日期补零: {[item['count'] for item in daily]}")
+
+print("\n" + "=" * 50)
+print("提醒统计测试")
+print("=" * 50)
+
+db.add_all([
+    reminder(elderly_a, -30, ReminderType.MEDICATION, ReminderStatus.COMPLETED),
+    reminder(elderly_a, -20, ReminderType.MEDICATION, ReminderStatus.ACTIVE),    # 已过时间未完成
+    reminder(elderly_a, -10, ReminderType.EXERCISE, ReminderStatus.EXPIRED),
+    reminder(elderly_a, -5, ReminderType.MEAL, ReminderStatus.INACTIVE),
+    reminder(elderly_a, -1 / 60, ReminderType.MEASUREMENT, ReminderStatus.ACTIVE),
+    reminder(elderly_a, 5, ReminderType.MEDICATION, ReminderStatus.ACTIVE),      # 超出窗口（未来）
+    reminder(elderly_a, -24 * 40, ReminderType.MEDICATION, ReminderStatus.ACTIVE),  # 超出窗口（过去）
+    reminder(elderly_b, -3, ReminderType.MEDICATION, ReminderStatus.ACTIVE),     # 其他老人
+])
+db.commit()
+
+queries.clear()
+event.listen(engine, "before_cursor_execute", count_query)
+stats = ReminderRepository(db).get_reminder_statistics(elderly_a, days=30)
+event.remove(engine, "before_cursor_execute", count_query)
+assert len(queries) == 1, queries
+
+assert stats["total_reminders"] == 5, stats
+assert stats["completed_reminders"] == 1
+assert stats["missed_reminders"] == 3
+assert stats["reminder_types"] == {"medication": 2, "exercise": 1, "meal": 1, "measurement": 1}
+print(f"✓ 一次查询：{stats}")
+
+print("\n全部测试通过")
@@ -0,0 +1,94 @@
+"""测试异步数据库会话：aiosqlite 驱动和异步驱动不可用时的线程池同步会话（使用临时 SQLite 文件）"""
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+sys.path.insert(0, '.')
+
+import scripts.sqlite_compat  # noqa: F401  SQLite 上渲染 UUID 列
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import database.database as database_module
+from database.database import Base, ThreadPoolSession, get_async_db
+from database.models import UserRole
+from repositories.user_repository import AsyncUserRepository
+
+tmpdir = tempfile.mkdtemp()
+url = "sqlite:///" + os.path.join(tmpdir, "async_test.db")
+engine = create_engine(url)
+Base.metadata.create_all(engine)  # 删除用户会级联到各关联表
+
+
+async def exercise(db, username):
+    repo = AsyncUserRepository(db)
+    user = await repo.create({"username": username, "password": "x", "role": UserRole.ELDERLY})
+    assert user is not None and user.id is not None
+    assert (await repo.get_by_id(user.id)).username == username
+    assert await repo.count(role=UserRole.ELDERLY) >= 1
+    assert (await repo.get_with_profiles(user.id)).elderly_profile is None
+    assert (await repo.update(user, {"phone_number": f"138{len(username):08d}"})).phone_number is not None
+    assert await repo.delete(user)
+    assert await repo.get_by_id(user.id) is None
+
+
+async def test_thread_pool_session():
+    threads = set()
+    original_execute = ThreadPoolSession.execute
+
+    async def recording_execute(self, statement, *args, **kwargs):
+        def run():
+            threads.add(threading.get_ident())
+            return self.sync_session.execute(statement, *args, **kwargs)
+        from starlette.concurrency import run_in_threadpool
+        return await run_in_threadpool(run)
+
+    ThreadPoolSession.execute = recording_execute
+    database_module.AsyncSessionLocal = None
+    database_module.SessionLocal = sessionmaker(bind=engine, autoflush=False)
+    try:
+        dependency = get_async_db()
+        db = await dependency.__anext__()
+        assert isinstance(db, ThreadPoolSession)
+        await exercise(db, "fallback_user")
+        await dependency.aclose()
+    finally:
+        ThreadPoolSession.execute = original_execute
+    assert threads and threading.get_ident() not in threads
+    print("✓ 异步驱动不可用时 get_async_db 返回线程池同步会话，异步仓储读写正常，查询不在事件循环线程执行")
+
+
+async def test_aiosqlite():
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(database_module._async_database_url(url))
+    database_module.AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+    try:
+        dependency = get_async_db()
+        db = await dependency.__anext__()
+        assert not isinstance(db, ThreadPoolSession)
+        await exercise(db, "aiosqlite_user")
+        await dependency.aclose()
+    finally:
+        await async_engine.dispose()
+    print("✓ SQLite 连接URL 推导为 sqlite+aiosqlite，异步仓储读写正常")
+
+
+print("=" * 50)
+print("线程池同步会话测试")
+print("=" * 50)
+asyncio.run(test_thread_pool_session())
+
+print("\n" + "=" * 50)
+print("aiosqlite 测试")
+print("=" * 50)
+try:
+    import aiosqlite  # noqa: F401
+except ImportError:
+    print("未安装 aiosqlite，跳过")
+else:
+    asyncio.run(test_aiosqlite())
+
+print("\n全部测试通过")
@@ -0,0 +1,169 @@
+"""测试认证主体缓存（使用内存 SQLite，无需 PostgreSQL）"""
+import asyncio
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+sys.path.insert(0, '.')
+
+import scripts.sqlite_compat  # noqa: F401  SQLite 上渲染 UUID 列
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from database.database import Base
+from database.models import (
+    User, UserRole, UserStatus, Gender, ElderlyProfile, ChildrenProfile, CommunityProfile
+)
+from dependencies.get_current_user import get_current_user
+from middlewares.auth_middleware import PermissionChecker
+from services.auth_cache import PrincipalCache, principal_cache
+from utils.password_utils import JWTUtils
+
+engine = create_engine("sqlite://")
+Base.metadata.create_all(engine, tables=[
+    User.__table__, ElderlyProfile.__table__, ChildrenProfile.__table__, CommunityProfile.__table__
+])
+Session = sessionmaker(bind=engine)
+
+queries = []
+event.listen(engine, "before_cursor_execute", lambda *args: queries.append(args[2]))
+
+elderly_user = User(id=uuid.uuid4(), username="elder", password="x", role=UserRole.ELDERLY)
+elderly_user.elderly_profile = ElderlyProfile(
+    name="张大爷", gender=Gender.MALE, birth_date=datetime(1945, 5, 1), age=79, address="幸福小区"
+)
+admin_user = User(id=uuid.uuid4(), username="admin", password="x", role=UserRole.COMMUNITY)
+admin_user.community_profile = CommunityProfile(
+    community_name="幸福社区", address="幸福路1号", contact_person="李主任", contact_phone="10086"
+)
+db = Session()
+db.add_all([elderly_user, admin_user])
+db.commit()
+elderly_id, admin_id = elderly_user.id, admin_user.id
+community_id = admin_user.community_profile.id
+db.close()
+
+
+def token_for(user_id, minutes=60):
+    return JWTUtils.create_access_token({"sub": str(user_id)}, expires_delta=timedelta(minutes=minutes))
+
+
+def resolve(token):
+    db = Session()
+    try:
+        user = asyncio.run(get_current_user(token=token, db=db))
+        return user, user.elderly_profile, user.children_profile
+    finally:
+        db.close()
+
+
+print("=" * 50)
+print("命中测试")
+print("=" * 50)
+
+principal_cache.clear()
+token = token_for(elderly_id)
+queries.clear()
+user, elderly_profile, children_profile = resolve(token)
+assert user.id == elderly_id and elderly_profile.name == "张大爷" and children_profile is None
+assert len(queries) == 1, queries
+print("✓ 未命中：用户和档案一条查询")
+
+queries.clear()
+user, elderly_profile, children_profile = resolve(token)
+assert user.id == elderly_id and user.username == "elder" and user.status == UserStatus.ACTIVE
+assert elderly_profile.name == "张大爷" and children_profile is None
+assert queries == [], queries
+print("✓ 命中：不查询数据库，档案可直接访问")
+
+db = Session()
+user = asyncio.run(get_current_user(token=token, db=db))
+user.elderly_profile.address = "和谐小区"
+db.commit()
+db.close()
+assert resolve(token)[1].address == "和谐小区"
+print("✓ 命中返回的实例在当前会话中可正常修改并提交")
+
+for bad in ("garbage", token_for("not-a-uuid"), token_for(uuid.uuid4())):
+    try:
+        resolve(bad)
+        raise AssertionError("应当认证失败")
+    except HTTPException as e:
+        assert e.status_code == 401
+print("✓ 无效令牌、非UUID、用户不存在返回 401（不缓存）")
+
+print("=" * 50)
+print("失效测试")
+print("=" * 50)
+
+db = Session()
+db.get(User, elderly_id).status = UserStatus.LOCKED
+db.commit()
+db.close()
+try:
+    resolve(token)
+    raise AssertionError("已锁定用户应当被拒绝")
+except HTTPException as e:
+    assert e.status_code == 403
+print("✓ 用户状态修改提交后立即失效")
+
+db = Session()
+db.get(User, elderly_id).status = UserStatus.ACTIVE
+db.commit()
+resolve(token)
+db.get(User, elderly_id).status = UserStatus.LOCKED
+db.flush()
+db.rollback()
+db.close()
+assert resolve(token)[0].status == UserStatus.ACTIVE
+print("✓ 回滚的修改不会导致失效")
+
+db = Session()
+admin = db.get(User, admin_id)
+checker = PermissionChecker.check_community_access
+queries.clear()
+assert asyncio.run(checker(admin, community_id, db))
+assert not asyncio.run(checker(admin, uuid.uuid4(), db))
+assert len(queries) == 1, queries
+print("✓ 社区管理权限：一次查询后缓存")
+
+db.get(CommunityProfile, community_id).user_id = elderly_id
+db.commit()
+db.refresh(admin)
+queries.clear()
+assert not asyncio.run(checker(admin, community_id, db))
+assert len(queries) == 1
+db.close()
+print("✓ 社区档案变更后权限缓存失效")
+
+print("=" * 50)
+print("容量与有效期测试")
+print("=" * 50)
+
+cache = PrincipalCache(ttl_seconds=30, max_entries=2)
+db = Session()
+user = db.get(User, elderly_id)
+cache.put("a", user)
+cache.put("b", user)
+cache.get("a")
+cache.put("c", user)
+assert cache.get("b") is None and cache.get("a") and cache.get("c")
+print("✓ 超过容量按 LRU 淘汰")
+
+cache.put("expiring", user, expires_at=time.time() + 0.05)
+assert cache.get("expiring")
+time.sleep(0.1)
+assert cache.get("expiring") is None
+cache.put("expired", user, expires_at=time.time() - 1)
+assert cache.get("expired") is None
+print("✓ 有效期不超过令牌剩余有效期")
+
+cache.invalidate_user(elderly_id)
+assert cache.get("a") is None and cache.get_stats()["entries"] == 0
+assert PrincipalCache(ttl_seconds=0).get("a") is None
+db.close()
+print(f"✓ 按用户失效、TTL=0 关闭缓存；全局缓存统计 {principal_cache.get_stats()}")
+
+print("\n全部测试通过")
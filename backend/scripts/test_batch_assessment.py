@@ -0,0 +1,167 @@
+"""测试批量健康评估（使用临时 SQLite 文件，无需 PostgreSQL）"""
+import json
+import os
+import random
+import sys
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+sys.path.insert(0, '.')
+
+import scripts.sqlite_compat  # noqa: F401  SQLite 上渲染 UUID 列
+
+from sqlalchemy import create_engine, event, func
+from sqlalchemy.orm import sessionmaker
+
+from database.database import Base
+from database.models import HealthAssessment, HealthRecord, SleepData
+from repositories.health_assessment_repository import HealthAssessmentRepository
+from services.health_assessment import batch_runner
+from services.health_assessment.batch_runner import BatchAssessmentRunner
+
+workdir = tempfile.mkdtemp()
+database_url = f"sqlite:///{os.path.join(workdir, 'batch.db')}"
+checkpoint_path = os.path.join(workdir, "checkpoint.json")
+
+engine = create_engine(database_url)
+Base.metadata.create_all(engine, tables=[
+    HealthRecord.__table__, SleepData.__table__, HealthAssessment.__table__
+])
+Session = sessionmaker(bind=engine)
+
+# 不建 elderly_profiles 表，SQLite 默认不检查外键
+random.seed(7)
+assessment_date = datetime(2026, 10, 1, 6, 0)
+elderly = [uuid.uuid4() for _ in range(25)]
+with_data, without_data = elderly[:22], elderly[22:]
+
+records, sleep = [], []
+for index, elderly_id in enumerate(with_data):
+    hypertensive = index % 3 == 0
+    for day in range(30):
+        at = assessment_date - timedelta(days=day, hours=2)
+        records.append({
+            "id": uuid.uuid4(), "elderly_id": elderly_id, "recorded_at": at,
+            "systolic_pressure": random.randint(145, 165) if hypertensive else random.randint(110, 130),
+            "diastolic_pressure": random.randint(70, 90), "heart_rate": random.randint(60, 90),
+            "blood_sugar": round(random.uniform(4.5, 7.5), 1), "steps": random.randint(2000, 9000),
+            "weight": 65.0,
+        })
+        sleep.append({
+            "id": uuid.uuid4(), "elderly_id": elderly_id, "date": at, "total_hours": random.uniform(5, 8),
+            "deep_sleep_hours": 1.5, "light_sleep_hours": 4.0, "quality": 70,
+        })
+    # 窗口之外的数据不参与评估
+    records.append({**records[-1], "id": uuid.uuid4(), "systolic_pressure": 250,
+                    "recorded_at": assessment_date - timedelta(days=90)})
+db = Session()
+db.execute(HealthRecord.__table__.insert(), records)
+db.execute(SleepData.__table__.insert(), sleep)
+db.commit()
+db.close()
+
+print("=" * 50)
+print("批量读取测试")
+print("=" * 50)
+
+statements = []
+event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+db = Session()
+inputs = HealthAssessmentRepository(db).load_assessment_inputs(
+    elderly, assessment_date - timedelta(days=30), assessment_date
+)
+db.close()
+assert len(statements) == 2, statements
+assert set(inputs) == set(with_data) and len(inputs[with_data[0]]) == 60
+assert all(row.get("systolic_bp") != 250 for rows in inputs.values() for row in rows)
+times = [row["check_time"] for row in inputs[with_data[0]]]
+assert times == sorted(times)
+print(f"✓ {len(elderly)} 位老人的窗口数据 {len(statements)} 条查询读出，按时间排序，窗口外数据排除")
+
+print("=" * 50)
+print("进程内运行 + 检查点测试")
+print("=" * 50)
+
+progress = []
+runner = BatchAssessmentRunner(workers=0, chunk_size=10, checkpoint_path=checkpoint_path,
+                               database_url=database_url, progress=progress.append)
+real_assess_chunk = batch_runner.assess_chunk
+
+
+def interrupted(chunk_index, *args):
+    if chunk_index == 1:
+        raise KeyboardInterrupt
+    return real_assess_chunk(chunk_index, *args)
+
+
+batch_runner.assess_chunk = interrupted
+try:
+    runner.run(elderly, assessment_date=assessment_date)
+    raise AssertionError("应当中断")
+except KeyboardInterrupt:
+    pass
+batch_runner.assess_chunk = real_assess_chunk
+with open(checkpoint_path, "r", encoding="utf-8") as f:
+    assert json.load(f)["completed"] == [0]
+print("✓ 中断后检查点记录已完成的组")
+
+stats = runner.run(elderly, assessment_date=assessment_date)
+assert stats["resumed_chunks"] == 1 and stats["chunks_done"] == 3
+assert not os.path.exists(checkpoint_path)
+assert stats["processed"] == len(elderly) - 10 and stats["failed"] == 0
+assert len(progress) == 3 and progress[-1]["eta_seconds"] == 0
+db = Session()
+rows = db.query(HealthAssessment).all()
+assert len(rows) == len(with_data)
+assert {row.assessment_date.replace(tzinfo=None) for row in rows} == {assessment_date}
+assert all(0 <= getattr(row, column) <= 100 for row in rows for column in (
+    "cardiovascular", "sleep_quality", "exercise", "nutrition", "mental_health", "weight_management", "overall"
+))
+by_elderly = {row.elderly_id: row for row in rows}
+hypertensive = [by_elderly[e].cardiovascular for i, e in enumerate(with_data) if i % 3 == 0]
+normal = [by_elderly[e].cardiovascular for i, e in enumerate(with_data) if i % 3 != 0]
+assert max(hypertensive) < min(normal), (hypertensive, normal)
+db.close()
+print(f"✓ 续跑跳过已完成的组，写入 {len(rows)} 条评估（无数据的老人跳过），心血管得分区分高血压老人")
+print(f"  {stats['users_per_second']} 人/秒")
+print("✓ 全部完成后删除检查点")
+
+batch_runner.assess_chunk = interrupted
+try:
+    runner.run(elderly, assessment_date=assessment_date)
+    raise AssertionError("应当中断")
+except KeyboardInterrupt:
+    pass
+batch_runner.assess_chunk = real_assess_chunk
+next_run = assessment_date + timedelta(days=7)
+stats = runner.run(elderly, assessment_date=next_run)
+assert stats["resumed_chunks"] == 0 and stats["processed"] == len(elderly)
+assert stats["assessment_date"] == next_run.isoformat()
+db = Session()
+rows = [row for row in db.query(HealthAssessment).all() if row.assessment_date.replace(tzinfo=None) == next_run]
+assert len(rows) == len(with_data)
+for row in rows:
+    db.delete(row)
+db.commit()
+db.close()
+print("✓ 评估日期与检查点不一致时重新开始，不沿用检查点中已完成的组")
+
+print("=" * 50)
+print("进程池测试")
+print("=" * 50)
+
+stats = BatchAssessmentRunner(workers=2, chunk_size=5, checkpoint_path=checkpoint_path,
+                              database_url=database_url).run(elderly, assessment_date=assessment_date)
+assert stats["chunks_done"] == 5 and stats["written"] == len(with_data)
+db = Session()
+assert db.query(func.count(HealthAssessment.id)).scalar() == len(with_data)
+db.close()
+print(f"✓ 2 个进程 5 组，重跑同一评估日期不产生重复行；{stats['users_per_second']} 人/秒")
+
+stats = BatchAssessmentRunner(workers=2, chunk_size=5, checkpoint_path=checkpoint_path,
+                              database_url=database_url).run(elderly)
+assert stats["resumed_chunks"] == 0 and stats["processed"] == len(elderly)
+assert not os.path.exists(checkpoint_path)
+print("✓ 上一次运行完成后，默认日期的下一次运行重新评估全部老人")
+
+print("\n全部测试通过")
@@ -0,0 +1,175 @@
+"""测试在线变点检测（使用内存 SQLite，无需 PostgreSQL）"""
+import sys
+import uuid
+import random
+from datetime import date, datetime, time, timedelta
+sys.path.insert(0, '.')
+
+import scripts.sqlite_compat  # noqa: F401  SQLite 上渲染 UUID 列
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database.database import Base
+from database.models import (
+    Alert, AlertSeverity, ChangePointDetectorState, HealthBaseline, HealthChangePoint, HealthRecord,
+    HealthRecordStatus, LatestVitals
+)
+from repositories.health_repository import HealthRepository
+from repositories.change_point_repository import ChangePointRepository
+from services.health_assessment.online_change_point import OnlineChangePointDetector, detect_offline
+from services.health_assessment.yangsheng_report_generator import YangShengReportGenerator
+
+print("=" * 50)
+print("检测器测试")
+print("=" * 50)
+
+np_rng = np.random.default_rng(11)
+false_alarms = sum(len(detect_offline(list(np_rng.normal(130, 6, 90)))) for _ in range(200))
+assert false_alarms <= 40, false_alarms
+print(f"✓ 平稳序列（200 × 90 天）误报 {false_alarms} 次")
+
+detected, delays = 0, []
+for _ in range(200):
+    series = list(np_rng.normal(130, 6, 40)) + list(np_rng.normal(145, 6, 30))
+    events = [e for e in detect_offline(series) if e['change_day'] >= 35 and e['direction'] == 'up']
+    if events:
+        detected += 1
+        delays.append(events[0]['detected_day'] - 40)
+assert detected >= 190, detected
+print(f"✓ 11% 均值上升检出 {detected}/200，中位延迟 {np.median(delays):.0f} 天")
+
+# 状态序列化后继续检测，与不中断的结果一致；同一天多条读数按日均值
+readings = [(float(v), day) for day, v in enumerate(np_rng.normal(75, 3, 30))]
+readings += [(float(v), 30 + day // 3) for day, v in enumerate(np_rng.normal(62, 3, 60))]
+continuous, resumed = OnlineChangePointDetector(), OnlineChangePointDetector()
+events_a, events_b = [], []
+for i, (value, day) in enumerate(readings):
+    events_a.append(continuous.add(value, day))
+    resumed = OnlineChangePointDetector.from_state(resumed.to_state())
+    events_b.append(resumed.add(value, day))
+assert events_a == events_b and continuous.to_state() == resumed.to_state()
+down = [e for e in events_a if e]
+assert down and down[0]['direction'] == 'down' and down[0]['change_day'] >= 28
+assert len(str(continuous.to_state())) < 300
+print(f"✓ 逐条序列化/恢复与连续检测一致，状态大小固定（{len(str(continuous.to_state()))} 字节）")
+
+print("\n" + "=" * 50)
+print("写入时检测并生成预警")
+print("=" * 50)
+
+engine = create_engine("sqlite://")
+Base.metadata.create_all(engine, tables=[
+    HealthRecord.__table__, LatestVitals.__table__, HealthBaseline.__table__, Alert.__table__,
+    ChangePointDetectorState.__table__, HealthChangePoint.__table__
+])
+db = sessionmaker(bind=engine)()
+repo = HealthRepository(db)
+change_points = ChangePointRepository(db, enabled=True)
+
+rng = random.Random(5)
+elderly_a, elderly_b = uuid.uuid4(), uuid.uuid4()
+today = date.today()
+first_day = today - timedelta(days=59)
+METRICS = ["heart_rate", "systolic_pressure", "diastolic_pressure", "blood_sugar", "weight"]
+
+
+def row(elderly_id, day, **values):
+    """与 IoT 流水线一样，每行包含相同的列"""
+    return {
+        "id": uuid.uuid4(),
+        "elderly_id": elderly_id,
+        "recorded_at": datetime.combine(day, time(rng.randint(6, 20), rng.randint(0, 59))),
+        "status": HealthRecordStatus.NORMAL,
+        **{metric: None for metric in METRICS},
+        **values
+    }
+
+
+# 老人A：第 40 天起收缩压上升约 15%；老人B 保持平稳。每天一批，每人每天两次测量
+shift_day = first_day + timedelta(days=40)
+for offset in range(60):
+    day = first_day + timedelta(days=offset)
+    rows = []
+    for _ in range(2):
+        sbp_mean = 150 if day >= shift_day else 130
+        rows.append(row(elderly_a, day, systolic_pressure=round(rng.gauss(sbp_mean, 5)),
+                        diastolic_pressure=round(rng.gauss(80, 4)), heart_rate=round(rng.gauss(72, 3))))
+        rows.append(row(elderly_b, day, systolic_pressure=round(rng.gauss(125, 5)),
+                        heart_rate=round(rng.gauss(68, 3))))
+    repo.bulk_insert_records(rows)
+
+db.expire_all()
+points = db.query(HealthChangePoint).filter(
+    HealthChangePoint.elderly_id == elderly_a, HealthChangePoint.metric == "systolic_bp"
+).all()
+assert len(points) == 1, [(p.change_date, p.direction, p.change_percent) for p in points]
+point = points[0]
+assert point.direction == "up" and abs((point.change_date - shift_day).days) <= 2
+assert point.detected_date - point.change_date <= timedelta(days=5)
+alert = db.query(Alert).filter(Alert.id == point.alert_id).one()
+assert "收缩压" in alert.alert_message and "明显上升" in alert.alert_message
+assert alert.severity == AlertSeverity.MEDIUM
+assert db.query(ChangePointDetectorState).count() == 5
+print(f"✓ {point.change_date} 起收缩压上升 {point.change_percent:.0f}%，"
+      f"{(point.detected_date - point.change_date).days} 天后检出并生成预警：{alert.alert_message}")
+
+total_alerts = db.query(Alert).count()
+assert total_alerts == db.query(HealthChangePoint).count()
+assert total_alerts <= 2, [p.metric for p in db.query(HealthChangePoint)]
+print(f"✓ 同一次变化只预警一次，全部预警 {total_alerts} 条")
+
+# 迟到的旧读数不影响检测器
+state_before = db.query(ChangePointDetectorState).filter_by(elderly_id=elderly_b, metric="systolic_bp").one().state
+repo.bulk_insert_records([row(elderly_b, first_day, systolic_pressure=200)])
+db.expire_all()
+assert db.query(ChangePointDetectorState).filter_by(elderly_id=elderly_b, metric="systolic_bp").one().state == state_before
+print("✓ 早于当前日期的迟到读数不参与检测")
+
+disabled = ChangePointRepository(db, enabled=False)
+assert disabled.update_from_rows([row(elderly_a, today, heart_rate=70)]) == []
+print("✓ 关闭检测时不更新")
+
+print("\n" + "=" * 50)
+print("报告读取")
+print("=" * 50)
+
+detected = change_points.get_change_points(elderly_a, first_day, today)
+assert [cp['direction'] for cp in detected["systolic_bp_history"]] == ["up"]
+assert detected["systolic_bp_history"][0]['index'] == (point.change_date - first_day).days
+
+generator = YangShengReportGenerator()
+sbp_history = [r.systolic_pressure for r in db.query(HealthRecord).filter(
+    HealthRecord.elderly_id == elderly_a, HealthRecord.systolic_pressure.isnot(None)
+).order_by(HealthRecord.recorded_at)]
+results = generator.analyze_all_change_points(
+    {"systolic_bp_history": sbp_history, "uric_acid_history": [300, 310, 305, 420, 430, 425, 428]},
+    detected=detected
+)
+assert results["systolic_bp_history"]["has_change_point"]
+assert "收缩压明显上升" in results["systolic_bp_history"]["description"]
+assert "diastolic_bp_history" not in results  # 报告没有该指标的历史数据，也没有变点
+assert "uric_acid_history" in results  # 未在线检测的指标仍按历史数组检测
+print(f"✓ 报告直接使用在线检测的变点：{results['systolic_bp_history']['description']}")
+
+batch = generator.detect_change_points([float(v) for v in sbp_history], metric_name="收缩压")
+assert batch["has_change_point"] and batch["change_points"][0]["direction"] == "up"
+print("✓ 与批量检测的结论一致")
+
+print("\n" + "=" * 50)
+print("回放重建")
+print("=" * 50)
+
+alerts_before, change_date = db.query(Alert).count(), point.change_date
+count = change_points.rebuild(as_of=today, days=60)
+db.expire_all()
+replayed = db.query(HealthChangePoint).filter(
+    HealthChangePoint.elderly_id == elderly_a, HealthChangePoint.metric == "systolic_bp"
+).one()
+assert replayed.change_date == change_date and replayed.alert_id is None
+assert db.query(Alert).count() == alerts_before
+assert change_points.rebuild(as_of=today, days=60) == count
+print(f"✓ 回放得到同样的变点（{count} 个），不重复生成预警，重复回放结果不变")
+
+print("\n全部测试通过")
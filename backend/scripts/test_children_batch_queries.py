@@ -0,0 +1,119 @@
+"""测试子女端老人列表/仪表盘的批量查询（使用内存 SQLite，无需 PostgreSQL）"""
+import sys
+import uuid
+from datetime import datetime, timedelta
+sys.path.insert(0, '.')
+
+import scripts.sqlite_compat  # noqa: F401  SQLite 上渲染 UUID 列
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from database.database import Base
+from database.models import (
+    Alert, AlertSeverity, AlertStatus, AlertType, ChildrenElderlyRelation, ElderlyProfile, Gender,
+    HealthRecord, HealthRecordStatus, RelationshipType, Reminder, ReminderStatus, ReminderType
+)
+from repositories.children_repository import ChildrenRepository
+
+engine = create_engine("sqlite://")
+Base.metadata.create_all(engine, tables=[
+    ElderlyProfile.__table__, ChildrenElderlyRelation.__table__, HealthRecord.__table__,
+    Alert.__table__, Reminder.__table__
+])
+db = sessionmaker(bind=engine)()
+repo = ChildrenRepository(db)
+
+now = datetime.now().replace(microsecond=0)
+children_id = uuid.uuid4()
+queries = []
+
+
+def count_query(conn, cursor, statement, *args):
+    queries.append(statement)
+
+
+def count_queries(func, *args):
+    queries.clear()
+    event.listen(engine, "before_cursor_execute", count_query)
+    try:
+        return func(*args), len(queries)
+    finally:
+        event.remove(engine, "before_cursor_execute", count_query)
+
+
+def add_elderly(index):
+    """第 i 位老人：i 条健康记录（最新一条在 i 小时前）、i % 3 条未处理预警、1 条已解决预警"""
+    elderly = ElderlyProfile(
+        id=uuid.uuid4(), user_id=uuid.uuid4(), name=f"老人{index}", gender=Gender.MALE,
+        birth_date=datetime(1950, 1, 1), age=75, address="测试地址"
+    )
+    db.add(elderly)
+    db.add(ChildrenElderlyRelation(
+        children_id=children_id, elderly_id=elderly.id, relationship_type=RelationshipType.SON,
+        created_at=now - timedelta(minutes=index)
+    ))
+    for j in range(index):
+        db.add(HealthRecord(
+            elderly_id=elderly.id, heart_rate=60 + j, recorded_at=now - timedelta(hours=index + j),
+            status=HealthRecordStatus.WARNING if index % 4 == 0 else HealthRecordStatus.NORMAL
+        ))
+    for _ in range(index % 3):
+        db.add(Alert(elderly_id=elderly.id, alert_type=AlertType.HEART_RATE_HIGH, alert_message="心率偏高",
+                     severity=AlertSeverity.MEDIUM, status=AlertStatus.ACTIVE))
+    db.add(Alert(elderly_id=elderly.id, alert_type=AlertType.OTHER, alert_message="已处理",
+                 severity=AlertSeverity.LOW, status=AlertStatus.RESOLVED))
+    db.add(Reminder(elderly_id=elderly.id, created_by=children_id, title="吃药", reminder_type=ReminderType.MEDICATION,
+                    next_reminder_time=now.replace(hour=12, minute=0, second=0), status=ReminderStatus.ACTIVE))
+    return elderly.id
+
+
+elderly_ids = [add_elderly(i) for i in range(50)]
+db.commit()
+
+print("=" * 50)
+print("批量统计测试")
+print("=" * 50)
+
+stats, query_count = count_queries(repo.get_elderly_health_statistics_batch, elderly_ids)
+assert query_count == 3, query_count
+assert stats[elderly_ids[0]]["latest_record"] is None
+for i in (1, 7, 49):
+    latest = stats[elderly_ids[i]]["latest_record"]
+    assert latest.heart_rate == 60 and latest.recorded_at == now - timedelta(hours=i), (i, latest.recorded_at)
+    assert stats[elderly_ids[i]]["pending_alerts_count"] == i % 3
+    assert stats[elderly_ids[i]]["today_reminders_count"] == 1
+print(f"✓ 50 位老人的最新记录、未处理预警数、今日提醒数共 {query_count} 次查询")
+
+single, _ = count_queries(repo.get_elderly_health_statistics, elderly_ids[5])
+assert single["pending_alerts_count"] == 2 and single["latest_record"].recorded_at == now - timedelta(hours=5)
+print("✓ 单个老人的统计与批量结果一致")
+
+print("\n" + "=" * 50)
+print("老人列表与仪表盘测试")
+print("=" * 50)
+
+elderly_list, query_count = count_queries(repo.get_children_elderly_list, children_id)
+assert query_count == 3, query_count
+assert len(elderly_list) == 50
+by_id = {item["elderly"].id: item for item in elderly_list}
+assert by_id[elderly_ids[8]]["pending_alerts_count"] == 2
+assert by_id[elderly_ids[8]]["latest_health"].recorded_at == now - timedelta(hours=8)
+assert by_id[elderly_ids[8]]["relationship_type"] == RelationshipType.SON
+print(f"✓ 老人列表 {query_count} 次查询")
+
+dashboard, query_count = count_queries(repo.get_children_elderly_dashboard, children_id)
+assert query_count == 8, query_count
+assert dashboard["total_elderly"] == 50
+assert dashboard["pending_alerts"] == sum(i % 3 for i in range(50))
+assert dashboard["recent_health_records"][0]["record"].recorded_at == now - timedelta(hours=1)
+summary = {item["elderly_id"]: item for item in dashboard["elderly_status_summary"]}
+assert summary[elderly_ids[0]]["health_status"] == "inactive"           # 没有记录
+assert summary[elderly_ids[1]]["health_status"] == "alert"              # 有未处理预警
+assert summary[elderly_ids[3]]["health_status"] == "normal"
+assert summary[elderly_ids[12]]["health_status"] == "abnormal"          # 最新记录状态异常
+assert summary[elderly_ids[30]]["health_status"] == "inactive"          # 24 小时内没有记录
+assert summary[elderly_ids[3]]["latest_record_time"] == now - timedelta(hours=3)
+print(f"✓ 仪表盘 {query_count} 次查询，状态摘要正确")
+
+print("\n全部测试通过")
@@ -0,0 +1,136 @@
+"""测试 CosyVoice fastapi 运行时的请求合并、队列满 503 和推理失败 500（使用假模型，无需 torch 和模型文件）"""
+import asyncio
+import os
+import sys
+import threading
+import types
+sys.path.insert(0, '.')
+
+import httpx
+import numpy as np
+
+RUNTIME_DIR = os.path.join('voice_service', 'runtime', 'python', 'fastapi')
+sys.path.insert(0, RUNTIME_DIR)
+
+
+class FakeSpeech:
+    def __init__(self, values):
+        self.values = np.asarray(values, dtype=np.float32)
+
+    def numpy(self):
+        return self.values
+
+
+class FakeCosyVoice:
+    """按文本逐字输出音频块；可阻塞推理，文本为 fail 时在输出前失败"""
+
+    def __init__(self):
+        self.calls = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def inference_sft(self, tts_text, spk_id):
+        self.calls.append((tts_text, spk_id))
+        self.gate.wait()
+        if tts_text == "fail":
+            raise RuntimeError("speaker not found")
+        for ch in tts_text:
+            yield {"tts_speech": FakeSpeech([ord(ch) / 2 ** 16])}
+
+
+# server.py 在导入时加载 cosyvoice，这里换成假模块
+fake_modules = {
+    "cosyvoice": types.ModuleType("cosyvoice"),
+    "cosyvoice.cli": types.ModuleType("cosyvoice.cli"),
+    "cosyvoice.cli.cosyvoice": types.ModuleType("cosyvoice.cli.cosyvoice"),
+    "cosyvoice.utils": types.ModuleType("cosyvoice.utils"),
+    "cosyvoice.utils.file_utils": types.ModuleType("cosyvoice.utils.file_utils"),
+}
+fake_modules["cosyvoice.cli.cosyvoice"].CosyVoice = FakeCosyVoice
+fake_modules["cosyvoice.utils.file_utils"].load_wav = lambda *args, **kwargs: None
+sys.modules.update(fake_modules)
+
+import server  # noqa: E402
+from scheduler import InferenceScheduler  # noqa: E402
+
+
+def expected_audio(text):
+    return b"".join((np.asarray([ord(ch) / 2 ** 16], dtype=np.float32) * 2 ** 15).astype(np.int16).tobytes()
+                    for ch in text)
+
+
+async def with_scheduler(test, **kwargs):
+    model = FakeCosyVoice()
+    server.scheduler = InferenceScheduler(model, **kwargs)
+    server.scheduler.start()
+    try:
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await test(client, model)
+    finally:
+        model.gate.set()
+        await server.scheduler.stop()
+
+
+def sft(client, text, spk_id="中文女"):
+    return client.request("GET", "/inference_sft", data={"tts_text": text, "spk_id": spk_id})
+
+
+async def test_coalescing(client, model):
+    responses = await asyncio.gather(*[sft(client, "你好") for _ in range(3)], sft(client, "再见"))
+    assert [r.status_code for r in responses] == [200] * 4
+    assert [r.content for r in responses[:3]] == [expected_audio("你好")] * 3
+    assert responses[3].content == expected_audio("再见")
+    assert sorted(model.calls) == [("你好", "中文女"), ("再见", "中文女")], model.calls
+    stats = (await client.get("/scheduler_stats")).json()
+    assert stats["requests"] == 4 and stats["coalesced"] == 2 and stats["jobs"] == 2, stats
+    print(f"✓ 3 个相同请求合并为 1 次推理，音频分发给每个客户端（{stats}）")
+
+
+async def test_queue_full(client, model):
+    model.gate.clear()
+    # 第 1 个请求占用唯一的推理线程，第 2 个由调度器取出后等待空位，第 3 个留在队列中
+    running = []
+    for i in range(3):
+        running.append(asyncio.create_task(sft(client, f"请求{i}")))
+        await asyncio.sleep(0.1)
+    assert server.scheduler.queue.full()
+    rejected = await sft(client, "请求3")
+    assert rejected.status_code == 503 and rejected.json()["detail"] == "inference queue is full"
+
+    model.gate.set()
+    responses = await asyncio.gather(*running)
+    assert [r.status_code for r in responses] == [200] * 3
+    assert [r.content for r in responses] == [expected_audio(f"请求{i}") for i in range(3)]
+    stats = (await client.get("/scheduler_stats")).json()
+    assert stats["rejected"] == 1 and stats["requests"] == 3, stats
+    print("✓ 队列已满时返回 503，已排队的请求在推理恢复后正常完成")
+
+
+async def test_job_failure(client, model):
+    response = await sft(client, "fail")
+    assert response.status_code == 500
+    assert response.json()["detail"] == "sft inference failed: speaker not found"
+    stats = (await client.get("/scheduler_stats")).json()
+    assert stats["failed"] == 1, stats
+
+    assert (await sft(client, "好")).content == expected_audio("好")
+    print("✓ 首个音频块之前推理失败返回 500 和错误信息，之后的请求不受影响")
+
+
+print("=" * 50)
+print("请求合并测试")
+print("=" * 50)
+asyncio.run(with_scheduler(test_coalescing, batch_window_ms=50))
+
+print("\n" + "=" * 50)
+print("队列满测试")
+print("=" * 50)
+asyncio.run(with_scheduler(test_queue_full, max_concurrency=1, max_batch_size=1, max_queue_size=1))
+
+print("\n" + "=" * 50)
+print("推理失败测试")
+print("=" * 50)
+asyncio.run(with_scheduler(test_job_failure))
+
+print("\n全部测试通过")
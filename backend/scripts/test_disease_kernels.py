@@ -0,0 +1,105 @@
+"""测试单病种批量评分与逐人评分结果一致（含分段边界），并对比耗时"""
+import sys
+import time
+sys.path.insert(0, '.')
+
+import numpy as np
+
+from services.health_assessment.disease_assessment import (
+    CONTROL_STATUSES, RISK_LEVELS, DiabetesAssessor, DyslipidemiAssessor,
+    HypertensionAssessor, SimplifiedFuzzyLogic
+)
+
+rng = np.random.default_rng(2024)
+N = 20000
+
+
+def with_boundaries(values, boundaries):
+    """随机值中混入分段边界本身及其相邻的浮点数"""
+    boundaries = np.asarray(boundaries, dtype=np.float64)
+    edges = np.concatenate([boundaries, np.nextafter(boundaries, -np.inf), np.nextafter(boundaries, np.inf)])
+    values = values.copy()
+    values[:len(edges)] = edges
+    return rng.permutation(values)
+
+
+def check_parity(assessor, features, baseline, baseline_key):
+    started = time.perf_counter()
+    batch = assessor.score_batch(features, baseline)
+    batch_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    scalar = []
+    for i in range(N):
+        user_features = {name: float(values[i]) for name, values in features.items()}
+        user_baseline = None
+        if baseline is not None and not np.isnan(baseline[baseline_key][i]):
+            user_baseline = {baseline_key: float(baseline[baseline_key][i])}
+        scalar.append(assessor.assess(user_features, user_baseline))
+    scalar_seconds = time.perf_counter() - started
+
+    # 逐位相同（不是近似相等）
+    assert np.array_equal(batch['risk_score'], [r.risk_score for r in scalar])
+    assert np.array_equal(batch['control_quality_score'], [r.control_quality_score for r in scalar])
+    assert [RISK_LEVELS[code] for code in batch['risk_level']] == [r.risk_level for r in scalar]
+    assert [CONTROL_STATUSES[code] for code in batch['control_status']] == [r.control_status for r in scalar]
+    deviation = [np.nan if r.baseline_deviation is None else r.baseline_deviation for r in scalar]
+    assert np.array_equal(batch['baseline_deviation'], deviation, equal_nan=True)
+    levels = np.bincount(batch['risk_level'], minlength=4)
+    return scalar_seconds, batch_seconds, levels
+
+
+def report(name, scalar_seconds, batch_seconds, levels):
+    print(f"✓ {name}: {N} 人逐位一致；逐人 {scalar_seconds * 1000:.0f}ms，"
+          f"批量 {batch_seconds * 1000:.1f}ms（{scalar_seconds / batch_seconds:.0f}x），风险等级分布 {levels.tolist()}")
+
+
+print("=" * 50)
+print("隶属度函数")
+print("=" * 50)
+
+x = with_boundaries(rng.uniform(-1, 12, N), [0, 2, 5, 8, 10])
+for params in ([0, 5, 10], [2, 2, 8], [0, 5, 5]):
+    assert np.array_equal(SimplifiedFuzzyLogic.trimf_array(x, params),
+                          [SimplifiedFuzzyLogic.trimf(v, params) for v in x])
+for params in ([0, 2, 8, 10], [0, 0, 5, 10], [2, 5, 5, 8]):
+    assert np.array_equal(SimplifiedFuzzyLogic.trapmf_array(x, params),
+                          [SimplifiedFuzzyLogic.trapmf(v, params) for v in x])
+print("✓ trimf/trapmf 数组版本逐位一致（包括退化参数）")
+
+print("=" * 50)
+print("单病种评分")
+print("=" * 50)
+
+baseline_sbp = rng.uniform(110, 170, N)
+baseline_sbp[rng.random(N) < 0.3] = np.nan    # 30% 没有基线
+features = {
+    'sbp_mean': with_boundaries(rng.uniform(95, 200, N), [115, 120, 125, 135, 140, 145, 155, 160, 165, 170, 180, 185]),
+    'dbp_mean': with_boundaries(rng.uniform(60, 125, N), [75, 80, 82, 87, 90, 93, 98, 100, 103, 105, 110, 115]),
+    'sbp_compliance_rate': rng.uniform(0, 1, N),
+    'sbp_cv': with_boundaries(rng.uniform(0, 0.3, N), [0.08, 0.1, 0.12, 0.15, 0.17, 0.2, 0.22]),
+}
+report("高血压", *check_parity(HypertensionAssessor(), features, {'sbp_mean': baseline_sbp}, 'sbp_mean'))
+
+baseline_glucose = rng.uniform(4.5, 9, N)
+baseline_glucose[rng.random(N) < 0.3] = np.nan
+features = {
+    'glucose_mean': with_boundaries(rng.uniform(4, 13, N), [6.1, 7.0, 10.0]),
+    'glucose_compliance_rate': rng.uniform(0, 1, N),
+    'glucose_cv': with_boundaries(rng.uniform(0, 0.5, N), [0.15, 0.25, 0.35]),
+}
+report("糖代谢", *check_parity(DiabetesAssessor(), features, {'glucose_mean': baseline_glucose}, 'glucose_mean'))
+
+features = {
+    'tc_mean': with_boundaries(rng.uniform(3.5, 7.5, N), [5.2, 6.2]),
+    'ldl_mean': with_boundaries(rng.uniform(2, 5, N), [3.4, 4.1]),
+    'hdl_mean': with_boundaries(rng.uniform(0.6, 2, N), [1.0]),
+    'tg_mean': with_boundaries(rng.uniform(0.8, 3.5, N), [1.7, 2.3]),
+}
+report("血脂", *check_parity(DyslipidemiAssessor(), features, None, None))
+
+batch = HypertensionAssessor().score_batch({'sbp_mean': np.array([118.0, 150.0])})
+assert batch['risk_score'].shape == (2,) and np.isnan(batch['baseline_deviation']).all()
+print("✓ 缺失的特征使用与逐人评估相同的默认值，没有基线时偏离为 NaN")
+
+print("\n全部测试通过")
@@ -0,0 +1,201 @@
+"""测试知识库嵌入的分批、重试和缓存（本地桩 HTTP 服务，无需硅基流动 API）"""
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.insert(0, '.')
+
+os.environ.setdefault("NO_PROXY", "127.0.0.1,localhost")
+
+from services.embedding_cache import EmbeddingCache
+from services.knowledge_base import SiliconFlowEmbeddings
+from services.siliconflow_service import SiliconFlowService
+
+DIM = 4
+
+
+def vector_for(text):
+    """每条文本对应确定的向量，便于核对顺序"""
+    return [float(len(text)), float(sum(map(ord, text)) % 997), 1.0, 0.5]
+
+
+class StubState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = []        # 每次请求的 input 条数
+        self.texts = []           # 成功嵌入过的文本
+        self.fail_statuses = []   # 依次返回的错误状态码
+
+
+state = StubState()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """模拟 /v1/embeddings：按脚本返回错误状态码，成功时打乱 data 顺序并带 index"""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        with state.lock:
+            state.requests.append(len(texts))
+            status = state.fail_statuses.pop(0) if state.fail_statuses else 200
+            if status == 200:
+                state.texts.extend(texts)
+
+        if status != 200:
+            payload = json.dumps({"message": "stub error"}).encode()
+        else:
+            data = [{"index": i, "embedding": vector_for(text)} for i, text in enumerate(texts)]
+            random.shuffle(data)
+            payload = json.dumps({"data": data}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+
+service = SiliconFlowService()
+service.api_key = "stub-key"
+service.base_url = f"http://127.0.0.1:{server.server_port}/v1"
+
+tmp_dir = tempfile.mkdtemp()
+cache_path = os.path.join(tmp_dir, "embeddings.db")
+
+
+def make_embeddings(cache=None, **kwargs):
+    params = {"batch_size": 32, "max_concurrency": 3, "max_retries": 3, "retry_backoff": 0.01}
+    params.update(kwargs)
+    embeddings = SiliconFlowEmbeddings(service=service, cache=cache, **params)
+    embeddings.EMBEDDING_DIM = DIM
+    return embeddings
+
+
+def reset():
+    with state.lock:
+        state.requests.clear()
+        state.texts.clear()
+        state.fail_statuses.clear()
+
+
+print("=" * 50)
+print("分批与顺序测试")
+print("=" * 50)
+
+texts = [f"第{i}段文档内容" for i in range(70)]
+inputs = texts + texts[:5]  # 带重复文本
+embeddings = make_embeddings(cache=EmbeddingCache(cache_path))
+vectors = embeddings.embed_documents(inputs)
+assert vectors == [vector_for(text) for text in inputs]
+assert sorted(state.requests) == [6, 32, 32], state.requests
+assert sorted(state.texts) == sorted(texts)
+print(f"✓ 70 条文本分 {len(state.requests)} 批请求 {sorted(state.requests)}，重复文本只嵌入一次，结果与输入顺序一致")
+
+print("\n" + "=" * 50)
+print("缓存测试")
+print("=" * 50)
+
+reset()
+assert embeddings.embed_documents(list(reversed(inputs))) == [vector_for(text) for text in reversed(inputs)]
+assert state.requests == []
+print(f"✓ 再次嵌入全部命中缓存，不发请求（命中 {embeddings.cache.hits}）")
+
+reset()
+reopened = make_embeddings(cache=EmbeddingCache(cache_path))
+mixed = texts[:10] + ["新文本A", "新文本B"]
+assert reopened.embed_documents(mixed) == [vector_for(text) for text in mixed]
+assert state.requests == [2] and sorted(state.texts) == ["新文本A", "新文本B"]
+assert reopened.embed_query(texts[3]) == vector_for(texts[3]) and state.requests == [2]
+print("✓ 重新打开缓存文件后仍命中，只嵌入未缓存的 2 条")
+
+print("\n" + "=" * 50)
+print("重试测试")
+print("=" * 50)
+
+reset()
+state.fail_statuses = [429, 503, 500]
+uncached = make_embeddings()
+retry_texts = [f"重试文本{i}" for i in range(10)]
+assert uncached.embed_documents(retry_texts) == [vector_for(text) for text in retry_texts]
+assert state.requests == [10, 10, 10, 10], state.requests
+print("✓ 429/503/500 后退避重试，第 4 次请求成功")
+
+reset()
+state.fail_statuses = [503] * 4
+cache = EmbeddingCache(":memory:")
+failing = make_embeddings(cache=cache, max_retries=3)
+assert failing.embed_documents(["总是失败"]) == [[0.0] * DIM]
+assert state.requests == [1] * 4
+assert cache.get_many([EmbeddingCache.make_key(failing.model, "总是失败")]) == {}
+print("✓ 重试用尽返回零向量，且零向量不写入缓存")
+
+reset()
+state.fail_statuses = [400]
+assert failing.embed_documents(["参数错误"]) == [[0.0] * DIM]
+assert state.requests == [1]
+print("✓ 400 等参数错误不重试")
+
+reset()
+state.fail_statuses = [429]
+assert failing.embed_documents(["总是失败"]) == [vector_for("总是失败")]
+print("✓ 之后再次嵌入会重新请求并成功")
+
+print("\n" + "=" * 50)
+print("异步查询测试")
+print("=" * 50)
+
+reset()
+async_embeddings = make_embeddings(cache=EmbeddingCache(":memory:"))
+assert asyncio.run(async_embeddings.aembed_query("异步查询")) == vector_for("异步查询")
+assert asyncio.run(async_embeddings.aembed_query("异步查询")) == vector_for("异步查询")
+assert state.requests == [1]
+print("✓ aembed_query 走异步客户端，第二次命中缓存")
+
+reset()
+state.fail_statuses = [429, 500]
+assert asyncio.run(make_embeddings().aembed_query("异步重试")) == vector_for("异步重试")
+assert state.requests == [1, 1, 1]
+print("✓ 异步查询同样退避重试")
+
+print("\n" + "=" * 50)
+print("异步客户端生命周期测试")
+print("=" * 50)
+
+http = service.http
+
+
+async def embed_and_get_client(text):
+    await service.aget_embedding(text)
+    return http._get_async_client()[0]
+
+
+first = asyncio.run(embed_and_get_client("循环一"))
+second = asyncio.run(embed_and_get_client("循环二"))
+assert first is not second
+assert len(http._async_clients) <= 1
+print("✓ 每个事件循环使用各自的客户端，已关闭循环的客户端被丢弃")
+
+
+async def use_then_close():
+    client = await embed_and_get_client("关闭前")
+    await http.aclose()
+    return client
+
+
+closed = asyncio.run(use_then_close())
+assert closed.is_closed and len(http._async_clients) == 0
+assert asyncio.run(service.aget_embedding("关闭后")) == vector_for("关闭后")
+print("✓ aclose() 关闭异步客户端，之后再次使用会重新创建")
+
+server.shutdown()
+print("\n全部测试通过")
@@ -0,0 +1,219 @@
+"""测试增量个人基线（使用内存 SQLite，无需 PostgreSQL）"""
+import sys
+import uuid
+import random
+from datetime import date, datetime, time, timedelta
+sys.path.insert(0, '.')
+
+import scripts.sqlite_compat  # noqa: F401  SQLite 上渲染 UUID 列
+
+import numpy as np
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from config.settings import settings
+from database.database import Base
+from database.models import (
+    Alert, ChangePointDetectorState, HealthBaseline, HealthChangePoint, HealthRecord, HealthRecordStatus, LatestVitals
+)
+from repositories.health_repository import HealthRepository
+from repositories.health_baseline_repository import HealthBaselineRepository
+from services.health_assessment.streaming_baseline import MetricBaseline, exact_summary
+from services.health_assessment.health_report_models import ElderBasicInfo
+from services.health_assessment.indicator_evaluator import PersonalizedEvaluator
+from services.health_assessment.yangsheng_report_generator import YangShengReportGenerator
+
+engine = create_engine("sqlite://")
+Base.metadata.create_all(engine, tables=[
+    HealthRecord.__table__, LatestVitals.__table__, HealthBaseline.__table__, Alert.__table__,
+    ChangePointDetectorState.__table__, HealthChangePoint.__table__
+])
+db = sessionmaker(bind=engine)()
+
+WINDOW = 30
+today = date.today()
+elderly_a, elderly_b = uuid.uuid4(), uuid.uuid4()
+rng = random.Random(7)
+
+METRICS = ["heart_rate", "systolic_pressure", "diastolic_pressure", "blood_sugar", "weight"]
+
+
+def row(elderly_id, day, **values):
+    """与 IoT 流水线一样，每行包含相同的列"""
+    return {
+        "id": uuid.uuid4(),
+        "elderly_id": elderly_id,
+        "recorded_at": datetime.combine(day, time(8, rng.randint(0, 59))),
+        "status": HealthRecordStatus.NORMAL,
+        **{metric: None for metric in METRICS},
+        **values
+    }
+
+
+def check(report, tolerance=1e-9, quantile_tolerance=1e-9):
+    for metric, item in report.items():
+        assert item["max_error"] is not None and item["max_error"] <= tolerance, (metric, item)
+        if item["quantile_error"] is not None:
+            assert item["quantile_error"] <= quantile_tolerance, (metric, item)
+
+
+print("=" * 50)
+print("写入时增量更新测试")
+print("=" * 50)
+
+# 写入流水线使用配置的窗口天数，测试中改用 30 天
+settings.HEALTH_BASELINE_DAYS = WINDOW
+repo = HealthRepository(db)
+baselines = HealthBaselineRepository(db, window_days=WINDOW)
+# 前 40 天的数据分 8 批写入（同一批内日期乱序），超出 30 天窗口的部分应被滑出
+days = [today - timedelta(days=i) for i in range(39, -1, -1)]
+for batch in range(8):
+    rows = []
+    for day in days[batch * 5:(batch + 1) * 5]:
+        rows.append(row(elderly_a, day, systolic_pressure=rng.randint(110, 160),
+                        diastolic_pressure=rng.randint(65, 100), heart_rate=rng.randint(55, 95)))
+        rows.append(row(elderly_a, day, blood_sugar=round(rng.uniform(4.5, 9.0), 1)))
+    rows.append(row(elderly_b, days[batch * 5], weight=round(rng.uniform(60, 62), 1)))
+    rng.shuffle(rows)
+    repo.bulk_insert_records(rows)
+
+db.expire_all()
+assert db.query(HealthBaseline).filter(HealthBaseline.elderly_id == elderly_a).count() == 4
+check(baselines.verify(elderly_a, today))
+check(baselines.verify(elderly_b, today))
+row_sbp = db.query(HealthBaseline).filter_by(elderly_id=elderly_a, metric="systolic_bp").one()
+assert row_sbp.sample_count == WINDOW and row_sbp.window_end == today
+print("✓ 8 批写入后与窗口内记录的精确计算一致（含分位数），窗口外数据已滑出")
+
+# 迟到的旧数据：窗口内的计入，窗口外的忽略
+repo.bulk_insert_records([
+    row(elderly_a, today - timedelta(days=3), systolic_pressure=200),
+    row(elderly_a, today - timedelta(days=WINDOW + 5), systolic_pressure=90),
+])
+db.expire_all()
+check(baselines.verify(elderly_a, today))
+assert db.query(HealthBaseline).filter_by(elderly_id=elderly_a, metric="systolic_bp").one().max_value == 200
+print("✓ 迟到数据：窗口内计入（含最大值），窗口外忽略")
+
+print("\n" + "=" * 50)
+print("读取测试")
+print("=" * 50)
+
+statements = []
+
+
+def record_statement(conn, cursor, statement, *args):
+    statements.append(statement)
+
+
+event.listen(engine, "before_cursor_execute", record_statement)
+data = baselines.get_baseline_data(elderly_a, today)
+event.remove(engine, "before_cursor_execute", record_statement)
+assert len(statements) == 1 and "state" not in statements[0].split("FROM")[0], statements
+assert data["baseline_days"] == WINDOW
+assert set(data) == {"baseline_days", "systolic_bp", "diastolic_bp", "heart_rate", "blood_sugar"}
+exact = exact_summary(
+    r.systolic_pressure for r in db.query(HealthRecord).filter(
+        HealthRecord.elderly_id == elderly_a, HealthRecord.systolic_pressure.isnot(None),
+        HealthRecord.recorded_at >= datetime.combine(today - timedelta(days=WINDOW - 1), time.min))
+)
+for key in ("mean", "std", "p25", "p75", "min", "max", "cv"):
+    assert abs(data["systolic_bp"][key] - exact[key]) < 1e-9, key
+print("✓ 一条查询读出基线（不读取状态列），格式与 calculate_personal_baseline 一致")
+
+# 读取更晚的日期：由状态滑动窗口，与精确计算一致
+later = today + timedelta(days=10)
+check(baselines.verify(elderly_a, later))
+later_data = baselines.get_baseline_data(elderly_a, later)
+assert later_data["systolic_bp"]["mean"] != data["systolic_bp"]["mean"]
+assert "systolic_bp" not in baselines.get_baseline_data(elderly_a, today + timedelta(days=WINDOW + 1))
+print("✓ 读取时窗口已过期：按日期滑出旧数据，全部滑出后不再返回该指标")
+
+# 少于 3 条读数的指标不生成基线
+repo.bulk_insert_records([row(elderly_b, today, heart_rate=70), row(elderly_b, today, heart_rate=72)])
+assert "heart_rate" not in baselines.get_baseline_data(elderly_b, today)
+print("✓ 少于 3 条读数的指标不返回")
+
+print("\n" + "=" * 50)
+print("重建测试")
+print("=" * 50)
+
+before = {row.metric: (row.sample_count, row.mean, row.p25, row.p75, row.max_value)
+          for row in db.query(HealthBaseline).filter(HealthBaseline.elderly_id == elderly_a)}
+count = baselines.rebuild(as_of=today)
+assert baselines.rebuild(as_of=today) == count
+db.expire_all()
+after = {row.metric: (row.sample_count, row.mean, row.p25, row.p75, row.max_value)
+         for row in db.query(HealthBaseline).filter(HealthBaseline.elderly_id == elderly_a)}
+assert before.keys() == after.keys()
+for metric in before:
+    assert before[metric][0] == after[metric][0]
+    assert np.allclose(before[metric][1:], after[metric][1:]), (metric, before[metric], after[metric])
+check(baselines.verify(elderly_a, today))
+print(f"✓ 重建 {count} 项，与增量结果一致，重复重建结果不变")
+
+print("\n" + "=" * 50)
+print("报告生成器使用已存基线")
+print("=" * 50)
+
+generator = YangShengReportGenerator()
+stored = baselines.get_baseline_data(elderly_a, today)
+weights = [61.0, 61.2, 61.5, 61.9]
+merged = generator.calculate_personal_baseline(
+    {"systolic_bp_history": [1, 2, 3], "weight_history": weights, "uric_acid_history": [300, 320, 340]},
+    days=WINDOW, stored_baseline=stored | {
+        "weight": {"mean": 61.4, "std": 0.3, "min": 61.0, "max": 61.9}
+    }
+)
+assert merged["systolic_bp"] == stored["systolic_bp"]
+assert merged["weight"]["mean"] == 61.4 and merged["weight"]["trend"] > 0
+assert merged["uric_acid"]["mean"] == 320
+print("✓ 已存指标直接使用，体重趋势和未存储的指标仍由历史数据计算")
+
+statements.clear()
+event.listen(engine, "before_cursor_execute", record_statement)
+elder = ElderBasicInfo(elder_id=str(elderly_a), elder_name="张大爷", elder_gender="男", elder_age=72)
+current = {"systolic_bp": stored["systolic_bp"]["mean"] * 1.2, "heart_rate": 70, "blood_sugar": 5.6}
+report = generator.generate_report(elder, current, historical_data={}, db=db)
+event.remove(engine, "before_cursor_execute", record_statement)
+assert len(statements) == 1 and "health_records" not in statements[0], statements
+assert generator.personalized_evaluator.user_baseline["systolic_bp"] == stored["systolic_bp"]
+assert report.baseline_comparison.baseline_days == WINDOW
+assert "高于个人历史平均水平 20.0%" in report.vital_signs.systolic_bp.status_text
+print("✓ 传入数据库会话时报告读取已存基线（一条查询），收缩压与个人平均水平对比")
+
+evaluator = PersonalizedEvaluator.from_stored_baseline(db, elderly_a, today)
+_, _, comparison = evaluator.evaluate_with_baseline("blood_sugar_fasting", stored["blood_sugar"]["mean"])
+assert comparison == "与个人历史平均水平相近"
+_, _, comparison = evaluator.evaluate_with_baseline("heart_rate", stored["heart_rate"]["mean"] * 0.8)
+assert comparison == "低于个人历史平均水平 20.0%"
+empty = generator.generate_report(
+    ElderBasicInfo(elder_id=str(uuid.uuid4()), elder_name="李奶奶", elder_gender="女", elder_age=70),
+    current, db=db
+)
+assert generator.personalized_evaluator is None
+assert empty.baseline_comparison.personal_baseline_desc == "暂无足够的历史数据生成个人基线"
+print("✓ PersonalizedEvaluator 由已存基线创建，空腹血糖对应血糖基线；没有基线的老人不做个人对比")
+
+print("\n" + "=" * 50)
+print("大样本分位数误差")
+print("=" * 50)
+
+np_rng = np.random.default_rng(3)
+sketch = MetricBaseline(window_days=90)
+values = []
+for day in range(90):
+    daily = np_rng.normal(130, 15, size=600)
+    values.extend(daily)
+    for value in daily:
+        sketch.add(float(value), 1000 + day)
+restored = MetricBaseline.from_state(sketch.to_state())
+summary, exact = restored.summary(), exact_summary(values)
+assert summary["count"] == exact["count"] and abs(summary["mean"] - exact["mean"]) < 1e-6
+assert abs(summary["std"] - exact["std"]) < 1e-6
+assert abs(summary["p25"] - exact["p25"]) < 1.0 and abs(summary["p75"] - exact["p75"]) < 1.0
+print(f"✓ {len(values)} 条读数：均值/标准差精确，p25/p75 误差 "
+      f"{abs(summary['p25'] - exact['p25']):.3f}/{abs(summary['p75'] - exact['p75']):.3f}，"
+      f"状态 {len(str(sketch.to_state()))} 字节")
+
+print("\n全部测试通过")
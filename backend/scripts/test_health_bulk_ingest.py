@@ -0,0 +1,126 @@
+"""测试健康记录批量写入与批量预警（使用内存 SQLite，无需 PostgreSQL）"""
+import sys
+import uuid
+from datetime import datetime, timedelta
+sys.path.insert(0, '.')
+
+import scripts.sqlite_compat  # noqa: F401  SQLite 上渲染 UUID 列
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from database.database import Base
+from database.models import (
+    Alert, AlertSeverity, AlertStatus, AlertType, ChangePointDetectorState, HealthBaseline, HealthChangePoint,
+    HealthRecord, HealthRecordStatus, LatestVitals
+)
+from repositories.health_repository import HealthRepository
+from repositories.latest_vitals_repository import LatestVitalsRepository
+
+engine = create_engine("sqlite://")
+Base.metadata.create_all(engine, tables=[
+    HealthRecord.__table__, LatestVitals.__table__, HealthBaseline.__table__, Alert.__table__,
+    ChangePointDetectorState.__table__, HealthChangePoint.__table__
+])
+db = sessionmaker(bind=engine)()
+repo = HealthRepository(db)
+
+elderly_a, elderly_b = uuid.uuid4(), uuid.uuid4()
+now = datetime.now().replace(microsecond=0)
+
+# elderly_b 已有未处理的心率偏高预警，以及一条已解决的血压偏高预警
+db.add_all([
+    Alert(elderly_id=elderly_b, alert_type=AlertType.HEART_RATE_HIGH, alert_message="心率偏高: 120次/分",
+          severity=AlertSeverity.MEDIUM, status=AlertStatus.ACTIVE),
+    Alert(elderly_id=elderly_b, alert_type=AlertType.BLOOD_PRESSURE_HIGH, alert_message="收缩压偏高: 150mmHg",
+          severity=AlertSeverity.MEDIUM, status=AlertStatus.RESOLVED),
+])
+db.commit()
+
+print("=" * 50)
+print("批量写入测试")
+print("=" * 50)
+
+records = [
+    {"elderly_id": elderly_a, "heart_rate": 72, "systolic_pressure": 120, "diastolic_pressure": 80,
+     "recorded_at": now - timedelta(minutes=50)},
+    {"elderly_id": elderly_a, "heart_rate": 130, "recorded_at": now - timedelta(minutes=40)},
+    {"elderly_id": elderly_a, "heart_rate": 140, "recorded_at": now - timedelta(minutes=30)},  # 同批内去重
+    {"elderly_id": elderly_a, "heart_rate": 45, "recorded_at": now - timedelta(minutes=20)},
+    {"elderly_id": elderly_a, "blood_oxygen": 90.0, "temperature": 36.5, "recorded_at": now - timedelta(minutes=10)},
+    {"elderly_id": elderly_b, "heart_rate": 125, "recorded_at": now - timedelta(minutes=30)},  # 已有未处理预警
+    {"elderly_id": elderly_b, "systolic_pressure": 160, "diastolic_pressure": 100,
+     "recorded_at": now - timedelta(minutes=20)},  # 收缩压和舒张压合并为一条预警
+    {"elderly_id": elderly_b, "steps": 3000, "weight": 60.5, "notes": "手动录入"},
+    # 无效记录
+    {"heart_rate": 80},
+    {"elderly_id": elderly_a},
+    {"elderly_id": elderly_a, "heart_rate": "abc"},
+]
+
+queries = []
+
+
+def count_query(conn, cursor, statement, *args):
+    queries.append(statement)
+
+
+event.listen(engine, "before_cursor_execute", count_query)
+result = repo.bulk_ingest_health_records(records)
+event.remove(engine, "before_cursor_execute", count_query)
+assert result == {"inserted": 8, "skipped": 3, "alerts_created": 4}, result
+print(f"✓ 写入结果 {result}，共 {len(queries)} 条 SQL")
+
+rows = db.query(HealthRecord).order_by(HealthRecord.recorded_at).all()
+assert len(rows) == 8
+statuses = {(row.elderly_id, row.heart_rate, row.blood_oxygen, row.systolic_pressure): row.status for row in rows}
+assert statuses[(elderly_a, 72, None, 120)] == HealthRecordStatus.NORMAL
+assert statuses[(elderly_a, 130, None, None)] == HealthRecordStatus.WARNING
+assert statuses[(elderly_a, 45, None, None)] == HealthRecordStatus.WARNING
+assert statuses[(elderly_a, None, 90.0, None)] == HealthRecordStatus.DANGER
+assert statuses[(elderly_b, None, None, 160)] == HealthRecordStatus.WARNING
+manual = db.query(HealthRecord).filter(HealthRecord.steps == 3000).one()
+assert manual.weight == 60.5 and manual.notes == "手动录入" and manual.status == HealthRecordStatus.NORMAL
+print("✓ 记录按指标列写入，状态取最严重的一项")
+
+alerts = db.query(Alert).filter(Alert.status == AlertStatus.ACTIVE).all()
+new_alerts = {(alert.elderly_id, alert.alert_type): alert for alert in alerts if alert.health_record_id}
+assert set(new_alerts) == {
+    (elderly_a, AlertType.HEART_RATE_HIGH),
+    (elderly_a, AlertType.HEART_RATE_LOW),
+    (elderly_a, AlertType.BLOOD_OXYGEN_LOW),
+    (elderly_b, AlertType.BLOOD_PRESSURE_HIGH),
+}, set(new_alerts)
+high_hr = new_alerts[(elderly_a, AlertType.HEART_RATE_HIGH)]
+assert high_hr.alert_message == "心率偏高: 130次/分" and high_hr.severity == AlertSeverity.MEDIUM
+assert db.get(HealthRecord, high_hr.health_record_id).heart_rate == 130
+assert new_alerts[(elderly_a, AlertType.BLOOD_OXYGEN_LOW)].severity == AlertSeverity.HIGH
+assert db.query(Alert).filter(Alert.elderly_id == elderly_b, Alert.alert_type == AlertType.HEART_RATE_HIGH).count() == 1
+print("✓ 预警按类型去重（同批次内、已有未处理预警），已解决的预警不影响新预警")
+
+low_mask, high_mask = repo._check_metrics_batch([{"blood_oxygen": 100.5}, {"blood_oxygen": 92}])["blood_oxygen"]
+assert low_mask.tolist() == [False, True] and high_mask.tolist() == [False, False]
+print("✓ 血氧只检查下限，超过 100% 的读数不生成没有类型的预警")
+
+snapshot = LatestVitalsRepository(db).get_by_elderly_id(elderly_a)
+assert snapshot.heart_rate == 45 and snapshot.blood_oxygen == 90.0
+print("✓ 与记录同一事务更新最新生命体征快照")
+
+print("\n" + "=" * 50)
+print("batch_add_health_records 测试")
+print("=" * 50)
+
+created = repo.batch_add_health_records([
+    {"elderly_id": elderly_b, "blood_sugar": 7.5},
+    {"elderly_id": elderly_b, "temperature": 36.6},
+    {"elderly_id": elderly_b},
+])
+assert [record.blood_sugar for record in created] == [7.5, None]
+assert created[0].status == HealthRecordStatus.WARNING and created[1].status == HealthRecordStatus.NORMAL
+assert db.query(Alert).filter(Alert.alert_type == AlertType.BLOOD_SUGAR_HIGH).count() == 1
+print("✓ 按输入顺序返回 ORM 对象，并生成血糖偏高预警")
+
+assert repo.bulk_ingest_health_records([{"elderly_id": elderly_a}]) == {"inserted": 0, "skipped": 1, "alerts_created": 0}
+print("✓ 全部无效时不写入")
+
+print("\n全部测试通过")
@@ -0,0 +1,138 @@
+"""测试每日健康汇总与周趋势（使用内存 SQLite，无需 PostgreSQL）"""
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta
+sys.path.insert(0, '.')
+
+import scripts.sqlite_compat  # noqa: F401  SQLite 上渲染 UUID 列
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+
+from database.database import Base
+from database.models import HealthRecord, HealthRecordStatus
+from repositories.health_repository import HealthRepository
+
+engine = create_engine("sqlite://")
+Base.metadata.create_all(engine, tables=[HealthRecord.__table__])
+db = sessionmaker(bind=engine)()
+repo = HealthRepository(db)
+
+random.seed(7)
+elderly_id, other_id = uuid.uuid4(), uuid.uuid4()
+today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def random_row(owner, day_offset):
+    """与 IoT 流水线一样，每行包含相同的列，部分指标为空"""
+    return {
+        "id": uuid.uuid4(),
+        "elderly_id": owner,
+        "recorded_at": today - timedelta(days=day_offset) + timedelta(minutes=random.randint(0, 24 * 60 - 1)),
+        "status": random.choice([HealthRecordStatus.NORMAL] * 4 + [HealthRecordStatus.WARNING]),
+        "heart_rate": random.choice([None, random.randint(50, 110)]),
+        "systolic_pressure": random.choice([None, random.randint(100, 160)]),
+        "diastolic_pressure": random.choice([None, random.randint(60, 95)]),
+        "blood_sugar": random.choice([None, round(random.uniform(4.0, 7.0), 1)]),
+        "temperature": random.choice([None, round(random.uniform(36.0, 37.4), 1)]),
+        "blood_oxygen": random.choice([None, float(random.randint(93, 99))]),
+        "weight": random.choice([None, 62.5]),
+        "steps": random.choice([None, random.randint(0, 8000)]),
+    }
+
+
+# 第 3 天没有数据，检查补零
+rows = [random_row(elderly_id, offset) for offset in (0, 1, 2, 4, 5, 6, 7) for _ in range(15)]
+rows += [random_row(other_id, offset) for offset in range(8) for _ in range(5)]
+db.execute(insert(HealthRecord), rows)
+db.commit()
+
+
+def old_daily_summary(day):
+    """原来的逐日逐指标循环（按真实列改写），作为对照"""
+    start_of_day = day.replace(hour=0, minute=0, second=0, microsecond=0)
+    end_of_day = day.replace(hour=23, minute=59, second=59, microsecond=999999)
+    records = db.query(HealthRecord).filter(
+        HealthRecord.elderly_id == elderly_id,
+        HealthRecord.recorded_at >= start_of_day,
+        HealthRecord.recorded_at <= end_of_day
+    ).all()
+    summary = {
+        "date": day.date(),
+        "data_count": len(records),
+        "has_abnormal": any(record.status != HealthRecordStatus.NORMAL for record in records),
+        "health_metrics": {}
+    }
+    for metric in HealthRepository.SUMMARY_METRICS:
+        values = [getattr(record, metric) for record in records if getattr(record, metric) is not None]
+        if not values:
+            continue
+        low, high = HealthRepository.METRIC_NORMAL_RANGES.get(metric, (float("-inf"), float("inf")))
+        summary["health_metrics"][metric] = {
+            "min": min(values),
+            "max": max(values),
+            "avg": sum(values) / len(values),
+            "count": len(values),
+            "has_abnormal": any(v < low or v > high for v in values)
+        }
+    return summary
+
+
+def assert_same(new, old):
+    assert new["date"] == old["date"]
+    assert new["data_count"] == old["data_count"], (new, old)
+    assert new["has_abnormal"] == old["has_abnormal"]
+    assert new["health_metrics"].keys() == old["health_metrics"].keys(), (new, old)
+    for metric, expected in old["health_metrics"].items():
+        actual = new["health_metrics"][metric]
+        assert actual["count"] == expected["count"] and actual["has_abnormal"] == expected["has_abnormal"]
+        for key in ("min", "max", "avg"):
+            assert abs(actual[key] - expected[key]) < 1e-9, (metric, key, actual, expected)
+
+
+print("=" * 50)
+print("每日汇总对照测试")
+print("=" * 50)
+
+queries = []
+
+
+def count_query(conn, cursor, statement, *args):
+    queries.append(statement)
+
+
+event.listen(engine, "before_cursor_execute", count_query)
+summaries = repo.get_daily_summaries(elderly_id, today - timedelta(days=7), today)
+event.remove(engine, "before_cursor_execute", count_query)
+query_count = len(queries)
+assert query_count == 1, queries
+assert len(summaries) == 8
+
+for summary in summaries:
+    day = datetime.combine(summary["date"], datetime.min.time())
+    assert_same(summary, old_daily_summary(day))
+assert summaries[4]["data_count"] == 0 and summaries[4]["health_metrics"] == {}
+print(f"✓ 8 天汇总与逐日循环一致，只查询 {query_count} 次，无数据的天补零")
+
+assert_same(repo.get_daily_summary(elderly_id, today), old_daily_summary(today))
+print("✓ get_daily_summary 与逐日循环一致")
+
+print("\n" + "=" * 50)
+print("周趋势测试")
+print("=" * 50)
+
+trend = repo.get_weekly_trend(elderly_id, "heart_rate")
+assert len(trend) == 8
+for point in trend:
+    expected = old_daily_summary(datetime.combine(point["date"], datetime.min.time()))["health_metrics"].get("heart_rate")
+    if expected is None:
+        assert point["value"] is None and point["has_abnormal"] is False
+    else:
+        assert abs(point["value"] - expected["avg"]) < 1e-9
+        assert (point["min"], point["max"], point["has_abnormal"]) == (
+            expected["min"], expected["max"], expected["has_abnormal"]
+        )
+print(f"✓ 心率周趋势: {[round(p['value'], 1) if p['value'] else None for p in trend]}")
+
+print("\n全部测试通过")
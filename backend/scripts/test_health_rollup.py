@@ -0,0 +1,90 @@
+"""测试健康记录日汇总与保留期清理（使用内存 SQLite，无需 PostgreSQL）"""
+import sys
+import uuid
+from datetime import datetime, timedelta, date
+sys.path.insert(0, '.')
+
+import scripts.sqlite_compat  # noqa: F401  SQLite 上渲染 UUID 列
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database.database import Base
+from database.models import HealthRecord, HealthRecordDaily, HealthRecordStatus, Alert
+from repositories.health_rollup_repository import HealthRollupRepository
+
+engine = create_engine("sqlite://")
+Base.metadata.create_all(engine, tables=[
+    HealthRecord.__table__, HealthRecordDaily.__table__, Alert.__table__
+])
+db = sessionmaker(bind=engine)()
+
+elderly_a, elderly_b = uuid.uuid4(), uuid.uuid4()
+day1 = datetime(2024, 3, 1, 8, 0)
+day2 = datetime(2024, 3, 2, 8, 0)
+
+
+def record(elderly_id, at, **values):
+    db.add(HealthRecord(
+        id=uuid.uuid4(), elderly_id=elderly_id, recorded_at=at,
+        status=values.pop("status", HealthRecordStatus.NORMAL), **values
+    ))
+
+
+record(elderly_a, day1, heart_rate=70, systolic_pressure=120, steps=500)
+record(elderly_a, day1 + timedelta(hours=10), heart_rate=90, steps=3000, status=HealthRecordStatus.WARNING)
+record(elderly_a, day2, heart_rate=80)
+record(elderly_b, day1, temperature=36.5)
+record(elderly_a, datetime(2024, 3, 10, 8, 0), heart_rate=60)   # 保留期内
+db.commit()
+
+print("=" * 50)
+print("日汇总测试")
+print("=" * 50)
+
+repo = HealthRollupRepository(db)
+stats = repo.archive_before(date(2024, 3, 5))
+assert stats["deleted"] == 4, stats
+assert db.query(HealthRecord).count() == 1
+print(f"✓ 保留期外记录已删除: {stats}")
+
+rows = {(r.elderly_id, r.day): r for r in db.query(HealthRecordDaily).all()}
+a1 = rows[(elderly_a, day1.date())]
+assert a1.record_count == 2 and a1.abnormal_count == 1
+assert (a1.heart_rate_sum, a1.heart_rate_count, a1.heart_rate_min, a1.heart_rate_max) == (160, 2, 70, 90)
+assert a1.systolic_pressure_count == 1 and a1.steps_max == 3000
+assert a1.temperature_count == 0 and a1.temperature_min is None
+assert rows[(elderly_a, day2.date())].heart_rate_sum == 80
+assert rows[(elderly_b, day1.date())].temperature_max == 36.5
+print("✓ 按老人和日期汇总（sum/count/min/max、异常数、步数最大值）")
+
+print("=" * 50)
+print("合并测试")
+print("=" * 50)
+
+# 迟到的旧数据：再次清理时合并到已有的日汇总
+record(elderly_a, day1 + timedelta(hours=2), heart_rate=50, temperature=37.2, steps=100)
+db.commit()
+stats = repo.archive_before(date(2024, 3, 5))
+assert stats["deleted"] == 1
+db.expire_all()
+a1 = db.query(HealthRecordDaily).filter_by(elderly_id=elderly_a, day=day1.date()).one()
+assert a1.record_count == 3 and a1.abnormal_count == 1
+assert (a1.heart_rate_sum, a1.heart_rate_count, a1.heart_rate_min, a1.heart_rate_max) == (210, 3, 50, 90)
+assert (a1.temperature_count, a1.temperature_min, a1.temperature_max) == (1, 37.2, 37.2)
+assert a1.steps_max == 3000
+print("✓ 迟到数据合并到已有日汇总")
+
+stats = repo.archive_before(date(2024, 3, 5))
+assert stats == {"rolled_up": 0, "deleted": 0, "partitions_dropped": 0}
+db.expire_all()
+assert db.query(HealthRecordDaily).filter_by(elderly_id=elderly_a, day=day1.date()).one().record_count == 3
+print("✓ 重复执行不会重复计数")
+
+daily = repo.get_daily(elderly_a, date(2024, 3, 1), date(2024, 3, 31))
+summary = HealthRollupRepository.to_dict(daily[0])
+assert summary["data_count"] == 3 and summary["has_abnormal"]
+assert summary["health_metrics"]["heart_rate"]["avg"] == 70
+print(f"✓ 日汇总读取: {summary['date']} 心率均值 {summary['health_metrics']['heart_rate']['avg']}")
+
+print("\n全部测试通过")
@@ -0,0 +1,200 @@
+"""测试 IoT 写入流水线的攒批、背压、关闭时落库和写入失败处理（使用内存 SQLite，无需 PostgreSQL）"""
+import asyncio
+import sys
+import threading
+import time
+import uuid
+sys.path.insert(0, '.')
+
+import scripts.sqlite_compat  # noqa: F401  SQLite 上渲染 UUID 列
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import services.iot_ingestion_service as iot_module
+from database.database import Base
+from database.models import (
+    Alert, ChangePointDetectorState, HealthBaseline, HealthChangePoint, HealthRecord, LatestVitals
+)
+from repositories.health_repository import HealthRepository
+from services.iot_ingestion_service import IngestionBackpressureError, IoTIngestionPipeline
+
+# 写入线程与测试共享同一个内存数据库
+engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+Base.metadata.create_all(engine, tables=[
+    HealthRecord.__table__, LatestVitals.__table__, HealthBaseline.__table__, Alert.__table__,
+    ChangePointDetectorState.__table__, HealthChangePoint.__table__
+])
+iot_module.SessionLocal = sessionmaker(bind=engine)
+
+elderly_id = uuid.uuid4()
+
+
+class StubBindings:
+    """设备绑定桩：unbound-* 设备未绑定，其余设备都绑定到同一位老人"""
+
+    def get(self, device_id):
+        return (None, None) if device_id.startswith("unbound") else ("user", elderly_id)
+
+    def resolve_user(self, user_id):
+        return None
+
+
+class StubDB:
+    """包装 bulk_insert_records：可暂停写入、整体故障，或拒绝含 bad-* 设备数据的批次"""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.gate.set()
+        self.down = False
+        self.calls = []
+
+    def bulk_insert_records(self, repo, rows, alert_rows=None):
+        self.gate.wait()
+        self.calls.append(len(rows))
+        if self.down:
+            raise RuntimeError("数据库不可用")
+        if any(row["notes"].startswith("IoT:bad") for row in rows):
+            raise ValueError("违反约束")
+        return original_bulk_insert(repo, rows, alert_rows)
+
+
+stub_db = StubDB()
+original_bulk_insert = HealthRepository.bulk_insert_records
+HealthRepository.bulk_insert_records = lambda repo, rows, alert_rows=None: stub_db.bulk_insert_records(
+    repo, rows, alert_rows
+)
+
+
+def vitals(device_id, heart_rate=72):
+    return {"device_id": device_id, "heart_rate": heart_rate, "spo2": 98, "timestamp": time.time()}
+
+
+def make_pipeline(**overrides):
+    pipeline = IoTIngestionPipeline()
+    pipeline.bindings = StubBindings()
+    pipeline.RETRY_BACKOFF = 0.01
+    for name, value in overrides.items():
+        setattr(pipeline, name, value)
+    batches = []
+    pipeline.on_batch = lambda batch: batches.append(len(batch))
+    return pipeline, batches
+
+
+def count_records():
+    db = iot_module.SessionLocal()
+    try:
+        return db.query(HealthRecord).count()
+    finally:
+        db.close()
+
+
+async def test_batching():
+    pipeline, batches = make_pipeline(BATCH_SIZE=50)
+    await pipeline.submit_many("vitals", [vitals(f"dev-{i % 5}") for i in range(120)])
+    await pipeline.submit("vitals", vitals("unbound-1"))
+    await pipeline.stop()
+
+    assert batches == [50, 50, 21], batches
+    stats = pipeline.get_stats()
+    assert stats["written"] == 120 and stats["unbound"] == 1 and stats["batches"] == 3, stats
+    assert count_records() == 120
+    assert len(pipeline.ring("vitals").latest("dev-0", limit=100)) == 24
+    print(f"✓ 121 条数据按每批 50 条写入 {batches}，未绑定设备的数据跳过，环形缓冲可查最新值")
+
+
+async def test_backpressure():
+    pipeline, _ = make_pipeline(QUEUE_MAXSIZE=10, ENQUEUE_TIMEOUT=0.05, BATCH_SIZE=5)
+    stub_db.gate.clear()  # 写入线程卡住，队列无法消化
+    try:
+        await pipeline.submit_many("vitals", [vitals("dev-bp") for _ in range(5)])
+        await asyncio.sleep(0.1)  # 写入任务取走第一批后阻塞在写库上
+        await pipeline.submit_many("vitals", [vitals("dev-bp") for _ in range(10)])
+
+        try:
+            await pipeline.submit("vitals", vitals("dev-bp"))
+            raise AssertionError("队列已满时应拒绝")
+        except IngestionBackpressureError:
+            pass
+        try:
+            await pipeline.submit_many("vitals", [vitals("dev-bp") for _ in range(11)])
+            raise AssertionError("超过队列容量的单批应直接拒绝")
+        except IngestionBackpressureError:
+            pass
+
+        stats = pipeline.get_stats()
+        assert stats["accepted"] == 15 and stats["rejected"] == 12 and stats["queue_size"] == 10, stats
+        # 被拒绝的数据不进入环形缓冲
+        assert len(pipeline.ring("vitals").latest("dev-bp", limit=100)) == 15
+    finally:
+        stub_db.gate.set()
+
+    before = count_records()
+    await pipeline.stop()
+    assert count_records() == before + 15 and pipeline.get_stats()["written"] == 15
+    print("✓ 队列满时等待后拒绝（IngestionBackpressureError），恢复后已接受的数据全部写入")
+
+
+async def test_flush_on_stop():
+    pipeline, _ = make_pipeline(BATCH_SIZE=500, BATCH_MAX_WAIT=1.0)
+    await pipeline.submit_many("vitals", [vitals("dev-stop") for _ in range(30)])
+    before = count_records()
+    await pipeline.stop()
+
+    assert count_records() == before + 30
+    stats = pipeline.get_stats()
+    assert stats["queue_size"] == 0 and not stats["running"] and pipeline._worker is None
+    print("✓ stop() 先写完队列中的数据再退出")
+
+
+async def test_write_failures():
+    pipeline, _ = make_pipeline(BATCH_SIZE=20)
+    before = count_records()
+    stub_db.calls.clear()
+    records = [vitals("bad-1" if i in (3, 11) else f"dev-{i}") for i in range(20)]
+    await pipeline.submit_many("vitals", records)
+    await pipeline.stop()
+
+    # 整批 3 次失败后逐条写入，只有 2 条坏数据进入死信队列
+    assert stub_db.calls == [20, 20, 20] + [1] * 20, stub_db.calls
+    assert count_records() == before + 18
+    stats = pipeline.get_stats()
+    assert stats["written"] == 18 and stats["failed"] == 2 and stats["dead_letters"] == 2, stats
+    assert [record for _, record, _ in pipeline.dead_letters] == [records[3], records[11]]
+    assert all(error == "违反约束" for _, _, error in pipeline.dead_letters)
+    print("✓ 整批重试失败后逐条写入，18 条正常数据落库，2 条坏数据进入死信队列")
+
+    pipeline, _ = make_pipeline(BATCH_SIZE=10)
+    stub_db.down = True
+    try:
+        await pipeline.submit_many("vitals", [vitals(f"dev-{i}") for i in range(10)])
+        await pipeline.stop()
+    finally:
+        stub_db.down = False
+    stats = pipeline.get_stats()
+    assert stats["failed"] == 10 and len(pipeline.dead_letters) == 10 and stats["written"] == 0
+    print("✓ 数据库不可用时整批数据保存在死信队列中，不静默丢弃")
+
+
+print("=" * 50)
+print("攒批测试")
+print("=" * 50)
+asyncio.run(test_batching())
+
+print("\n" + "=" * 50)
+print("背压测试")
+print("=" * 50)
+asyncio.run(test_backpressure())
+
+print("\n" + "=" * 50)
+print("关闭测试")
+print("=" * 50)
+asyncio.run(test_flush_on_stop())
+
+print("\n" + "=" * 50)
+print("写入失败测试")
+print("=" * 50)
+asyncio.run(test_write_failures())
+
+print("\n全部测试通过")
@@ -0,0 +1,126 @@
+"""测试最新生命体征快照（使用内存 SQLite，无需 PostgreSQL）"""
+import sys
+import uuid
+from datetime import datetime, timedelta
+sys.path.insert(0, '.')
+
+import scripts.sqlite_compat  # noqa: F401  SQLite 上渲染 UUID 列
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from database.database import Base
+from database.models import (
+    Alert, ChangePointDetectorState, HealthBaseline, HealthChangePoint, HealthRecord, HealthRecordStatus, LatestVitals
+)
+from repositories.health_repository import HealthRepository
+from repositories.latest_vitals_repository import LatestVitalsRepository
+from services.latest_vitals_cache import LatestVitalsCache
+
+engine = create_engine("sqlite://")
+Base.metadata.create_all(engine, tables=[
+    HealthRecord.__table__, LatestVitals.__table__, HealthBaseline.__table__, Alert.__table__,
+    ChangePointDetectorState.__table__, HealthChangePoint.__table__
+])
+db = sessionmaker(bind=engine)()
+
+elderly_a, elderly_b = uuid.uuid4(), uuid.uuid4()
+now = datetime.now().replace(microsecond=0)
+
+
+METRICS = ["heart_rate", "systolic_pressure", "diastolic_pressure", "blood_oxygen", "temperature", "steps"]
+
+
+def row(elderly_id, minutes_ago, **values):
+    """与 IoT 流水线一样，每行包含相同的列"""
+    return {
+        "id": uuid.uuid4(),
+        "elderly_id": elderly_id,
+        "recorded_at": now - timedelta(minutes=minutes_ago),
+        "status": HealthRecordStatus.NORMAL,
+        **{metric: None for metric in METRICS},
+        **values
+    }
+
+
+print("=" * 50)
+print("写入时更新快照测试")
+print("=" * 50)
+
+repo = HealthRepository(db)
+repo.bulk_insert_records([
+    row(elderly_a, 30, heart_rate=70, systolic_pressure=120, diastolic_pressure=80),
+    row(elderly_a, 10, heart_rate=75, blood_oxygen=97.0, steps=1200),
+    row(elderly_a, 20, heart_rate=99, steps=800),   # 同一批内乱序的旧数据
+    row(elderly_b, 5, temperature=36.6),
+])
+snapshot = LatestVitalsRepository(db).get_by_elderly_id(elderly_a)
+assert snapshot.heart_rate == 75
+assert (snapshot.systolic_pressure, snapshot.diastolic_pressure) == (120, 80)
+assert snapshot.blood_oxygen == 97.0 and snapshot.steps == 1200
+assert LatestVitalsRepository(db).get_by_elderly_id(elderly_b).temperature == 36.6
+print("✓ 每个指标取最新的非空值")
+
+repo.bulk_insert_records([
+    row(elderly_a, 60, heart_rate=50, temperature=37.0),  # 迟到的旧数据
+    row(elderly_a, 1, systolic_pressure=150, diastolic_pressure=95, steps=900,
+        status=HealthRecordStatus.WARNING),
+])
+db.expire_all()
+snapshot = LatestVitalsRepository(db).get_by_elderly_id(elderly_a)
+assert snapshot.heart_rate == 75, snapshot.heart_rate
+assert snapshot.temperature == 37.0  # 此前没有体温，旧数据也写入
+assert (snapshot.systolic_pressure, snapshot.diastolic_pressure) == (150, 95)
+assert snapshot.steps == 1200  # 同一天步数取最大值
+assert snapshot.status == HealthRecordStatus.WARNING
+print("✓ 迟到的旧数据不覆盖新值，同一天步数取最大值")
+
+yesterday = row(elderly_b, 0, steps=5000)
+yesterday["recorded_at"] = now - timedelta(days=1)
+repo.bulk_insert_records([yesterday, row(elderly_b, 0, steps=300)])
+db.expire_all()
+assert LatestVitalsRepository(db).get_by_elderly_id(elderly_b).steps == 300
+print("✓ 新的一天步数重新计")
+
+print("\n" + "=" * 50)
+print("回填与读取测试")
+print("=" * 50)
+
+expected = {
+    key: value for key, value in LatestVitalsRepository.to_dict(
+        LatestVitalsRepository(db).get_by_elderly_id(elderly_a)
+    ).items() if key != "updated_at"
+}
+db.query(LatestVitals).delete()
+db.commit()
+assert LatestVitalsRepository(db).rebuild() == 2
+rebuilt = LatestVitalsRepository.to_dict(LatestVitalsRepository(db).get_by_elderly_id(elderly_a))
+assert {key: rebuilt[key] for key in expected} == expected, (rebuilt, expected)
+print("✓ 从健康记录回填的快照与增量维护的一致")
+
+today = LatestVitalsRepository.today_values(rebuilt)
+assert today["heart_rate"] == 75 and today["steps"] == 1200
+print(f"今日数据: {today}")
+
+latest = repo.get_latest_records_by_types(elderly_a, ["heart_rate", "blood_pressure", "step_count", "weight", "unknown"])
+assert latest["heart_rate"] == {"heart_rate": 75, "recorded_at": now - timedelta(minutes=10)}, latest
+assert latest["blood_pressure"] == {
+    "systolic_pressure": 150, "diastolic_pressure": 95, "recorded_at": now - timedelta(minutes=1)
+}
+assert latest["step_count"]["steps"] == 1200
+assert latest["weight"] is None and latest["unknown"] is None
+assert all(value is None for value in repo.get_latest_records_by_types(uuid.uuid4(), ["heart_rate"]).values())
+print("✓ get_latest_records_by_types 从快照读取各指标最新值和测量时间")
+
+queries = []
+event.listen(engine, "before_cursor_execute", lambda *args: queries.append(args[2]))
+cache = LatestVitalsCache(ttl_seconds=60)
+for _ in range(100):
+    assert cache.get(db, elderly_a)["heart_rate"] == 75
+assert len(queries) == 1
+cache.invalidate([elderly_a])
+cache.get(db, elderly_a)
+assert len(queries) == 2
+print(f"✓ 100 次读取只查询 1 次数据库，写入后失效缓存 {cache.get_stats()}")
+
+print("\n全部测试通过")
@@ -0,0 +1,193 @@
+"""测试提醒调度（时间轮、批量推进、日历运算；使用内存 SQLite，无需 PostgreSQL）"""
+import asyncio
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+sys.path.insert(0, '.')
+
+import scripts.sqlite_compat  # noqa: F401  SQLite 上渲染 UUID 列
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from database.database import Base
+from database.models import Reminder, ReminderFrequency, ReminderStatus, ReminderType
+from repositories.reminder_schedule_repository import next_occurrence
+from services.reminder_scheduler import ReminderScheduler, TimingWheel
+from utils.common_utils import DateUtils
+
+print("=" * 50)
+print("日历运算测试")
+print("=" * 50)
+
+assert DateUtils.add_months(datetime(2024, 1, 31, 8, 0), 1) == datetime(2024, 2, 29, 8, 0)
+assert DateUtils.add_months(datetime(2023, 1, 31, 8, 0), 1) == datetime(2023, 2, 28, 8, 0)
+assert DateUtils.add_months(datetime(2024, 12, 15), 1) == datetime(2025, 1, 15)
+assert DateUtils.add_months(datetime(2024, 3, 31), -1) == datetime(2024, 2, 29)
+print("✓ 按月加减：月末截断、跨年")
+
+monthly = ReminderFrequency.MONTHLY
+assert next_occurrence(datetime(2024, 1, 31, 8), monthly) == datetime(2024, 2, 29, 8)
+assert next_occurrence(datetime(2024, 1, 5, 8), monthly, after=datetime(2024, 3, 31)) == datetime(2024, 4, 5, 8)
+assert next_occurrence(datetime(2024, 1, 31, 8), monthly, after=datetime(2024, 3, 5)) == datetime(2024, 3, 31, 8)
+assert next_occurrence(datetime(2024, 3, 1, 8), ReminderFrequency.DAILY) == datetime(2024, 3, 2, 8)
+assert next_occurrence(datetime(2024, 3, 1, 8), ReminderFrequency.DAILY,
+                       after=datetime(2024, 3, 10, 9)) == datetime(2024, 3, 11, 8)
+assert next_occurrence(datetime(2024, 3, 1, 8), ReminderFrequency.WEEKLY,
+                       after=datetime(2024, 3, 8, 8)) == datetime(2024, 3, 15, 8)
+assert next_occurrence(datetime(2024, 3, 1, 8), ReminderFrequency.ONCE) is None
+aware = datetime(2024, 3, 1, 8, tzinfo=timezone(timedelta(hours=8)))
+assert next_occurrence(aware, ReminderFrequency.DAILY, after=aware + timedelta(hours=1)) == aware + timedelta(days=1)
+print("✓ 下一次时间：每天/每周/每月、跳过错过的周期、一次性不展开、带时区")
+
+print("=" * 50)
+print("时间轮测试")
+print("=" * 50)
+
+wheel = TimingWheel(1.0, 8, start=1000.0)
+wheel.add("a", 1002.5, "a")
+wheel.add("b", 1002.9, "b")
+wheel.add("late", 1020.0, "late")      # 超过一圈
+wheel.add("overdue", 900.0, "overdue")  # 已过期，下一格触发
+wheel.add("gone", 1003.0, "gone")
+assert wheel.remove("gone") and "gone" not in wheel
+assert wheel.advance(1001.0) == ["overdue"]
+assert sorted(wheel.advance(1002.99)) == ["a", "b"]
+assert wheel.advance(1012.0) == [] and len(wheel) == 1
+assert wheel.advance(1030.0) == ["late"]
+print("✓ 同一格合并触发、超过一圈的条目、删除、过期条目")
+
+print("=" * 50)
+print("调度测试")
+print("=" * 50)
+
+engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+Base.metadata.tables["reminders"].create(engine)
+Session = sessionmaker(bind=engine, expire_on_commit=False)
+
+statements = []
+event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+now = time.time()
+base = datetime.fromtimestamp(now).replace(microsecond=0)
+
+
+def reminder(elderly_id, at, frequency=ReminderFrequency.DAILY, title="按时服药"):
+    return Reminder(
+        id=uuid.uuid4(), elderly_id=elderly_id, created_by=uuid.uuid4(), title=title,
+        reminder_type=ReminderType.MEDICATION, frequency=frequency,
+        next_reminder_time=at, status=ReminderStatus.ACTIVE
+    )
+
+
+elderly = [uuid.uuid4() for _ in range(200)]
+db = Session()
+due_now = [reminder(elderly_id, base + timedelta(seconds=1)) for elderly_id in elderly]
+pressure = reminder(elderly[0], base + timedelta(seconds=1), ReminderFrequency.ONCE, title="测量血压")
+monthly_reminder = reminder(elderly[1], base + timedelta(seconds=1), ReminderFrequency.MONTHLY, title="复诊")
+later = reminder(elderly[2], base + timedelta(seconds=120))
+far = reminder(elderly[3], base + timedelta(hours=2))
+missed = reminder(elderly[4], base - timedelta(days=3))
+db.add_all(due_now + [pressure, monthly_reminder, later, far, missed])
+db.commit()
+db.close()
+
+scheduler = ReminderScheduler(horizon_seconds=600, session_factory=Session)
+scheduler.QUERY_BATCH_SIZE = 50
+messages = []
+scheduler.add_listener(messages.append)
+
+statements.clear()
+assert asyncio.run(scheduler.tick(now)) == 0
+assert len(scheduler.wheel) == len(due_now) + 4    # 包括已错过的，不包括 2 小时后的
+print(f"✓ 加载未来 10 分钟内到期的提醒（键集分页，{sum('SELECT' in s for s in statements)} 次查询）")
+
+statements.clear()
+delivered = asyncio.run(scheduler.tick(now + 1.5))
+assert delivered == len(due_now) + 2 and scheduler.stats["missed"] == 1    # 错过超过宽限期的不推送
+writes = [s for s in statements if s.startswith("UPDATE")]
+assert len(writes) == 2, writes    # 一次 executemany 推进 + 一次标记完成
+assert len(messages) == len(elderly)
+first = next(m for m in messages if m["elderly_id"] == str(elderly[0]))
+assert sorted(r["title"] for r in first["reminders"]) == sorted(["按时服药", "测量血压"])
+assert first["text"].startswith("提醒您：") and "测量血压" in first["text"]
+print(f"✓ 同一格到期的 {delivered} 条提醒批量推进（{len(writes)} 条 UPDATE 语句），按老人合并为 {len(messages)} 条消息，错过的不推送")
+
+db = Session()
+assert db.get(Reminder, due_now[0].id).next_reminder_time == base + timedelta(days=1, seconds=1)
+assert db.get(Reminder, pressure.id).status == ReminderStatus.COMPLETED
+assert db.get(Reminder, monthly_reminder.id).next_reminder_time == DateUtils.add_months(base + timedelta(seconds=1), 1)
+assert db.get(Reminder, missed.id).next_reminder_time > base
+print("✓ 每天 +1 天，一次性标记完成，每月按日历，错过的提醒推进到下一次")
+
+db.get(Reminder, later.id).status = ReminderStatus.INACTIVE
+db.add(reminder(elderly[5], base + timedelta(seconds=60), title="散步"))
+db.commit()
+db.close()
+messages.clear()
+asyncio.run(scheduler.tick(now + scheduler.REFILL_SECONDS + 1))
+assert later.id not in scheduler.wheel
+assert asyncio.run(scheduler.tick(now + 61.5)) == 1 and messages[0]["reminders"][0]["title"] == "散步"
+assert asyncio.run(scheduler.tick(now + 121.5)) == 0
+print("✓ 补充时间轮时同步停用和新增的提醒")
+
+print("=" * 50)
+print("按老人推送测试")
+print("=" * 50)
+
+# 上面的提醒都没有终端在线，暂存等待补发
+assert scheduler.stats["delivered"] == 0
+assert scheduler.get_stats()["pending"] == len(due_now) + 3
+
+
+class Terminal:
+    def __init__(self, fail=False):
+        self.received = []
+        self.fail = fail
+
+    async def send(self, message):
+        if self.fail:
+            raise ConnectionError("连接已断开")
+        self.received.append(message)
+
+
+own, other = Terminal(), Terminal()
+newcomer = uuid.uuid4()
+assert asyncio.run(scheduler.connect(elderly[0], own.send)) == 2
+assert [r["title"] for r in own.received[0]["reminders"]] == [r["title"] for r in first["reminders"]]
+assert all(m["elderly_id"] == str(elderly[0]) for m in own.received)
+assert asyncio.run(scheduler.connect(newcomer, other.send)) == 0 and other.received == []
+print("✓ 老人连接时补发本人暂存的提醒，其他老人的提醒不会推送给该连接")
+
+db = Session()
+db.add(reminder(elderly[0], base + timedelta(seconds=200), title="喝水"))
+db.add(reminder(newcomer, base + timedelta(seconds=200), title="午睡"))
+db.commit()
+db.close()
+asyncio.run(scheduler.tick(now + 2 * scheduler.REFILL_SECONDS + 1))
+assert asyncio.run(scheduler.tick(now + 201.5)) == 2
+assert own.received[-1]["text"] == "提醒您：喝水" and other.received[-1]["text"] == "提醒您：午睡"
+assert len(other.received) == 1
+print("✓ 在线老人的提醒直接推送到本人的连接")
+
+broken = Terminal(fail=True)
+assert asyncio.run(scheduler.connect(elderly[1], broken.send)) == 0
+assert elderly[1] not in scheduler._connections
+assert any(elderly_id == elderly[1] for elderly_id in scheduler._pending)
+scheduler.disconnect(elderly[0], own.send)
+scheduler.disconnect(newcomer, other.send)
+assert scheduler.get_stats()["connections"] == 0
+print("✓ 发送失败的连接被移除，提醒继续暂存")
+
+missed_before = scheduler.stats["missed"]
+pending_before = scheduler.get_stats()["pending"]
+scheduler._expire_pending(now + scheduler.MISSED_GRACE_SECONDS + 300)
+assert scheduler.get_stats()["pending"] == 0
+assert scheduler.stats["missed"] == missed_before + pending_before
+print("✓ 超过宽限期仍未送达的暂存提醒丢弃，计入 missed")
+
+print(f"✓ 统计 {scheduler.get_stats()}")
+
+print("\n全部测试通过")
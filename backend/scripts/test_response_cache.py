@@ -0,0 +1,101 @@
+"""测试 LLM 回答缓存（问题向量使用字符计数桩函数，无需嵌入模型）"""
+import sys
+sys.path.insert(0, '.')
+
+import numpy as np
+
+from services.agents.response_cache import ResponseCache
+
+DIM = 4096
+
+
+def fake_embed(text):
+    """按字符计数的向量，所有阿拉伯数字落在同一维度（数字不同的问题向量也很接近）"""
+    vector = np.zeros(DIM, dtype=np.float32)
+    for ch in text:
+        vector[0 if ch.isdigit() else ord(ch) % (DIM - 1) + 1] += 1
+    return vector.tolist()
+
+
+def cosine(a, b):
+    a, b = np.asarray(fake_embed(ResponseCache.normalize(a))), np.asarray(fake_embed(ResponseCache.normalize(b)))
+    return float(a @ b / np.linalg.norm(a) / np.linalg.norm(b))
+
+
+namespace = ResponseCache.make_namespace("health", "elderly", "health_consult")
+cache = ResponseCache(similarity_threshold=0.92, embed_fn=fake_embed)
+cache.put("血压150高吗？", namespace, "150mmHg 偏高，建议复测并咨询医生。")
+
+print("=" * 50)
+print("精确匹配测试")
+print("=" * 50)
+
+result = cache.lookup("  血压150高吗 ", namespace)
+assert result.level == "exact" and result.response.startswith("150mmHg"), result
+assert cache.lookup("血压150高吗？", ResponseCache.make_namespace("health", "children", "health_consult")).level == "miss"
+print("✓ 去掉空白标点后命中，不同命名空间不命中")
+
+cache.put("体温36.5正常吗", namespace, "36.5℃ 正常。")
+assert cache.lookup("体温 36.5 正常吗？", namespace).level == "exact"
+assert cache.lookup("体温365正常吗", namespace).response != "36.5℃ 正常。"
+print("✓ 归一化保留小数点，36.5 与 365 不是同一个问题")
+
+print("\n" + "=" * 50)
+print("语义匹配测试")
+print("=" * 50)
+
+assert cosine("血压150算高吗", "血压150高吗") >= 0.92
+result = cache.lookup("血压150算高吗", namespace)
+assert result.level == "semantic" and result.response.startswith("150mmHg"), result
+assert result.embedding is not None
+print(f"✓ 数字相同的近义问题命中（相似度 {cosine('血压150算高吗', '血压150高吗'):.3f}）")
+
+print("\n" + "=" * 50)
+print("数字/指标不同测试")
+print("=" * 50)
+
+similarity = cosine("血压90高吗", "血压150高吗")
+assert similarity >= 0.92, similarity
+result = cache.lookup("血压90高吗", namespace)
+assert result.level == "miss" and result.response is None, result
+print(f"✓ 血压90 与 血压150 相似度 {similarity:.3f} 超过阈值，但数字不同不命中")
+
+assert cache.lookup("血压一百五高吗", namespace).level == "miss"
+print("✓ 中文数字与阿拉伯数字视为不同数字，不命中")
+
+similarity = cosine("血糖150高吗", "血压150高吗")
+assert similarity >= 0.92, similarity
+assert cache.lookup("血糖150高吗", namespace).level == "miss"
+print(f"✓ 血糖 与 血压 相似度 {similarity:.3f} 超过阈值，但指标不同不命中")
+
+assert ResponseCache.extract_slots(ResponseCache.normalize("高压150低压95要紧吗")) == (
+    ("150", "95"), ("收缩压", "舒张压")
+)
+assert ResponseCache.extract_slots("心跳快怎么办") == ResponseCache.extract_slots("心率快怎么办")
+print("✓ 指标同义词归为同一项")
+
+print("\n" + "=" * 50)
+print("失效测试")
+print("=" * 50)
+
+cache = ResponseCache(embed_fn=fake_embed)
+cache.put("血压150高吗", namespace, "偏高", kb_version="v1")
+assert cache.lookup("血压150高吗", namespace, kb_version="v1").level == "exact"
+assert cache.lookup("血压150高吗", namespace, kb_version="v2").level == "miss"
+assert cache.get_stats()["invalidations"] == 1 and cache.get_stats()["entries"] == 0
+print("✓ 知识库版本变化后整体失效")
+
+cache.put("血压150高吗", namespace, "偏高", kb_version="v2")
+cache.invalidate()
+assert cache.lookup("血压150高吗", namespace, kb_version="v2").level == "miss"
+print("✓ invalidate() 清空缓存")
+
+cache = ResponseCache(ttl_seconds=0, embed_fn=fake_embed)
+cache.put("血压150高吗", namespace, "偏高")
+assert cache.lookup("血压150高吗", namespace).level == "miss"
+print("✓ 过期后不命中")
+
+stats = cache.get_stats()
+print(f"✓ 统计 {stats}")
+
+print("\n全部测试通过")
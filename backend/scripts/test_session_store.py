@@ -0,0 +1,76 @@
+"""测试会话存储（进程内后端，无需 Redis）"""
+import sys
+import time
+sys.path.insert(0, '.')
+
+from services.session_store import InMemorySessionStore
+from services.conversation_memory import ConversationMemory
+
+print("=" * 50)
+print("滑动过期测试")
+print("=" * 50)
+
+store = InMemorySessionStore("test", ttl_seconds=0.2)
+store.set("a", {"x": 1})
+store.set("b", {"x": 2})
+time.sleep(0.12)
+assert store.get("a") == {"x": 1}  # 访问后刷新有效期
+time.sleep(0.12)
+assert store.get("a") == {"x": 1}
+assert store.get("b") is None
+assert store.get_stats()["expired"] == 1
+print("✓ 访问刷新有效期，未访问的会话过期")
+
+print("\n" + "=" * 50)
+print("内存上限与环形缓冲测试")
+print("=" * 50)
+
+store = InMemorySessionStore("test", ttl_seconds=60, max_bytes=4096)
+for i in range(100):
+    store.set(f"s{i}", "数据" * 20)
+stats = store.get_stats()
+print(stats)
+assert store._bytes <= 4096 and stats["evicted"] > 0
+assert store.get("s99") is not None and store.get("s0") is None
+print("✓ 超过内存上限时淘汰最久未访问的会话")
+
+for i in range(50):
+    store.append("ring", i, maxlen=10)
+assert store.get_list("ring") == list(range(40, 50))
+assert store.get_list("ring", limit=3) == [47, 48, 49]
+print("✓ 列表只保留最近 N 项")
+
+print("\n" + "=" * 50)
+print("会话数量与访问耗时测试")
+print("=" * 50)
+
+
+def measure(sessions: int) -> float:
+    memory = ConversationMemory(max_history=10)
+    memory.conversations = InMemorySessionStore("conv", 3600)
+    memory.profiles = InMemorySessionStore("profile", 3600)
+    for i in range(sessions):
+        memory.add_message(f"user{i}", "user", "你好")
+    start = time.perf_counter()
+    for i in range(2000):
+        user_id = f"user{i % sessions}"
+        memory.add_message(user_id, "user", "今天血压怎么样")
+        memory.get_chat_history_for_llm(user_id)
+    return (time.perf_counter() - start) / 2000 * 1e6
+
+
+small, large = measure(100), measure(20000)
+print(f"100 个会话: {small:.1f} µs/次，20000 个会话: {large:.1f} µs/次")
+assert large < small * 3
+print("✓ 单次访问耗时与会话数量无关")
+
+memory = ConversationMemory(max_history=5)
+memory.conversations = InMemorySessionStore("conv", 3600)
+memory.profiles = InMemorySessionStore("profile", 3600)
+for i in range(20):
+    memory.add_message("u", "user", f"消息{i}")
+history = memory.get_history("u")
+assert [m["content"] for m in history] == [f"消息{i}" for i in range(10, 20)]
+print("✓ 对话历史保留最近 max_history 轮")
+
+print("\n全部测试通过")
@@ -0,0 +1,128 @@
+"""测试增量流式识别（使用桩模型，无需 faster-whisper）"""
+import sys
+import time
+import asyncio
+import threading
+sys.path.insert(0, '.')
+
+import numpy as np
+
+from services.streaming_asr_service import (
+    ASRModel, ASRSegment, PCMRingBuffer, StreamingASRService
+)
+
+SAMPLE_RATE = 16000
+
+
+class StubModel(ASRModel):
+    """每秒音频识别为一个字：音频幅值编码了是第几秒（1 → "一"，2 → "二" ...）"""
+
+    DIGITS = "零一二三四五六七八九"
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def transcribe(self, audio, sample_rate):
+        with self._lock:
+            self.active += 1
+            self.calls += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delay)
+            segments = []
+            for i in range(0, len(audio) - sample_rate // 2 + 1, sample_rate):
+                second = audio[i:i + sample_rate]
+                digit = int(round(float(second.mean()) * 100)) % 10
+                segments.append(ASRSegment(i / sample_rate, (i + len(second)) / sample_rate, self.DIGITS[digit]))
+            return segments
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def make_speech(seconds: int) -> bytes:
+    """第 n 秒的样本值都为 n/100（float）对应的 int16"""
+    chunks = [np.full(SAMPLE_RATE, (n % 10) / 100 * 32768, dtype=np.int16) for n in range(1, seconds + 1)]
+    return np.concatenate(chunks).tobytes()
+
+
+print("=" * 50)
+print("环形缓冲测试")
+print("=" * 50)
+
+ring = PCMRingBuffer(1000)
+reference = np.arange(3500, dtype=np.int16)
+raw = reference.tobytes()
+for i in range(0, len(raw), 333):  # 奇数字节分块，测试跨块拼接
+    ring.append(raw[i:i + 333])
+assert ring.total_samples == 3500
+assert np.array_equal(ring.read(2500), reference[2500:])
+assert np.array_equal(ring.read(0), reference[2500:])  # 已被覆盖的部分截掉
+assert np.array_equal(ring.read(2800, 3100), reference[2800:3100])
+print("✓ 写入/回绕/读取正确")
+
+
+async def stream_one(service, speech: bytes, chunk_ms: int = 100, realtime: bool = False):
+    partials = []
+
+    async def on_partial(text):
+        partials.append(text)
+
+    recognizer = service.create_recognizer(SAMPLE_RATE, on_partial=on_partial, max_window_seconds=4.0)
+    chunk_bytes = SAMPLE_RATE * 2 * chunk_ms // 1000
+    for i in range(0, len(speech), chunk_bytes):
+        recognizer.feed(speech[i:i + chunk_bytes])
+        await asyncio.sleep(chunk_ms / 1000 if realtime else 0)
+    final = await recognizer.finish()
+    return partials, final
+
+
+async def main():
+    print("\n" + "=" * 50)
+    print("增量识别测试")
+    print("=" * 50)
+
+    service = StreamingASRService(model=StubModel(), max_concurrency=2)
+    partials, final = await stream_one(service, make_speech(12), realtime=True)
+    print(f"部分结果 {len(partials)} 次，最后一次: {partials[-1] if partials else ''}")
+    print(f"最终结果: {final}")
+    assert final == "一二三四五六七八九零一二", final
+    assert partials and all(final.startswith(p[:-1]) for p in partials)
+    print("✓ 滑动窗口固定文本后结果完整")
+
+    print("\n" + "=" * 50)
+    print("并发与事件循环阻塞测试")
+    print("=" * 50)
+
+    model = StubModel(delay=0.3)
+    service = StreamingASRService(model=model, max_concurrency=2)
+
+    # 测量事件循环延迟
+    lags = []
+
+    async def ticker():
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lags.append(time.perf_counter() - start - 0.01)
+
+    tick_task = asyncio.create_task(ticker())
+    results = await asyncio.gather(*[
+        stream_one(service, make_speech(5), realtime=True) for _ in range(6)
+    ])
+    tick_task.cancel()
+
+    assert all(final == "一二三四五" for _, final in results), [f for _, f in results]
+    print(f"6 路并发，识别调用 {model.calls} 次，最大同时识别 {model.max_active}")
+    print(f"事件循环最大延迟: {max(lags) * 1000:.1f} ms")
+    assert model.max_active <= 2
+    assert max(lags) < 0.1
+    print("✓ 识别不阻塞事件循环，并发受限")
+
+
+asyncio.run(main())
+print("\n全部测试通过")
@@ -0,0 +1,111 @@
+"""测试 TTS 音频缓存（Edge-TTS 使用桩类，无需网络）"""
+import sys
+import asyncio
+import tempfile
+from pathlib import Path
+sys.path.insert(0, '.')
+
+import services.voice_service as voice_module
+from services.tts_cache import TTSAudioCache
+from services.voice_service import voice_service
+from services.voice_agent_service import voice_agent_service
+
+
+class FakeCommunicate:
+    """合成结果为参数本身的字节，带少量延迟"""
+
+    def __init__(self, text, voice, rate, volume):
+        self.data = f"{voice}|{rate}|{volume}|{text}".encode("utf-8")
+
+    async def stream(self):
+        await asyncio.sleep(0.05)
+        for i in range(0, len(self.data), 16):
+            yield {"type": "audio", "data": self.data[i:i + 16]}
+
+
+voice_module.edge_tts.Communicate = FakeCommunicate
+
+tmp_dir = Path(tempfile.mkdtemp())
+voice_service.tts_cache = TTSAudioCache(tmp_dir / "audio", max_disk_bytes=2048, max_memory_bytes=1024)
+voice_service.synthesis_count = 0
+
+
+async def main():
+    print("=" * 50)
+    print("内容寻址 + 并发去重测试")
+    print("=" * 50)
+
+    results = await asyncio.gather(*[voice_service.text_to_speech("您好，今天感觉怎么样？") for _ in range(5)])
+    ids = {audio_id for audio_id, _ in results}
+    assert len(ids) == 1 and voice_service.synthesis_count == 1, (ids, voice_service.synthesis_count)
+    audio_id, audio_path = results[0]
+    assert Path(audio_path).read_bytes().endswith("您好，今天感觉怎么样？".encode("utf-8"))
+    print(f"✓ 5 个并发请求只合成 1 次，音频ID {audio_id}")
+
+    other_id, _ = await voice_service.text_to_speech("您好，今天感觉怎么样？", rate="-10%")
+    assert other_id != audio_id and voice_service.synthesis_count == 2
+    print("✓ 语音参数不同时分别缓存")
+
+    data = await voice_service.text_to_speech_fast("您好，今天感觉怎么样？", rate="+0%")
+    streamed = b"".join([chunk async for chunk in voice_service.text_to_speech_stream("您好，今天感觉怎么样？", rate="+0%")])
+    assert data == streamed == Path(audio_path).read_bytes()
+    assert voice_service.synthesis_count == 2
+    print("✓ 文件 / 字节 / 流式三种接口共用缓存")
+
+    print("\n" + "=" * 50)
+    print("LRU 淘汰与固定短语测试")
+    print("=" * 50)
+
+    voice_service.tts_cache.pin([audio_id])
+    for i in range(60):
+        await voice_service.text_to_speech(f"第{i}条临时回复内容")
+    stats = voice_service.get_cache_stats()
+    print(stats)
+    assert voice_service.tts_cache._disk_bytes <= 2048
+    assert stats["evictions"] > 0
+    assert voice_service.tts_cache.get_path(audio_id) is not None
+    print("✓ 超过磁盘上限时淘汰最久未用的音频，固定短语保留")
+
+    assert not voice_service.tts_cache.remove(audio_id)
+    assert voice_service.tts_cache.get_path(audio_id) is not None and voice_service.tts_cache.is_pinned(audio_id)
+    print("✓ 固定短语不能删除")
+
+    # 重启后恢复索引
+    reloaded = TTSAudioCache(tmp_dir / "audio", max_disk_bytes=2048)
+    assert reloaded.get_stats()["entries"] == stats["entries"]
+    print("✓ 重启后从目录恢复缓存索引")
+
+    print("\n" + "=" * 50)
+    print("预合成测试")
+    print("=" * 50)
+
+    voice_service.tts_cache = TTSAudioCache(tmp_dir / "warm", max_disk_bytes=10 * 1024 * 1024)
+    voice_service.synthesis_count = 0
+    warm_stats = await voice_agent_service.warm_tts_cache()
+    print(f"预合成: {warm_stats}")
+    assert warm_stats["failed"] == 0 and warm_stats["synthesized"] == voice_service.synthesis_count
+    warmed = voice_service.synthesis_count
+
+    result = voice_agent_service._new_result()
+    await voice_agent_service._respond("糖豆糖豆", result, "default", "elderly", False)
+    params = voice_agent_service.voice_settings.get_voice_settings("default")
+    await voice_service.text_to_speech(
+        result["response"], voice=params["voice"], rate=params["rate"], volume=params["volume"]
+    )
+
+    events = [event async for event in voice_agent_service.process_voice_input_stream(text="早安")]
+    sentences = [e["text"] for e in events if e["type"] == "sentence"]
+    print(f"早安模式流式播报 {len(sentences)} 句")
+    assert sentences
+    # 带情感的场景指令、非默认语音风格同样命中预合成的缓存
+    events = [event async for event in voice_agent_service.process_voice_input_stream(
+        text="太好了，早安", voice_style="calm"
+    )]
+    done = events[-1]["result"]
+    assert done["emotion"] == "happy" and done["is_automation"]
+    assert voice_service.synthesis_count == warmed, voice_service.synthesis_count
+    print("✓ 唤醒应答和场景播报不再合成")
+
+
+asyncio.run(main())
+print("\n全部测试通过")
@@ -0,0 +1,190 @@
+"""测试内存映射向量索引：增删、检索、分类过滤、重新打开和压缩（临时目录，无需向量化模型）"""
+import os
+import shutil
+import sys
+import tempfile
+sys.path.insert(0, '.')
+
+import numpy as np
+
+from services.health_assessment.vector_index import MmapVectorIndex
+
+DIM = 16
+rng = np.random.default_rng(11)
+workdir = tempfile.mkdtemp()
+path = os.path.join(workdir, "index")
+
+
+def exact_top(index, query, k, categories=None):
+    """逐行计算余弦相似度的参考结果"""
+    query = query / np.linalg.norm(query)
+    candidates = []
+    for id_, row in index.id_to_row.items():
+        if categories is not None and index._categories[index._category_codes[row]] not in categories:
+            continue
+        candidates.append((float(index.get_vector(id_) @ query), id_))
+    candidates.sort(key=lambda item: -item[0])
+    return [id_ for _, id_ in candidates[:k]]
+
+
+vectors = rng.normal(size=(300, DIM)).astype(np.float32)
+ids = [f"doc-{i}" for i in range(300)]
+categories = ["高血压" if i % 3 == 0 else "糖尿病" if i % 3 == 1 else "睡眠" for i in range(300)]
+
+print("=" * 50)
+print("增加与检索测试")
+print("=" * 50)
+
+index = MmapVectorIndex(DIM, path, signature="model-a")
+index.SEARCH_BLOCK_ROWS = 64    # 分块检索
+index.add(vectors[:200], ids[:200], categories[:200])
+index.add(vectors[200:], ids[200:], categories[200:])
+assert len(index) == 300 and index.deleted_count == 0
+assert np.allclose(np.linalg.norm(index.get_vector("doc-5")), 1.0)
+
+scores, found = index.search(vectors[42], k=5)
+assert found[0] == "doc-42" and abs(scores[0] - 1.0) < 1e-5
+assert scores == sorted(scores, reverse=True)
+queries = rng.normal(size=(4, DIM)).astype(np.float32)
+for query, (_, found) in zip(queries, index.search_batch(queries, k=7)):
+    assert found == exact_top(index, query, 7)
+print("✓ 写入时归一化，单个和批量检索与逐行计算一致（分块 top-k）")
+
+print("\n" + "=" * 50)
+print("分类过滤测试")
+print("=" * 50)
+
+for query in queries:
+    _, found = index.search(query, k=5, categories="睡眠")
+    assert found == exact_top(index, query, 5, {"睡眠"})
+    _, found = index.search(query, k=10, categories=["高血压", "糖尿病"])
+    assert found == exact_top(index, query, 10, {"高血压", "糖尿病"})
+assert index.search(queries[0], k=5, categories="不存在的分类") == ([], [])
+print("✓ 单个分类、多个分类过滤，不存在的分类返回空结果")
+
+print("\n" + "=" * 50)
+print("覆盖与删除测试")
+print("=" * 50)
+
+index.add(vectors[7:8] * -1, ["doc-0"], ["睡眠"])    # 覆盖已有 ID
+assert len(index) == 300 and index.deleted_count == 1
+_, found = index.search(vectors[7], k=1, categories="高血压")
+assert found != ["doc-0"]
+assert index.remove(["doc-1", "doc-2", "missing"]) == 2
+assert "doc-1" not in index.search(vectors[1], k=300)[1]
+assert len(index) == 298 and index.deleted_count == 3
+print("✓ 相同 ID 覆盖旧向量和分类，删除后不再被检索到")
+
+print("\n" + "=" * 50)
+print("重新打开测试")
+print("=" * 50)
+
+index.flush()
+expected = index.search_batch(queries, k=10)
+reopened = MmapVectorIndex(DIM, path, signature="model-a")
+assert len(reopened) == 298 and reopened.deleted_count == 3
+assert reopened.search_batch(queries, k=10) == expected
+assert reopened.search(queries[0], k=5, categories="睡眠") == index.search(queries[0], k=5, categories="睡眠")
+assert np.array_equal(reopened.get_vector("doc-0"), index.get_vector("doc-0"))
+print("✓ 回放日志、映射向量文件后检索结果一致")
+
+with open(f"{path}.log", "a", encoding="utf-8") as f:
+    f.write('{"op": "add", "ids": ["doc-x"')    # 进程中断时未写完的记录
+assert len(MmapVectorIndex(DIM, path, signature="model-a")) == 298
+print("✓ 忽略日志末尾未写完的记录")
+
+assert len(MmapVectorIndex(DIM, path, signature="model-b")) == 0
+print("✓ 向量化模型标识变化时丢弃旧索引")
+
+print("\n" + "=" * 50)
+print("压缩测试")
+print("=" * 50)
+
+index = MmapVectorIndex(DIM, path, signature="model-a")
+index.add(vectors, ids, categories)
+index.remove(ids[:150])
+expected = index.search_batch(queries, k=10)
+filtered = index.search(queries[0], k=10, categories="糖尿病")
+index.save()    # 删除超过 30%，自动压缩
+assert index.deleted_count == 0 and len(index) == 150
+assert index.search_batch(queries, k=10) == expected
+assert not os.path.exists(f"{path}.log.compact") and not os.path.exists(f"{path}.vectors.compact")
+reopened = MmapVectorIndex(DIM, path, signature="model-a")
+assert reopened.search_batch(queries, k=10) == expected
+assert reopened.search(queries[0], k=10, categories="糖尿病") == filtered
+reopened.add(vectors[:1], ["doc-new"], ["睡眠"])
+assert MmapVectorIndex(DIM, path, signature="model-a").search(vectors[0], k=1)[1] == ["doc-new"]
+print("✓ 压缩后去掉已删除行，检索结果不变，重新打开和继续追加正常")
+
+
+def snapshot():
+    backup = tempfile.mkdtemp()
+    for suffix in (".log", ".vectors"):
+        shutil.copy(path + suffix, backup)
+    return backup
+
+
+def restore(backup):
+    for suffix in (".log", ".vectors", ".log.compact", ".vectors.compact"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    for suffix in (".log", ".vectors"):
+        shutil.copy(os.path.join(backup, "index" + suffix), path + suffix)
+
+
+index = MmapVectorIndex(DIM, path, signature="model-a")
+index.remove([f"doc-{i}" for i in range(150, 250)])
+index.flush()
+before = index.search_batch(queries, k=10)
+backup = snapshot()
+
+# 压缩文件写到一半中断：丢弃压缩文件，保留旧索引
+real_replace = os.replace
+os.replace = lambda *args: (_ for _ in ()).throw(KeyboardInterrupt())
+try:
+    index.compact()
+    raise AssertionError("应当中断")
+except KeyboardInterrupt:
+    pass
+finally:
+    os.replace = real_replace
+with open(f"{path}.log.compact", "r", encoding="utf-8") as f:
+    lines = f.readlines()
+with open(f"{path}.log.compact", "w", encoding="utf-8") as f:
+    f.writelines(lines[:-1])    # 去掉 commit 记录：日志未写完
+recovered = MmapVectorIndex(DIM, path, signature="model-a")
+assert recovered.deleted_count == 100 and recovered.search_batch(queries, k=10) == before
+assert not os.path.exists(f"{path}.log.compact") and not os.path.exists(f"{path}.vectors.compact")
+print("✓ 压缩日志未写完时中断：丢弃压缩文件，旧索引完整")
+
+# 压缩日志已提交，换入向量文件后中断：打开时完成换入
+restore(backup)
+index = MmapVectorIndex(DIM, path, signature="model-a")
+calls = []
+
+
+def replace_once(src, dst):
+    if calls:
+        raise KeyboardInterrupt()
+    calls.append(src)
+    real_replace(src, dst)
+
+
+os.replace = replace_once
+try:
+    index.compact()
+    raise AssertionError("应当中断")
+except KeyboardInterrupt:
+    pass
+finally:
+    os.replace = real_replace
+assert calls == [f"{path}.vectors.compact"] and os.path.exists(f"{path}.log.compact")
+recovered = MmapVectorIndex(DIM, path, signature="model-a")
+assert recovered.deleted_count == 0 and len(recovered) == 51
+assert recovered.search_batch(queries, k=10) == before
+assert not os.path.exists(f"{path}.log.compact")
+print("✓ 换入向量文件后、换入日志前中断：打开时完成换入，检索结果不变")
+
+shutil.rmtree(workdir, ignore_errors=True)
+shutil.rmtree(backup, ignore_errors=True)
+print("\n全部测试通过")
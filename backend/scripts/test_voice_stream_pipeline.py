@@ -0,0 +1,108 @@
+"""测试流式语音回复流水线（大模型和 TTS 使用桩函数，无需网络）"""
+import sys
+import time
+import asyncio
+sys.path.insert(0, '.')
+
+from services.voice_service import voice_service, SentenceTTSPipeline
+from services.spark_service import spark_service
+from services.voice_agent_service import voice_agent_service
+
+REPLY = "您好，血压偏高时要注意休息。每天少吃盐，按时量血压！如果头晕得厉害，请及时去医院。"
+TOKEN_DELAY = 0.05     # 大模型每个字的间隔
+TTS_DELAY = 0.3        # 每句合成耗时
+
+
+def fake_chat_stream(user_input, system_prompt=None, history=None, temperature=0.7, max_tokens=2048):
+    for char in REPLY:
+        time.sleep(TOKEN_DELAY)
+        yield char
+
+
+async def fake_tts_stream(text, voice=None, rate="+10%", volume="+10%"):
+    await asyncio.sleep(TTS_DELAY)
+    for i in range(3):
+        yield f"[{text}#{i}]".encode("utf-8")
+        await asyncio.sleep(0.01)
+
+
+spark_service.chat_stream = fake_chat_stream
+voice_service.text_to_speech_stream = fake_tts_stream
+
+
+async def run(cancel_after: float = None):
+    cancel_event = asyncio.Event()
+    if cancel_after is not None:
+        asyncio.get_running_loop().call_later(cancel_after, cancel_event.set)
+
+    start = time.perf_counter()
+    first_audio = None
+    sentences, audio, done = [], [], None
+    async for event in voice_agent_service.process_voice_input_stream(
+        text="我血压有点高怎么办", user_id="stream-test", cancel_event=cancel_event
+    ):
+        if event["type"] == "sentence":
+            sentences.append(event["text"])
+        elif event["type"] == "audio":
+            if first_audio is None:
+                first_audio = time.perf_counter() - start
+            audio.append(event["data"].decode("utf-8"))
+        elif event["type"] == "done":
+            done = event
+    return sentences, audio, done, first_audio, time.perf_counter() - start
+
+
+async def main():
+    print("=" * 50)
+    print("顺序输出测试")
+    print("=" * 50)
+
+    order = []
+
+    async def slow_first(text):
+        # 第一句合成最慢，输出仍需保持顺序
+        await asyncio.sleep(0.2 if text == "一" else 0.01)
+        yield text.encode("utf-8")
+
+    pipeline = SentenceTTSPipeline(slow_first, max_parallel=3, min_chunk_bytes=1)
+    for text in "一二三":
+        pipeline.add(text)
+    pipeline.close()
+    async for event in pipeline.stream():
+        if event["type"] == "audio":
+            order.append(event["data"].decode("utf-8"))
+    assert order == ["一", "二", "三"], order
+    print("✓ 并发合成，按句子顺序输出")
+
+    print("\n" + "=" * 50)
+    print("边生成边播报测试")
+    print("=" * 50)
+
+    sentences, audio, done, first_audio, total = await run()
+    full_generation = len(REPLY) * TOKEN_DELAY
+    print(f"句子: {sentences}")
+    print(f"首段音频: {first_audio:.2f}s，完整生成需 {full_generation:.2f}s，总耗时 {total:.2f}s")
+    assert not done["interrupted"]
+    assert "".join(sentences).startswith(REPLY)
+    # 首句生成完 + 一句合成时间后即有音频，不等待完整回复
+    first_sentence = REPLY.split("。")[0] + "。"
+    assert first_audio < len(first_sentence) * TOKEN_DELAY + TTS_DELAY + 0.3
+    assert first_audio < full_generation
+    # 每句的音频按顺序完整输出
+    expected = [f"[{s}#{i}]" for s in sentences for i in range(3)]
+    assert "".join(audio) == "".join(expected)
+    print("✓ 首句音频在回复生成完成前开始输出")
+
+    print("\n" + "=" * 50)
+    print("打断测试")
+    print("=" * 50)
+
+    sentences, audio, done, _, total = await run(cancel_after=1.0)
+    print(f"打断前输出 {len(sentences)} 句，耗时 {total:.2f}s")
+    assert done["interrupted"]
+    assert total < 1.3
+    print("✓ 打断后立即停止输出")
+
+
+asyncio.run(main())
+print("\n全部测试通过")
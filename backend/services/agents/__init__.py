@@ -8,7 +8,7 @@
 
 from .base_agent import (
     BaseAgent, AgentRole, AgentMessage, AgentMemory,
-    MessageType, EmotionState
+    MessageType, EmotionState, LLMStreamCancelled, stream_llm_deltas
 )
 from .agent_coordinator import AgentCoordinator
 from .health_butler import HealthButlerAgent
@@ -25,6 +25,8 @@ __all__ = [
     "AgentMemory",
     "MessageType",
     "EmotionState",
+    "LLMStreamCancelled",
+    "stream_llm_deltas",
     "AgentCoordinator",
     "HealthButlerAgent",
     "ChronicDiseaseExpertAgent", 
@@ -5,9 +5,12 @@
 负责协调多个智能体之间的协作，路由消息，整合响应。
 """
 
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 import logging
+import threading
+import time
 
 from .base_agent import (
     BaseAgent, AgentRole, AgentMessage, AgentMemory,
@@ -28,10 +31,20 @@ class AgentCoordinator:
     - 整合多个智能体的响应
     """
     
-    def __init__(self):
+    # 多智能体并发处理的线程数上限
+    MAX_PARALLEL_AGENTS = 8
+    
+    # 单个智能体处理的默认超时时间（秒）
+    DEFAULT_AGENT_TIMEOUT = 20.0
+    
+    def __init__(self, max_parallel_agents: int = MAX_PARALLEL_AGENTS):
         self.agents: Dict[AgentRole, BaseAgent] = {}
         self.default_agent: Optional[AgentRole] = None
         self.conversation_history: List[AgentMessage] = []
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_parallel_agents,
+            thread_name_prefix="agent"
+        )
         
     def register_agent(self, agent: BaseAgent, is_default: bool = False):
         """注册智能体"""
@@ -130,12 +143,21 @@ class AgentCoordinator:
         agent_roles: List[AgentRole] = None,
         confidence_threshold: float = 0.6,
         user_role: str = "elderly",
-        session_id: str = None
+        session_id: str = None,
+        parallel: bool = True,
+        agent_timeout: Optional[float] = DEFAULT_AGENT_TIMEOUT,
+        strategy: Optional[str] = None
     ) -> List[AgentMessage]:
         """
         多智能体协作处理（支持角色适配 + 对话记忆）
         
         让多个智能体同时处理消息，收集所有响应
+        
+        Args:
+            parallel: 是否并发执行各智能体（每个智能体各自调用LLM/RAG/工具，互不依赖）
+            agent_timeout: 并发模式下等待智能体的超时时间（秒），超时的智能体不计入结果
+            strategy: 后续使用的整合策略；为 select_best 时，置信度最高的智能体
+                      返回后即取消其余尚未完成的智能体
         """
         user_message = AgentMessage(
             type=MessageType.USER_INPUT,
@@ -143,30 +165,124 @@ class AgentCoordinator:
             metadata={"user_role": user_role}
         )
         
-        responses = []
-        
+        # 选出参与处理的智能体及其置信度（指定的智能体不计算置信度）
+        candidates: List[Tuple[BaseAgent, Optional[float]]] = []
         if agent_roles:
             # 使用指定的智能体
             for role in agent_roles:
                 agent = self.agents.get(role)
                 if agent and agent.is_active:
-                    response = agent.process(user_message, memory, user_role=user_role, session_id=session_id)
-                    response.metadata["processed_by"] = agent.role.value
-                    response.metadata["agent_name"] = agent.name
-                    responses.append(response)
+                    candidates.append((agent, None))
         else:
             # 自动选择相关的智能体（置信度 >= threshold）
             for role, agent in self.agents.items():
                 if agent.is_active:
                     confidence = agent.can_handle(user_message, {})
                     if confidence >= confidence_threshold:
-                        response = agent.process(user_message, memory, user_role=user_role, session_id=session_id)
-                        response.metadata["processed_by"] = agent.role.value
-                        response.metadata["agent_name"] = agent.name
-                        response.metadata["confidence"] = confidence
-                        responses.append(response)
+                        candidates.append((agent, confidence))
+        
+        if not parallel or len(candidates) <= 1:
+            return [
+                self._run_agent(agent, confidence, user_message, memory, user_role, session_id)
+                for agent, confidence in candidates
+            ]
+        
+        return self._run_agents_parallel(
+            candidates, user_message, memory, user_role, session_id, agent_timeout, strategy
+        )
+    
+    def _run_agent(
+        self,
+        agent: BaseAgent,
+        confidence: Optional[float],
+        user_message: AgentMessage,
+        memory: AgentMemory,
+        user_role: str,
+        session_id: Optional[str]
+    ) -> AgentMessage:
+        """执行单个智能体并补充处理信息"""
+        response = agent.process(user_message, memory, user_role=user_role, session_id=session_id)
+        response.metadata["processed_by"] = agent.role.value
+        response.metadata["agent_name"] = agent.name
+        if confidence is not None:
+            response.metadata["confidence"] = confidence
+        return response
+    
+    def _run_agents_parallel(
+        self,
+        candidates: List[Tuple[BaseAgent, Optional[float]]],
+        user_message: AgentMessage,
+        memory: AgentMemory,
+        user_role: str,
+        session_id: Optional[str],
+        agent_timeout: Optional[float],
+        strategy: Optional[str]
+    ) -> List[AgentMessage]:
+        """
+        并发执行多个智能体
+        
+        - 超时或出错的智能体被跳过，返回已完成的部分结果
+        - select_best 策略下，置信度最高的智能体完成后取消其余智能体
+        - 返回结果保持候选顺序，与串行模式一致
+        """
+        # select_best 的胜者：置信度最高的候选（指定智能体时没有置信度，不提前结束）
+        winner_index = None
+        if strategy == "select_best" and all(c is not None for _, c in candidates):
+            winner_index = max(range(len(candidates)), key=lambda i: candidates[i][1])
+        
+        # 胜者完成或超时后置位，排队中的智能体开始前检查，不再调用
+        # （胜者所在线程可能在协调线程取消之前就领取下一个任务，Future.cancel 来不及）
+        stop = threading.Event()
+        
+        def run(index: int, agent: BaseAgent, confidence: Optional[float]) -> Optional[AgentMessage]:
+            if stop.is_set():
+                return None
+            response = self._run_agent(agent, confidence, user_message, memory, user_role, session_id)
+            if index == winner_index:
+                stop.set()
+            return response
+        
+        futures: Dict[Future, int] = {
+            self._executor.submit(run, index, agent, confidence): index
+            for index, (agent, confidence) in enumerate(candidates)
+        }
+        
+        results: Dict[int, AgentMessage] = {}
+        pending = set(futures)
+        deadline = time.monotonic() + agent_timeout if agent_timeout else None
+        
+        while pending:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            
+            if not done:
+                break  # 超时
+            
+            for future in done:
+                index = futures[future]
+                agent = candidates[index][0]
+                try:
+                    response = future.result()
+                    if response is not None:
+                        results[index] = response
+                except Exception as e:
+                    logger.error(f"[{agent.name}] 并发处理失败: {e}")
+            
+            if winner_index is not None and winner_index in results:
+                break
+        
+        # 取消未完成的智能体（已在运行的线程会执行完毕，但结果被丢弃）
+        stop.set()
+        winner_done = winner_index is not None and winner_index in results
+        for future in pending:
+            future.cancel()
+            agent_name = candidates[futures[future]][0].name
+            if winner_done:
+                logger.info(f"[{agent_name}] 已有最佳回答，取消处理")
+            else:
+                logger.warning(f"[{agent_name}] 未在时限内完成，已跳过")
         
-        return responses
+        return [results[i] for i in sorted(results)]
     
     def synthesize_responses(
         self,
@@ -6,16 +6,45 @@
 """
 
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, Iterator, List, Optional, Any
+import hashlib
 import uuid
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+# 当前调用链上的大模型输出接收器：设置后 call_llm 以流式方式调用模型，
+# 每收到一段回复就回调一次（用于语音边生成边播报）。
+# 使用 ContextVar 而不是参数，避免修改每个智能体的 process 签名。
+# 只在单智能体模式下设置：多智能体的回复需要整合后才能输出。
+_llm_delta_sink: ContextVar[Optional[Callable[[str], None]]] = ContextVar("llm_delta_sink", default=None)
+
+
+class LLMStreamCancelled(Exception):
+    """流式输出被调用方取消（如用户打断语音播报）"""
+    pass
+
+
+@contextmanager
+def stream_llm_deltas(on_delta: Optional[Callable[[str], None]]) -> Iterator[None]:
+    """
+    在当前上下文中接收大模型的流式输出
+    
+    on_delta 在调用 call_llm 的线程中执行，抛出 LLMStreamCancelled 可中止生成。
+    """
+    token = _llm_delta_sink.set(on_delta)
+    try:
+        yield
+    finally:
+        _llm_delta_sink.reset(token)
+
+
 class AgentRole(Enum):
     """智能体角色枚举"""
     HEALTH_BUTLER = "health_butler"      # 健康管家（主交互）
@@ -186,14 +215,24 @@ class BaseAgent(ABC):
         Returns:
             大模型回复
         """
+        on_delta = _llm_delta_sink.get()
+        
         try:
             from services.spark_service import spark_service
+            from services.agents.response_cache import response_cache, ResponseCache
             
             # 根据用户角色生成适配的系统提示词
             if system_prompt is None:
                 system_prompt = self.get_role_adapted_prompt(user_role)
             
+            # 缓存命名空间：智能体 + 用户角色 + 意图 + 基础提示词
+            cache_namespace = ResponseCache.make_namespace(
+                self.role.value, user_role, intent, str(use_rag),
+                hashlib.md5(system_prompt.encode("utf-8")).hexdigest()[:12]
+            )
+            
             # ========== 对话记忆增强 ==========
+            memory_context = ""
             if session_id:
                 memory_context = self._get_memory_context(session_id, user_input)
                 if memory_context:
@@ -220,6 +259,22 @@ class BaseAgent(ABC):
                     system_prompt = f"{system_prompt}\n\n{follow_up_prompt}"
                     logger.info(f"[{self.name}] 追问提示已注入")
             
+            # ========== 回答缓存 ==========
+            # 只有不含个性化上下文（记忆、历史、工具结果、追问）的通用问题才走缓存
+            cache_lookup = None
+            cacheable = not (memory_context or history or tool_context or follow_up_prompt)
+            if cacheable:
+                cache_lookup = response_cache.lookup(user_input, cache_namespace, self._get_kb_version())
+                if cache_lookup.response is not None:
+                    logger.info(f"[{self.name}] 命中回答缓存({cache_lookup.level})")
+                    if session_id:
+                        self._save_to_memory(session_id, user_input, cache_lookup.response)
+                    if on_delta is not None:
+                        on_delta(cache_lookup.response)
+                    return cache_lookup.response
+            else:
+                response_cache.record_skip()
+            
             # ========== RAG 知识库检索增强 ==========
             if use_rag:
                 rag_context = self._retrieve_rag_context(user_input, elderly_id)
@@ -227,13 +282,18 @@ class BaseAgent(ABC):
                     system_prompt = f"{system_prompt}\n\n{rag_context}"
                     logger.info(f"[{self.name}] RAG知识库已注入")
             
-            response = spark_service.chat(
-                user_input=user_input,
-                system_prompt=system_prompt,
-                history=history,
-                temperature=0.7,
-                max_tokens=2048
-            )
+            if on_delta is not None:
+                streamed = self._stream_llm(spark_service, on_delta, user_input, system_prompt, history)
+                response = streamed
+            else:
+                streamed = ""
+                response = spark_service.chat(
+                    user_input=user_input,
+                    system_prompt=system_prompt,
+                    history=history,
+                    temperature=0.7,
+                    max_tokens=2048
+                )
             
             # ========== 回答质量检查 ==========
             response = self._check_response_quality(response, {
@@ -241,6 +301,24 @@ class BaseAgent(ABC):
                 "intent": intent or ""
             })
             
+            # 流式输出时，质量检查补充的提醒在回复之后补发
+            if on_delta is not None:
+                position = response.find(streamed) if streamed else -1
+                if position >= 0:
+                    addition = (response[:position] + response[position + len(streamed):]).strip()
+                else:
+                    addition = response
+                if addition:
+                    on_delta(addition if not streamed else f"\n{addition}")
+            
+            # 服务不可用时的提示不缓存
+            if cache_lookup is not None and not response.startswith("抱歉，AI服务暂时不可用"):
+                response_cache.put(
+                    user_input, cache_namespace, response,
+                    kb_version=self._get_kb_version(),
+                    embedding=cache_lookup.embedding
+                )
+            
             # ========== 保存对话到记忆 ==========
             if session_id:
                 self._save_to_memory(session_id, user_input, response)
@@ -248,10 +326,58 @@ class BaseAgent(ABC):
             logger.info(f"[{self.name}] LLM调用成功(角色:{user_role}, RAG:{use_rag}, 工具:{bool(tool_context)}, 追问:{bool(follow_up_prompt)}, 记忆:{bool(session_id)})，回复长度: {len(response)}")
             return response
             
+        except LLMStreamCancelled:
+            logger.info(f"[{self.name}] 流式输出已被取消")
+            raise
         except Exception as e:
             logger.error(f"[{self.name}] LLM调用失败: {e}")
             return self.get_fallback_response(user_input)
     
+    def _stream_llm(
+        self,
+        spark_service,
+        on_delta: Callable[[str], None],
+        user_input: str,
+        system_prompt: str,
+        history: Optional[List[Dict[str, str]]]
+    ) -> str:
+        """流式调用大模型并逐段回调，返回完整回复；尚未输出任何内容时失败则退回非流式调用"""
+        parts: List[str] = []
+        try:
+            for delta in spark_service.chat_stream(
+                user_input=user_input,
+                system_prompt=system_prompt,
+                history=history,
+                temperature=0.7,
+                max_tokens=2048
+            ):
+                parts.append(delta)
+                on_delta(delta)
+        except LLMStreamCancelled:
+            raise
+        except Exception as e:
+            if parts:
+                raise
+            logger.warning(f"[{self.name}] 流式调用失败，改用普通调用: {e}")
+            response = spark_service.chat(
+                user_input=user_input,
+                system_prompt=system_prompt,
+                history=history,
+                temperature=0.7,
+                max_tokens=2048
+            )
+            on_delta(response)
+            return response
+        return "".join(parts)
+    
+    def _get_kb_version(self) -> Optional[int]:
+        """获取知识库内容版本（知识库变化后回答缓存失效）"""
+        try:
+            from services.knowledge_base import langchain_knowledge_base
+            return getattr(langchain_knowledge_base, "version", None)
+        except Exception:
+            return None
+    
     def _get_follow_up_prompt(self, user_input: str, intent: str, entities: Dict, session_id: str = None) -> str:
         """
         获取多轮追问提示
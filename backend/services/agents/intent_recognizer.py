@@ -11,9 +11,12 @@
 import re
 import logging
 from enum import Enum
+from functools import lru_cache
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
 
+from .keyword_matcher import KeywordMatcher
+
 logger = logging.getLogger(__name__)
 
 
@@ -96,6 +99,9 @@ class IntentRecognizer:
     3. LLM 兜底（复杂/模糊情况）
     """
     
+    # 规则匹配和实体提取结果的缓存条数
+    ANALYSIS_CACHE_SIZE = 1024
+    
     def __init__(self):
         # 语义匹配器（延迟加载）
         self.semantic_matcher = None
@@ -223,6 +229,32 @@ class IntentRecognizer:
             "temperature": r"体温[是为]?(\d+\.?\d*)",       # 体温37.5
             "number": r"(\d+\.?\d*)",                       # 通用数值
         }
+        
+        # 控制动词列表（用于提升控制命令的优先级）
+        self.control_verbs = ["打开", "去", "进入", "跳转", "返回", "查看", "看看", 
+                              "提醒", "设置", "取消", "打给", "拨打", "联系",
+                              "测量", "测一下", "量一下", "播放", "放",
+                              "大声", "小声", "调大", "调小", "停止", "暂停"]
+        
+        self._compile_rules()
+    
+    def _compile_rules(self):
+        """
+        编译规则表（修改 intent_rules / control_verbs / entity_patterns 后需重新调用）
+        
+        - 全部意图关键词编译为一个多模式自动机，一次扫描得到所有命中
+        - 控制动词单独编译为一个自动机
+        - 实体正则预编译
+        - 对重复出现的语句缓存规则匹配和实体提取结果
+        """
+        self._intent_matcher = KeywordMatcher(
+            (kw, intent) for intent, keywords in self.intent_rules.items() for kw in keywords
+        )
+        self._control_verb_matcher = KeywordMatcher((v, True) for v in self.control_verbs)
+        self._compiled_entity_patterns = [
+            (name, re.compile(pattern)) for name, pattern in self.entity_patterns.items()
+        ]
+        self._analyze_cached = lru_cache(maxsize=self.ANALYSIS_CACHE_SIZE)(self._analyze)
     
     def recognize(self, text: str, use_llm: bool = False) -> IntentResult:
         """
@@ -246,11 +278,10 @@ class IntentRecognizer:
                 requires_multi_agent=False
             )
         
-        # 1. 规则匹配
-        matched_intents = self._rule_match(text)
-        
-        # 2. 提取实体
-        entities = self._extract_entities(text)
+        # 1. 规则匹配 + 2. 提取实体（相同语句直接复用缓存结果）
+        cached_intents, cached_entities = self._analyze_cached(text)
+        matched_intents = list(cached_intents)
+        entities = dict(cached_entities)
         
         # 3. 确定主意图和置信度
         if not matched_intents:
@@ -291,20 +322,22 @@ class IntentRecognizer:
             requires_multi_agent=requires_multi_agent
         )
     
+    def _analyze(self, text: str) -> Tuple[Tuple[Tuple[IntentType, float], ...], Tuple[Tuple[str, str], ...]]:
+        """规则匹配和实体提取（结果为不可变类型，供 LRU 缓存）"""
+        return tuple(self._rule_match(text)), tuple(self._extract_entities(text).items())
+    
     def _rule_match(self, text: str) -> List[Tuple[IntentType, float]]:
         """规则匹配（控制命令优先）"""
         matches = []
         
-        # 控制动词列表（用于提升控制命令的优先级）
-        control_verbs = ["打开", "去", "进入", "跳转", "返回", "查看", "看看", 
-                         "提醒", "设置", "取消", "打给", "拨打", "联系",
-                         "测量", "测一下", "量一下", "播放", "放",
-                         "大声", "小声", "调大", "调小", "停止", "暂停"]
+        has_control_verb = self._control_verb_matcher.contains_any(text)
         
-        has_control_verb = any(v in text for v in control_verbs)
+        # 一次扫描得到每个意图命中的关键词数
+        match_counts = self._intent_matcher.count_labels(text)
         
-        for intent, keywords in self.intent_rules.items():
-            match_count = sum(1 for kw in keywords if kw in text)
+        # 按规则表顺序输出，与逐个意图扫描的顺序一致
+        for intent in self.intent_rules:
+            match_count = match_counts.get(intent, 0)
             if match_count > 0:
                 # 基础置信度
                 confidence = min(0.5 + match_count * 0.15, 0.95)
@@ -321,8 +354,8 @@ class IntentRecognizer:
         """提取实体"""
         entities = {}
         
-        for entity_name, pattern in self.entity_patterns.items():
-            match = re.search(pattern, text)
+        for entity_name, pattern in self._compiled_entity_patterns:
+            match = pattern.search(text)
             if match:
                 if entity_name == "blood_pressure":
                     entities["systolic"] = match.group(1)
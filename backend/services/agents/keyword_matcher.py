@@ -0,0 +1,119 @@
+"""
+多模式关键词匹配
+================
+
+基于 Aho–Corasick 自动机的关键词匹配器，构建一次后可在一次扫描中
+找出文本里出现的全部关键词（包括互相重叠的关键词）。
+
+用于替代 "for kw in keywords: if kw in text" 的逐个关键词扫描，
+匹配耗时只与文本长度相关，与关键词数量无关。
+"""
+from collections import deque
+from typing import Dict, FrozenSet, Generic, Hashable, Iterable, List, Tuple, TypeVar
+
+LabelT = TypeVar("LabelT", bound=Hashable)
+
+
+class KeywordMatcher(Generic[LabelT]):
+    """
+    编译后的多关键词匹配器
+
+    每个关键词可以关联一个或多个标签（如意图类型），
+    match() 返回文本中出现的关键词集合，每个关键词只计一次，
+    与逐个 `kw in text` 判断的结果一致。
+    """
+
+    def __init__(self, keywords: Iterable[Tuple[str, LabelT]]):
+        """
+        Args:
+            keywords: (关键词, 标签) 序列；同一关键词可对应多个标签，
+                      同一 (关键词, 标签) 重复出现时按出现次数计数
+        """
+        self.keywords: List[str] = []
+        self.keyword_labels: List[List[LabelT]] = []
+        keyword_ids: Dict[str, int] = {}
+
+        for keyword, label in keywords:
+            if not keyword:
+                continue
+            keyword_id = keyword_ids.get(keyword)
+            if keyword_id is None:
+                keyword_id = len(self.keywords)
+                keyword_ids[keyword] = keyword_id
+                self.keywords.append(keyword)
+                self.keyword_labels.append([])
+            self.keyword_labels[keyword_id].append(label)
+
+        self._build(keyword_ids)
+
+    def _build(self, keyword_ids: Dict[str, int]) -> None:
+        """构建字典树、失败指针，并展开为确定性状态转移表"""
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[set] = [set()]
+
+        # 1. 字典树
+        for keyword, keyword_id in keyword_ids.items():
+            state = 0
+            for ch in keyword:
+                next_state = goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][ch] = next_state
+                    goto.append({})
+                    outputs.append(set())
+                state = next_state
+            outputs[state].add(keyword_id)
+
+        # 2. BFS 计算失败指针，同时把失败状态的转移合并进来（得到完整的转移表），
+        #    这样匹配时每个字符只需一次字典查找
+        fail = [0] * len(goto)
+        delta: List[Dict[str, int]] = [dict() for _ in goto]
+        delta[0] = dict(goto[0])
+        queue = deque(goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+            delta[state] = {**delta[fail[state]], **goto[state]}
+            outputs[state] |= outputs[fail[state]]
+            for ch, next_state in goto[state].items():
+                fail[next_state] = delta[fail[state]].get(ch, 0) if state != 0 else 0
+                queue.append(next_state)
+
+        self._delta = delta
+        self._outputs: List[FrozenSet[int]] = [frozenset(o) for o in outputs]
+
+    def find_keyword_ids(self, text: str) -> set:
+        """扫描一次文本，返回出现的关键词编号集合"""
+        delta = self._delta
+        outputs = self._outputs
+        found: set = set()
+        state = 0
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            out = outputs[state]
+            if out:
+                found |= out
+        return found
+
+    def match(self, text: str) -> List[str]:
+        """返回文本中出现的关键词"""
+        return [self.keywords[i] for i in sorted(self.find_keyword_ids(text))]
+
+    def count_labels(self, text: str) -> Dict[LabelT, int]:
+        """统计每个标签命中的关键词数"""
+        counts: Dict[LabelT, int] = {}
+        for keyword_id in self.find_keyword_ids(text):
+            for label in self.keyword_labels[keyword_id]:
+                counts[label] = counts.get(label, 0) + 1
+        return counts
+
+    def contains_any(self, text: str) -> bool:
+        """文本中是否出现任一关键词"""
+        delta = self._delta
+        outputs = self._outputs
+        state = 0
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            if outputs[state]:
+                return True
+        return False
@@ -8,18 +8,10 @@
 """
 
 import logging
-import json
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Any
 
-try:
-    import redis
-    HAS_REDIS = True
-except ImportError:
-    HAS_REDIS = False
-    redis = None
-
-from config.settings import settings
-from .base_agent import AgentRole, AgentMessage, AgentMemory, MessageType
+from services.session_store import create_session_store
+from .base_agent import AgentRole, AgentMessage, AgentMemory, MessageType, stream_llm_deltas
 from .agent_coordinator import AgentCoordinator
 from .health_butler import HealthButlerAgent
 from .chronic_disease_expert import ChronicDiseaseExpertAgent
@@ -60,20 +52,9 @@ class MultiAgentService:
             
         self.coordinator = AgentCoordinator()
         self.memories: Dict[str, AgentMemory] = {}  # 用户记忆缓存
-        self.conversation_states: Dict[str, List[Dict]] = {}  # 多轮对话状态（内存备用）
-        
-        # Redis 连接（用于持久化对话状态）
-        self.redis_client = None
-        self.redis_ttl = 86400  # 1天过期
-        if HAS_REDIS:
-            try:
-                redis_url = getattr(settings, 'REDIS_URL', 'redis://localhost:6379/0')
-                self.redis_client = redis.from_url(redis_url, decode_responses=True)
-                self.redis_client.ping()  # 测试连接
-                logger.info(f"Redis 连接成功，对话状态将持久化存储（TTL: {self.redis_ttl}秒）")
-            except Exception as e:
-                logger.warning(f"Redis 连接失败: {e}，将使用内存存储")
-                self.redis_client = None
+        
+        # 多轮对话状态（Redis 键 conv:{user_id}:{session_id}，1天过期；Redis 不可用时存内存）
+        self.conversation_states = create_session_store("conv", 86400)
         
         # 注册智能体
         self._register_agents()
@@ -106,52 +87,23 @@ class MultiAgentService:
         return self.memories[user_id]
     
     def _get_conversation_key(self, user_id: str, session_id: str = None) -> str:
-        """生成对话状态的存储键"""
-        return f"conv:{user_id}:{session_id or 'default'}"
+        """生成对话状态的存储键（存储会加上 conv: 前缀）"""
+        return f"{user_id}:{session_id or 'default'}"
     
     def _get_conversation_state(self, user_id: str, session_id: str = None) -> List[Dict]:
-        """获取对话状态（优先从 Redis 读取）"""
+        """获取对话状态"""
         key = self._get_conversation_key(user_id, session_id)
-        
-        # 优先从 Redis 读取
-        if self.redis_client:
-            try:
-                data = self.redis_client.get(key)
-                if data:
-                    return json.loads(data)
-            except Exception as e:
-                logger.warning(f"Redis 读取失败: {e}")
-        
-        # 降级到内存
-        return self.conversation_states.get(key, [])
+        return self.conversation_states.get(key) or []
     
     def _save_conversation_state(self, user_id: str, session_id: str, state: List[Dict]):
-        """保存对话状态（优先存入 Redis）"""
+        """保存对话状态"""
         key = self._get_conversation_key(user_id, session_id)
-        
-        # 优先存入 Redis
-        if self.redis_client:
-            try:
-                self.redis_client.setex(key, self.redis_ttl, json.dumps(state, ensure_ascii=False))
-                return
-            except Exception as e:
-                logger.warning(f"Redis 写入失败: {e}")
-        
-        # 降级到内存
-        self.conversation_states[key] = state
+        self.conversation_states.set(key, state)
     
     def _clear_conversation_state(self, user_id: str, session_id: str = None):
         """清除对话状态"""
         key = self._get_conversation_key(user_id, session_id)
-        
-        if self.redis_client:
-            try:
-                self.redis_client.delete(key)
-            except Exception as e:
-                logger.warning(f"Redis 删除失败: {e}")
-        
-        if key in self.conversation_states:
-            del self.conversation_states[key]
+        self.conversation_states.delete(key)
     
     def process(
         self,
@@ -160,7 +112,8 @@ class MultiAgentService:
         user_role: str = "elderly",
         health_data: Optional[Dict[str, Any]] = None,
         mode: str = "auto",
-        session_id: str = None
+        session_id: str = None,
+        on_delta: Optional[Callable[[str], None]] = None
     ) -> Dict[str, Any]:
         """
         处理用户输入（含意图识别 + 角色适配 + 对话记忆）
@@ -172,6 +125,8 @@ class MultiAgentService:
             health_data: 用户健康数据
             mode: 处理模式 ("auto": 自动, "single": 单智能体, "multi": 多智能体协作)
             session_id: 会话ID（用于对话记忆，不传则使用user_id）
+            on_delta: 单智能体模式下接收大模型流式输出的回调（在当前线程执行）；
+                      其他模式下不调用，以返回值中的完整回复为准
         
         Returns:
             {
@@ -286,7 +241,8 @@ class MultiAgentService:
         if mode == "multi":
             result = self._multi_agent_process(user_input, memory, user_role, effective_session_id)
         else:
-            result = self._single_agent_process(user_input, memory, user_role, effective_session_id)
+            with stream_llm_deltas(on_delta):
+                result = self._single_agent_process(user_input, memory, user_role, effective_session_id)
         
         # 添加意图和角色信息到返回结果
         result["intent"] = intent_result.to_dict()
@@ -326,7 +282,8 @@ class MultiAgentService:
             memory,
             confidence_threshold=0.6,
             user_role=user_role,
-            session_id=session_id
+            session_id=session_id,
+            strategy="merge"
         )
         
         if not responses:
@@ -0,0 +1,259 @@
+"""
+回答缓存模块
+============
+
+缓存常见问题的大模型回答，减少重复的LLM调用。
+
+两级缓存：
+1. 精确匹配 - 归一化后的问题 + 命名空间（智能体、用户角色、意图）完全一致
+2. 语义匹配 - 问题向量与已缓存问题的余弦相似度超过阈值，且问题中的数字和健康指标词完全相同
+   （"血压150高吗" 与 "血压90高吗" 向量很接近，但答案不同）
+
+缓存项按 LRU + TTL 淘汰；知识库内容变化后整体失效。
+带有个性化上下文（工具结果、对话记忆、追问）的回答不缓存。
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .keyword_matcher import KeywordMatcher
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    """缓存项"""
+    namespace: str
+    response: str
+    embedding: Optional[np.ndarray]  # 已归一化的问题向量
+    created_at: float
+    slots: Tuple[Tuple[str, ...], ...] = ()  # 问题中的数字和指标词，语义匹配时必须完全相同
+
+
+@dataclass
+class CacheLookup:
+    """查询结果"""
+    response: Optional[str]            # 命中的回答，未命中为 None
+    level: str                         # exact / semantic / miss
+    embedding: Optional[np.ndarray]    # 本次计算的问题向量，写入缓存时复用
+
+
+class ResponseCache:
+    """
+    LLM 回答缓存
+
+    线程安全，可被并发执行的多个智能体共享。
+    """
+
+    # 归一化时去掉的字符：空白和常见中英文标点（保留数字中的小数点，36.5 与 365 不同）
+    _STRIP_PATTERN = re.compile(r"[\s，。！？、；：,!?;:~～…\"'“”‘’（）()]+|(?<!\d)\.|\.(?!\d)")
+    # 问题中的数字：阿拉伯数字（含小数）和中文数字
+    _NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?|[零〇一二两三四五六七八九十百千万]+")
+    # 问题中的健康指标词 → 归一后的指标（同义词归为同一项）
+    ENTITY_KEYWORDS = {
+        "血压": "血压", "收缩压": "收缩压", "高压": "收缩压", "舒张压": "舒张压", "低压": "舒张压",
+        "血糖": "血糖", "空腹": "空腹", "餐后": "餐后",
+        "心率": "心率", "心跳": "心率", "脉搏": "心率",
+        "体温": "体温", "发烧": "体温", "发热": "体温",
+        "血氧": "血氧", "体重": "体重", "步数": "步数", "睡眠": "睡眠",
+    }
+    _entity_matcher = KeywordMatcher(ENTITY_KEYWORDS.items())
+
+    def __init__(
+        self,
+        max_entries: int = 2000,
+        ttl_seconds: float = 6 * 3600,
+        similarity_threshold: float = 0.92,
+        embed_fn: Optional[Callable[[str], List[float]]] = None,
+    ):
+        """
+        Args:
+            max_entries: 最大缓存条数，超出后淘汰最久未使用的
+            ttl_seconds: 缓存有效期（秒）
+            similarity_threshold: 语义匹配的余弦相似度阈值
+            embed_fn: 文本 → 向量 的函数，为 None 时只做精确匹配
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.embed_fn = embed_fn
+
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._kb_version = None
+
+        self.stats = {
+            "exact_hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "skipped": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    @classmethod
+    def normalize(cls, text: str) -> str:
+        """归一化问题文本（去空白标点、统一大小写）"""
+        return cls._STRIP_PATTERN.sub("", text or "").lower()
+
+    @classmethod
+    def extract_slots(cls, normalized: str) -> Tuple[Tuple[str, ...], ...]:
+        """提取归一化问题中的数字（按出现顺序）和健康指标"""
+        numbers = tuple(cls._NUMBER_PATTERN.findall(normalized))
+        entities = tuple(sorted({cls.ENTITY_KEYWORDS[kw] for kw in cls._entity_matcher.match(normalized)}))
+        return numbers, entities
+
+    @staticmethod
+    def make_namespace(*parts: Optional[str]) -> str:
+        """由智能体、用户角色、意图等组成命名空间"""
+        return "|".join(part or "" for part in parts)
+
+    @staticmethod
+    def _make_key(namespace: str, normalized: str) -> str:
+        return hashlib.md5(f"{namespace}\x00{normalized}".encode("utf-8")).hexdigest()
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        """计算归一化的问题向量，失败或零向量时返回 None"""
+        if self.embed_fn is None:
+            return None
+        try:
+            vector = np.asarray(self.embed_fn(text), dtype=np.float32)
+        except Exception as e:
+            logger.debug(f"[回答缓存] 问题向量计算失败: {e}")
+            return None
+        norm = float(np.linalg.norm(vector))
+        if norm == 0.0:
+            return None
+        return vector / norm
+
+    def _check_kb_version(self, kb_version) -> None:
+        """知识库版本变化时清空缓存（需持有锁）"""
+        if kb_version != self._kb_version:
+            if self._entries:
+                logger.info("[回答缓存] 知识库已更新，缓存失效")
+                self.stats["invalidations"] += 1
+            self._entries.clear()
+            self._kb_version = kb_version
+
+    def _is_expired(self, entry: CacheEntry, now: float) -> bool:
+        return now - entry.created_at > self.ttl_seconds
+
+    def lookup(self, user_input: str, namespace: str, kb_version=None) -> CacheLookup:
+        """
+        查询缓存
+
+        Args:
+            user_input: 用户问题
+            namespace: 命名空间，见 make_namespace
+            kb_version: 当前知识库版本，与缓存时不同则整体失效
+        """
+        normalized = self.normalize(user_input)
+        key = self._make_key(namespace, normalized)
+        now = time.time()
+
+        # 1. 精确匹配
+        with self._lock:
+            self._check_kb_version(kb_version)
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._is_expired(entry, now):
+                    del self._entries[key]
+                else:
+                    self._entries.move_to_end(key)
+                    self.stats["exact_hits"] += 1
+                    return CacheLookup(entry.response, "exact", entry.embedding)
+
+        # 2. 语义匹配（向量计算在锁外进行），只在数字和指标词完全相同的问题之间匹配
+        embedding = self._embed(normalized)
+        if embedding is not None:
+            slots = self.extract_slots(normalized)
+            with self._lock:
+                candidates = [
+                    (k, e) for k, e in self._entries.items()
+                    if e.namespace == namespace and e.embedding is not None
+                    and e.slots == slots and not self._is_expired(e, now)
+                ]
+                if candidates:
+                    matrix = np.stack([e.embedding for _, e in candidates])
+                    scores = matrix @ embedding
+                    best = int(np.argmax(scores))
+                    if scores[best] >= self.similarity_threshold:
+                        best_key, best_entry = candidates[best]
+                        self._entries.move_to_end(best_key)
+                        self.stats["semantic_hits"] += 1
+                        return CacheLookup(best_entry.response, "semantic", embedding)
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return CacheLookup(None, "miss", embedding)
+
+    def put(
+        self,
+        user_input: str,
+        namespace: str,
+        response: str,
+        kb_version=None,
+        embedding: Optional[np.ndarray] = None,
+    ) -> None:
+        """写入缓存，embedding 可复用 lookup 返回的向量"""
+        normalized = self.normalize(user_input)
+        if not normalized or not response:
+            return
+        key = self._make_key(namespace, normalized)
+        if embedding is None:
+            embedding = self._embed(normalized)
+
+        with self._lock:
+            self._check_kb_version(kb_version)
+            self._entries[key] = CacheEntry(
+                namespace=namespace,
+                response=response,
+                embedding=embedding,
+                created_at=time.time(),
+                slots=self.extract_slots(normalized),
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def record_skip(self) -> None:
+        """记录一次因个性化上下文而跳过缓存的调用"""
+        with self._lock:
+            self.stats["skipped"] += 1
+
+    def invalidate(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self.stats["invalidations"] += 1
+
+    def get_stats(self) -> Dict[str, float]:
+        """获取缓存统计信息（含命中率）"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["exact_hits"] + stats["semantic_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["exact_hits"] + stats["semantic_hits"]) / lookups if lookups else 0.0
+        return stats
+
+
+def _embed_with_knowledge_base(text: str) -> List[float]:
+    """使用知识库的嵌入模型计算问题向量（带持久化嵌入缓存）"""
+    from services.knowledge_base import langchain_knowledge_base
+
+    if langchain_knowledge_base is None or langchain_knowledge_base.embeddings is None:
+        raise RuntimeError("嵌入模型不可用")
+    return langchain_knowledge_base.embeddings.embed_query(text)
+
+
+# 单例实例
+response_cache = ResponseCache(embed_fn=_embed_with_knowledge_base)
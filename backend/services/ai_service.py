@@ -1,8 +1,10 @@
 """AI健康助手服务 - 集成多智能体协作系统"""
+import asyncio
 import logging
 import httpx
 from typing import Optional, Dict, Any
 from config.settings import settings
+from services.http_client import get_provider_client
 
 # 导入知识库（延迟导入，避免循环依赖）
 try:
@@ -129,7 +131,9 @@ class AIService:
                 use_multi_mode = multi_agent_service.should_use_multi_agent(user_input)
                 mode = "multi" if use_multi_mode else "single"
                 
-                result = multi_agent_service.process(
+                # 多智能体流程是同步的（检索、工具调用、大模型），放到线程池执行，避免阻塞事件循环
+                result = await asyncio.to_thread(
+                    multi_agent_service.process,
                     user_input=user_input,
                     user_id=elderly_id or "default",
                     user_role=user_role,
@@ -180,7 +184,7 @@ class AIService:
             knowledge_context = ""
             if use_knowledge_base and HAS_KNOWLEDGE_BASE and knowledge_base:
                 try:
-                    search_results = knowledge_base.search(user_input, top_k=3, elderly_id=elderly_id)
+                    search_results = await knowledge_base.asearch(user_input, top_k=3)
                     if search_results:
                         knowledge_context = "\n\n【相关知识库内容】\n"
                         for i, result in enumerate(search_results, 1):
@@ -227,42 +231,41 @@ class AIService:
                 "content": user_input
             })
             
-            # 调用AI API（兼容OpenAI格式）
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                headers = {
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {self.api_key}"
-                }
-                
-                # 智谱GLM需要特殊的Authorization格式
-                if self.provider == 'zhipu':
-                    headers["Authorization"] = self.api_key
-                
-                payload = {
-                    "model": self.model,
-                    "messages": messages,
-                    "temperature": 0.7,
-                    "max_tokens": 1000,
-                    "top_p": 0.9
-                }
-                
-                response = await client.post(
-                    f"{self.api_base}/chat/completions",
-                    headers=headers,
-                    json=payload
-                )
-                
-                if response.status_code != 200:
-                    error_msg = response.text
-                    logger.error(f"AI API调用失败: {response.status_code} - {error_msg}")
-                    return {"response": self._get_mock_response(user_input), "agent": "健康管家"}
-                
-                result = response.json()
-                ai_response = result["choices"][0]["message"]["content"].strip()
-                
-                logger.info(f"AI咨询成功 ({self.provider}): 用户问题长度={len(user_input)}, 回复长度={len(ai_response)}")
-                
-                return {"response": ai_response, "agent": "健康管家"}
+            # 调用AI API（兼容OpenAI格式），复用服务商的共享连接池
+            headers = {
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {self.api_key}"
+            }
+            
+            # 智谱GLM需要特殊的Authorization格式
+            if self.provider == 'zhipu':
+                headers["Authorization"] = self.api_key
+            
+            payload = {
+                "model": self.model,
+                "messages": messages,
+                "temperature": 0.7,
+                "max_tokens": 1000,
+                "top_p": 0.9
+            }
+            
+            response = await get_provider_client(self.provider, timeout=30.0).apost(
+                f"{self.api_base}/chat/completions",
+                headers=headers,
+                json=payload
+            )
+            
+            if response.status_code != 200:
+                error_msg = response.text
+                logger.error(f"AI API调用失败: {response.status_code} - {error_msg}")
+                return {"response": self._get_mock_response(user_input), "agent": "健康管家"}
+            
+            result = response.json()
+            ai_response = result["choices"][0]["message"]["content"].strip()
+            
+            logger.info(f"AI咨询成功 ({self.provider}): 用户问题长度={len(user_input)}, 回复长度={len(ai_response)}")
+            
+            return {"response": ai_response, "agent": "健康管家"}
             
         except httpx.TimeoutException:
             logger.error("AI API调用超时")
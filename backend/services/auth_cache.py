@@ -0,0 +1,264 @@
+"""
+认证主体缓存
+============
+
+每个请求的认证依赖都要解码 JWT、按用户ID查询 users 表，角色检查还会懒加载老人/子女/社区档案。
+这里按令牌缓存认证结果（用户及其档案的列值快照）：
+
+1. 键为令牌的 SHA-256；有效期取 AUTH_CACHE_SECONDS 与令牌剩余有效期中较短者，命中时不再解码令牌
+2. 容量上限 AUTH_CACHE_MAX_ENTRIES，超过后按 LRU 淘汰
+3. 本进程中用户或档案的修改（状态、角色等）提交后立即失效该用户的所有缓存项；
+   其他 worker 的修改最多在 TTL 内不可见
+4. 命中时由快照构造实例并 merge(load=False) 到当前请求的会话，不访问数据库，
+   路由拿到的 current_user 与直接查询得到的实例用法相同
+5. 社区管理员可管理的社区ID集合按用户缓存，随用户一起失效
+"""
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from itertools import chain
+from typing import Any, Callable, Dict, FrozenSet, Optional, Tuple, TYPE_CHECKING
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from database.models import User, ElderlyProfile, ChildrenProfile, CommunityProfile
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+# 随用户一起缓存的档案关系（一对一）
+PROFILE_RELATIONS = {
+    "elderly_profile": ElderlyProfile,
+    "children_profile": ChildrenProfile,
+    "community_profile": CommunityProfile,
+}
+
+_SESSION_INFO_KEY = "auth_cache_user_ids"
+
+
+def token_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _columns(obj: Any) -> Dict[str, Any]:
+    return {attr.key: getattr(obj, attr.key) for attr in inspect(type(obj)).column_attrs}
+
+
+def snapshot_user(user: User) -> Dict[str, Any]:
+    """用户及档案的列值快照（档案需已加载，否则这里会触发懒加载）"""
+    snapshot = {"user": _columns(user)}
+    for relation in PROFILE_RELATIONS:
+        profile = getattr(user, relation)
+        snapshot[relation] = _columns(profile) if profile is not None else None
+    return snapshot
+
+
+def build_user(snapshot: Dict[str, Any]) -> User:
+    """由快照构造脱离会话的实例（状态等同于刚从数据库加载）"""
+    user = User(**snapshot["user"])
+    profiles = []
+    for relation, model in PROFILE_RELATIONS.items():
+        data = snapshot[relation]
+        profile = model(**data) if data is not None else None
+        setattr(user, relation, profile)
+        if profile is not None:
+            profiles.append(profile)
+    for obj in profiles + [user]:
+        make_transient_to_detached(obj)
+    return user
+
+
+class PrincipalCache:
+    """令牌 → 用户快照 的 TTL + LRU 缓存"""
+
+    def __init__(self, ttl_seconds: float = 30.0, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # 令牌键 → (用户ID, 快照, 过期时间)，按最近访问排序
+        self._entries: "OrderedDict[str, Tuple[uuid.UUID, Dict[str, Any], float]]" = OrderedDict()
+        # 用户ID → 令牌键集合，用于按用户失效
+        self._user_tokens: Dict[uuid.UUID, set] = {}
+        # 用户ID → (社区ID集合, 过期时间)
+        self._community_admin: "OrderedDict[uuid.UUID, Tuple[FrozenSet[uuid.UUID], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    # ------------------------------------------------------------------
+    # 内部（调用方持有锁）
+    # ------------------------------------------------------------------
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            keys = self._user_tokens.get(entry[0])
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._user_tokens[entry[0]]
+
+    # ------------------------------------------------------------------
+    # 令牌 → 用户
+    # ------------------------------------------------------------------
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """读取令牌对应的用户快照，未命中或已过期返回 None"""
+        if not self.enabled:
+            return None
+        key = token_key(token)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[2] <= now:
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, token: str, user: User, expires_at: Optional[float] = None) -> None:
+        """
+        缓存认证结果
+
+        Args:
+            token: JWT令牌
+            user: 已加载档案的用户
+            expires_at: 令牌过期时间（Unix 时间戳，即 payload["exp"]）
+        """
+        if not self.enabled:
+            return
+        ttl = self.ttl_seconds
+        if expires_at is not None:
+            ttl = min(ttl, expires_at - time.time())
+        if ttl <= 0:
+            return
+        snapshot = snapshot_user(user)
+        key = token_key(token)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (user.id, snapshot, time.monotonic() + ttl)
+            self._user_tokens.setdefault(user.id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def get_user(self, db: Session, token: str) -> Optional[User]:
+        """命中时返回合并到 db 会话中的用户实例（不查询数据库）"""
+        snapshot = self.get(token)
+        if snapshot is None:
+            return None
+        return db.merge(build_user(snapshot), load=False)
+
+    async def get_user_async(self, db: "AsyncSession", token: str) -> Optional[User]:
+        """get_user 的 AsyncSession 版本"""
+        snapshot = self.get(token)
+        if snapshot is None:
+            return None
+        return await db.merge(build_user(snapshot), load=False)
+
+    # ------------------------------------------------------------------
+    # 社区管理权限
+    # ------------------------------------------------------------------
+
+    def community_admin_ids(self, user_id: uuid.UUID,
+                            loader: Callable[[], FrozenSet[uuid.UUID]]) -> FrozenSet[uuid.UUID]:
+        """用户可管理的社区ID集合，未缓存时调用 loader 查询"""
+        if self.enabled:
+            now = time.monotonic()
+            with self._lock:
+                entry = self._community_admin.get(user_id)
+                if entry is not None and entry[1] > now:
+                    self._community_admin.move_to_end(user_id)
+                    return entry[0]
+        ids = frozenset(loader())
+        if self.enabled:
+            with self._lock:
+                self._community_admin[user_id] = (ids, time.monotonic() + self.ttl_seconds)
+                self._community_admin.move_to_end(user_id)
+                while len(self._community_admin) > self.max_entries:
+                    self._community_admin.popitem(last=False)
+        return ids
+
+    # ------------------------------------------------------------------
+    # 失效
+    # ------------------------------------------------------------------
+
+    def invalidate_user(self, user_id: uuid.UUID) -> None:
+        """失效用户的所有令牌缓存和权限缓存"""
+        with self._lock:
+            for key in list(self._user_tokens.get(user_id, ())):
+                self._remove(key)
+            self._community_admin.pop(user_id, None)
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._user_tokens.clear()
+            self._community_admin.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "users": len(self._user_tokens),
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+
+def _create_cache() -> PrincipalCache:
+    from config.settings import settings
+    return PrincipalCache(
+        ttl_seconds=settings.AUTH_CACHE_SECONDS,
+        max_entries=settings.AUTH_CACHE_MAX_ENTRIES
+    )
+
+
+# 全局实例
+principal_cache = _create_cache()
+
+
+# ----------------------------------------------------------------------
+# 用户/档案变更后失效（对所有会话生效，包括 AsyncSession 内部的同步会话）
+# ----------------------------------------------------------------------
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session: Session, flush_context) -> None:
+    """记录本次 flush 中新增/修改/删除的用户和档案，提交后再失效"""
+    changed = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, User):
+            changed.add(obj.id)
+        elif isinstance(obj, (ElderlyProfile, ChildrenProfile, CommunityProfile)):
+            # 档案改挂到其他用户时，原用户的缓存也要失效（flush 后历史仍可读取）
+            history = inspect(obj).attrs.user_id.history
+            changed.update(history.deleted)
+            changed.add(obj.user_id)
+    changed.discard(None)
+    if changed:
+        session.info.setdefault(_SESSION_INFO_KEY, set()).update(changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session: Session) -> None:
+    for user_id in session.info.pop(_SESSION_INFO_KEY, ()):
+        principal_cache.invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_users(session: Session) -> None:
+    session.info.pop(_SESSION_INFO_KEY, None)
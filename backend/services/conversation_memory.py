@@ -3,12 +3,15 @@
 ============
 
 支持短期记忆（当前对话）和长期记忆（用户健康档案）
+
+数据保存在会话存储中（见 services/session_store.py）：过期清理均摊 O(1)，
+总内存有上限，可配置为 Redis 在多个 worker 间共享。
 """
 import logging
 from typing import Dict, List, Optional, Any
-from datetime import datetime, timedelta
-from collections import defaultdict
-import json
+from datetime import datetime
+
+from services.session_store import SessionStore, create_session_store
 
 logger = logging.getLogger(__name__)
 
@@ -16,25 +19,31 @@ logger = logging.getLogger(__name__)
 class ConversationMemory:
     """对话记忆管理器"""
     
-    def __init__(self, max_history: int = 10, memory_ttl_hours: int = 24):
+    def __init__(
+        self,
+        max_history: int = 10,
+        memory_ttl_hours: int = 24,
+        profile_ttl_hours: int = 24 * 30,
+        conversations: Optional[SessionStore] = None,
+        profiles: Optional[SessionStore] = None
+    ):
         """
         初始化记忆管理器
         
         Args:
             max_history: 保留的最大对话轮数
-            memory_ttl_hours: 记忆过期时间（小时）
+            memory_ttl_hours: 记忆过期时间（小时，最后一次访问后）
+            profile_ttl_hours: 用户健康档案过期时间（小时，最后一次访问后）
+            conversations: 对话历史存储，默认按配置创建
+            profiles: 用户档案存储，默认按配置创建
         """
         self.max_history = max_history
-        self.memory_ttl = timedelta(hours=memory_ttl_hours)
-        
-        # 短期记忆：当前对话历史 {session_id: [messages]}
-        self.conversations: Dict[str, List[Dict]] = defaultdict(list)
         
-        # 长期记忆：用户健康档案 {user_id: {health_profile}}
-        self.user_profiles: Dict[str, Dict[str, Any]] = defaultdict(dict)
+        # 短期记忆：当前对话历史 session_id -> 环形缓冲 [[role, content, 时间戳, metadata], ...]
+        self.conversations = conversations or create_session_store("memory:conv", memory_ttl_hours * 3600)
         
-        # 记忆时间戳 {session_id: last_update_time}
-        self.timestamps: Dict[str, datetime] = {}
+        # 长期记忆：用户健康档案 session_id -> {字段: {value, updated_at, source}}
+        self.user_profiles = profiles or create_session_store("memory:profile", profile_ttl_hours * 3600)
     
     def add_message(
         self, 
@@ -52,20 +61,9 @@ class ConversationMemory:
             content: 消息内容
             metadata: 额外元数据（如智能体名称、情绪等）
         """
-        message = {
-            "role": role,
-            "content": content,
-            "timestamp": datetime.now().isoformat(),
-            "metadata": metadata or {}
-        }
-        
-        self.conversations[session_id].append(message)
-        self.timestamps[session_id] = datetime.now()
-        
-        # 限制历史长度
-        if len(self.conversations[session_id]) > self.max_history * 2:
-            # 保留最近的消息
-            self.conversations[session_id] = self.conversations[session_id][-self.max_history * 2:]
+        # 紧凑存储，读取时再展开为字典；超过 max_history 轮时最早的消息被覆盖
+        message = [role, content, datetime.now().timestamp(), metadata or None]
+        self.conversations.append(session_id, message, maxlen=self.max_history * 2)
         
         # 从对话中提取健康信息
         if role == "user":
@@ -86,12 +84,17 @@ class ConversationMemory:
         Returns:
             对话历史列表
         """
-        self._cleanup_expired()
-        
-        history = self.conversations.get(session_id, [])
-        if limit:
-            history = history[-limit * 2:]  # 每轮包含user和assistant
-        return history
+        # 每轮包含user和assistant
+        items = self.conversations.get_list(session_id, limit * 2 if limit else None)
+        return [
+            {
+                "role": role,
+                "content": content,
+                "timestamp": datetime.fromtimestamp(timestamp).isoformat(),
+                "metadata": metadata or {}
+            }
+            for role, content, timestamp, metadata in items
+        ]
     
     def get_context_summary(self, session_id: str) -> str:
         """
@@ -133,8 +136,8 @@ class ConversationMemory:
         Returns:
             [{"role": "user", "content": "..."}, {"role": "assistant", "content": "..."}]
         """
-        history = self.get_history(session_id, limit=limit)
-        return [{"role": msg["role"], "content": msg["content"]} for msg in history]
+        items = self.conversations.get_list(session_id, limit * 2 if limit else None)
+        return [{"role": role, "content": content} for role, content, _, _ in items]
     
     def update_user_profile(
         self, 
@@ -152,14 +155,13 @@ class ConversationMemory:
             value: 值
             source: 来源（conversation/manual/system）
         """
-        if session_id not in self.user_profiles:
-            self.user_profiles[session_id] = {}
-        
-        self.user_profiles[session_id][key] = {
+        profile = self._get_raw_profile(session_id)
+        profile[key] = {
             "value": value,
             "updated_at": datetime.now().isoformat(),
             "source": source
         }
+        self.user_profiles.set(session_id, profile)
         
         logger.debug(f"更新用户档案 [{session_id}]: {key} = {value}")
     
@@ -173,18 +175,27 @@ class ConversationMemory:
         Returns:
             用户档案字典
         """
-        profile = self.user_profiles.get(session_id, {})
+        profile = self._get_raw_profile(session_id)
         # 简化格式，只返回值
         return {k: v.get("value") for k, v in profile.items() if v.get("value")}
     
+    def _get_raw_profile(self, session_id: str) -> Dict[str, Any]:
+        """读取档案原始数据（含更新时间和来源），返回的是副本"""
+        profile = self.user_profiles.get(session_id)
+        return dict(profile) if profile else {}
+    
     def clear_session(self, session_id: str):
         """清除会话记忆"""
-        if session_id in self.conversations:
-            del self.conversations[session_id]
-        if session_id in self.timestamps:
-            del self.timestamps[session_id]
+        self.conversations.delete(session_id)
         logger.info(f"清除会话记忆: {session_id}")
     
+    def get_stats(self) -> Dict[str, Any]:
+        """存储统计（条目数、内存占用、命中率、过期/淘汰数）"""
+        return {
+            "conversations": self.conversations.get_stats(),
+            "profiles": self.user_profiles.get_stats(),
+        }
+    
     def _extract_health_info(self, session_id: str, content: str):
         """
         从用户消息中提取健康信息
@@ -210,7 +221,7 @@ class ConversationMemory:
         high_bp = re.search(r'高压[是为]?\s*(\d{2,3})', content)
         low_bp = re.search(r'低压[是为]?\s*(\d{2,3})', content)
         if high_bp or low_bp:
-            bp = self.user_profiles.get(session_id, {}).get("blood_pressure", {}).get("value", {})
+            bp = self._get_raw_profile(session_id).get("blood_pressure", {}).get("value", {})
             if high_bp:
                 bp["systolic"] = int(high_bp.group(1))
             if low_bp:
@@ -238,7 +249,7 @@ class ConversationMemory:
                 diseases.append(disease)
         
         if diseases:
-            existing = self.user_profiles.get(session_id, {}).get("conditions", {}).get("value", [])
+            existing = self._get_raw_profile(session_id).get("conditions", {}).get("value", [])
             if isinstance(existing, list):
                 diseases = list(set(existing + diseases))
             self.update_user_profile(session_id, "conditions", diseases)
@@ -307,19 +318,6 @@ class ConversationMemory:
                     topics.add(topic)
         
         return list(topics)[:5]  # 最多5个话题
-    
-    def _cleanup_expired(self):
-        """清理过期的会话记忆"""
-        now = datetime.now()
-        expired = [
-            sid for sid, ts in self.timestamps.items()
-            if now - ts > self.memory_ttl
-        ]
-        for sid in expired:
-            self.clear_session(sid)
-        
-        if expired:
-            logger.info(f"清理了 {len(expired)} 个过期会话")
 
 
 # 创建全局实例
@@ -0,0 +1,128 @@
+"""
+嵌入向量缓存
+============
+
+以 (模型, 文本内容) 的哈希为键，将嵌入向量持久化到 SQLite。
+
+特点：
+1. 相同文本只嵌入一次，重复导入和重复查询直接命中缓存
+2. 向量以 float32 二进制存储，读取时零拷贝转换为 NumPy 数组
+3. 批量读写，线程安全（供并发嵌入使用）
+"""
+import hashlib
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """内容哈希 → 嵌入向量 的持久化缓存"""
+
+    # SQLite 单条语句的参数个数有限制，批量查询时分片
+    _QUERY_CHUNK_SIZE = 500
+
+    def __init__(self, db_path: str):
+        """
+        初始化缓存
+
+        Args:
+            db_path: SQLite 文件路径，传入 ":memory:" 则只在进程内缓存
+        """
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " dim INTEGER NOT NULL,"
+            " vector BLOB NOT NULL"
+            ")"
+        )
+        self._conn.commit()
+
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        """根据模型和文本内容生成缓存键"""
+        return hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        """批量读取缓存，只返回命中的键"""
+        found: Dict[str, List[float]] = {}
+        unique_keys = list(dict.fromkeys(keys))
+
+        with self._lock:
+            for i in range(0, len(unique_keys), self._QUERY_CHUNK_SIZE):
+                chunk = unique_keys[i:i + self._QUERY_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+
+            self.hits += len(found)
+            self.misses += len(unique_keys) - len(found)
+
+        return found
+
+    def get(self, key: str) -> Optional[List[float]]:
+        """读取单个缓存项"""
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items: Dict[str, Sequence[float]]) -> None:
+        """批量写入缓存"""
+        if not items:
+            return
+
+        rows = []
+        for key, vector in items.items():
+            arr = np.asarray(vector, dtype=np.float32)
+            rows.append((key, int(arr.shape[0]), arr.tobytes()))
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, dim, vector) VALUES (?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def get_stats(self) -> Dict[str, float]:
+        """获取缓存统计信息"""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
@@ -16,7 +16,9 @@ from .disease_assessment import (
     DyslipidemiAssessor,
     DiseaseRiskResult,
     RiskLevel,
-    ControlStatus
+    ControlStatus,
+    RISK_LEVELS,
+    CONTROL_STATUSES
 )
 from .lifestyle_assessment import (
     LifestyleAssessmentEngine,
@@ -46,6 +48,8 @@ __all__ = [
     'DiseaseRiskResult',
     'RiskLevel',
     'ControlStatus',
+    'RISK_LEVELS',
+    'CONTROL_STATUSES',
     
     # 生活方式评估
     'LifestyleAssessmentEngine',
@@ -5,7 +5,7 @@ Health Assessment System Core Engine
 整合所有六个子模块，提供统一的评估接口
 """
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 import logging
 
@@ -45,10 +45,15 @@ class HealthAssessmentEngine:
     3. 管理评估流程
     """
     
-    def __init__(self):
+    def __init__(self, verbose: bool = True):
         """
         初始化评估引擎
+        
+        Args:
+            verbose: 是否逐步输出评估过程（批量评估时关闭）
         """
+        self.verbose = verbose
+        
         # 初始化各个子模块
         self.task_manager = AssessmentTaskManager()
         self.feature_engineer = FeatureEngineer()
@@ -60,7 +65,12 @@ class HealthAssessmentEngine:
         self.record_manager = AssessmentRecordManager()
         self.report_generator = ReportGenerator()
         
-        print("✓ 健康评估引擎初始化完成")
+        self._log("✓ 健康评估引擎初始化完成")
+    
+    def _log(self, message: str = ""):
+        """输出评估过程信息"""
+        if self.verbose:
+            print(message)
     
     def run_scheduled_assessment(
         self,
@@ -79,19 +89,19 @@ class HealthAssessmentEngine:
         Returns:
             综合评估结果
         """
-        print(f"\n{'='*60}")
-        print(f"开始定期健康评估 - 用户: {user_id}")
-        print(f"{'='*60}\n")
+        self._log(f"\n{'='*60}")
+        self._log(f"开始定期健康评估 - 用户: {user_id}")
+        self._log(f"{'='*60}\n")
         
         # 1. 创建评估配置
-        print("步骤1: 创建评估配置...")
+        self._log("步骤1: 创建评估配置...")
         config = self.task_manager.create_scheduled_assessment(
             user_id=user_id,
             period=period,
             time_window=time_window
         )
-        print(f"✓ 评估ID: {config.assessment_id}")
-        print(f"✓ 时间窗口: {config.start_date.date()} 至 {config.end_date.date()}")
+        self._log(f"✓ 评估ID: {config.assessment_id}")
+        self._log(f"✓ 时间窗口: {config.start_date.date()} 至 {config.end_date.date()}")
         
         # 2. 执行完整评估
         result = self._execute_assessment(config, user_id)
@@ -102,9 +112,9 @@ class HealthAssessmentEngine:
             {'status': 'completed', 'score': result.overall_score}
         )
         
-        print(f"\n{'='*60}")
-        print(f"定期评估完成")
-        print(f"{'='*60}\n")
+        self._log(f"\n{'='*60}")
+        self._log(f"定期评估完成")
+        self._log(f"{'='*60}\n")
         
         return result
     
@@ -129,13 +139,13 @@ class HealthAssessmentEngine:
         Returns:
             综合评估结果
         """
-        print(f"\n{'='*60}")
-        print(f"开始按需健康评估 - 用户: {user_id}")
-        print(f"触发者: {triggered_by}")
-        print(f"{'='*60}\n")
+        self._log(f"\n{'='*60}")
+        self._log(f"开始按需健康评估 - 用户: {user_id}")
+        self._log(f"触发者: {triggered_by}")
+        self._log(f"{'='*60}\n")
         
         # 1. 创建评估配置
-        print("步骤1: 创建评估配置...")
+        self._log("步骤1: 创建评估配置...")
         config = self.task_manager.create_on_demand_assessment(
             user_id=user_id,
             triggered_by=triggered_by,
@@ -143,21 +153,61 @@ class HealthAssessmentEngine:
             start_date=start_date,
             end_date=end_date
         )
-        print(f"✓ 评估ID: {config.assessment_id}")
+        self._log(f"✓ 评估ID: {config.assessment_id}")
         
         # 2. 执行完整评估
         result = self._execute_assessment(config, user_id)
         
-        print(f"\n{'='*60}")
-        print(f"按需评估完成")
-        print(f"{'='*60}\n")
+        self._log(f"\n{'='*60}")
+        self._log(f"按需评估完成")
+        self._log(f"{'='*60}\n")
         
         return result
     
+    def assess_preloaded(
+        self,
+        user_id: str,
+        raw_data: Dict[str, HealthMetrics],
+        baseline_data: Dict,
+        start_date: datetime,
+        end_date: datetime,
+        time_window: TimeWindow = TimeWindow.LAST_30_DAYS
+    ) -> ComprehensiveAssessmentResult:
+        """
+        使用已加载的数据运行定期评估（批量评估使用）
+        
+        不查询数据库、不登记任务、不保存 MySQL 评估记录，由调用方批量写入结果。
+        
+        Args:
+            user_id: 用户ID
+            raw_data: 原始健康数据（见 records_to_metrics）
+            baseline_data: 基线数据
+            start_date: 时间窗口开始
+            end_date: 时间窗口结束
+            time_window: 时间窗口类型
+        
+        Returns:
+            综合评估结果
+        """
+        config = AssessmentConfig(
+            assessment_id=f"ASSESS_{user_id}_{end_date.strftime('%Y%m%d%H%M%S')}",
+            user_id=user_id,
+            assessment_type=AssessmentType.SCHEDULED,
+            time_window=time_window,
+            start_date=start_date,
+            end_date=end_date,
+            triggered_by="system"
+        )
+        return self._execute_assessment(
+            config, user_id, preloaded=(raw_data, baseline_data), save_record=False
+        )
+    
     def _execute_assessment(
         self,
         config: AssessmentConfig,
-        user_id: str
+        user_id: str,
+        preloaded: Optional[Tuple[Dict, Dict]] = None,
+        save_record: bool = True
     ) -> ComprehensiveAssessmentResult:
         """
         执行完整评估流程
@@ -165,57 +215,62 @@ class HealthAssessmentEngine:
         Args:
             config: 评估配置
             user_id: 用户ID
+            preloaded: 已加载的 (raw_data, baseline_data)，为空时从数据库加载
+            save_record: 是否保存评估记录
         
         Returns:
             综合评估结果
         """
         # 2. 数据准备与完整性检查
-        print("\n步骤2: 数据准备与完整性检查...")
-        raw_data, baseline_data = self._load_user_data(user_id, config)
+        self._log("\n步骤2: 数据准备与完整性检查...")
+        if preloaded is None:
+            raw_data, baseline_data = self._load_user_data(user_id, config)
+        else:
+            raw_data, baseline_data = preloaded
         
         completeness_report = self.task_manager.check_data_completeness(
             config, raw_data
         )
-        print(f"✓ 数据完整性: {completeness_report.completeness_level.value}")
-        print(f"✓ 完整率: {completeness_report.overall_completeness_rate*100:.1f}%")
+        self._log(f"✓ 数据完整性: {completeness_report.completeness_level.value}")
+        self._log(f"✓ 完整率: {completeness_report.overall_completeness_rate*100:.1f}%")
         
         if not completeness_report.is_sufficient_for_assessment():
-            print("⚠️  警告: 数据不足，评估结果可能不准确")
+            self._log("⚠️  警告: 数据不足，评估结果可能不准确")
         
         # 3. 特征构建
-        print("\n步骤3: 特征构建...")
+        self._log("\n步骤3: 特征构建...")
         features = self.feature_engineer.build_features(
             user_id=user_id,
             raw_data=raw_data,
             assessment_period=(config.start_date, config.end_date),
             baseline_data=baseline_data
         )
-        print(f"✓ 已构建 {len([k for k, v in features.to_dict().items() if v is not None])} 个特征")
+        self._log(f"✓ 已构建 {len([k for k, v in features.to_dict().items() if v is not None])} 个特征")
         
         # 4. 单病种风险评估
-        print("\n步骤4: 单病种风险评估...")
+        self._log("\n步骤4: 单病种风险评估...")
         disease_results = self._assess_diseases(features.to_dict(), baseline_data)
         
         for disease_name, result in disease_results.items():
-            print(f"  • {disease_name}: {result['control_status']} / 风险{result['risk_level']}")
+            self._log(f"  • {disease_name}: {result['control_status']} / 风险{result['risk_level']}")
         
         # 5. 生活方式评估
-        print("\n步骤5: 生活方式与行为风险评估...")
+        self._log("\n步骤5: 生活方式与行为风险评估...")
         diet_data = self._load_diet_data(user_id)
         lifestyle_result = self.lifestyle_engine.assess(
             features=features.to_dict(),
             diet_data=diet_data
         )
-        print(f"✓ 生活方式评分: {lifestyle_result.overall_score:.1f}")
-        print(f"✓ 风险等级: {lifestyle_result.overall_risk_level.value}")
+        self._log(f"✓ 生活方式评分: {lifestyle_result.overall_score:.1f}")
+        self._log(f"✓ 风险等级: {lifestyle_result.overall_risk_level.value}")
         
         # 6. 趋势分析
-        print("\n步骤6: 趋势变化与异常波动监测...")
+        self._log("\n步骤6: 趋势变化与异常波动监测...")
         trend_results = self._analyze_trends(user_id, features.to_dict(), baseline_data)
-        print(f"✓ 已分析 {len(trend_results)} 个指标的趋势")
+        self._log(f"✓ 已分析 {len(trend_results)} 个指标的趋势")
         
         # 7. 综合风险融合
-        print("\n步骤7: 综合健康风险评估与分层分级...")
+        self._log("\n步骤7: 综合健康风险评估与分层分级...")
         comprehensive_result = self.fusion_engine.fuse_risks(
             disease_results=disease_results,
             lifestyle_result=lifestyle_result.to_dict(),
@@ -223,21 +278,75 @@ class HealthAssessmentEngine:
             user_id=user_id,
             assessment_id=config.assessment_id
         )
-        print(f"✓ 综合评分: {comprehensive_result.overall_score:.1f}")
-        print(f"✓ 健康等级: {comprehensive_result.health_level.value}")
-        print(f"✓ TOP风险因素: {len(comprehensive_result.top_risk_factors)} 个")
+        self._log(f"✓ 综合评分: {comprehensive_result.overall_score:.1f}")
+        self._log(f"✓ 健康等级: {comprehensive_result.health_level.value}")
+        self._log(f"✓ TOP风险因素: {len(comprehensive_result.top_risk_factors)} 个")
         
         # 8. 保存评估记录
-        print("\n步骤8: 保存评估记录...")
-        self._save_assessment_record(
-            config, 
-            comprehensive_result, 
-            completeness_report
-        )
-        print("✓ 评估记录已保存")
+        if save_record:
+            self._log("\n步骤8: 保存评估记录...")
+            self._save_assessment_record(
+                config, 
+                comprehensive_result, 
+                completeness_report
+            )
+            self._log("✓ 评估记录已保存")
         
         return comprehensive_result
     
+    # 健康记录字段 → (指标名, 单位)
+    RECORD_METRICS = (
+        ('systolic_bp', 'blood_pressure', 'mmHg'),
+        ('blood_sugar', 'blood_glucose', 'mmol/L'),
+        ('heart_rate', 'heart_rate', 'bpm'),
+        ('sleep_hours', 'sleep', 'hours'),
+        ('steps', 'steps', 'steps'),
+        ('weight_kg', 'weight', 'kg'),
+    )
+    
+    @classmethod
+    def records_to_metrics(cls, records: List[Dict]) -> tuple:
+        """
+        将按时间排序的健康记录转换为评估输入
+        
+        Args:
+            records: 健康记录字典列表，键为 check_time、systolic_bp、diastolic_bp、heart_rate、
+                     blood_sugar、sleep_hours、steps、weight_kg（缺失或为空的指标跳过）
+        
+        Returns:
+            (raw_data, baseline_data) 元组
+        """
+        series = {field: ([], []) for field, _, _ in cls.RECORD_METRICS}
+        for record in records:
+            ts = record.get('check_time')
+            if not ts:
+                continue
+            for field, (timestamps, values) in series.items():
+                if record.get(field):
+                    # 每个指标保留自己的测量时间（不同指标不一定在同一条记录中）
+                    timestamps.append(ts)
+                    values.append(float(record[field]))
+        
+        raw_data = {}
+        for field, metric_name, unit in cls.RECORD_METRICS:
+            timestamps, values = series[field]
+            if values:
+                raw_data[metric_name] = HealthMetrics(
+                    metric_name=metric_name,
+                    timestamps=timestamps,
+                    values=values,
+                    unit=unit
+                )
+        
+        # 计算基线数据（使用历史平均值）
+        baseline_data = {}
+        for field, key in (('systolic_bp', 'sbp_mean'), ('blood_sugar', 'glucose_mean'), ('weight_kg', 'weight')):
+            values = series[field][1]
+            if values:
+                baseline_data[key] = sum(values) / len(values)
+        
+        return raw_data, baseline_data
+    
     def _load_user_data(
         self,
         user_id: str,
@@ -253,13 +362,11 @@ class HealthAssessmentEngine:
         Returns:
             (raw_data, baseline_data) 元组
         """
-        from datetime import timedelta
-        from .database_manager import DatabaseManager
-        
         raw_data = {}
         baseline_data = {}
         
         try:
+            from .database_manager import DatabaseManager
             db = DatabaseManager()
             
             # 解析 elder_id（支持 'elderly_001' 格式或纯数字）
@@ -298,100 +405,15 @@ class HealthAssessmentEngine:
             ))
             
             if records:
-                # 提取各指标数据
-                timestamps = []
-                sbp_values = []
-                dbp_values = []
-                hr_values = []
-                glucose_values = []
-                sleep_values = []
-                steps_values = []
-                weight_values = []
-                
-                for record in records:
-                    ts = record.get('check_time')
-                    if ts:
-                        timestamps.append(ts)
-                        
-                        if record.get('systolic_bp'):
-                            sbp_values.append(float(record['systolic_bp']))
-                        if record.get('diastolic_bp'):
-                            dbp_values.append(float(record['diastolic_bp']))
-                        if record.get('heart_rate'):
-                            hr_values.append(float(record['heart_rate']))
-                        if record.get('blood_sugar'):
-                            glucose_values.append(float(record['blood_sugar']))
-                        if record.get('sleep_hours'):
-                            sleep_values.append(float(record['sleep_hours']))
-                        if record.get('steps'):
-                            steps_values.append(float(record['steps']))
-                        if record.get('weight_kg'):
-                            weight_values.append(float(record['weight_kg']))
-                
-                # 构建 HealthMetrics 对象
-                if sbp_values:
-                    raw_data['blood_pressure'] = HealthMetrics(
-                        metric_name='blood_pressure',
-                        timestamps=timestamps[:len(sbp_values)],
-                        values=sbp_values,
-                        unit='mmHg'
-                    )
-                
-                if glucose_values:
-                    raw_data['blood_glucose'] = HealthMetrics(
-                        metric_name='blood_glucose',
-                        timestamps=timestamps[:len(glucose_values)],
-                        values=glucose_values,
-                        unit='mmol/L'
-                    )
-                
-                if hr_values:
-                    raw_data['heart_rate'] = HealthMetrics(
-                        metric_name='heart_rate',
-                        timestamps=timestamps[:len(hr_values)],
-                        values=hr_values,
-                        unit='bpm'
-                    )
-                
-                if sleep_values:
-                    raw_data['sleep'] = HealthMetrics(
-                        metric_name='sleep',
-                        timestamps=timestamps[:len(sleep_values)],
-                        values=sleep_values,
-                        unit='hours'
-                    )
-                
-                if steps_values:
-                    raw_data['steps'] = HealthMetrics(
-                        metric_name='steps',
-                        timestamps=timestamps[:len(steps_values)],
-                        values=steps_values,
-                        unit='steps'
-                    )
-                
-                if weight_values:
-                    raw_data['weight'] = HealthMetrics(
-                        metric_name='weight',
-                        timestamps=timestamps[:len(weight_values)],
-                        values=weight_values,
-                        unit='kg'
-                    )
-                
-                # 计算基线数据（使用历史平均值）
-                if sbp_values:
-                    baseline_data['sbp_mean'] = sum(sbp_values) / len(sbp_values)
-                if glucose_values:
-                    baseline_data['glucose_mean'] = sum(glucose_values) / len(glucose_values)
-                if weight_values:
-                    baseline_data['weight'] = sum(weight_values) / len(weight_values)
+                raw_data, baseline_data = self.records_to_metrics(records)
                 
-                print(f"✓ 从数据库加载了 {len(records)} 条健康记录")
+                self._log(f"✓ 从数据库加载了 {len(records)} 条健康记录")
             else:
-                print(f"⚠️ 未找到用户 {elder_id} 在指定时间范围内的健康记录，使用默认数据")
+                self._log(f"⚠️ 未找到用户 {elder_id} 在指定时间范围内的健康记录，使用默认数据")
                 raw_data, baseline_data = self._generate_default_data(config)
                 
         except Exception as e:
-            print(f"⚠️ 数据库查询失败: {e}，使用默认数据")
+            self._log(f"⚠️ 数据库查询失败: {e}，使用默认数据")
             raw_data, baseline_data = self._generate_default_data(config)
         
         return raw_data, baseline_data
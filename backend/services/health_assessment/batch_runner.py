@@ -0,0 +1,316 @@
+"""
+批量健康评估
+============
+
+对全部（或指定的）老人运行一次定期评估，结果写入 health_assessments：
+
+1. 老人ID排序后按 chunk_size 分组；每组的评估窗口数据用两条查询读出（健康记录、睡眠数据），
+   不再逐人查询
+2. 各组分发到进程池，每个进程初始化时创建一个评估引擎和数据库连接并一直复用
+   （引擎初始化远比单人评估耗时）
+3. 每组的结果在一个事务中批量写入：先删除本组在本次评估日期的旧结果再插入，重跑不会重复
+4. 检查点文件记录本次运行的评估日期和已完成的组，中断后用同样的参数重跑会跳过已完成的组；
+   全部完成后删除检查点，下一次运行（如下个月）重新评估
+5. 每完成一组输出进度、吞吐量（人/秒）和预计剩余时间
+
+评估结果到 health_assessments 各列的对应关系见 to_assessment_row。
+没有任何数据的老人跳过，不写入结果（引擎在无数据时会使用随机默认数据，不适合批量写入）。
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .assessment_engine import HealthAssessmentEngine
+from .comprehensive_assessment import ComprehensiveAssessmentResult
+
+logger = logging.getLogger(__name__)
+
+
+def _score(value: Any) -> int:
+    """评分取整并限制在 0-100"""
+    return int(round(min(max(float(value), 0.0), 100.0)))
+
+
+def to_assessment_row(elderly_id: uuid.UUID, result: ComprehensiveAssessmentResult,
+                      assessment_date: datetime) -> Dict[str, Any]:
+    """
+    评估结果 → HealthAssessment 列
+
+    - cardiovascular: 100 - 高血压风险分（未评估高血压时用 100 - 疾病综合风险分）
+    - sleep_quality / exercise / nutrition: 生活方式评估的睡眠、运动、饮食得分
+    - mental_health: 引擎没有心理评估，用作息规律性得分近似
+    - weight_management: 100 - 糖尿病风险分（代谢风险，未评估时用综合得分）
+    - overall: 综合得分
+    """
+    diseases = result.disease_results or {}
+    lifestyle = result.lifestyle_result or {}
+    overall = result.overall_score
+
+    # 单病种结果为 DiseaseRiskResult.to_dict()
+    hypertension = diseases.get("hypertension")
+    diabetes = diseases.get("diabetes")
+    return {
+        "id": uuid.uuid4(),
+        "elderly_id": elderly_id,
+        "cardiovascular": _score(100 - (hypertension["risk_score"] if hypertension else result.disease_risk_score)),
+        "sleep_quality": _score(lifestyle.get("sleep_score", overall)),
+        "exercise": _score(lifestyle.get("exercise_score", overall)),
+        "nutrition": _score(lifestyle.get("diet_score", overall)),
+        "mental_health": _score(lifestyle.get("regularity_score", overall)),
+        "weight_management": _score(100 - diabetes["risk_score"] if diabetes else overall),
+        "overall": _score(overall),
+        "assessment_date": assessment_date,
+    }
+
+
+# ----------------------------------------------------------------------
+# 工作进程
+# ----------------------------------------------------------------------
+
+# 每个工作进程（或进程内执行时）的评估引擎和会话工厂
+_worker: Dict[str, Any] = {}
+
+
+def _create_session_factory(database_url: Optional[str]):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    if database_url is None:
+        from config.settings import settings
+        database_url = settings.DATABASE_URL
+    engine = create_engine(database_url, pool_pre_ping=True)
+    return sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+
+def _init_worker(database_url: Optional[str]) -> None:
+    """进程池初始化：创建评估引擎和数据库连接（每个进程一次）"""
+    _worker["database_url"] = database_url
+    _worker["session_factory"] = _create_session_factory(database_url)
+    _worker["engine"] = HealthAssessmentEngine(verbose=False)
+
+
+def assess_chunk(chunk_index: int, elderly_ids: List[uuid.UUID], start: datetime, end: datetime,
+                 assessment_date: datetime) -> Tuple[int, int, int, int]:
+    """
+    评估一组老人并写入结果（在工作进程中执行）
+
+    Returns:
+        (组序号, 写入数, 无数据跳过数, 评估失败数)
+    """
+    from repositories.health_assessment_repository import HealthAssessmentRepository
+
+    engine: HealthAssessmentEngine = _worker["engine"]
+    db = _worker["session_factory"]()
+    try:
+        repo = HealthAssessmentRepository(db)
+        inputs = repo.load_assessment_inputs(elderly_ids, start, end)
+
+        rows, failed = [], 0
+        for elderly_id in elderly_ids:
+            records = inputs.get(elderly_id)
+            if not records:
+                continue
+            try:
+                raw_data, baseline_data = engine.records_to_metrics(records)
+                result = engine.assess_preloaded(str(elderly_id), raw_data, baseline_data, start, end)
+                rows.append(to_assessment_row(elderly_id, result, assessment_date))
+            except Exception as e:
+                failed += 1
+                logger.error(f"老人 {elderly_id} 评估失败: {str(e)}")
+
+        written = repo.replace_assessments(elderly_ids, assessment_date, rows)
+        db.commit()
+        return chunk_index, written, len(elderly_ids) - len(inputs), failed
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+# ----------------------------------------------------------------------
+# 调度
+# ----------------------------------------------------------------------
+
+class BatchAssessmentRunner:
+    """按组分发到进程池的批量评估"""
+
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = 500, window_days: int = 30,
+                 checkpoint_path: Optional[str] = None, database_url: Optional[str] = None,
+                 progress: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """
+        Args:
+            workers: 工作进程数，0 表示在当前进程中执行；默认 CPU 核数
+            chunk_size: 每组老人数（一组两条查询、一个写入事务）
+            window_days: 评估窗口天数（截止到本次评估日期）
+            checkpoint_path: 检查点文件，为空时不支持断点续跑
+            database_url: 数据库地址，默认 settings.DATABASE_URL
+            progress: 每完成一组调用一次，参数同 get_stats()
+        """
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.chunk_size = chunk_size
+        self.window_days = window_days
+        self.checkpoint_path = checkpoint_path
+        self.database_url = database_url
+        self.progress = progress
+        self.stats: Dict[str, Any] = {}
+
+    # ------------------------------------------------------------------
+    # 检查点
+    # ------------------------------------------------------------------
+
+    def _fingerprint(self, elderly_ids: List[uuid.UUID], assessment_date: Optional[datetime]) -> str:
+        # 未指定评估日期时（默认现在）续跑沿用检查点中的日期
+        requested = assessment_date.isoformat() if assessment_date is not None else "now"
+        digest = hashlib.sha256(f"{self.chunk_size}:{self.window_days}:{requested}".encode())
+        for elderly_id in elderly_ids:
+            digest.update(elderly_id.bytes)
+        return digest.hexdigest()
+
+    def _load_checkpoint(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return None
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"检查点文件无法读取，重新开始: {str(e)}")
+            return None
+        if checkpoint.get("fingerprint") != fingerprint:
+            logger.warning("检查点与本次老人列表或参数不一致，重新开始")
+            return None
+        return checkpoint
+
+    def _save_checkpoint(self, checkpoint: Dict[str, Any]) -> None:
+        if not self.checkpoint_path:
+            return
+        # 先写临时文件再替换，进程中断时不会留下不完整的检查点
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _clear_checkpoint(self) -> None:
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+    # ------------------------------------------------------------------
+    # 运行
+    # ------------------------------------------------------------------
+
+    def run(self, elderly_ids: Optional[List[uuid.UUID]] = None,
+            assessment_date: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        运行批量评估
+
+        Args:
+            elderly_ids: 要评估的老人，默认全部老人
+            assessment_date: 评估日期（窗口截止时间），默认现在；
+                未指定时从检查点续跑沿用检查点中的日期，指定的日期与检查点不一致时重新开始
+
+        Returns:
+            Dict: 运行统计
+        """
+        if self.workers == 0 and (not _worker or _worker["database_url"] != self.database_url):
+            _init_worker(self.database_url)
+        if elderly_ids is None:
+            elderly_ids = self._all_elderly_ids()
+        elderly_ids = sorted(set(elderly_ids))
+        chunks = [elderly_ids[i:i + self.chunk_size] for i in range(0, len(elderly_ids), self.chunk_size)]
+
+        fingerprint = self._fingerprint(elderly_ids, assessment_date)
+        checkpoint = self._load_checkpoint(fingerprint)
+        if checkpoint is None:
+            assessment_date = assessment_date or datetime.now(timezone.utc)
+            checkpoint = {
+                "fingerprint": fingerprint,
+                "assessment_date": assessment_date.isoformat(),
+                "completed": [],
+            }
+            self._save_checkpoint(checkpoint)
+        else:
+            assessment_date = datetime.fromisoformat(checkpoint["assessment_date"])
+            logger.info(f"从检查点续跑：已完成 {len(checkpoint['completed'])}/{len(chunks)} 组")
+        start = assessment_date - timedelta(days=self.window_days)
+
+        completed = set(checkpoint["completed"])
+        pending = [i for i in range(len(chunks)) if i not in completed]
+        self.stats = {
+            "elderly": len(elderly_ids),
+            "chunks": len(chunks),
+            "chunks_done": len(completed),
+            "resumed_chunks": len(completed),
+            "written": 0,
+            "no_data": 0,
+            "failed": 0,
+            "processed": 0,
+            "users_per_second": 0.0,
+            "eta_seconds": None,
+            "elapsed_seconds": 0.0,
+            "assessment_date": checkpoint["assessment_date"],
+        }
+        remaining_users = sum(len(chunks[i]) for i in pending)
+        started = time.monotonic()
+
+        def on_done(result: Tuple[int, int, int, int]) -> None:
+            nonlocal remaining_users
+            chunk_index, written, no_data, failed = result
+            completed.add(chunk_index)
+            checkpoint["completed"] = sorted(completed)
+            self._save_checkpoint(checkpoint)
+
+            remaining_users -= len(chunks[chunk_index])
+            elapsed = time.monotonic() - started
+            self.stats["chunks_done"] += 1
+            self.stats["written"] += written
+            self.stats["no_data"] += no_data
+            self.stats["failed"] += failed
+            self.stats["processed"] += len(chunks[chunk_index])
+            self.stats["elapsed_seconds"] = round(elapsed, 2)
+            rate = self.stats["processed"] / elapsed if elapsed > 0 else 0.0
+            self.stats["users_per_second"] = round(rate, 1)
+            self.stats["eta_seconds"] = round(remaining_users / rate, 1) if rate > 0 else None
+            logger.info(
+                f"批量评估 {self.stats['chunks_done']}/{len(chunks)} 组，"
+                f"{self.stats['users_per_second']} 人/秒，预计剩余 {self.stats['eta_seconds']} 秒"
+            )
+            if self.progress is not None:
+                self.progress(self.get_stats())
+
+        args = [(i, chunks[i], start, assessment_date, assessment_date) for i in pending]
+        if self.workers == 0:
+            for item in args:
+                on_done(assess_chunk(*item))
+        elif args:
+            with ProcessPoolExecutor(
+                max_workers=min(self.workers, len(args)),
+                initializer=_init_worker,
+                initargs=(self.database_url,)
+            ) as pool:
+                futures = [pool.submit(assess_chunk, *item) for item in args]
+                for future in as_completed(futures):
+                    on_done(future.result())
+
+        # 全部组完成，下一次运行不再从这个检查点续跑
+        self._clear_checkpoint()
+        return self.get_stats()
+
+    def _all_elderly_ids(self) -> List[uuid.UUID]:
+        from repositories.health_assessment_repository import HealthAssessmentRepository
+
+        session_factory = _create_session_factory(self.database_url)
+        db = session_factory()
+        try:
+            return HealthAssessmentRepository(db).get_all_elderly_ids()
+        finally:
+            db.close()
+            session_factory.kw["bind"].dispose()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(self.stats)
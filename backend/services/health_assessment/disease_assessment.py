@@ -81,6 +81,44 @@ class DiseaseRiskResult:
         }
 
 
+# 批量评分返回的等级下标对应的枚举
+CONTROL_STATUSES = (ControlStatus.EXCELLENT, ControlStatus.GOOD, ControlStatus.FAIR, ControlStatus.POOR)
+RISK_LEVELS = (RiskLevel.LOW, RiskLevel.MEDIUM, RiskLevel.HIGH, RiskLevel.VERY_HIGH)
+
+
+def _batch_features(features: Dict[str, np.ndarray], defaults: Tuple[Tuple[str, float], ...]) -> List[np.ndarray]:
+    """按 (特征名, 默认值) 取出批量特征，缺失的特征用默认值填满，统一为等长 float64 数组"""
+    present = [np.asarray(features[name], dtype=np.float64) for name, _ in defaults if name in features]
+    if not present:
+        raise ValueError(f"批量评分至少需要以下特征之一: {[name for name, _ in defaults]}")
+    shape = np.broadcast_shapes(*(array.shape for array in present))
+    return [
+        np.broadcast_to(np.asarray(features.get(name, default), dtype=np.float64), shape)
+        for name, default in defaults
+    ]
+
+
+def _batch_deviation(values: np.ndarray, baseline: Optional[Dict[str, np.ndarray]], key: str) -> np.ndarray:
+    """与基线的偏离，没有基线的用户为 NaN"""
+    if not baseline or key not in baseline:
+        return np.full(values.shape, np.nan)
+    return values - np.asarray(baseline[key], dtype=np.float64)
+
+
+def _level_codes(scores: np.ndarray, thresholds: Tuple[float, float, float], ascending: bool) -> np.ndarray:
+    """
+    评分 → 等级下标，与标量 if/elif 分支一致（NaN 的比较均不成立，落到最后一级）
+
+    ascending=True: score < t0 → 0, < t1 → 1, < t2 → 2, 否则 3（风险等级）
+    ascending=False: score >= t0 → 0, >= t1 → 1, >= t2 → 2, 否则 3（控制状态）
+    """
+    if ascending:
+        conditions = [scores < threshold for threshold in thresholds]
+    else:
+        conditions = [scores >= threshold for threshold in thresholds]
+    return np.select(conditions, [0, 1, 2], default=3).astype(np.int8)
+
+
 class SimplifiedFuzzyLogic:
     """简化的模糊逻辑实现（当skfuzzy不可用时）"""
     
@@ -107,7 +145,33 @@ class SimplifiedFuzzyLogic:
             return 1.0
         else:  # c < x < d
             return (d - x) / (d - c) if d != c else 1.0
-    
+
+    @staticmethod
+    def trimf_array(x: np.ndarray, params: List[float]) -> np.ndarray:
+        """三角隶属度函数（数组版本，逐元素与 trimf 相同）"""
+        a, b, c = params
+        x = np.asarray(x, dtype=np.float64)
+        rising = (x - a) / (b - a) if b != a else np.ones_like(x)
+        falling = (c - x) / (c - b) if c != b else np.ones_like(x)
+        return np.select(
+            [(x <= a) | (x >= c), (a < x) & (x <= b)],
+            [0.0, rising],
+            default=falling
+        )
+
+    @staticmethod
+    def trapmf_array(x: np.ndarray, params: List[float]) -> np.ndarray:
+        """梯形隶属度函数（数组版本，逐元素与 trapmf 相同）"""
+        a, b, c, d = params
+        x = np.asarray(x, dtype=np.float64)
+        rising = (x - a) / (b - a) if b != a else np.ones_like(x)
+        falling = (d - x) / (d - c) if d != c else np.ones_like(x)
+        return np.select(
+            [(x <= a) | (x >= d), (a < x) & (x <= b), (b < x) & (x <= c)],
+            [0.0, rising, 1.0],
+            default=falling
+        )
+
     @staticmethod
     def fuzzy_and(memberships: List[float]) -> float:
         """模糊AND操作（取最小值）"""
@@ -576,6 +640,143 @@ class HypertensionAssessor:
             findings.append("血压控制良好，继续保持")
         
         return findings
+    
+    # ------------------------------------------------------------------
+    # 批量评分（数组版本，分支与上面的标量函数逐一对应，结果逐元素相同）
+    # ------------------------------------------------------------------
+    
+    def score_batch(
+        self,
+        features: Dict[str, np.ndarray],
+        baseline: Optional[Dict[str, np.ndarray]] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        批量计算 N 位用户的控制评分、风险评分和等级（用于区域筛查、阈值调整试算）
+        
+        Args:
+            features: 特征名 → 长度 N 的数组（sbp_mean、dbp_mean、sbp_compliance_rate、sbp_cv），
+                      缺失的特征使用与 assess 相同的默认值
+            baseline: 'sbp_mean' → 长度 N 的数组，NaN 表示该用户没有基线
+        
+        Returns:
+            control_quality_score、risk_score、baseline_deviation（没有基线为 NaN）、
+            control_status（CONTROL_STATUSES 下标）、risk_level（RISK_LEVELS 下标）
+        """
+        sbp, dbp, compliance_rate, cv = _batch_features(features, (
+            ('sbp_mean', 120), ('dbp_mean', 80), ('sbp_compliance_rate', 1.0), ('sbp_cv', 0.0)
+        ))
+        deviation = _batch_deviation(sbp, baseline, 'sbp_mean')
+        
+        bp_score = np.minimum(self._smooth_sbp_score_array(sbp), self._smooth_dbp_score_array(dbp))
+        control_score = np.minimum(100, compliance_rate * 40 + self._smooth_stability_score_array(cv) + bp_score)
+        
+        risk_score = 0.0 + np.maximum(self._smooth_sbp_risk_array(sbp), self._smooth_dbp_risk_array(dbp))
+        risk_score = risk_score + (1 - compliance_rate) * 25
+        risk_score = risk_score + self._smooth_cv_risk_array(cv)
+        has_baseline = ~np.isnan(deviation)
+        risk_score = np.where(has_baseline, risk_score + self._smooth_trend_risk_array(deviation), risk_score)
+        risk_score = np.minimum(100, risk_score)
+        
+        return {
+            'control_quality_score': control_score,
+            'risk_score': risk_score,
+            'baseline_deviation': deviation,
+            'control_status': _level_codes(control_score, (80, 60, 40), ascending=False),
+            'risk_level': _level_codes(risk_score, (25, 50, 75), ascending=True),
+        }
+    
+    @staticmethod
+    def _smooth_stability_score_array(cv: np.ndarray) -> np.ndarray:
+        """_smooth_stability_score 的数组版本"""
+        return np.select(
+            [cv < 0.08, cv < 0.12, cv < 0.17, cv < 0.22],
+            [30.0,
+             30.0 - (cv - 0.08) / 0.04 * 10.0,
+             20.0 - (cv - 0.12) / 0.05 * 10.0,
+             10.0 - (cv - 0.17) / 0.05 * 10.0],
+            default=0.0
+        )
+    
+    @staticmethod
+    def _smooth_sbp_score_array(sbp: np.ndarray) -> np.ndarray:
+        """_smooth_sbp_score 的数组版本"""
+        return np.select(
+            [sbp < 115, sbp < 125, sbp < 135, sbp < 145, sbp < 155, sbp < 170, sbp < 185],
+            [30.0,
+             30.0 - (sbp - 115) / 10.0 * 5.0,
+             25.0 - (sbp - 125) / 10.0 * 5.0,
+             20.0 - (sbp - 135) / 10.0 * 5.0,
+             15.0 - (sbp - 145) / 10.0 * 5.0,
+             10.0 - (sbp - 155) / 15.0 * 5.0,
+             5.0 - (sbp - 170) / 15.0 * 5.0],
+            default=0.0
+        )
+    
+    @staticmethod
+    def _smooth_dbp_score_array(dbp: np.ndarray) -> np.ndarray:
+        """_smooth_dbp_score 的数组版本"""
+        return np.select(
+            [dbp < 75, dbp < 82, dbp < 87, dbp < 93, dbp < 98, dbp < 105, dbp < 115],
+            [30.0,
+             30.0 - (dbp - 75) / 7.0 * 5.0,
+             25.0 - (dbp - 82) / 5.0 * 5.0,
+             20.0 - (dbp - 87) / 6.0 * 5.0,
+             15.0 - (dbp - 93) / 5.0 * 5.0,
+             10.0 - (dbp - 98) / 7.0 * 5.0,
+             5.0 - (dbp - 105) / 10.0 * 5.0],
+            default=0.0
+        )
+    
+    @staticmethod
+    def _smooth_sbp_risk_array(sbp: np.ndarray) -> np.ndarray:
+        """_smooth_sbp_risk 的数组版本"""
+        return np.select(
+            [sbp < 125, sbp < 135, sbp < 145, sbp < 165, sbp < 185],
+            [0.0,
+             (sbp - 125) / 10.0 * 10.0,
+             10.0 + (sbp - 135) / 10.0 * 10.0,
+             20.0 + (sbp - 145) / 20.0 * 10.0,
+             30.0 + (sbp - 165) / 20.0 * 10.0],
+            default=40.0
+        )
+    
+    @staticmethod
+    def _smooth_dbp_risk_array(dbp: np.ndarray) -> np.ndarray:
+        """_smooth_dbp_risk 的数组版本"""
+        return np.select(
+            [dbp < 82, dbp < 87, dbp < 93, dbp < 103, dbp < 115],
+            [0.0,
+             (dbp - 82) / 5.0 * 10.0,
+             10.0 + (dbp - 87) / 6.0 * 10.0,
+             20.0 + (dbp - 93) / 10.0 * 10.0,
+             30.0 + (dbp - 103) / 12.0 * 10.0],
+            default=40.0
+        )
+    
+    @staticmethod
+    def _smooth_cv_risk_array(cv: np.ndarray) -> np.ndarray:
+        """_smooth_cv_risk 的数组版本"""
+        return np.select(
+            [cv < 0.08, cv < 0.12, cv < 0.17, cv < 0.22],
+            [0.0,
+             (cv - 0.08) / 0.04 * 10.0,
+             10.0 + (cv - 0.12) / 0.05 * 5.0,
+             15.0 + (cv - 0.17) / 0.05 * 5.0],
+            default=20.0
+        )
+    
+    @staticmethod
+    def _smooth_trend_risk_array(baseline_deviation: np.ndarray) -> np.ndarray:
+        """_smooth_trend_risk 的数组版本"""
+        d = baseline_deviation
+        return np.select(
+            [d <= 0, d < 5, d < 10, d < 15],
+            [0.0,
+             d / 5.0 * 5.0,
+             5.0 + (d - 5) / 5.0 * 5.0,
+             10.0 + (d - 10) / 5.0 * 5.0],
+            default=15.0
+        )
 
 
 class DiabetesAssessor:
@@ -786,6 +987,49 @@ class DiabetesAssessor:
             findings.append("血糖控制良好")
         
         return findings
+    
+    # ------------------------------------------------------------------
+    # 批量评分（数组版本，分支与上面的标量函数逐一对应，结果逐元素相同）
+    # ------------------------------------------------------------------
+    
+    def score_batch(
+        self,
+        features: Dict[str, np.ndarray],
+        baseline: Optional[Dict[str, np.ndarray]] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        批量计算 N 位用户的控制评分、风险评分和等级
+        
+        Args:
+            features: 特征名 → 长度 N 的数组（glucose_mean、glucose_compliance_rate、glucose_cv）
+            baseline: 'glucose_mean' → 长度 N 的数组，NaN 表示该用户没有基线
+        
+        Returns:
+            同 HypertensionAssessor.score_batch
+        """
+        glucose, compliance_rate, cv = _batch_features(features, (
+            ('glucose_mean', 5.5), ('glucose_compliance_rate', 1.0), ('glucose_cv', 0.0)
+        ))
+        deviation = _batch_deviation(glucose, baseline, 'glucose_mean')
+        
+        stability_score = np.select([cv < 0.15, cv < 0.25, cv < 0.35], [30, 20, 10], default=0)
+        glucose_score = np.select([glucose < 6.1, glucose < 7.0, glucose < 10.0], [30, 20, 10], default=0)
+        control_score = np.minimum(100, compliance_rate * 40 + stability_score + glucose_score)
+        
+        risk_score = 0.0 + np.select([glucose >= 10.0, glucose >= 7.0, glucose >= 6.1], [40, 25, 15], default=0)
+        risk_score = risk_score + (1 - compliance_rate) * 25
+        risk_score = risk_score + np.select([cv >= 0.35, cv >= 0.25, cv >= 0.15], [20, 15, 10], default=0)
+        # NaN（没有基线）与 1.0 比较不成立，与标量分支一致
+        risk_score = np.where(deviation > 1.0, risk_score + 15, risk_score)
+        risk_score = np.minimum(100, risk_score)
+        
+        return {
+            'control_quality_score': control_score,
+            'risk_score': risk_score,
+            'baseline_deviation': deviation,
+            'control_status': _level_codes(control_score, (80, 60, 40), ascending=False),
+            'risk_level': _level_codes(risk_score, (25, 50, 75), ascending=True),
+        }
 
 
 class DyslipidemiAssessor:
@@ -944,6 +1188,43 @@ class DyslipidemiAssessor:
             findings.append("血脂水平正常")
         
         return findings
+    
+    # ------------------------------------------------------------------
+    # 批量评分（数组版本，分支与上面的标量函数逐一对应，结果逐元素相同）
+    # ------------------------------------------------------------------
+    
+    def score_batch(
+        self,
+        features: Dict[str, np.ndarray],
+        baseline: Optional[Dict[str, np.ndarray]] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        批量计算 N 位用户的风险评分和等级
+        
+        Args:
+            features: 特征名 → 长度 N 的数组（tc_mean、ldl_mean、hdl_mean、tg_mean）
+            baseline: 未使用（与其他评估器接口一致）
+        
+        Returns:
+            同 HypertensionAssessor.score_batch（控制评分固定为 70、控制状态为良好，没有基线偏离）
+        """
+        tc, ldl, hdl, tg = _batch_features(features, (
+            ('tc_mean', 5.0), ('ldl_mean', 3.0), ('hdl_mean', 1.2), ('tg_mean', 1.5)
+        ))
+        
+        risk_score = 0.0 + np.select([tc >= 6.2, tc >= 5.2], [20, 10], default=0)
+        risk_score = risk_score + np.select([ldl >= 4.1, ldl >= 3.4], [25, 15], default=0)
+        risk_score = risk_score + np.where(hdl < 1.0, 20, 0)
+        risk_score = risk_score + np.select([tg >= 2.3, tg >= 1.7], [20, 10], default=0)
+        risk_score = np.minimum(100, risk_score)
+        
+        return {
+            'control_quality_score': np.full(risk_score.shape, 70.0),
+            'risk_score': risk_score,
+            'baseline_deviation': np.full(risk_score.shape, np.nan),
+            'control_status': np.full(risk_score.shape, CONTROL_STATUSES.index(ControlStatus.GOOD), dtype=np.int8),
+            'risk_level': _level_codes(risk_score, (20, 40, 60), ascending=True),
+        }
 
 
 # 使用示例
@@ -7,6 +7,7 @@ Indicator Evaluator
 
 from typing import Dict, Optional, Tuple
 from dataclasses import dataclass
+from datetime import date
 from .health_report_models import IndicatorStatus, VitalSignIndicator
 
 
@@ -289,10 +290,23 @@ class PersonalizedEvaluator(IndicatorEvaluator):
     支持根据用户历史数据调整参考范围
     """
     
+    # 指标键 → 个人基线中的指标名（与 calculate_personal_baseline / health_baselines 一致）
+    BASELINE_KEYS = {
+        'blood_sugar_fasting': 'blood_sugar',
+        'blood_sugar_random': 'blood_sugar',
+    }
+    
     def __init__(self, user_baseline: Optional[Dict] = None):
         super().__init__()
         self.user_baseline = user_baseline or {}
     
+    @classmethod
+    def from_stored_baseline(cls, db, elderly_id, as_of: Optional[date] = None) -> "PersonalizedEvaluator":
+        """由 health_baselines 中增量维护的个人基线创建（一次查询，不读取历史记录）"""
+        from repositories.health_baseline_repository import HealthBaselineRepository
+        
+        return cls(HealthBaselineRepository(db).get_baseline_data(elderly_id, as_of))
+    
     def set_user_baseline(self, baseline: Dict):
         """设置用户个人基线"""
         self.user_baseline = baseline
@@ -312,8 +326,9 @@ class PersonalizedEvaluator(IndicatorEvaluator):
         status, status_text = self.evaluate(indicator_key, value, gender)
         
         baseline_comparison = ""
-        if indicator_key in self.user_baseline and value is not None:
-            baseline_value = self.user_baseline[indicator_key].get('mean')
+        baseline_key = self.BASELINE_KEYS.get(indicator_key, indicator_key)
+        if isinstance(self.user_baseline.get(baseline_key), dict) and value is not None:
+            baseline_value = self.user_baseline[baseline_key].get('mean')
             if baseline_value:
                 diff = value - baseline_value
                 diff_percent = (diff / baseline_value) * 100 if baseline_value != 0 else 0
@@ -20,12 +20,14 @@ RAG 知识库模块 - FAISS 向量检索
 
 import os
 import json
-import pickle
+import zlib
 import numpy as np
 from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 
+from .vector_index import MmapVectorIndex
+
 # FAISS 和 sentence-transformers 已禁用，使用简化版
 FAISS_AVAILABLE = False
 SENTENCE_TRANSFORMER_AVAILABLE = False
@@ -49,6 +51,9 @@ class SimpleEmbedding:
     简化版文本向量化（当 sentence-transformers 不可用时使用）
     使用 TF-IDF 风格的简单向量化
     """
+    # 向量化算法标识（算法变化时需更新，以便丢弃已持久化的旧向量）
+    SIGNATURE = "simple-char-crc32-v1"
+    
     def __init__(self, dim: int = 384):
         self.dim = dim
         self.vocab: Dict[str, int] = {}
@@ -62,8 +67,8 @@ class SimpleEmbedding:
             vec = np.zeros(self.dim, dtype=np.float32)
             words = list(text)
             for i, char in enumerate(words):
-                # 使用字符的哈希值作为索引
-                idx = hash(char) % self.dim
+                # 使用字符的哈希值作为索引（crc32 跨进程稳定，向量可以持久化复用）
+                idx = zlib.crc32(char.encode('utf-8')) % self.dim
                 vec[idx] += 1.0 / (i + 1)  # 位置加权
             # 归一化
             norm = np.linalg.norm(vec)
@@ -73,62 +78,6 @@ class SimpleEmbedding:
         return np.array(embeddings, dtype=np.float32)
 
 
-class SimpleFAISS:
-    """
-    简化版 FAISS（当 FAISS 不可用时使用）
-    使用 numpy 实现基本的向量检索
-    """
-    def __init__(self, dim: int):
-        self.dim = dim
-        self.vectors: Optional[np.ndarray] = None
-        self.ids: List[str] = []
-    
-    def add(self, vectors: np.ndarray, ids: List[str]):
-        """添加向量"""
-        if self.vectors is None:
-            self.vectors = vectors
-        else:
-            self.vectors = np.vstack([self.vectors, vectors])
-        self.ids.extend(ids)
-    
-    def search(self, query_vector: np.ndarray, k: int = 5) -> Tuple[List[float], List[str]]:
-        """搜索最相似的向量"""
-        if self.vectors is None or len(self.ids) == 0:
-            return [], []
-        
-        # 计算余弦相似度
-        query_norm = query_vector / (np.linalg.norm(query_vector) + 1e-8)
-        vectors_norm = self.vectors / (np.linalg.norm(self.vectors, axis=1, keepdims=True) + 1e-8)
-        similarities = np.dot(vectors_norm, query_norm.T).flatten()
-        
-        # 获取 top-k
-        k = min(k, len(self.ids))
-        top_indices = np.argsort(similarities)[-k:][::-1]
-        
-        scores = [float(similarities[i]) for i in top_indices]
-        result_ids = [self.ids[i] for i in top_indices]
-        
-        return scores, result_ids
-    
-    def save(self, path: str):
-        """保存索引"""
-        data = {
-            'vectors': self.vectors,
-            'ids': self.ids,
-            'dim': self.dim
-        }
-        with open(path, 'wb') as f:
-            pickle.dump(data, f)
-    
-    def load(self, path: str):
-        """加载索引"""
-        with open(path, 'rb') as f:
-            data = pickle.load(f)
-        self.vectors = data['vectors']
-        self.ids = data['ids']
-        self.dim = data['dim']
-
-
 class HealthKnowledgeBase:
     """
     健康知识库 - RAG 核心组件
@@ -151,7 +100,7 @@ class HealthKnowledgeBase:
         
         Args:
             embedding_model: 文本向量化模型名称
-            index_path: FAISS 索引存储路径
+            index_path: 向量索引存储路径（文件名前缀）
             knowledge_path: 知识条目存储路径
         """
         self.embedding_dim = 384
@@ -168,26 +117,29 @@ class HealthKnowledgeBase:
         else:
             self.encoder = SimpleEmbedding(self.embedding_dim)
         
-        # 初始化 FAISS 索引
-        if FAISS_AVAILABLE:
-            self.index = faiss.IndexFlatIP(self.embedding_dim)  # 内积相似度
-            print(f"✓ 初始化 FAISS 索引 (dim={self.embedding_dim})")
-        else:
-            self.index = SimpleFAISS(self.embedding_dim)
-            print(f"✓ 初始化简化版向量索引 (dim={self.embedding_dim})")
-        
         # 知识条目存储
         self.knowledge_items: Dict[str, KnowledgeItem] = {}
         self.id_to_index: Dict[str, int] = {}  # ID 到索引位置的映射
         
         # 存储路径
         base_dir = os.path.dirname(os.path.abspath(__file__))
-        self.index_path = index_path or os.path.join(base_dir, "data", "faiss_index.bin")
+        self.index_path = index_path or os.path.join(base_dir, "data", "vector_index")
         self.knowledge_path = knowledge_path or os.path.join(base_dir, "data", "knowledge_base.json")
         
         # 确保目录存在
         os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
         
+        # 初始化向量索引
+        if FAISS_AVAILABLE:
+            self.index = faiss.IndexFlatIP(self.embedding_dim)  # 内积相似度
+            print(f"✓ 初始化 FAISS 索引 (dim={self.embedding_dim})")
+        else:
+            # 内存映射索引：启动时直接映射已持久化的向量，无需重新向量化
+            self.index = MmapVectorIndex(
+                self.embedding_dim, self.index_path, signature=self._encoder_signature(embedding_model)
+            )
+            print(f"✓ 打开向量索引 (dim={self.embedding_dim}, 已有 {len(self.index)} 条)")
+        
         # 尝试加载已有数据
         self._load_if_exists()
         
@@ -195,6 +147,12 @@ class HealthKnowledgeBase:
         if len(self.knowledge_items) == 0:
             self._init_default_knowledge()
     
+    def _encoder_signature(self, embedding_model: str) -> str:
+        """向量化模型标识，模型变化时已持久化的向量失效"""
+        if isinstance(self.encoder, SimpleEmbedding):
+            return f"{SimpleEmbedding.SIGNATURE}:{self.embedding_dim}"
+        return embedding_model
+    
     def _load_if_exists(self):
         """加载已存在的知识库"""
         try:
@@ -205,32 +163,45 @@ class HealthKnowledgeBase:
                     item = KnowledgeItem(**item_data)
                     self.knowledge_items[item.id] = item
                 print(f"✓ 加载知识库: {len(self.knowledge_items)} 条")
-                
-                # 重建索引
-                if len(self.knowledge_items) > 0:
-                    self._rebuild_index()
+            
+            # 重建索引
+            self._rebuild_index()
         except Exception as e:
             print(f"⚠️ 加载知识库失败: {e}")
     
     def _rebuild_index(self):
-        """重建向量索引"""
-        texts = []
-        ids = []
-        for item_id, item in self.knowledge_items.items():
-            texts.append(f"{item.title} {item.content}")
-            ids.append(item_id)
-        
-        if texts:
-            embeddings = self._encode_texts(texts)
-            if FAISS_AVAILABLE:
+        """重建向量索引（内存映射索引只补齐差异部分）"""
+        if FAISS_AVAILABLE:
+            texts = []
+            ids = []
+            for item_id, item in self.knowledge_items.items():
+                texts.append(f"{item.title} {item.content}")
+                ids.append(item_id)
+            
+            if texts:
+                embeddings = self._encode_texts(texts)
                 self.index = faiss.IndexFlatIP(self.embedding_dim)
                 self.index.add(embeddings)
-            else:
-                self.index = SimpleFAISS(self.embedding_dim)
-                self.index.add(embeddings, ids)
-            
-            self.id_to_index = {id_: i for i, id_ in enumerate(ids)}
-            print(f"✓ 重建向量索引: {len(ids)} 条")
+                self.id_to_index = {id_: i for i, id_ in enumerate(ids)}
+                print(f"✓ 重建向量索引: {len(ids)} 条")
+            return
+        
+        # 删除知识库中已不存在的条目
+        stale_ids = [id_ for id_ in self.index.id_to_row if id_ not in self.knowledge_items]
+        if stale_ids:
+            self.index.remove(stale_ids)
+        
+        # 只向量化索引中缺失的条目
+        missing = [item for item_id, item in self.knowledge_items.items()
+                   if item_id not in self.index.id_to_row]
+        if missing:
+            embeddings = self._encode_texts([f"{item.title} {item.content}" for item in missing])
+            self.index.add(embeddings, [item.id for item in missing], [item.category for item in missing])
+            self.index.flush()
+        
+        self.id_to_index = dict(self.index.id_to_row)
+        if stale_ids or missing:
+            print(f"✓ 同步向量索引: 新增 {len(missing)} 条，删除 {len(stale_ids)} 条")
     
     def _encode_texts(self, texts: List[str]) -> np.ndarray:
         """将文本转换为向量"""
@@ -406,12 +377,13 @@ class HealthKnowledgeBase:
             # 添加到索引
             if FAISS_AVAILABLE:
                 self.index.add(embedding.reshape(1, -1))
+                self.id_to_index[item.id] = len(self.id_to_index)
             else:
-                self.index.add(embedding.reshape(1, -1), [item.id])
+                self.index.add(embedding.reshape(1, -1), [item.id], [item.category])
+                self.id_to_index[item.id] = self.index.id_to_row[item.id]
             
             # 存储条目
             self.knowledge_items[item.id] = item
-            self.id_to_index[item.id] = len(self.id_to_index)
             
             return True
         except Exception as e:
@@ -473,24 +445,17 @@ class HealthKnowledgeBase:
                 if len(results) >= top_k:
                     break
         else:
-            scores, result_ids = self.index.search(query_embedding, top_k * 2)
+            # 分类在检索前过滤，不会因为其他分类占满 top-k 而漏掉结果
+            scores, result_ids = self.index.search(query_embedding, top_k, categories=category)
             
             results = []
             for score, item_id in zip(scores, result_ids):
                 if score < min_score:
+                    break
+                item = self.knowledge_items.get(item_id)
+                if item is None:
                     continue
-                if item_id not in self.knowledge_items:
-                    continue
-                    
-                item = self.knowledge_items[item_id]
-                
-                if category and item.category != category:
-                    continue
-                    
                 results.append((item, score))
-                
-                if len(results) >= top_k:
-                    break
         
         return results
     
@@ -538,11 +503,12 @@ class HealthKnowledgeBase:
             with open(self.knowledge_path, 'w', encoding='utf-8') as f:
                 json.dump(data, f, ensure_ascii=False, indent=2)
             
-            # 保存 FAISS 索引
+            # 保存向量索引
             if FAISS_AVAILABLE:
                 faiss.write_index(self.index, self.index_path)
             else:
-                self.index.save(self.index_path)
+                self.index.save()
+                self.id_to_index = dict(self.index.id_to_row)
             
             print(f"✓ 知识库已保存: {len(data)} 条")
             return True
@@ -0,0 +1,390 @@
+"""
+个人基线流式统计
+================
+
+calculate_personal_baseline 每次生成报告都要对 90 天历史数组重新计算均值、标准差、分位数等。
+这里把同样的统计拆成可以逐条更新的状态，持久化后读取时不再扫描历史：
+
+- Welford：均值/方差逐条更新，按天分桶，桶之间用 Chan 公式合并
+- 单调队列：窗口内的最小/最大值（每天只保留当天的极值，队列长度不超过窗口天数）
+- KLL 分位数草图：可合并，样本数不超过 k 时保存全部样本，分位数与 np.percentile 完全一致；
+  超过后按层压缩，空间 O(k)，p25/p75 为近似值
+
+MetricBaseline 维护一个按天滑动的窗口（默认 90 天）：新的一天到来时丢弃过期的天，
+并由剩余的日桶重新合并窗口统计（每天一次，O(窗口天数)），其余每条读数 O(1) 均摊。
+"""
+import math
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+class Welford:
+    """均值/方差的逐条更新（总体方差，与 np.std 默认的 ddof=0 一致）"""
+
+    __slots__ = ("count", "mean", "m2")
+
+    def __init__(self, count: int = 0, mean: float = 0.0, m2: float = 0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def merge(self, other: "Welford") -> None:
+        """合并另一组统计（Chan 并行公式）"""
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+
+    @property
+    def variance(self) -> float:
+        return max(self.m2, 0.0) / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def to_state(self) -> List[float]:
+        return [self.count, self.mean, self.m2]
+
+    @classmethod
+    def from_state(cls, state: List[float]) -> "Welford":
+        return cls(int(state[0]), float(state[1]), float(state[2]))
+
+
+class KLLSketch:
+    """
+    KLL 分位数草图（确定性压缩：奇偶偏移交替，结果可复现）
+
+    第 h 层的样本权重为 2^h；某层超过容量时排序后隔一个取一个提升到上一层。
+    只有第 0 层时保存的是全部样本，quantile 与 np.percentile（线性插值）完全一致。
+    """
+
+    __slots__ = ("k", "levels", "compactions")
+
+    def __init__(self, k: int = 200, levels: Optional[List[List[float]]] = None, compactions: int = 0):
+        self.k = k
+        self.levels = levels if levels is not None else [[]]
+        self.compactions = compactions
+
+    def __len__(self) -> int:
+        return sum(len(level) for level in self.levels)
+
+    @property
+    def is_exact(self) -> bool:
+        return len(self.levels) == 1
+
+    @property
+    def count(self) -> int:
+        """代表的样本数"""
+        return sum(len(level) << h for h, level in enumerate(self.levels))
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - 1 - level
+        return max(2, int(math.ceil(self.k * (2.0 / 3.0) ** depth)))
+
+    def _compress(self) -> None:
+        h = 0
+        while h < len(self.levels):
+            if len(self.levels[h]) >= self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append([])
+                items = sorted(self.levels[h])
+                leftover = [items.pop()] if len(items) % 2 else []
+                offset = self.compactions % 2
+                self.compactions += 1
+                self.levels[h + 1].extend(items[offset::2])
+                self.levels[h] = leftover
+            h += 1
+
+    def add(self, value: float) -> None:
+        self.levels[0].append(value)
+        if len(self.levels[0]) >= self._capacity(0):
+            self._compress()
+
+    def merge(self, other: "KLLSketch") -> None:
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for h, level in enumerate(other.levels):
+            self.levels[h].extend(level)
+        self.compactions += other.compactions
+        self._compress()
+
+    def quantile(self, q: float) -> Optional[float]:
+        """q 分位数（0-1），没有样本时返回 None"""
+        if self.is_exact:
+            if not self.levels[0]:
+                return None
+            return float(np.percentile(self.levels[0], q * 100))
+
+        values = np.concatenate([np.asarray(level, dtype=np.float64) for level in self.levels])
+        weights = np.concatenate([np.full(len(level), float(1 << h)) for h, level in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        values, weights = values[order], weights[order]
+        # 每个样本代表的秩区间取中点，在中点之间线性插值
+        cumulative = np.cumsum(weights)
+        positions = (cumulative - weights / 2) / cumulative[-1]
+        return float(np.interp(q, positions, values))
+
+    def to_state(self) -> Dict[str, Any]:
+        return {"k": self.k, "levels": self.levels, "c": self.compactions}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "KLLSketch":
+        return cls(int(state["k"]), [list(level) for level in state["levels"]], int(state["c"]))
+
+
+class DayBucket:
+    """一天内某项指标的统计"""
+
+    __slots__ = ("day", "stats", "min", "max", "sketch")
+
+    def __init__(self, day: int, sketch_k: int):
+        self.day = day
+        self.stats = Welford()
+        self.min = math.inf
+        self.max = -math.inf
+        self.sketch = KLLSketch(sketch_k)
+
+    def add(self, value: float) -> None:
+        self.stats.add(value)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.sketch.add(value)
+
+    def to_state(self) -> Dict[str, Any]:
+        return {"d": self.day, "w": self.stats.to_state(), "lo": self.min, "hi": self.max,
+                "q": self.sketch.to_state()}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "DayBucket":
+        bucket = cls.__new__(cls)
+        bucket.day = int(state["d"])
+        bucket.stats = Welford.from_state(state["w"])
+        bucket.min = float(state["lo"])
+        bucket.max = float(state["hi"])
+        bucket.sketch = KLLSketch.from_state(state["q"])
+        return bucket
+
+
+class MetricBaseline:
+    """
+    一项指标在最近 window_days 天（按日历日，含最新一天）内的流式统计
+
+    Args:
+        window_days: 窗口天数
+        sketch_k: 窗口分位数草图的容量（样本数不超过该值时分位数精确）
+        day_sketch_k: 每天分位数草图的容量
+    """
+
+    STATE_VERSION = 1
+
+    def __init__(self, window_days: int = 90, sketch_k: int = 200, day_sketch_k: int = 64):
+        self.window_days = window_days
+        self.sketch_k = sketch_k
+        self.day_sketch_k = day_sketch_k
+        self.end_day: Optional[int] = None
+        self.buckets: Deque[DayBucket] = deque()
+        self.stats = Welford()
+        self.sketch = KLLSketch(sketch_k)
+        # (日序号, 当天极值)，队首为窗口内的最小/最大值
+        self.min_queue: Deque[Tuple[int, float]] = deque()
+        self.max_queue: Deque[Tuple[int, float]] = deque()
+
+    @property
+    def start_day(self) -> Optional[int]:
+        return None if self.end_day is None else self.end_day - self.window_days + 1
+
+    # ------------------------------------------------------------------
+    # 更新
+    # ------------------------------------------------------------------
+
+    def add(self, value: float, day: int) -> bool:
+        """
+        加入一条读数
+
+        Args:
+            value: 读数
+            day: 日序号（date.toordinal()）
+
+        Returns:
+            bool: 是否计入窗口（早于窗口的读数忽略）
+        """
+        if value is None or math.isnan(value):
+            return False
+        value = float(value)
+        if self.end_day is None or day > self.end_day:
+            self.advance(day)
+        elif day < self.start_day:
+            return False
+
+        in_order = not self.buckets or day >= self.buckets[-1].day
+        if in_order:
+            if not self.buckets or self.buckets[-1].day != day:
+                self.buckets.append(DayBucket(day, self.day_sketch_k))
+            bucket = self.buckets[-1]
+        else:
+            bucket = self._bucket_for(day)
+        bucket.add(value)
+        self.stats.add(value)
+        self.sketch.add(value)
+
+        if in_order:
+            self._push_extreme(self.min_queue, day, value, lambda new, old: new <= old)
+            self._push_extreme(self.max_queue, day, value, lambda new, old: new >= old)
+        else:
+            # 乱序到达的过去某天：由日桶重建极值队列
+            self._rebuild_extremes()
+        return True
+
+    def add_many(self, readings: Iterable[Tuple[float, int]]) -> int:
+        """加入多条 (读数, 日序号)，返回计入窗口的条数"""
+        return sum(self.add(value, day) for value, day in readings)
+
+    def advance(self, day: int) -> None:
+        """窗口滑动到以 day 为最后一天，丢弃过期的天并重新合并窗口统计"""
+        if self.end_day is not None and day <= self.end_day:
+            return
+        self.end_day = day
+        start = self.start_day
+        expired = False
+        while self.buckets and self.buckets[0].day < start:
+            self.buckets.popleft()
+            expired = True
+        for queue in (self.min_queue, self.max_queue):
+            while queue and queue[0][0] < start:
+                queue.popleft()
+        if expired:
+            self._rebuild_window()
+
+    def _bucket_for(self, day: int) -> DayBucket:
+        for index, bucket in enumerate(self.buckets):
+            if bucket.day == day:
+                return bucket
+            if bucket.day > day:
+                new_bucket = DayBucket(day, self.day_sketch_k)
+                self.buckets.insert(index, new_bucket)
+                return new_bucket
+        new_bucket = DayBucket(day, self.day_sketch_k)
+        self.buckets.append(new_bucket)
+        return new_bucket
+
+    @staticmethod
+    def _push_extreme(queue: Deque[Tuple[int, float]], day: int, value: float, dominates) -> None:
+        if queue and queue[-1][0] == day and not dominates(value, queue[-1][1]):
+            # 当天已有更极端的值，同一天的值一起过期，新值不会成为窗口极值
+            return
+        while queue and dominates(value, queue[-1][1]):
+            queue.pop()
+        queue.append((day, value))
+
+    def _rebuild_extremes(self) -> None:
+        self.min_queue.clear()
+        self.max_queue.clear()
+        for bucket in self.buckets:
+            self._push_extreme(self.min_queue, bucket.day, bucket.min, lambda new, old: new <= old)
+            self._push_extreme(self.max_queue, bucket.day, bucket.max, lambda new, old: new >= old)
+
+    def _rebuild_window(self) -> None:
+        self.stats = Welford()
+        self.sketch = KLLSketch(self.sketch_k)
+        for bucket in self.buckets:
+            self.stats.merge(bucket.stats)
+            self.sketch.merge(KLLSketch.from_state(bucket.sketch.to_state()))
+
+    # ------------------------------------------------------------------
+    # 读取
+    # ------------------------------------------------------------------
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        窗口统计，键与 calculate_personal_baseline 的各指标一致
+        （count、mean、std、p25、p75、min、max、cv；没有读数时只有 count）
+        """
+        count = self.stats.count
+        if count == 0:
+            return {"count": 0}
+        mean, std = self.stats.mean, self.stats.std
+        return {
+            "count": count,
+            "mean": mean,
+            "std": std,
+            "p25": self.sketch.quantile(0.25),
+            "p75": self.sketch.quantile(0.75),
+            "min": self.min_queue[0][1],
+            "max": self.max_queue[0][1],
+            "cv": std / mean if mean != 0 else 0,
+        }
+
+    # ------------------------------------------------------------------
+    # 持久化
+    # ------------------------------------------------------------------
+
+    def to_state(self) -> Dict[str, Any]:
+        return {
+            "v": self.STATE_VERSION,
+            "days": self.window_days,
+            "k": [self.sketch_k, self.day_sketch_k],
+            "end": self.end_day,
+            "buckets": [bucket.to_state() for bucket in self.buckets],
+            "w": self.stats.to_state(),
+            "q": self.sketch.to_state(),
+            "lo": [list(item) for item in self.min_queue],
+            "hi": [list(item) for item in self.max_queue],
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any], window_days: Optional[int] = None) -> "MetricBaseline":
+        """
+        由 to_state 的结果恢复
+
+        window_days 与保存时不同（配置修改）时由日桶重新合并窗口统计，
+        新窗口比原来长时只能包含已保存的天数。
+        """
+        sketch_k, day_sketch_k = state["k"]
+        baseline = cls(int(state["days"]), int(sketch_k), int(day_sketch_k))
+        baseline.end_day = state["end"]
+        baseline.buckets = deque(DayBucket.from_state(item) for item in state["buckets"])
+        baseline.stats = Welford.from_state(state["w"])
+        baseline.sketch = KLLSketch.from_state(state["q"])
+        baseline.min_queue = deque((int(day), float(value)) for day, value in state["lo"])
+        baseline.max_queue = deque((int(day), float(value)) for day, value in state["hi"])
+        if window_days is not None and window_days != baseline.window_days:
+            baseline.window_days = window_days
+            if baseline.end_day is not None:
+                end_day, baseline.end_day = baseline.end_day, None
+                baseline.advance(end_day)
+                baseline._rebuild_window()
+                baseline._rebuild_extremes()
+        return baseline
+
+
+def exact_summary(values: Iterable[float]) -> Dict[str, Any]:
+    """由全部读数精确计算（与 calculate_personal_baseline 相同的 numpy 计算，用于校验和重建）"""
+    data = np.asarray([value for value in values if value is not None], dtype=np.float64)
+    if len(data) == 0:
+        return {"count": 0}
+    mean, std = float(np.mean(data)), float(np.std(data))
+    return {
+        "count": int(len(data)),
+        "mean": mean,
+        "std": std,
+        "p25": float(np.percentile(data, 25)),
+        "p75": float(np.percentile(data, 75)),
+        "min": float(np.min(data)),
+        "max": float(np.max(data)),
+        "cv": std / mean if mean != 0 else 0,
+    }
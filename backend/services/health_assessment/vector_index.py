@@ -0,0 +1,426 @@
+"""
+内存映射向量索引
+============================================================================
+
+替代原 SimpleFAISS（pickle 持久化 + 每次检索重新归一化整个矩阵）。
+
+存储格式（均以 index_path 为前缀）：
+- {index_path}.vectors  归一化后的 float32 向量，按行连续存放，通过 np.memmap 访问
+- {index_path}.log      追加日志（JSON Lines），每行记录一次元信息/批量新增/批量删除
+- 压缩时先写 {...}.vectors.compact / {...}.log.compact（日志以 commit 记录结尾），
+  再用 os.replace 换入；中断后打开索引时完成或丢弃未换入的压缩
+
+特点：
+1. 向量写入时即归一化，检索只需一次矩阵乘法
+2. 新增向量直接写入映射文件的空闲容量，容量按倍数扩展，不再整体 vstack
+3. 启动时只回放日志、映射向量文件，无需反序列化或重新向量化
+4. 检索使用 argpartition 取 top-k，支持批量查询和分类预过滤
+============================================================================
+"""
+
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+
+class MmapVectorIndex:
+    """
+    基于内存映射文件的内积（余弦相似度）向量索引
+
+    index_path 为 None 时只在内存中保存，不落盘。
+    """
+
+    # 向量文件初始容量（行）和扩容倍数
+    INITIAL_CAPACITY = 1024
+    GROWTH_FACTOR = 2
+    # 分块计算相似度的行数，限制大索引检索时的临时内存
+    SEARCH_BLOCK_ROWS = 65536
+    # 已删除行占比超过该比例时，保存时自动压缩
+    COMPACT_RATIO = 0.3
+
+    def __init__(self, dim: int, index_path: Optional[str] = None, signature: str = ""):
+        """
+        初始化索引
+
+        Args:
+            dim: 向量维度
+            index_path: 存储路径前缀，为 None 时为纯内存索引
+            signature: 向量化模型标识，与已存储的不一致时丢弃旧索引
+        """
+        self.dim = dim
+        self.index_path = index_path
+        self.signature = signature
+
+        self._vectors_path = f"{index_path}.vectors" if index_path else None
+        self._log_path = f"{index_path}.log" if index_path else None
+
+        self._capacity = 0
+        self._size = 0                          # 已使用的行数（含已删除行）
+        self._vectors: Optional[np.ndarray] = None
+        self._alive = np.zeros(0, dtype=bool)
+        self._category_codes = np.zeros(0, dtype=np.int32)
+
+        self.ids: List[Optional[str]] = []      # 行号 → ID（已删除行为 None）
+        self.id_to_row: Dict[str, int] = {}
+        self._categories: List[str] = []        # 分类编码 → 分类名
+        self._category_to_code: Dict[str, int] = {}
+
+        if index_path:
+            os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
+            self._open()
+
+    # ------------------------------------------------------------------
+    # 存储
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _read_log(path: str) -> List[Dict]:
+        entries = []
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        break  # 末尾未写完的记录（进程中断），忽略
+        return entries
+
+    def _recover_compaction(self):
+        """上次压缩中断时：压缩日志已完整写入则完成换入，否则丢弃压缩文件"""
+        log_tmp, vectors_tmp = f"{self._log_path}.compact", f"{self._vectors_path}.compact"
+        if os.path.exists(log_tmp) and self._read_log(log_tmp)[-1:] == [{"op": "commit"}]:
+            if os.path.exists(vectors_tmp):
+                os.replace(vectors_tmp, self._vectors_path)
+            os.replace(log_tmp, self._log_path)
+            return
+        for path in (log_tmp, vectors_tmp):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _open(self):
+        """打开已有索引：回放日志并映射向量文件"""
+        self._recover_compaction()
+        entries = self._read_log(self._log_path)
+
+        meta = entries[0] if entries and entries[0].get("op") == "meta" else None
+        if meta is None or meta.get("dim") != self.dim or meta.get("signature") != self.signature:
+            self.reset()
+            return
+
+        vector_bytes = os.path.getsize(self._vectors_path) if os.path.exists(self._vectors_path) else 0
+        capacity = vector_bytes // (4 * self.dim)
+
+        self._map(max(capacity, self.INITIAL_CAPACITY))
+        self._alive = np.zeros(self._capacity, dtype=bool)
+        self._category_codes = np.zeros(self._capacity, dtype=np.int32)
+
+        for entry in entries[1:]:
+            op = entry.get("op")
+            if op == "add":
+                # 向量先于日志写入，日志是有效行的唯一依据；超出文件容量的记录截断（文件损坏时）
+                count = min(len(entry["ids"]), capacity - self._size)
+                self._register_rows(entry["ids"][:count], entry["categories"][:count])
+            elif op == "del":
+                for id_ in entry["ids"]:
+                    self._unregister_id(id_)
+
+    def _map(self, capacity: int):
+        """按容量（重新）映射向量文件"""
+        if self._vectors_path is None:
+            vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+            if self._vectors is not None and self._size:
+                vectors[:self._size] = self._vectors[:self._size]
+            self._vectors = vectors
+        else:
+            if isinstance(self._vectors, np.memmap):
+                self._vectors.flush()
+            self._vectors = None
+            with open(self._vectors_path, 'ab') as f:
+                f.truncate(max(capacity * self.dim * 4, os.path.getsize(self._vectors_path)))
+            self._vectors = np.memmap(
+                self._vectors_path, dtype=np.float32, mode='r+', shape=(capacity, self.dim)
+            )
+        self._capacity = capacity
+
+    def _ensure_capacity(self, extra: int):
+        """保证还能再写入 extra 行"""
+        needed = self._size + extra
+        if needed <= self._capacity:
+            return
+        capacity = max(self._capacity, self.INITIAL_CAPACITY)
+        while capacity < needed:
+            capacity *= self.GROWTH_FACTOR
+        self._map(capacity)
+
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:self._size] = self._alive[:self._size]
+        self._alive = alive
+        codes = np.zeros(capacity, dtype=np.int32)
+        codes[:self._size] = self._category_codes[:self._size]
+        self._category_codes = codes
+
+    def _append_log(self, entries: Iterable[Dict]):
+        if self._log_path is None:
+            return
+        with open(self._log_path, 'a', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def _meta_entry(self) -> Dict:
+        return {"op": "meta", "dim": self.dim, "signature": self.signature}
+
+    def _clear(self):
+        """清空内存中的状态（不动磁盘文件）"""
+        self._vectors = None
+        self._capacity = 0
+        self._size = 0
+        self.ids = []
+        self.id_to_row = {}
+        self._categories = []
+        self._category_to_code = {}
+        self._alive = np.zeros(0, dtype=bool)
+        self._category_codes = np.zeros(0, dtype=np.int32)
+
+    def reset(self):
+        """清空索引（同时清空磁盘文件）"""
+        self._clear()
+        if self._log_path is not None:
+            with open(self._vectors_path, 'wb'):
+                pass
+            with open(self._log_path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(self._meta_entry()) + "\n")
+        self._ensure_capacity(0)
+
+    def flush(self):
+        """将映射的向量刷新到磁盘"""
+        if isinstance(self._vectors, np.memmap):
+            self._vectors.flush()
+
+    def save(self):
+        """持久化（日志是实时追加的，这里只需刷新向量；删除较多时顺带压缩）"""
+        if self._size and self.deleted_count / self._size > self.COMPACT_RATIO:
+            self.compact()
+        self.flush()
+
+    def compact(self):
+        """去掉已删除的行，重写向量文件和日志
+
+        新文件写完后才用 os.replace 换入，任何时刻中断，磁盘上都是完整的旧索引或新索引。
+        """
+        rows = np.flatnonzero(self._alive[:self._size])
+        ids = [self.ids[i] for i in rows]
+        categories = [self._categories[self._category_codes[i]] for i in rows]
+
+        if self._log_path is None:
+            vectors = np.array(self._vectors[rows], dtype=np.float32)
+            self._clear()
+            self._ensure_capacity(0)
+            if ids:
+                self._add_normalized(vectors, ids, categories)
+            return
+
+        log_tmp, vectors_tmp = f"{self._log_path}.compact", f"{self._vectors_path}.compact"
+        compacted = np.memmap(
+            vectors_tmp, dtype=np.float32, mode='w+',
+            shape=(max(len(rows), self.INITIAL_CAPACITY), self.dim)
+        )
+        for start in range(0, len(rows), self.SEARCH_BLOCK_ROWS):
+            block = rows[start:start + self.SEARCH_BLOCK_ROWS]
+            compacted[start:start + len(block)] = self._vectors[block]
+        compacted.flush()
+        del compacted
+
+        entries = [self._meta_entry()]
+        if ids:
+            entries.append({"op": "add", "ids": ids, "categories": categories})
+        with open(log_tmp, 'w', encoding='utf-8') as f:
+            for entry in entries + [{"op": "commit"}]:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+        # 压缩日志写完即提交：之后中断时 _recover_compaction 会完成换入
+        self._clear()
+        os.replace(vectors_tmp, self._vectors_path)
+        os.replace(log_tmp, self._log_path)
+        self._open()
+
+    # ------------------------------------------------------------------
+    # 增删
+    # ------------------------------------------------------------------
+
+    def _category_code(self, category: str) -> int:
+        code = self._category_to_code.get(category)
+        if code is None:
+            code = len(self._categories)
+            self._categories.append(category)
+            self._category_to_code[category] = code
+        return code
+
+    def _register_rows(self, ids: Sequence[str], categories: Sequence[str]):
+        """登记新写入的若干行（同 ID 的旧行标记为删除）"""
+        for id_ in ids:
+            self._unregister_id(id_)
+
+        start = self._size
+        end = start + len(ids)
+        self.ids.extend(ids)
+        self._alive[start:end] = True
+        self._category_codes[start:end] = [self._category_code(c) for c in categories]
+        self._size = end
+
+        rows = dict(zip(ids, range(start, end)))
+        if len(rows) < len(ids):
+            # 同一批次内的重复 ID，只保留最后一行
+            for row in range(start, end):
+                if rows[self.ids[row]] != row:
+                    self._alive[row] = False
+                    self.ids[row] = None
+        self.id_to_row.update(rows)
+
+    def _unregister_id(self, id_: str) -> bool:
+        row = self.id_to_row.pop(id_, None)
+        if row is None:
+            return False
+        self._alive[row] = False
+        self.ids[row] = None
+        return True
+
+    def _add_normalized(self, vectors: np.ndarray, ids: Sequence[str], categories: Sequence[str]):
+        self._ensure_capacity(len(ids))
+        start = self._size
+        self._vectors[start:start + len(ids)] = vectors
+        # 先落盘向量，再追加日志，中断时以日志为准
+        self.flush()
+        self._append_log([{"op": "add", "ids": ids, "categories": categories}])
+        self._register_rows(ids, categories)
+
+    def add(self, vectors: np.ndarray, ids: Sequence[str], categories: Optional[Sequence[str]] = None):
+        """
+        添加向量（已存在的 ID 会被覆盖）
+
+        Args:
+            vectors: (n, dim) 向量
+            ids: 对应的 ID
+            categories: 对应的分类（用于检索时预过滤）
+        """
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        if len(vectors) != len(ids):
+            raise ValueError(f"向量数 {len(vectors)} 与 ID 数 {len(ids)} 不一致")
+        if categories is None:
+            categories = [""] * len(ids)
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.maximum(norms, 1e-8)
+        self._add_normalized(vectors, list(ids), list(categories))
+
+    def remove(self, ids: Iterable[str]) -> int:
+        """删除向量，返回实际删除的数量"""
+        removed = [id_ for id_ in ids if self._unregister_id(id_)]
+        if removed:
+            self._append_log([{"op": "del", "ids": removed}])
+        return len(removed)
+
+    # ------------------------------------------------------------------
+    # 检索
+    # ------------------------------------------------------------------
+
+    def _filter_mask(self, categories: Optional[Union[str, Iterable[str]]]) -> np.ndarray:
+        """有效行 + 分类过滤的掩码"""
+        mask = self._alive[:self._size]
+        if categories is None:
+            return mask
+        if isinstance(categories, str):
+            categories = [categories]
+        codes = [self._category_to_code[c] for c in categories if c in self._category_to_code]
+        return mask & np.isin(self._category_codes[:self._size], codes)
+
+    def search_batch(
+        self,
+        queries: np.ndarray,
+        k: int = 5,
+        categories: Optional[Union[str, Iterable[str]]] = None,
+    ) -> List[Tuple[List[float], List[str]]]:
+        """
+        批量检索
+
+        Args:
+            queries: (q, dim) 查询向量
+            k: 每个查询返回的结果数
+            categories: 只在这些分类中检索
+
+        Returns:
+            每个查询一个 (相似度列表, ID 列表)，按相似度降序
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-8)
+        num_queries = len(queries)
+
+        mask = self._filter_mask(categories)
+        k = min(k, int(mask.sum()))
+        if k <= 0:
+            return [([], []) for _ in range(num_queries)]
+
+        # 分块计算，每块只保留 top-k 候选
+        best_scores = np.full((num_queries, 0), -np.inf, dtype=np.float32)
+        best_rows = np.zeros((num_queries, 0), dtype=np.int64)
+        for start in range(0, self._size, self.SEARCH_BLOCK_ROWS):
+            end = min(start + self.SEARCH_BLOCK_ROWS, self._size)
+            block_mask = mask[start:end]
+            if not block_mask.any():
+                continue
+            scores = queries @ self._vectors[start:end].T      # (q, block)
+            scores[:, ~block_mask] = -np.inf
+
+            block_k = min(k, end - start)
+            top = np.argpartition(-scores, block_k - 1, axis=1)[:, :block_k]
+            best_scores = np.concatenate([best_scores, np.take_along_axis(scores, top, axis=1)], axis=1)
+            best_rows = np.concatenate([best_rows, top + start], axis=1)
+
+            if best_scores.shape[1] > k:
+                keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                best_rows = np.take_along_axis(best_rows, keep, axis=1)
+
+        order = np.argsort(-best_scores, axis=1, kind='stable')
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        best_rows = np.take_along_axis(best_rows, order, axis=1)
+
+        results = []
+        for scores, rows in zip(best_scores, best_rows):
+            valid = np.isfinite(scores)
+            results.append((
+                [float(s) for s in scores[valid]],
+                [self.ids[r] for r in rows[valid]],
+            ))
+        return results
+
+    def search(
+        self,
+        query_vector: np.ndarray,
+        k: int = 5,
+        categories: Optional[Union[str, Iterable[str]]] = None,
+    ) -> Tuple[List[float], List[str]]:
+        """检索单个查询向量，返回 (相似度列表, ID 列表)"""
+        return self.search_batch(np.asarray(query_vector).reshape(1, -1), k, categories)[0]
+
+    # ------------------------------------------------------------------
+    # 信息
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.id_to_row)
+
+    @property
+    def deleted_count(self) -> int:
+        return self._size - len(self.id_to_row)
+
+    def get_vector(self, id_: str) -> Optional[np.ndarray]:
+        """获取已归一化的向量"""
+        row = self.id_to_row.get(id_)
+        return None if row is None else np.array(self._vectors[row])
@@ -6,6 +6,7 @@ YangSheng Health Report Generator
 """
 
 import json
+import uuid
 from datetime import datetime, date, timedelta
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
@@ -44,7 +45,8 @@ class YangShengReportGenerator:
         current_measurements: Dict,
         historical_data: Optional[Dict] = None,
         baseline_data: Optional[Dict] = None,
-        trend_window_days: int = 30
+        trend_window_days: int = 30,
+        db=None
     ) -> HealthReportData:
         """
         生成完整健康报告
@@ -55,13 +57,18 @@ class YangShengReportGenerator:
             historical_data: 历史数据（用于趋势分析）
             baseline_data: 基线数据（用于对比）
             trend_window_days: 趋势分析时间窗口
+            db: 数据库会话；baseline_data 为空时由 load_personal_baseline 读取已存的个人基线
         
         Returns:
             HealthReportData 完整报告数据
         """
+        if baseline_data is None and db is not None:
+            loaded = self.load_personal_baseline(db, elder_info.elder_id, historical_data)
+            # 只有 baseline_days 时表示还没有任何指标的基线
+            baseline_data = loaded if len(loaded) > 1 else None
+        
         # 设置个性化评估器
-        if baseline_data:
-            self.personalized_evaluator = PersonalizedEvaluator(baseline_data)
+        self.personalized_evaluator = PersonalizedEvaluator(baseline_data) if baseline_data else None
         
         # 生成报告ID
         report_id = f"RPT_{datetime.now().strftime('%Y%m%d%H%M%S')}_{elder_info.elder_id}"
@@ -91,6 +98,18 @@ class YangShengReportGenerator:
         
         return report
     
+    def _with_baseline_comparison(self, indicator_key: str, value: Optional[float], status_text: str) -> str:
+        """有个人基线时在状态描述后附上与个人历史平均水平的对比"""
+        if self.personalized_evaluator is None:
+            return status_text
+        _, _, comparison = self.personalized_evaluator.evaluate_with_baseline(indicator_key, value)
+        return f"{status_text}，{comparison}" if comparison else status_text
+    
+    def _create_indicator(self, indicator_key: str, value: Optional[float], gender: str) -> VitalSignIndicator:
+        indicator = self.evaluator.create_vital_sign_indicator(indicator_key, value, gender)
+        indicator.status_text = self._with_baseline_comparison(indicator_key, value, indicator.status_text)
+        return indicator
+    
     def _build_vital_signs(self, measurements: Dict, gender: str) -> VitalSigns:
         """构建生命体征数据"""
         vital_signs = VitalSigns()
@@ -103,21 +122,15 @@ class YangShengReportGenerator:
         
         # 心率
         if 'heart_rate' in measurements:
-            vital_signs.heart_rate = self.evaluator.create_vital_sign_indicator(
-                'heart_rate', measurements['heart_rate'], gender
-            )
+            vital_signs.heart_rate = self._create_indicator('heart_rate', measurements['heart_rate'], gender)
         
         # 收缩压
         if 'systolic_bp' in measurements:
-            vital_signs.systolic_bp = self.evaluator.create_vital_sign_indicator(
-                'systolic_bp', measurements['systolic_bp'], gender
-            )
+            vital_signs.systolic_bp = self._create_indicator('systolic_bp', measurements['systolic_bp'], gender)
         
         # 舒张压
         if 'diastolic_bp' in measurements:
-            vital_signs.diastolic_bp = self.evaluator.create_vital_sign_indicator(
-                'diastolic_bp', measurements['diastolic_bp'], gender
-            )
+            vital_signs.diastolic_bp = self._create_indicator('diastolic_bp', measurements['diastolic_bp'], gender)
         
         # 脉率
         if 'pulse_rate' in measurements:
@@ -145,6 +158,7 @@ class YangShengReportGenerator:
                 sugar_key = 'blood_sugar_random'
             
             status, status_text = self.evaluator.evaluate(sugar_key, measurements['blood_sugar'])
+            status_text = self._with_baseline_comparison(sugar_key, measurements['blood_sugar'], status_text)
             metabolic.blood_sugar = VitalSignIndicator(
                 name='血糖',
                 value=measurements['blood_sugar'],
@@ -531,10 +545,38 @@ class YangShengReportGenerator:
         
         return patterns
     
+    def load_personal_baseline(
+        self,
+        db,
+        elderly_id,
+        historical_data: Optional[Dict] = None,
+        as_of: Optional[date] = None
+    ) -> Dict:
+        """
+        读取 health_baselines 中增量维护的个人基线（一次查询，不再由历史数组重新计算）
+        
+        未存储的指标（体重趋势、睡眠、血尿酸等）仍由 historical_data 计算。
+        
+        Args:
+            db: 数据库会话
+            elderly_id: 老人档案ID（UUID 或其字符串）
+            historical_data: 历史数据字典，可为空
+            as_of: 基线窗口截止日期，默认今天
+        """
+        from repositories.health_baseline_repository import HealthBaselineRepository
+        
+        if not isinstance(elderly_id, uuid.UUID):
+            elderly_id = uuid.UUID(str(elderly_id))
+        stored = HealthBaselineRepository(db).get_baseline_data(elderly_id, as_of)
+        return self.calculate_personal_baseline(
+            historical_data or {}, days=stored['baseline_days'], stored_baseline=stored
+        )
+    
     def calculate_personal_baseline(
         self,
         historical_data: Dict,
-        days: int = 90
+        days: int = 90,
+        stored_baseline: Optional[Dict] = None
     ) -> Dict:
         """
         计算个人基线区间
@@ -544,11 +586,20 @@ class YangShengReportGenerator:
         Args:
             historical_data: 历史数据字典
             days: 基线计算天数
+            stored_baseline: 已增量维护的基线（HealthBaselineRepository.get_baseline_data），
+                其中的指标直接使用，不再由历史数据重新计算
         
         Returns:
             个人基线数据字典
         """
         baseline = {'baseline_days': days}
+        stored = {k: v for k, v in (stored_baseline or {}).items() if k != 'baseline_days'}
+        if stored:
+            # 体重趋势仍由历史数据计算，其余已有的指标跳过
+            historical_data = {
+                k: v for k, v in historical_data.items()
+                if k == 'weight_history' or k[:-len('_history')] not in stored
+            }
         
         # 计算血压基线
         if 'systolic_bp_history' in historical_data:
@@ -638,6 +689,11 @@ class YangShengReportGenerator:
                     'max': float(np.max(uric_data))
                 }
         
+        for metric, values in stored.items():
+            if metric == 'weight' and 'weight' in baseline:
+                values = {**values, 'trend': baseline['weight']['trend']}
+            baseline[metric] = values
+        
         return baseline
     
     def detect_change_points(
@@ -672,7 +728,10 @@ class YangShengReportGenerator:
         else:
             change_points = self._detect_with_cusum(values, threshold)
         
-        # 生成描述
+        return self._change_point_result(change_points, metric_name)
+    
+    def _change_point_result(self, change_points: List[Dict], metric_name: str) -> Dict:
+        """由变点列表生成变点检测结果（描述使用变点中的前后均值和变化幅度）"""
         if not change_points:
             return {
                 'has_change_point': False,
@@ -684,14 +743,12 @@ class YangShengReportGenerator:
         descriptions = []
         for cp in change_points:
             idx = cp['index']
-            direction = cp['direction']
+            before_mean = cp['before_mean']
+            after_mean = cp['after_mean']
+            change_pct = cp['change_percent']
             
-            if idx > 0 and idx < len(values):
-                before_mean = np.mean(values[:idx])
-                after_mean = np.mean(values[idx:])
-                change_pct = abs(after_mean - before_mean) / before_mean * 100 if before_mean != 0 else 0
-                
-                if direction == 'up':
+            if idx >= 0:
+                if cp['direction'] == 'up':
                     descriptions.append(
                         f"第{idx+1}天起{metric_name}明显上升（从{before_mean:.1f}升至{after_mean:.1f}，变化{change_pct:.0f}%）"
                     )
@@ -793,12 +850,18 @@ class YangShengReportGenerator:
         
         return change_points
     
-    def analyze_all_change_points(self, historical_data: Dict) -> Dict[str, Dict]:
+    def analyze_all_change_points(
+        self,
+        historical_data: Dict,
+        detected: Optional[Dict[str, List[Dict]]] = None
+    ) -> Dict[str, Dict]:
         """
         分析所有指标的变点
         
         Args:
             historical_data: 历史数据字典
+            detected: 在线检测已得到的变点（ChangePointRepository.get_change_points），
+                其中的指标直接生成结果，不再对历史数组重新检测
         
         Returns:
             各指标的变点分析结果
@@ -815,7 +878,10 @@ class YangShengReportGenerator:
         }
         
         for key, (name, unit) in indicator_mapping.items():
-            if key in historical_data and len(historical_data[key]) >= 5:
+            # 在线检测的指标：有变点，或有历史数据但没有变点（平稳）时直接使用检测结果
+            if detected is not None and key in detected and (detected[key] or key in historical_data):
+                results[key] = self._change_point_result(detected[key], name)
+            elif key in historical_data and len(historical_data[key]) >= 5:
                 results[key] = self.detect_change_points(
                     historical_data[key],
                     metric_name=name
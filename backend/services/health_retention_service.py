@@ -0,0 +1,87 @@
+"""
+健康记录保留期服务
+==================
+
+每天运行一次：
+1. health_records 为分区表时预建未来几个月的分区
+2. HEALTH_RECORD_RETENTION_DAYS > 0 时，把超过保留期的原始记录汇总到 health_record_daily 后删除
+   （整月的分区直接删除，其余按天分批删除）
+
+数据库操作是同步的，放在线程中执行，不阻塞事件循环。
+"""
+import asyncio
+import logging
+from datetime import date, timedelta
+from typing import Any, Dict, Optional
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class HealthRetentionService:
+    """健康记录保留期清理与分区维护"""
+
+    INTERVAL_SECONDS = 24 * 3600
+    # 启动后延迟执行，避开启动时的数据库压力
+    STARTUP_DELAY_SECONDS = 300
+
+    def __init__(self, retention_days: Optional[int] = None):
+        self.retention_days = settings.HEALTH_RECORD_RETENTION_DAYS if retention_days is None else retention_days
+        self._task: Optional[asyncio.Task] = None
+        self.last_result: Optional[Dict[str, Any]] = None
+
+    def run_once(self) -> Dict[str, Any]:
+        """执行一次分区维护和保留期清理（同步）"""
+        from database.database import SessionLocal
+        from database import partitioning
+        from repositories.health_rollup_repository import HealthRollupRepository
+
+        result: Dict[str, Any] = {"partitions_created": [], "rolled_up": 0, "deleted": 0, "partitions_dropped": 0}
+        db = SessionLocal()
+        try:
+            result["partitions_created"] = partitioning.ensure_month_partitions(db.connection())
+            db.commit()
+
+            if self.retention_days > 0:
+                cutoff = date.today() - timedelta(days=self.retention_days)
+                result.update(HealthRollupRepository(db).archive_before(cutoff))
+                logger.info(
+                    f"健康记录保留期清理完成（{cutoff} 之前）: 汇总 {result['rolled_up']} 行，"
+                    f"删除 {result['deleted']} 条，删除分区 {result['partitions_dropped']} 个"
+                )
+        finally:
+            db.close()
+
+        self.last_result = result
+        return result
+
+    async def _run(self) -> None:
+        await asyncio.sleep(self.STARTUP_DELAY_SECONDS)
+        while True:
+            try:
+                await asyncio.to_thread(self.run_once)
+            except Exception as e:
+                logger.error(f"健康记录保留期任务失败: {str(e)}")
+            await asyncio.sleep(self.INTERVAL_SECONDS)
+
+    def start(self) -> None:
+        """在当前事件循环上启动定时任务（重复调用无副作用）"""
+        if self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.info("🗄️ 健康记录保留期任务已启动")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+# 全局实例
+health_retention_service = HealthRetentionService()
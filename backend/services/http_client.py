@@ -0,0 +1,191 @@
+"""
+共享 HTTP 客户端
+================
+
+为各个大模型服务商提供长连接、连接池化的 HTTP 客户端。
+
+特点：
+1. 每个服务商一个长生命周期的 httpx 客户端，复用 TCP/TLS 连接（keep-alive）
+2. 安装了 h2 时自动启用 HTTP/2
+3. 每个服务商独立的并发上限和超时配置
+4. 同时提供异步接口（供 FastAPI 路由使用）和同步接口（供旧代码使用）
+"""
+import asyncio
+import logging
+import threading
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# 检查 HTTP/2 依赖
+try:
+    import h2  # noqa: F401
+    HAS_HTTP2 = True
+except ImportError:
+    HAS_HTTP2 = False
+
+
+class ProviderHTTPClient:
+    """单个服务商的共享 HTTP 客户端"""
+
+    def __init__(
+        self,
+        name: str,
+        timeout: float = 60.0,
+        connect_timeout: float = 10.0,
+        max_connections: int = 50,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 60.0,
+        max_concurrency: int = 16,
+        http2: bool = True,
+    ):
+        """
+        Args:
+            name: 服务商名称（用于日志）
+            timeout: 默认读写超时（秒）
+            connect_timeout: 建立连接超时（秒）
+            max_connections: 连接池最大连接数
+            max_keepalive_connections: 保持的空闲长连接数
+            keepalive_expiry: 空闲长连接的保留时间（秒）
+            max_concurrency: 同时进行的请求数上限
+            http2: 是否尝试启用 HTTP/2（需要安装 h2）
+        """
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.http2 = http2 and HAS_HTTP2
+        self._timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+
+        self._lock = threading.Lock()
+        self._sync_client: Optional[httpx.Client] = None
+        self._sync_semaphore = threading.BoundedSemaphore(max_concurrency)
+
+        # 异步客户端和信号量绑定在创建它们的事件循环上，每个事件循环一份；
+        # 事件循环被回收时对应的条目自动移除
+        self._async_clients = weakref.WeakKeyDictionary()  # 事件循环 → (客户端, 信号量)
+
+    @property
+    def sync_client(self) -> httpx.Client:
+        """同步客户端（懒加载）"""
+        if self._sync_client is None:
+            with self._lock:
+                if self._sync_client is None:
+                    self._sync_client = httpx.Client(
+                        timeout=self._timeout, limits=self._limits, http2=self.http2
+                    )
+                    logger.info(f"[HTTP] {self.name} 同步客户端已创建 (http2={self.http2})")
+        return self._sync_client
+
+    def _get_async_client(self) -> Tuple[httpx.AsyncClient, asyncio.Semaphore]:
+        """当前事件循环的异步客户端和信号量（懒加载，按事件循环隔离）"""
+        loop = asyncio.get_running_loop()
+        entry = self._async_clients.get(loop)
+        if entry is None:
+            with self._lock:
+                # 已关闭的事件循环上的连接无法再关闭，直接丢弃
+                for old_loop in [old for old in self._async_clients if old.is_closed()]:
+                    del self._async_clients[old_loop]
+                entry = (
+                    httpx.AsyncClient(timeout=self._timeout, limits=self._limits, http2=self.http2),
+                    asyncio.Semaphore(self.max_concurrency),
+                )
+                self._async_clients[loop] = entry
+            logger.info(f"[HTTP] {self.name} 异步客户端已创建 (http2={self.http2})")
+        return entry
+    
+    def post(self, url: str, timeout: Optional[float] = None, **kwargs: Any) -> httpx.Response:
+        """同步 POST 请求"""
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        with self._sync_semaphore:
+            return self.sync_client.post(url, **kwargs)
+
+    @contextmanager
+    def stream(self, method: str, url: str, timeout: Optional[float] = None,
+               **kwargs: Any) -> Iterator[httpx.Response]:
+        """同步流式请求"""
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        with self._sync_semaphore:
+            with self.sync_client.stream(method, url, **kwargs) as response:
+                yield response
+
+    async def apost(self, url: str, timeout: Optional[float] = None, **kwargs: Any) -> httpx.Response:
+        """异步 POST 请求"""
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        client, semaphore = self._get_async_client()
+        async with semaphore:
+            return await client.post(url, **kwargs)
+
+    @asynccontextmanager
+    async def astream(self, method: str, url: str, timeout: Optional[float] = None,
+                      **kwargs: Any) -> AsyncIterator[httpx.Response]:
+        """异步流式请求"""
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        client, semaphore = self._get_async_client()
+        async with semaphore:
+            async with client.stream(method, url, **kwargs) as response:
+                yield response
+
+    def close(self) -> None:
+        """关闭同步客户端"""
+        with self._lock:
+            if self._sync_client is not None:
+                self._sync_client.close()
+                self._sync_client = None
+
+    async def aclose(self) -> None:
+        """关闭全部客户端"""
+        current = asyncio.get_running_loop()
+        with self._lock:
+            entries = list(self._async_clients.items())
+            self._async_clients.clear()
+        for loop, (client, _) in entries:
+            if loop is current:
+                await client.aclose()
+            elif loop.is_running():
+                # 其他事件循环上的客户端交给所属循环关闭
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        self.close()
+
+
+# 服务商名称 → 共享客户端
+_provider_clients: Dict[str, ProviderHTTPClient] = {}
+_registry_lock = threading.Lock()
+
+
+def get_provider_client(name: str, **config: Any) -> ProviderHTTPClient:
+    """
+    获取服务商的共享客户端，首次调用时按 config 创建
+
+    Args:
+        name: 服务商名称，如 "siliconflow"、"spark"
+        **config: ProviderHTTPClient 的构造参数，仅在首次创建时生效
+    """
+    client = _provider_clients.get(name)
+    if client is None:
+        with _registry_lock:
+            client = _provider_clients.get(name)
+            if client is None:
+                client = ProviderHTTPClient(name, **config)
+                _provider_clients[name] = client
+    return client
+
+
+async def close_all_clients() -> None:
+    """关闭所有共享客户端（应用关闭时调用）"""
+    for client in list(_provider_clients.values()):
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"[HTTP] 关闭 {client.name} 客户端失败: {e}")
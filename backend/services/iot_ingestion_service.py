@@ -0,0 +1,463 @@
+"""
+IoT 生命体征写入流水线
+======================
+
+设备上报的数据不再只保存在进程内列表中，而是经过：
+
+  HTTP POST → 环形缓冲（最新值查询） → 有界异步队列 → 微批写入 HealthRecord
+
+特点：
+1. 有界队列 + 背压：队列满时短暂等待，仍满则拒绝（接口返回 503），不静默丢弃
+2. 微批写入：后台任务按条数/时间攒批，一次事务多行 INSERT
+3. 设备绑定持久化到 device_bindings 表，进程内带 TTL 的读缓存，多个 worker 共享
+4. 每个设备一个定长环形缓冲，最新值查询不访问数据库
+5. 同一事务中更新 latest_vitals 快照（"最新/今日"类接口只读快照）和 health_baselines 个人基线
+6. 同一事务中更新在线变点检测器，检测到指标均值突变时写入 health_change_points 并生成预警
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from database.database import SessionLocal
+from database.models import HealthRecordStatus
+from services.latest_vitals_cache import latest_vitals_cache
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionBackpressureError(Exception):
+    """写入队列已满，调用方应稍后重试"""
+    pass
+
+
+class DeviceRingBuffer:
+    """按设备保存最近 N 条数据的环形缓冲"""
+
+    def __init__(self, capacity_per_device: int = 100):
+        self.capacity_per_device = capacity_per_device
+        # device_id -> deque[(序号, 数据)]，序号用于跨设备合并排序
+        self._buffers: Dict[str, Deque[Tuple[int, dict]]] = {}
+        self._seq = 0
+
+    def append(self, record: dict) -> None:
+        device_id = record.get("device_id") or ""
+        buffer = self._buffers.get(device_id)
+        if buffer is None:
+            buffer = deque(maxlen=self.capacity_per_device)
+            self._buffers[device_id] = buffer
+        self._seq += 1
+        buffer.append((self._seq, record))
+
+    def latest(self, device_id: Optional[str] = None, limit: int = 10) -> List[dict]:
+        """最新的 limit 条数据（按时间升序，与原接口一致）"""
+        if limit <= 0:
+            return []
+        if device_id is not None:
+            buffer = self._buffers.get(device_id)
+            return [record for _, record in list(buffer)[-limit:]] if buffer else []
+
+        # 各设备缓冲内部有序，取每个设备的最后 limit 条再合并
+        candidates = []
+        for buffer in self._buffers.values():
+            candidates.extend(list(buffer)[-limit:])
+        candidates.sort(key=lambda item: item[0])
+        return [record for _, record in candidates[-limit:]]
+
+    def last_per_device(self) -> Dict[str, dict]:
+        """每个设备的最后一条数据"""
+        return {device_id: buffer[-1][1] for device_id, buffer in self._buffers.items() if buffer}
+
+    def size(self) -> int:
+        return sum(len(buffer) for buffer in self._buffers.values())
+
+
+class DeviceBindingCache:
+    """
+    设备绑定读缓存
+
+    绑定关系以数据库为准，缓存项带 TTL，其他 worker 修改的绑定在 TTL 内生效。
+    """
+
+    def __init__(self, ttl_seconds: float = 60.0):
+        self.ttl_seconds = ttl_seconds
+        # device_id -> (user_id, elderly_id, 过期时间)
+        self._devices: Dict[str, Tuple[Optional[str], Optional[uuid.UUID], float]] = {}
+        # 上报的 user_id -> (elderly_id, 过期时间)
+        self._users: Dict[str, Tuple[Optional[uuid.UUID], float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, device_id: str) -> Tuple[Optional[str], Optional[uuid.UUID]]:
+        """获取设备绑定的 (user_id, elderly_id)，未绑定返回 (None, None)（同步，可能访问数据库）"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._devices.get(device_id)
+        if entry is not None and entry[2] > now:
+            return entry[0], entry[1]
+
+        from repositories.device_repository import DeviceBindingRepository
+
+        db = SessionLocal()
+        try:
+            binding = DeviceBindingRepository(db).get_by_device_id(device_id)
+        finally:
+            db.close()
+        user_id = binding.user_id if binding else None
+        elderly_id = binding.elderly_id if binding else None
+
+        with self._lock:
+            self._devices[device_id] = (user_id, elderly_id, now + self.ttl_seconds)
+        return user_id, elderly_id
+
+    def resolve_user(self, user_id: str) -> Optional[uuid.UUID]:
+        """将上报的 user_id 解析为老人档案ID（同步，可能访问数据库）"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._users.get(user_id)
+        if entry is not None and entry[1] > now:
+            return entry[0]
+
+        from repositories.device_repository import DeviceBindingRepository
+
+        db = SessionLocal()
+        try:
+            elderly_id = DeviceBindingRepository(db).resolve_elderly_id(user_id)
+        finally:
+            db.close()
+
+        with self._lock:
+            self._users[user_id] = (elderly_id, now + self.ttl_seconds)
+        return elderly_id
+
+    def bind(self, device_id: str, user_id: str) -> Optional[Any]:
+        """写入数据库并刷新缓存（同步）"""
+        from repositories.device_repository import DeviceBindingRepository
+
+        db = SessionLocal()
+        try:
+            binding = DeviceBindingRepository(db).bind(device_id, user_id)
+            if binding is None:
+                return None
+            with self._lock:
+                self._devices[device_id] = (
+                    binding.user_id, binding.elderly_id, time.monotonic() + self.ttl_seconds
+                )
+            return binding
+        finally:
+            db.close()
+
+    def list_bindings(self) -> Dict[str, str]:
+        """从数据库读取全部绑定关系 device_id -> user_id（同步）"""
+        from repositories.device_repository import DeviceBindingRepository
+
+        db = SessionLocal()
+        try:
+            return {b.device_id: b.user_id for b in DeviceBindingRepository(db).list_bindings()}
+        finally:
+            db.close()
+
+    def invalidate(self, device_id: Optional[str] = None) -> None:
+        with self._lock:
+            if device_id is None:
+                self._devices.clear()
+                self._users.clear()
+            else:
+                self._devices.pop(device_id, None)
+
+
+class IoTIngestionPipeline:
+    """IoT 数据写入流水线"""
+
+    # 队列容量（条），超过后触发背压
+    QUEUE_MAXSIZE = 20000
+    # 队列满时请求最多等待的时间（秒）
+    ENQUEUE_TIMEOUT = 0.5
+    # 每批最多写入的条数 / 攒批最长等待时间（秒）
+    BATCH_SIZE = 500
+    BATCH_MAX_WAIT = 0.05
+    # 写库失败时的重试次数 / 首次重试等待秒数（之后按指数增长）
+    WRITE_RETRIES = 3
+    RETRY_BACKOFF = 0.2
+    # 逐条写入仍失败的数据进入死信队列，最多保留的条数
+    DEAD_LETTER_CAPACITY = 10000
+
+    def __init__(
+        self,
+        ring_capacity: int = 100,
+        binding_ttl: float = 60.0,
+        on_batch: Optional[Callable[[List[Tuple[str, dict]]], None]] = None,
+    ):
+        """
+        Args:
+            ring_capacity: 每个设备保留的最新数据条数
+            binding_ttl: 设备绑定缓存的有效期（秒）
+            on_batch: 每批写库后在写入线程中调用的回调，参数为 [(kind, record), ...]
+                      （如接入数据清洗流水线）
+        """
+        self.ring_capacity = ring_capacity
+        self._rings: Dict[str, DeviceRingBuffer] = {}
+        self.bindings = DeviceBindingCache(binding_ttl)
+        self.on_batch = on_batch
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # 死信队列：[(kind, record, 错误信息), ...]，供排查和人工补录
+        self.dead_letters: Deque[Tuple[str, dict, str]] = deque(maxlen=self.DEAD_LETTER_CAPACITY)
+
+        self.stats = {
+            "accepted": 0,
+            "rejected": 0,
+            "written": 0,
+            "unbound": 0,
+            "failed": 0,
+            "batches": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # 生命周期
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        """在当前事件循环上启动写入任务（重复调用无副作用）"""
+        loop = asyncio.get_running_loop()
+        if self._worker is not None and not self._worker.done() and self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.QUEUE_MAXSIZE)
+        self._worker = loop.create_task(self._run())
+        logger.info("📥 IoT 写入流水线已启动")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """停止写入任务，先把队列中的数据写完"""
+        if self._worker is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"IoT 写入流水线关闭超时，未写入 {self._queue.qsize()} 条")
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        logger.info("📥 IoT 写入流水线已停止")
+
+    # ------------------------------------------------------------------
+    # 提交
+    # ------------------------------------------------------------------
+
+    def ring(self, kind: str) -> DeviceRingBuffer:
+        """某类数据的环形缓冲"""
+        ring = self._rings.get(kind)
+        if ring is None:
+            ring = DeviceRingBuffer(self.ring_capacity)
+            self._rings[kind] = ring
+        return ring
+
+    async def submit(self, kind: str, record: dict) -> None:
+        """
+        提交一条数据
+
+        Args:
+            kind: 数据类型，vitals / blood_pressure / temperature
+            record: 上报数据（含 device_id、timestamp 等）
+
+        Raises:
+            IngestionBackpressureError: 队列持续已满
+        """
+        await self.submit_many(kind, [record])
+
+    async def submit_many(self, kind: str, records: List[dict]) -> None:
+        """
+        提交同一类型的一批数据（整批接受或整批拒绝）
+
+        Raises:
+            IngestionBackpressureError: 队列剩余容量不足
+        """
+        self.start()
+        queue = self._queue
+
+        if len(records) > queue.maxsize:
+            self.stats["rejected"] += len(records)
+            raise IngestionBackpressureError(f"单批 {len(records)} 条超过队列容量 {queue.maxsize}")
+
+        # 容量不足时短暂等待写入任务消化
+        deadline = time.monotonic() + self.ENQUEUE_TIMEOUT
+        while queue.maxsize - queue.qsize() < len(records):
+            if time.monotonic() >= deadline:
+                self.stats["rejected"] += len(records)
+                raise IngestionBackpressureError(f"写入队列已满（{queue.qsize()} 条）")
+            await asyncio.sleep(0.01)
+
+        # 先写环形缓冲，最新值立即可查
+        ring = self.ring(kind)
+        for record in records:
+            ring.append(record)
+            queue.put_nowait((kind, record))
+        self.stats["accepted"] += len(records)
+
+    # ------------------------------------------------------------------
+    # 写入
+    # ------------------------------------------------------------------
+
+    async def _run(self) -> None:
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            deadline = time.monotonic() + self.BATCH_MAX_WAIT
+            # 攒批：取走已在队列中的数据，不足一批时短暂让出，直到满批或超时
+            while True:
+                while len(batch) < self.BATCH_SIZE and not queue.empty():
+                    batch.append(queue.get_nowait())
+                remaining = deadline - time.monotonic()
+                if len(batch) >= self.BATCH_SIZE or remaining <= 0:
+                    break
+                await asyncio.sleep(min(0.005, remaining))
+
+            try:
+                await asyncio.to_thread(self._write_with_retry, batch)
+            except Exception as e:
+                logger.error(f"IoT 批量写入异常，{len(batch)} 条转入死信队列: {e}")
+                self._dead_letter(batch, e)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    def _write_with_retry(self, batch: List[Tuple[str, dict]]) -> None:
+        """整批写入，重试用尽后逐条写入，只有逐条仍失败的数据进入死信队列"""
+        for attempt in range(self.WRITE_RETRIES):
+            try:
+                self._write_batch(batch)
+                return
+            except Exception as e:
+                if attempt == self.WRITE_RETRIES - 1:
+                    logger.error(f"IoT 批量写入失败 {self.WRITE_RETRIES} 次，改为逐条写入 {len(batch)} 条: {e}")
+                    break
+                logger.warning(f"IoT 批量写入失败，第 {attempt + 1} 次重试: {e}")
+                time.sleep(self.RETRY_BACKOFF * (2 ** attempt))
+
+        failed = 0
+        for item in batch:
+            try:
+                self._write_batch([item])
+            except Exception as e:
+                self._dead_letter([item], e)
+                failed += 1
+        if failed:
+            logger.error(f"IoT 逐条写入后仍有 {failed}/{len(batch)} 条失败，已转入死信队列")
+
+    def _dead_letter(self, batch: List[Tuple[str, dict]], error: Exception) -> None:
+        """记录写入失败的数据（不丢弃，供排查和补录）"""
+        for kind, record in batch:
+            self.dead_letters.append((kind, record, str(error)))
+        self.stats["failed"] += len(batch)
+
+    def _write_batch(self, batch: List[Tuple[str, dict]]) -> None:
+        """在线程中执行：解析绑定、转换为 HealthRecord 行并一次写入"""
+        from repositories.health_repository import HealthRepository
+
+        rows = []
+        unbound = 0
+        for _, record in batch:
+            elderly_id = self._resolve_elderly_id(record)
+            if elderly_id is None:
+                unbound += 1
+                continue
+            rows.append(self._to_health_record_row(record, elderly_id))
+
+        if rows:
+            db = SessionLocal()
+            try:
+                HealthRepository(db).bulk_insert_records(rows)
+            finally:
+                db.close()
+            latest_vitals_cache.invalidate({row["elderly_id"] for row in rows})
+
+        self.stats["written"] += len(rows)
+        self.stats["unbound"] += unbound
+        self.stats["batches"] += 1
+
+        if self.on_batch is not None:
+            try:
+                self.on_batch(batch)
+            except Exception as e:
+                logger.error(f"IoT 批处理回调失败: {e}")
+
+    def _resolve_elderly_id(self, record: dict) -> Optional[uuid.UUID]:
+        """优先使用上报的 user_id，其次使用设备绑定"""
+        user_id = record.get("user_id")
+        if user_id:
+            elderly_id = self.bindings.resolve_user(user_id)
+            if elderly_id is not None:
+                return elderly_id
+
+        _, elderly_id = self.bindings.get(record.get("device_id") or "")
+        return elderly_id
+
+    @staticmethod
+    def _record_status(record: dict) -> HealthRecordStatus:
+        """按与上报接口相同的阈值判断记录状态"""
+        spo2 = record.get("spo2")
+        if spo2 is not None and spo2 < 94:
+            return HealthRecordStatus.DANGER
+
+        heart_rate = record.get("heart_rate")
+        if heart_rate is not None and (heart_rate < 50 or heart_rate > 100):
+            return HealthRecordStatus.WARNING
+
+        systolic, diastolic = record.get("systolic"), record.get("diastolic")
+        if systolic is not None and diastolic is not None:
+            if systolic >= 140 or diastolic >= 90 or systolic < 90 or diastolic < 60:
+                return HealthRecordStatus.WARNING
+
+        temperature = record.get("temperature")
+        if temperature is not None and (temperature >= 37.3 or temperature < 36.0):
+            return HealthRecordStatus.WARNING
+
+        return HealthRecordStatus.NORMAL
+
+    def _to_health_record_row(self, record: dict, elderly_id: uuid.UUID) -> Dict[str, Any]:
+        timestamp = record.get("timestamp")
+        recorded_at = datetime.fromtimestamp(timestamp) if timestamp else datetime.now()
+        return {
+            "id": uuid.uuid4(),
+            "elderly_id": elderly_id,
+            "heart_rate": record.get("heart_rate") or record.get("pulse"),
+            "blood_oxygen": record.get("spo2"),
+            "systolic_pressure": record.get("systolic"),
+            "diastolic_pressure": record.get("diastolic"),
+            "temperature": record.get("temperature"),
+            "status": self._record_status(record),
+            "notes": f"IoT:{record.get('device_id', '')}",
+            "recorded_at": recorded_at,
+        }
+
+    # ------------------------------------------------------------------
+    # 状态
+    # ------------------------------------------------------------------
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats["queue_size"] = self._queue.qsize() if self._queue is not None else 0
+        stats["queue_capacity"] = self.QUEUE_MAXSIZE
+        stats["dead_letters"] = len(self.dead_letters)
+        stats["running"] = self._worker is not None and not self._worker.done()
+        stats["buffered_devices"] = len({
+            device_id for ring in self._rings.values() for device_id in ring.last_per_device()
+        })
+        stats["avg_batch_size"] = (
+            round((stats["written"] + stats["unbound"]) / stats["batches"], 1) if stats["batches"] else 0
+        )
+        return stats
+
+
+# 全局实例
+iot_ingestion_pipeline = IoTIngestionPipeline()
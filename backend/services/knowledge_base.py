@@ -10,11 +10,18 @@
 3. 支持多种文档格式
 4. 更灵活的检索策略
 """
+import asyncio
 import logging
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 
+import httpx
+
+from services.embedding_cache import EmbeddingCache
+
 logger = logging.getLogger(__name__)
 
 # 检查依赖
@@ -29,32 +36,149 @@ except ImportError:
 
 
 class SiliconFlowEmbeddings:
-    """硅基流动嵌入模型封装（兼容LangChain接口）"""
+    """
+    硅基流动嵌入模型封装（兼容LangChain接口）
+    
+    - 多条文本合并为一次请求（get_embeddings_batch）
+    - 多个批次并发发送，并发数有上限
+    - 限流和服务端错误时指数退避重试
+    - 以内容哈希缓存向量，相同文本不会重复嵌入
+    """
+    
+    # BGE-M3 维度
+    EMBEDDING_DIM = 1024
     
-    def __init__(self):
-        from services.siliconflow_service import siliconflow_service
-        self.service = siliconflow_service
+    def __init__(
+        self,
+        service=None,
+        cache: Optional[EmbeddingCache] = None,
+        batch_size: int = 32,
+        max_concurrency: int = 4,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5,
+    ):
+        """
+        Args:
+            service: 嵌入服务，需提供 get_embeddings_batch(texts, model)，默认使用全局硅基流动服务
+            cache: 嵌入缓存，为 None 时不缓存
+            batch_size: 每次请求包含的文本数
+            max_concurrency: 同时进行的请求数上限
+            max_retries: 单个批次的最大重试次数
+            retry_backoff: 首次重试等待秒数，之后按指数增长
+        """
+        if service is None:
+            from services.siliconflow_service import siliconflow_service
+            service = siliconflow_service
+        self.service = service
+        self.cache = cache
         self.model = "BAAI/bge-m3"
+        self.batch_size = max(1, batch_size)
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max(0, max_retries)
+        self.retry_backoff = retry_backoff
     
-    def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        """批量嵌入文档"""
-        embeddings = []
-        for text in texts:
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        """限流（429）和服务端错误（5xx）可重试，其他 4xx（参数、鉴权错误）重试也不会成功"""
+        if isinstance(error, httpx.HTTPStatusError):
+            status = error.response.status_code
+            return status == 429 or status >= 500
+        return True
+    
+    def _embed_batch_with_retry(self, texts: List[str]) -> List[List[float]]:
+        """嵌入一个批次，429/5xx/网络错误时指数退避重试，最终失败则返回零向量"""
+        for attempt in range(self.max_retries + 1):
             try:
-                emb = self.service.get_embedding(text, model=self.model)
-                embeddings.append(emb)
+                embeddings = self.service.get_embeddings_batch(texts, model=self.model)
+                if len(embeddings) != len(texts):
+                    raise ValueError(f"返回向量数 {len(embeddings)} 与文本数 {len(texts)} 不一致")
+                return embeddings
             except Exception as e:
-                logger.error(f"嵌入失败: {e}")
-                embeddings.append([0.0] * 1024)  # BGE-M3 维度
-        return embeddings
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    logger.error(f"嵌入失败（已重试 {attempt} 次）: {e}")
+                    break
+                delay = self.retry_backoff * (2 ** attempt)
+                logger.warning(f"嵌入失败，{delay:.1f}s 后重试: {e}")
+                time.sleep(delay)
+        
+        return [[0.0] * self.EMBEDDING_DIM for _ in texts]
+    
+    def _embed_uncached(self, texts: List[str]) -> Dict[str, List[float]]:
+        """分批并发嵌入未命中缓存的文本，返回 文本 → 向量"""
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        
+        if len(batches) == 1:
+            results = [self._embed_batch_with_retry(batches[0])]
+        else:
+            workers = min(self.max_concurrency, len(batches))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(self._embed_batch_with_retry, batches))
+        
+        embedded: Dict[str, List[float]] = {}
+        for batch, embeddings in zip(batches, results):
+            embedded.update(zip(batch, embeddings))
+        return embedded
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """批量嵌入文档"""
+        if not texts:
+            return []
+        
+        unique_texts = list(dict.fromkeys(texts))
+        vectors: Dict[str, List[float]] = {}
+        
+        # 1. 查缓存
+        keys = {}
+        if self.cache is not None:
+            keys = {text: EmbeddingCache.make_key(self.model, text) for text in unique_texts}
+            cached = self.cache.get_many(list(keys.values()))
+            for text, key in keys.items():
+                if key in cached:
+                    vectors[text] = cached[key]
+        
+        # 2. 嵌入未命中的文本
+        missing = [text for text in unique_texts if text not in vectors]
+        if missing:
+            embedded = self._embed_uncached(missing)
+            vectors.update(embedded)
+            
+            # 3. 写回缓存（失败返回的零向量不缓存）
+            if self.cache is not None:
+                self.cache.put_many({
+                    keys[text]: vector
+                    for text, vector in embedded.items()
+                    if any(vector)
+                })
+        
+        return [vectors[text] for text in texts]
     
     def embed_query(self, text: str) -> List[float]:
         """嵌入查询"""
-        try:
-            return self.service.get_embedding(text, model=self.model)
-        except Exception as e:
-            logger.error(f"查询嵌入失败: {e}")
-            return [0.0] * 1024
+        return self.embed_documents([text])[0]
+    
+    async def aembed_query(self, text: str) -> List[float]:
+        """异步嵌入查询（不阻塞事件循环），缓存和重试策略同 embed_documents"""
+        key = EmbeddingCache.make_key(self.model, text)
+        if self.cache is not None:
+            cached = self.cache.get_many([key])
+            if key in cached:
+                return cached[key]
+        
+        for attempt in range(self.max_retries + 1):
+            try:
+                vector = await self.service.aget_embedding(text, model=self.model)
+                break
+            except Exception as e:
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    logger.error(f"嵌入失败（已重试 {attempt} 次）: {e}")
+                    return [0.0] * self.EMBEDDING_DIM
+                delay = self.retry_backoff * (2 ** attempt)
+                logger.warning(f"嵌入失败，{delay:.1f}s 后重试: {e}")
+                await asyncio.sleep(delay)
+        
+        if self.cache is not None and any(vector):
+            self.cache.put_many({key: vector})
+        return vector
 
 
 class LangChainKnowledgeBase:
@@ -82,6 +206,9 @@ class LangChainKnowledgeBase:
         self.embeddings = None
         self.text_splitter = None
         
+        # 内容版本号，每次增删文档后递增（供回答缓存判断是否失效）
+        self.version = 0
+        
         if HAS_LANGCHAIN:
             self._init_components()
         else:
@@ -96,7 +223,9 @@ class LangChainKnowledgeBase:
             try:
                 from services.siliconflow_service import siliconflow_service
                 if siliconflow_service and siliconflow_service.is_available:
-                    self.embeddings = SiliconFlowEmbeddings()
+                    self.embeddings = SiliconFlowEmbeddings(
+                        cache=EmbeddingCache(str(self.persist_dir / "embedding_cache.sqlite3"))
+                    )
                     logger.info("✅ LangChain 使用硅基流动 BGE-M3 嵌入模型")
                 else:
                     logger.warning("硅基流动服务不可用，知识库功能将受限")
@@ -197,6 +326,7 @@ class LangChainKnowledgeBase:
             
             # 添加到向量存储
             self.vectorstore.add_documents(documents)
+            self.version += 1
             
             logger.info(f"文档添加成功: {title} (ID: {doc_id}, {len(chunks)} 个块)")
             return doc_id
@@ -235,31 +365,67 @@ class LangChainKnowledgeBase:
                 k=top_k,
                 filter=filter_dict
             )
+            return self._format_results(results, score_threshold)
             
-            # 格式化结果
-            formatted_results = []
-            for doc, score in results:
-                # ChromaDB 返回的是距离，需要转换为相似度
-                similarity = 1 - score if score <= 1 else 1 / (1 + score)
-                
-                if similarity >= score_threshold:
-                    formatted_results.append({
-                        "content": doc.page_content,
-                        "title": doc.metadata.get("title", ""),
-                        "doc_id": doc.metadata.get("doc_id", ""),
-                        "chunk_index": doc.metadata.get("chunk_index", 0),
-                        "doc_type": doc.metadata.get("doc_type", ""),
-                        "source": doc.metadata.get("source", ""),
-                        "similarity_score": similarity,
-                        "metadata": doc.metadata
-                    })
-            
-            return formatted_results
+        except Exception as e:
+            logger.error(f"搜索失败: {e}")
+            return []
+    
+    async def asearch(
+        self, 
+        query: str, 
+        top_k: int = 5,
+        filter_dict: Optional[Dict[str, Any]] = None,
+        score_threshold: float = 0.5
+    ) -> List[Dict[str, Any]]:
+        """
+        异步搜索知识库（供 FastAPI 路由使用），参数同 search
+        
+        查询向量通过异步 HTTP 客户端获取，本地向量检索放到线程池执行。
+        """
+        if not HAS_LANGCHAIN or self.vectorstore is None:
+            logger.warning("知识库未初始化")
+            return []
+        
+        if not hasattr(self.embeddings, "aembed_query"):
+            return await asyncio.to_thread(self.search, query, top_k, filter_dict, score_threshold)
+        
+        try:
+            embedding = await self.embeddings.aembed_query(query)
+            results = await asyncio.to_thread(
+                self.vectorstore.similarity_search_by_vector_with_relevance_scores,
+                embedding,
+                k=top_k,
+                filter=filter_dict
+            )
+            return self._format_results(results, score_threshold)
             
         except Exception as e:
             logger.error(f"搜索失败: {e}")
             return []
     
+    @staticmethod
+    def _format_results(results, score_threshold: float) -> List[Dict[str, Any]]:
+        """将 (文档, 距离) 列表格式化为搜索结果，过滤低于阈值的结果"""
+        formatted_results = []
+        for doc, score in results:
+            # ChromaDB 返回的是距离，需要转换为相似度
+            similarity = 1 - score if score <= 1 else 1 / (1 + score)
+            
+            if similarity >= score_threshold:
+                formatted_results.append({
+                    "content": doc.page_content,
+                    "title": doc.metadata.get("title", ""),
+                    "doc_id": doc.metadata.get("doc_id", ""),
+                    "chunk_index": doc.metadata.get("chunk_index", 0),
+                    "doc_type": doc.metadata.get("doc_type", ""),
+                    "source": doc.metadata.get("source", ""),
+                    "similarity_score": similarity,
+                    "metadata": doc.metadata
+                })
+        
+        return formatted_results
+    
     def search_with_context(
         self, 
         query: str, 
@@ -305,6 +471,7 @@ class LangChainKnowledgeBase:
             self.vectorstore._collection.delete(
                 where={"doc_id": doc_id}
             )
+            self.version += 1
             logger.info(f"文档删除成功: {doc_id}")
             return True
         except Exception as e:
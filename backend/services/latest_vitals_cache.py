@@ -0,0 +1,116 @@
+"""
+最新生命体征读缓存
+==================
+
+仪表盘每隔几秒轮询"最新/今日"数据，同一位老人的快照在短时间内被反复读取。
+这里在 latest_vitals 表前加一层进程内读穿透缓存：
+
+1. 缓存项带短 TTL（LATEST_VITALS_CACHE_SECONDS，0 表示关闭），其他 worker 写入的数据在 TTL 内可见
+2. 本进程写入健康记录后立即失效对应老人的缓存
+3. 缓存的是字典而不是 ORM 对象，与数据库会话无关
+"""
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterable, Optional, Tuple, TYPE_CHECKING
+
+from sqlalchemy.orm import Session
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class LatestVitalsCache:
+    """老人ID → 最新生命体征快照字典 的 TTL 缓存"""
+
+    def __init__(self, ttl_seconds: float = 2.0, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[uuid.UUID, Tuple[Optional[Dict[str, Any]], float]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    _MISS = object()
+
+    def _lookup(self, elderly_id: uuid.UUID) -> Any:
+        if self.ttl_seconds <= 0:
+            return self._MISS
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(elderly_id)
+            if entry is not None and entry[1] > now:
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        return self._MISS
+
+    def _store(self, elderly_id: uuid.UUID, value: Optional[Dict[str, Any]]) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._purge(time.monotonic())
+            self._entries[elderly_id] = (value, time.monotonic() + self.ttl_seconds)
+
+    def get(self, db: Session, elderly_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+        """读取快照，未命中时查询数据库（没有快照的老人也会缓存，避免重复查询）"""
+        value = self._lookup(elderly_id)
+        if value is not self._MISS:
+            return value
+
+        from repositories.latest_vitals_repository import LatestVitalsRepository
+
+        snapshot = LatestVitalsRepository(db).get_by_elderly_id(elderly_id)
+        value = LatestVitalsRepository.to_dict(snapshot) if snapshot is not None else None
+        self._store(elderly_id, value)
+        return value
+
+    async def get_async(self, db: "AsyncSession", elderly_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+        """get 的 AsyncSession 版本"""
+        value = self._lookup(elderly_id)
+        if value is not self._MISS:
+            return value
+
+        from repositories.latest_vitals_repository import LatestVitalsRepository, AsyncLatestVitalsRepository
+
+        snapshot = await AsyncLatestVitalsRepository(db).get_by_elderly_id(elderly_id)
+        value = LatestVitalsRepository.to_dict(snapshot) if snapshot is not None else None
+        self._store(elderly_id, value)
+        return value
+
+    def invalidate(self, elderly_ids: Iterable[uuid.UUID]) -> None:
+        """写入后失效对应老人的缓存"""
+        with self._lock:
+            for elderly_id in elderly_ids:
+                self._entries.pop(elderly_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _purge(self, now: float) -> None:
+        """清理过期项，仍然超限时清空（调用方持有锁）"""
+        self._entries = {key: entry for key, entry in self._entries.items() if entry[1] > now}
+        if len(self._entries) >= self.max_entries:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+def _create_cache() -> LatestVitalsCache:
+    from config.settings import settings
+    return LatestVitalsCache(ttl_seconds=settings.LATEST_VITALS_CACHE_SECONDS)
+
+
+# 全局实例
+latest_vitals_cache = _create_cache()
@@ -0,0 +1,380 @@
+"""
+提醒调度服务
+============
+
+不再轮询整张提醒表，而是：
+
+1. 每 REFILL_SECONDS 按 (status, next_reminder_time) 索引读取未来 REMINDER_HORIZON_SECONDS 内到期的活跃提醒，
+   放入内存时间轮；已不在结果中的提醒（被删除、停用或改期）同时移出
+2. 时间轮每秒转动一格，同一格到期的提醒合并处理：一次 executemany 推进下一次时间后提交一次
+   （每天/每周/每月按日历计算，一次性提醒标记为已完成），再按老人分组推送
+3. 按 elderly_id 推送到该老人登录的实时语音 WebSocket（/api/v1/realtime-voice/ws/voice?token=...）；
+   老人不在线时消息暂存，连接时补发，超过 MISSED_GRACE_SECONDS 仍未送达的丢弃并计入 missed。
+   REMINDER_SPEAK 开启时同时在本机 TTS 播报；add_listener 可接入其他通道
+4. 停机期间错过的提醒：超过 MISSED_GRACE_SECONDS 的不再推送，只推进到下一次
+
+调度只应在一个进程中运行（多 worker 部署时其余 worker 设置 REMINDER_SCHEDULER_ENABLED=false），
+否则同一提醒会被推送多次。
+"""
+import asyncio
+import logging
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TimingWheel:
+    """单层哈希时间轮
+
+    条目放在 (到期格数 % 槽数) 的槽中，添加/删除 O(1)；每转动一格只访问对应的槽，
+    超过一圈的条目留在槽中，转到时只取出已到期的。
+    """
+
+    def __init__(self, tick_seconds: float, slots: int, start: float):
+        self.tick_seconds = tick_seconds
+        self._slots: List[Dict[Hashable, Tuple[int, Any]]] = [{} for _ in range(slots)]
+        self._ticks: Dict[Hashable, int] = {}
+        self._current = self._tick_of(start)
+
+    def _tick_of(self, timestamp: float) -> int:
+        return int(timestamp // self.tick_seconds)
+
+    def __len__(self) -> int:
+        return len(self._ticks)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._ticks
+
+    def add(self, key: Hashable, due: float, item: Any) -> None:
+        """添加或替换条目（已过期的在下一格触发）"""
+        self.remove(key)
+        tick = max(self._tick_of(due), self._current + 1)
+        self._slots[tick % len(self._slots)][key] = (tick, item)
+        self._ticks[key] = tick
+
+    def remove(self, key: Hashable) -> bool:
+        tick = self._ticks.pop(key, None)
+        if tick is None:
+            return False
+        del self._slots[tick % len(self._slots)][key]
+        return True
+
+    def advance(self, now: float) -> List[Any]:
+        """转动到 now 所在的格，返回这期间到期的全部条目"""
+        target = self._tick_of(now)
+        if target <= self._current:
+            return []
+        if target - self._current >= len(self._slots):
+            slots = self._slots
+        else:
+            slots = [self._slots[tick % len(self._slots)] for tick in range(self._current + 1, target + 1)]
+
+        due = []
+        for slot in slots:
+            for key, (tick, item) in list(slot.items()):
+                if tick <= target:
+                    del slot[key]
+                    del self._ticks[key]
+                    due.append(item)
+        self._current = target
+        return due
+
+
+class ScheduledReminder(NamedTuple):
+    """时间轮中的提醒（列值快照）"""
+    id: uuid.UUID
+    elderly_id: uuid.UUID
+    title: str
+    description: Optional[str]
+    reminder_type: Any
+    frequency: Any
+    next_reminder_time: datetime
+    due: float
+
+
+def _enum_value(value: Any) -> Any:
+    return value.value if hasattr(value, "value") else value
+
+
+class ReminderScheduler:
+    """基于时间轮的提醒调度"""
+
+    TICK_SECONDS = 1.0
+    REFILL_SECONDS = 30.0
+    MISSED_GRACE_SECONDS = 3600
+    QUERY_BATCH_SIZE = 1000
+
+    def __init__(self, horizon_seconds: Optional[int] = None,
+                 session_factory: Optional[Callable[[], Any]] = None):
+        self._session_factory = session_factory
+        self.horizon_seconds = settings.REMINDER_HORIZON_SECONDS if horizon_seconds is None else horizon_seconds
+        # 时间轮覆盖一个加载范围再加上一次补充间隔，正常情况下不会有超过一圈的条目
+        slots = int((self.horizon_seconds + self.REFILL_SECONDS) / self.TICK_SECONDS) + 1
+        self.wheel = TimingWheel(self.TICK_SECONDS, slots, time.time())
+        self._entries: Dict[uuid.UUID, ScheduledReminder] = {}
+        self._loaded_until = 0.0
+        self._next_refill = 0.0
+        self._listeners: List[Callable[[Dict[str, Any]], Any]] = []
+        # 老人档案ID -> 该老人在线终端的发送函数；未送达的 (最晚到期时间, 消息)
+        self._connections: Dict[uuid.UUID, List[Callable[[Dict[str, Any]], Awaitable[Any]]]] = defaultdict(list)
+        self._pending: Dict[uuid.UUID, List[Tuple[float, Dict[str, Any]]]] = defaultdict(list)
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"refills": 0, "fired": 0, "delivered": 0, "missed": 0, "batches": 0}
+
+    def _session(self):
+        if self._session_factory is None:
+            from database.database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    def add_listener(self, callback: Callable[[Dict[str, Any]], Any]) -> None:
+        """注册额外的推送通道，参数为推送消息（可以是协程函数）"""
+        self._listeners.append(callback)
+
+    async def connect(self, elderly_id: uuid.UUID, send: Callable[[Dict[str, Any]], Awaitable[Any]]) -> int:
+        """登记老人的在线终端（send 发送失败时抛出异常），补发暂存的提醒，返回补发的提醒数"""
+        self._connections[elderly_id].append(send)
+        pending = self._pending.pop(elderly_id, [])
+        resent = 0
+        for index, (due, message) in enumerate(pending):
+            if time.time() - due > self.MISSED_GRACE_SECONDS:
+                self.stats["missed"] += len(message["reminders"])
+            elif await self._send(elderly_id, message):
+                resent += len(message["reminders"])
+            else:
+                # 补发途中连接断开，剩余的继续暂存
+                self._pending[elderly_id].extend(pending[index:])
+                break
+        self.stats["delivered"] += resent
+        return resent
+
+    def disconnect(self, elderly_id: uuid.UUID, send: Callable[[Dict[str, Any]], Awaitable[Any]]) -> None:
+        connections = self._connections.get(elderly_id)
+        if connections and send in connections:
+            connections.remove(send)
+            if not connections:
+                del self._connections[elderly_id]
+
+    # ------------------------------------------------------------------
+    # 加载
+    # ------------------------------------------------------------------
+
+    def load_window(self, now: float) -> Tuple[List[ScheduledReminder], float]:
+        """读取 now + horizon 之前到期的活跃提醒（同步，在线程中执行）"""
+        from repositories.reminder_schedule_repository import ReminderScheduleRepository
+
+        until = now + self.horizon_seconds
+        db = self._session()
+        try:
+            rows = ReminderScheduleRepository(db).iter_active_due_before(
+                datetime.fromtimestamp(until), self.QUERY_BATCH_SIZE
+            )
+            entries = [ScheduledReminder(*row, due=row.next_reminder_time.timestamp()) for row in rows]
+        finally:
+            db.close()
+        return entries, until
+
+    def apply_window(self, entries: List[ScheduledReminder], until: float) -> None:
+        """按最新查询结果同步时间轮"""
+        seen = set()
+        for entry in entries:
+            seen.add(entry.id)
+            current = self._entries.get(entry.id)
+            if current is None or current.due != entry.due:
+                self.wheel.add(entry.id, entry.due, entry)
+            self._entries[entry.id] = entry
+        for reminder_id in [reminder_id for reminder_id in self._entries if reminder_id not in seen]:
+            self.wheel.remove(reminder_id)
+            del self._entries[reminder_id]
+        self._loaded_until = until
+        self.stats["refills"] += 1
+
+    # ------------------------------------------------------------------
+    # 触发
+    # ------------------------------------------------------------------
+
+    def complete(self, fired: List[ScheduledReminder], now: float) -> List[Dict[str, Any]]:
+        """批量推进已触发的提醒并提交（同步，在线程中执行）"""
+        from repositories.reminder_schedule_repository import ReminderScheduleRepository
+
+        db = self._session()
+        try:
+            updates = ReminderScheduleRepository(db).advance_fired(
+                [entry._asdict() for entry in fired], datetime.fromtimestamp(now)
+            )
+            db.commit()
+            return updates
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def tick(self, now: Optional[float] = None) -> int:
+        """转动一格：需要时补充时间轮，处理到期的提醒，返回推送（或暂存待补发）的提醒数"""
+        now = time.time() if now is None else now
+        if now >= self._next_refill:
+            entries, until = await asyncio.to_thread(self.load_window, now)
+            self.apply_window(entries, until)
+            self._expire_pending(now)
+            self._next_refill = now + self.REFILL_SECONDS
+
+        fired = self.wheel.advance(now)
+        if not fired:
+            return 0
+        for entry in fired:
+            self._entries.pop(entry.id, None)
+
+        try:
+            updates = await asyncio.to_thread(self.complete, fired, now)
+        except Exception as e:
+            # 未提交成功时不推送，下次补充时间轮会重新加载这些提醒
+            logger.error(f"推进到期提醒失败（{len(fired)} 条）: {str(e)}")
+            self._next_refill = 0.0
+            return 0
+        self.stats["batches"] += 1
+        self.stats["fired"] += len(fired)
+
+        # 下一次时间仍在已加载范围内的直接放回时间轮
+        by_id = {entry.id: entry for entry in fired}
+        for update in updates:
+            next_time = update["next_reminder_time"]
+            if next_time is not None and next_time.timestamp() < self._loaded_until:
+                entry = by_id[update["id"]]._replace(next_reminder_time=next_time, due=next_time.timestamp())
+                self.wheel.add(entry.id, entry.due, entry)
+                self._entries[entry.id] = entry
+
+        groups: Dict[uuid.UUID, List[ScheduledReminder]] = defaultdict(list)
+        for entry in fired:
+            if now - entry.due > self.MISSED_GRACE_SECONDS:
+                self.stats["missed"] += 1
+            else:
+                groups[entry.elderly_id].append(entry)
+
+        dispatched = 0
+        for elderly_id, entries in groups.items():
+            await self._deliver(elderly_id, entries)
+            dispatched += len(entries)
+        return dispatched
+
+    # ------------------------------------------------------------------
+    # 推送
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def build_message(elderly_id: uuid.UUID, entries: List[ScheduledReminder]) -> Dict[str, Any]:
+        """同一位老人同时到期的提醒合并为一条消息"""
+        return {
+            "type": "reminder",
+            "elderly_id": str(elderly_id),
+            "reminders": [
+                {
+                    "id": str(entry.id),
+                    "title": entry.title,
+                    "description": entry.description,
+                    "reminder_type": _enum_value(entry.reminder_type),
+                    "time": entry.next_reminder_time.isoformat(),
+                }
+                for entry in entries
+            ],
+            "text": "提醒您：" + "，".join(entry.title for entry in entries),
+        }
+
+    async def _send(self, elderly_id: uuid.UUID, message: Dict[str, Any]) -> bool:
+        """发送到老人的全部在线终端，至少一个成功时返回 True；发送失败的连接移除"""
+        sent = False
+        for send in list(self._connections.get(elderly_id, [])):
+            try:
+                await send(message)
+                sent = True
+            except Exception as e:
+                logger.warning(f"提醒推送到终端失败: {str(e)}")
+                self.disconnect(elderly_id, send)
+        return sent
+
+    def _expire_pending(self, now: float) -> None:
+        """丢弃超过宽限期仍未送达的暂存提醒"""
+        for elderly_id in list(self._pending):
+            kept = []
+            for due, message in self._pending[elderly_id]:
+                if now - due > self.MISSED_GRACE_SECONDS:
+                    self.stats["missed"] += len(message["reminders"])
+                else:
+                    kept.append((due, message))
+            if kept:
+                self._pending[elderly_id] = kept
+            else:
+                del self._pending[elderly_id]
+
+    async def _deliver(self, elderly_id: uuid.UUID, entries: List[ScheduledReminder]) -> None:
+        message = self.build_message(elderly_id, entries)
+
+        if await self._send(elderly_id, message):
+            self.stats["delivered"] += len(entries)
+        else:
+            self._pending[elderly_id].append((max(entry.due for entry in entries), message))
+
+        if settings.REMINDER_SPEAK:
+            try:
+                from services.realtime_voice_service import realtime_voice_service
+                realtime_voice_service.speak(message["text"], interrupt=False)
+            except Exception as e:
+                logger.warning(f"提醒语音播报失败: {str(e)}")
+
+        for callback in self._listeners:
+            try:
+                result = callback(message)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.error(f"提醒推送失败: {str(e)}")
+
+    # ------------------------------------------------------------------
+    # 生命周期
+    # ------------------------------------------------------------------
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.tick()
+            except Exception as e:
+                logger.error(f"提醒调度失败: {str(e)}")
+                self._next_refill = time.time() + self.REFILL_SECONDS
+            # 对齐到下一格的起点
+            await asyncio.sleep(self.TICK_SECONDS - time.time() % self.TICK_SECONDS)
+
+    def start(self) -> None:
+        """在当前事件循环上启动调度（重复调用无副作用）"""
+        if self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.info("⏰ 提醒调度已启动")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "scheduled": len(self.wheel),
+            "pending": sum(len(message["reminders"]) for pending in self._pending.values() for _, message in pending),
+            "connections": sum(len(connections) for connections in self._connections.values()),
+            "horizon_seconds": self.horizon_seconds,
+        }
+
+
+# 全局实例
+reminder_scheduler = ReminderScheduler()
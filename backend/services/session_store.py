@@ -0,0 +1,342 @@
+"""
+会话存储
+========
+
+对话历史、用户档案、多轮对话状态等按会话保存的数据统一存放在这里。
+
+两种后端，接口相同：
+1. InMemorySessionStore：进程内存储
+   - 滑动过期：每次读写刷新有效期。所有条目有效期相同，按最近访问排序的链表
+     同时也是按过期时间排序的队列，过期清理只需从表头弹出，均摊 O(1)，无需扫描
+   - 总内存上限：超过后按 LRU 淘汰
+   - 列表值使用定长环形缓冲（deque），追加 O(1)
+2. RedisSessionStore：多个 worker 共享，键为 "{namespace}:{key}"（与原 conv: 键格式一致），
+   Redis 不可用时降级到进程内存储
+"""
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional
+
+try:
+    import redis
+    HAS_REDIS = True
+except ImportError:
+    HAS_REDIS = False
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+class SessionStore(ABC):
+    """会话存储接口（值需可 JSON 序列化）"""
+
+    def __init__(self, namespace: str, ttl_seconds: float):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """读取值并刷新有效期，不存在或已过期返回 None"""
+
+    @abstractmethod
+    def set(self, key: str, value: Any) -> None:
+        """写入值"""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """删除值"""
+
+    @abstractmethod
+    def append(self, key: str, item: Any, maxlen: int) -> None:
+        """向列表追加一项，只保留最近 maxlen 项"""
+
+    @abstractmethod
+    def get_list(self, key: str, limit: Optional[int] = None) -> List[Any]:
+        """读取列表最近的 limit 项（按追加顺序），并刷新有效期"""
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": type(self).__name__, "namespace": self.namespace}
+
+
+class _Entry:
+    __slots__ = ("value", "size", "expires_at")
+
+    def __init__(self, value: Any, size: int, expires_at: float):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+
+
+def _estimate_size(value: Any) -> int:
+    """估算值占用的内存（按序列化后的长度，足以用于容量控制）"""
+    try:
+        return len(json.dumps(value, ensure_ascii=False, default=str)) + 64
+    except (TypeError, ValueError):
+        return 256
+
+
+class InMemorySessionStore(SessionStore):
+    """进程内会话存储：滑动过期 + 总内存上限 LRU"""
+
+    def __init__(self, namespace: str, ttl_seconds: float, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Args:
+            namespace: 命名空间（用于日志和统计）
+            ttl_seconds: 最后一次访问后的有效期
+            max_bytes: 估算的总内存上限，超过后淘汰最久未访问的会话
+        """
+        super().__init__(namespace, ttl_seconds)
+        self.max_bytes = max_bytes
+        # 按最近访问排序（末尾最新），有效期统一，因此也按过期时间排序
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+
+    # ------------------------------------------------------------------
+    # 内部（调用方持有锁）
+    # ------------------------------------------------------------------
+
+    def _expire(self, now: float) -> None:
+        """从表头弹出已过期的条目"""
+        entries = self._entries
+        while entries:
+            key, entry = next(iter(entries.items()))
+            if entry.expires_at > now:
+                break
+            del entries[key]
+            self._bytes -= entry.size
+            self.expired += 1
+
+    def _evict(self) -> None:
+        """超过内存上限时淘汰最久未访问的条目（至少保留刚写入的一条）"""
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            self.evicted += 1
+
+    def _lookup(self, key: str, now: float) -> Optional[_Entry]:
+        self._expire(now)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        entry.expires_at = now + self.ttl_seconds
+        self._entries.move_to_end(key)
+        return entry
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    # ------------------------------------------------------------------
+    # 接口
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._lookup(key, time.monotonic())
+            return entry.value if entry is not None else None
+
+    def set(self, key: str, value: Any) -> None:
+        size = _estimate_size(value)
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            self._remove(key)
+            self._entries[key] = _Entry(value, size, now + self.ttl_seconds)
+            self._bytes += size
+            self._evict()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def append(self, key: str, item: Any, maxlen: int) -> None:
+        size = _estimate_size(item)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._lookup(key, now)
+            if entry is None or not isinstance(entry.value, deque) or entry.value.maxlen != maxlen:
+                items = deque(entry.value if entry is not None else (), maxlen=maxlen)
+                self._remove(key)
+                entry = _Entry(items, sum(_estimate_size(i) for i in items), now + self.ttl_seconds)
+                self._entries[key] = entry
+                self._bytes += entry.size
+
+            items = entry.value
+            if len(items) == maxlen:
+                # 环形缓冲满时最早的一项被覆盖
+                dropped = _estimate_size(items[0])
+                entry.size -= dropped
+                self._bytes -= dropped
+            items.append(item)
+            entry.size += size
+            self._bytes += size
+            self._evict()
+
+    def get_list(self, key: str, limit: Optional[int] = None) -> List[Any]:
+        with self._lock:
+            entry = self._lookup(key, time.monotonic())
+            if entry is None:
+                return []
+            items = entry.value
+            if limit is None or limit >= len(items):
+                return list(items)
+            if limit <= 0:
+                return []
+            # 从尾部取 limit 项，不复制整个缓冲
+            return [items[i] for i in range(len(items) - limit, len(items))]
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._expire(time.monotonic())
+            return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._expire(time.monotonic())
+            lookups = self.hits + self.misses
+            return {
+                **super().get_stats(),
+                "entries": len(self._entries),
+                "memory_mb": round(self._bytes / 1024 / 1024, 2),
+                "max_memory_mb": round(self.max_bytes / 1024 / 1024, 2),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "expired": self.expired,
+                "evicted": self.evicted,
+            }
+
+
+class RedisSessionStore(SessionStore):
+    """Redis 会话存储（多个 worker 共享），出错时降级到进程内存储"""
+
+    def __init__(self, namespace: str, ttl_seconds: float, client, fallback: InMemorySessionStore):
+        super().__init__(namespace, ttl_seconds)
+        self.client = client
+        self.fallback = fallback
+        self.errors = 0
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _failed(self, action: str, e: Exception) -> None:
+        self.errors += 1
+        logger.warning(f"Redis {action}失败({self.namespace}): {e}，使用内存存储")
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            pipe = self.client.pipeline()
+            pipe.get(self._key(key))
+            pipe.expire(self._key(key), int(self.ttl_seconds))
+            data, _ = pipe.execute()
+            if data:
+                return json.loads(data)
+        except Exception as e:
+            self._failed("读取", e)
+        return self.fallback.get(key)
+
+    def set(self, key: str, value: Any) -> None:
+        try:
+            self.client.setex(self._key(key), int(self.ttl_seconds), json.dumps(value, ensure_ascii=False))
+            return
+        except Exception as e:
+            self._failed("写入", e)
+        self.fallback.set(key, value)
+
+    def delete(self, key: str) -> None:
+        try:
+            self.client.delete(self._key(key))
+        except Exception as e:
+            self._failed("删除", e)
+        self.fallback.delete(key)
+
+    def append(self, key: str, item: Any, maxlen: int) -> None:
+        try:
+            pipe = self.client.pipeline()
+            pipe.rpush(self._key(key), json.dumps(item, ensure_ascii=False))
+            pipe.ltrim(self._key(key), -maxlen, -1)
+            pipe.expire(self._key(key), int(self.ttl_seconds))
+            pipe.execute()
+            return
+        except Exception as e:
+            self._failed("写入", e)
+        self.fallback.append(key, item, maxlen)
+
+    def get_list(self, key: str, limit: Optional[int] = None) -> List[Any]:
+        if limit is not None and limit <= 0:
+            return []
+        try:
+            pipe = self.client.pipeline()
+            pipe.lrange(self._key(key), -limit if limit else 0, -1)
+            pipe.expire(self._key(key), int(self.ttl_seconds))
+            items, _ = pipe.execute()
+            if items:
+                return [json.loads(item) for item in items]
+        except Exception as e:
+            self._failed("读取", e)
+        return self.fallback.get_list(key, limit)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**super().get_stats(), "errors": self.errors, "fallback": self.fallback.get_stats()}
+
+
+_redis_client = None
+_redis_lock = threading.Lock()
+
+
+def _get_redis_client():
+    """进程内共享的 Redis 连接，连接失败返回 None"""
+    global _redis_client
+    with _redis_lock:
+        if _redis_client is None and HAS_REDIS:
+            from config.settings import settings
+            try:
+                client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+                client.ping()
+                _redis_client = client
+                logger.info("会话存储已连接 Redis")
+            except Exception as e:
+                logger.warning(f"Redis 连接失败: {e}，会话存储使用内存")
+                _redis_client = False
+        return _redis_client or None
+
+
+def create_session_store(
+    namespace: str,
+    ttl_seconds: float,
+    max_bytes: Optional[int] = None,
+    backend: Optional[str] = None
+) -> SessionStore:
+    """
+    按配置创建会话存储
+
+    Args:
+        namespace: 命名空间，Redis 键前缀
+        ttl_seconds: 有效期（最后一次访问后）
+        max_bytes: 进程内存储的内存上限，默认取 SESSION_STORE_MAX_MB
+        backend: memory / redis，默认取 SESSION_STORE_BACKEND；redis 不可用时使用内存
+    """
+    from config.settings import settings
+
+    if max_bytes is None:
+        max_bytes = settings.SESSION_STORE_MAX_MB * 1024 * 1024
+    memory_store = InMemorySessionStore(namespace, ttl_seconds, max_bytes)
+
+    if (backend or settings.SESSION_STORE_BACKEND) == "redis":
+        client = _get_redis_client()
+        if client is not None:
+            return RedisSessionStore(namespace, ttl_seconds, client, fallback=memory_store)
+    return memory_store
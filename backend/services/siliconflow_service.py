@@ -3,10 +3,13 @@
 兼容 OpenAI 接口格式
 """
 import os
+import json
 import logging
-from typing import List, Dict, Optional, Generator
+from typing import List, Dict, Optional, Generator, Any
 import httpx
 
+from services.http_client import get_provider_client
+
 logger = logging.getLogger(__name__)
 
 
@@ -31,6 +34,13 @@ class SiliconFlowService:
             "bce-embedding": "netease-youdao/bce-embedding-base_v1",
         }
         
+        # 共享的连接池客户端（keep-alive，按服务商限制并发）
+        self.http = get_provider_client(
+            "siliconflow",
+            timeout=60.0,
+            max_concurrency=int(os.getenv("SILICONFLOW_MAX_CONCURRENCY", "16")),
+        )
+        
         if not self.api_key:
             logger.warning("SILICONFLOW_API_KEY 未配置")
     
@@ -39,6 +49,61 @@ class SiliconFlowService:
         """检查服务是否可用"""
         return bool(self.api_key)
     
+    @property
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+    
+    def _build_chat_payload(
+        self,
+        user_input: str,
+        system_prompt: Optional[str],
+        history: Optional[List[Dict[str, str]]],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        stream: bool = False,
+    ) -> Dict[str, Any]:
+        """构建对话请求体"""
+        if not self.is_available:
+            raise ValueError("硅基流动 API Key 未配置")
+        
+        # 构建消息
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        if history:
+            messages.extend(history)
+        messages.append({"role": "user", "content": user_input})
+        
+        payload = {
+            # 获取模型全名
+            "model": self.models.get(model, model),
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        if stream:
+            payload["stream"] = True
+        return payload
+    
+    @staticmethod
+    def _parse_stream_line(line: str) -> Optional[str]:
+        """解析 SSE 数据行，返回文本片段；遇到结束标记时返回 None"""
+        if not line.startswith("data: "):
+            return ""
+        data = line[6:]
+        if data == "[DONE]":
+            return None
+        try:
+            chunk = json.loads(data)
+            delta = chunk["choices"][0].get("delta", {})
+            return delta.get("content", "") or ""
+        except (ValueError, KeyError, IndexError):
+            return ""
+    
     def chat(
         self,
         user_input: str,
@@ -58,46 +123,27 @@ class SiliconFlowService:
             model: 模型名称
             temperature: 温度参数
             max_tokens: 最大生成长度
-            
+        
         Returns:
             模型回复
         """
-        if not self.is_available:
-            raise ValueError("硅基流动 API Key 未配置")
-        
-        # 构建消息
-        messages = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        if history:
-            messages.extend(history)
-        messages.append({"role": "user", "content": user_input})
-        
-        # 获取模型全名
-        model_name = self.models.get(model, model)
+        payload = self._build_chat_payload(
+            user_input, system_prompt, history, model, temperature, max_tokens
+        )
         
         try:
-            with httpx.Client(timeout=60.0) as client:
-                response = client.post(
-                    f"{self.base_url}/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json",
-                    },
-                    json={
-                        "model": model_name,
-                        "messages": messages,
-                        "temperature": temperature,
-                        "max_tokens": max_tokens,
-                    },
-                )
-                response.raise_for_status()
-                result = response.json()
-                
-                content = result["choices"][0]["message"]["content"]
-                logger.info(f"[SiliconFlow] {model} 调用成功，回复长度: {len(content)}")
-                return content
-                
+            response = self.http.post(
+                f"{self.base_url}/chat/completions",
+                headers=self._headers,
+                json=payload,
+            )
+            response.raise_for_status()
+            result = response.json()
+            
+            content = result["choices"][0]["message"]["content"]
+            logger.info(f"[SiliconFlow] {model} 调用成功，回复长度: {len(content)}")
+            return content
+        
         except httpx.HTTPStatusError as e:
             logger.error(f"[SiliconFlow] API 错误: {e.response.status_code} - {e.response.text}")
             raise
@@ -120,51 +166,26 @@ class SiliconFlowService:
         Yields:
             模型回复的文本片段
         """
-        if not self.is_available:
-            raise ValueError("硅基流动 API Key 未配置")
-        
-        messages = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        if history:
-            messages.extend(history)
-        messages.append({"role": "user", "content": user_input})
-        
-        model_name = self.models.get(model, model)
+        payload = self._build_chat_payload(
+            user_input, system_prompt, history, model, temperature, max_tokens, stream=True
+        )
         
         try:
-            with httpx.Client(timeout=120.0) as client:
-                with client.stream(
-                    "POST",
-                    f"{self.base_url}/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json",
-                    },
-                    json={
-                        "model": model_name,
-                        "messages": messages,
-                        "temperature": temperature,
-                        "max_tokens": max_tokens,
-                        "stream": True,
-                    },
-                ) as response:
-                    response.raise_for_status()
-                    for line in response.iter_lines():
-                        if line.startswith("data: "):
-                            data = line[6:]
-                            if data == "[DONE]":
-                                break
-                            try:
-                                import json
-                                chunk = json.loads(data)
-                                delta = chunk["choices"][0].get("delta", {})
-                                content = delta.get("content", "")
-                                if content:
-                                    yield content
-                            except:
-                                continue
-                                
+            with self.http.stream(
+                "POST",
+                f"{self.base_url}/chat/completions",
+                headers=self._headers,
+                json=payload,
+                timeout=120.0,
+            ) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    content = self._parse_stream_line(line)
+                    if content is None:
+                        break
+                    if content:
+                        yield content
+        
         except Exception as e:
             logger.error(f"[SiliconFlow] 流式调用失败: {e}")
             raise
@@ -180,7 +201,7 @@ class SiliconFlowService:
         Args:
             text: 输入文本
             model: 嵌入模型名称
-            
+        
         Returns:
             嵌入向量
         """
@@ -190,29 +211,37 @@ class SiliconFlowService:
         model_name = self.models.get(model, model)
         
         try:
-            with httpx.Client(timeout=30.0) as client:
-                response = client.post(
-                    f"{self.base_url}/embeddings",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json",
-                    },
-                    json={
-                        "model": model_name,
-                        "input": text,
-                    },
-                )
-                response.raise_for_status()
-                result = response.json()
-                
-                embedding = result["data"][0]["embedding"]
-                logger.debug(f"[SiliconFlow] 嵌入生成成功，维度: {len(embedding)}")
-                return embedding
-                
+            response = self.http.post(
+                f"{self.base_url}/embeddings",
+                headers=self._headers,
+                json={
+                    "model": model_name,
+                    "input": text,
+                },
+                timeout=30.0,
+            )
+            response.raise_for_status()
+            result = response.json()
+            
+            embedding = result["data"][0]["embedding"]
+            logger.debug(f"[SiliconFlow] 嵌入生成成功，维度: {len(embedding)}")
+            return embedding
+        
         except Exception as e:
             logger.error(f"[SiliconFlow] 嵌入生成失败: {e}")
             raise
     
+    async def aget_embedding(
+        self,
+        text: str,
+        model: str = "bce-embedding",
+    ) -> List[float]:
+        """
+        异步获取文本嵌入向量，参数同 get_embedding
+        """
+        embeddings = await self.aget_embeddings_batch([text], model=model)
+        return embeddings[0]
+    
     def get_embeddings_batch(
         self,
         texts: List[str],
@@ -224,7 +253,7 @@ class SiliconFlowService:
         Args:
             texts: 输入文本列表
             model: 嵌入模型名称
-            
+        
         Returns:
             嵌入向量列表
         """
@@ -234,28 +263,56 @@ class SiliconFlowService:
         model_name = self.models.get(model, model)
         
         try:
-            with httpx.Client(timeout=60.0) as client:
-                response = client.post(
-                    f"{self.base_url}/embeddings",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json",
-                    },
-                    json={
-                        "model": model_name,
-                        "input": texts,
-                    },
-                )
-                response.raise_for_status()
-                result = response.json()
-                
-                embeddings = [item["embedding"] for item in result["data"]]
-                logger.info(f"[SiliconFlow] 批量嵌入成功，数量: {len(embeddings)}")
-                return embeddings
-                
+            response = self.http.post(
+                f"{self.base_url}/embeddings",
+                headers=self._headers,
+                json={
+                    "model": model_name,
+                    "input": texts,
+                },
+            )
+            response.raise_for_status()
+            result = response.json()
+            
+            # 按 index 还原输入顺序（接口不保证 data 与 input 同序）
+            embeddings = [item["embedding"] for item in sorted(result["data"], key=lambda item: item.get("index", 0))]
+            logger.info(f"[SiliconFlow] 批量嵌入成功，数量: {len(embeddings)}")
+            return embeddings
+        
         except Exception as e:
             logger.error(f"[SiliconFlow] 批量嵌入失败: {e}")
             raise
+    
+    async def aget_embeddings_batch(
+        self,
+        texts: List[str],
+        model: str = "bce-embedding",
+    ) -> List[List[float]]:
+        """
+        异步批量获取文本嵌入向量，参数同 get_embeddings_batch
+        """
+        if not self.is_available:
+            raise ValueError("硅基流动 API Key 未配置")
+        
+        model_name = self.models.get(model, model)
+        
+        try:
+            response = await self.http.apost(
+                f"{self.base_url}/embeddings",
+                headers=self._headers,
+                json={
+                    "model": model_name,
+                    "input": texts,
+                },
+            )
+            response.raise_for_status()
+            result = response.json()
+            
+            return [item["embedding"] for item in sorted(result["data"], key=lambda item: item.get("index", 0))]
+        
+        except Exception as e:
+            logger.error(f"[SiliconFlow] 异步批量嵌入失败: {e}")
+            raise
 
 
 # 创建全局实例
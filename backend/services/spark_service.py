@@ -5,9 +5,11 @@
 使用新版 HTTP API（OpenAI 兼容格式）调用星火大模型。
 """
 
-import requests
+import json
 import logging
-from typing import List, Dict, Optional
+from typing import Any, Dict, Generator, List, Optional, Tuple
+
+from services.http_client import get_provider_client
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +24,10 @@ class SparkConfig:
     
     # 模型名称
     MODEL = "x1"  # Spark X1.5
+    
+    # 请求超时（秒）和同时进行的请求数上限
+    TIMEOUT = 60.0
+    MAX_CONCURRENCY = 16
 
 
 class SparkServiceHTTP:
@@ -31,6 +37,79 @@ class SparkServiceHTTP:
         self.api_url = SparkConfig.API_URL
         self.api_password = SparkConfig.API_PASSWORD
         self.model = SparkConfig.MODEL
+        
+        # 共享的连接池客户端（keep-alive，按服务商限制并发）
+        self.http = get_provider_client(
+            "spark",
+            timeout=SparkConfig.TIMEOUT,
+            max_concurrency=SparkConfig.MAX_CONCURRENCY,
+        )
+    
+    def _build_request(
+        self,
+        user_input: str,
+        system_prompt: Optional[str],
+        history: Optional[List[Dict[str, str]]],
+        temperature: float,
+        max_tokens: int,
+        stream: bool = False
+    ) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """构建请求体和请求头"""
+        # 构建消息
+        messages = []
+        
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        
+        if history:
+            messages.extend(history)
+        
+        messages.append({"role": "user", "content": user_input})
+        
+        # 请求体
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        if stream:
+            payload["stream"] = True
+        
+        # 请求头
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_password}"
+        }
+        
+        return payload, headers
+    
+    @staticmethod
+    def _parse_response(response) -> str:
+        """解析响应，失败时返回给用户的提示文本"""
+        if response.status_code == 200:
+            data = response.json()
+            content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
+            return content
+        else:
+            error_msg = f"HTTP {response.status_code}: {response.text}"
+            logger.error(f"Spark API error: {error_msg}")
+            return f"抱歉，AI服务暂时不可用: {error_msg}"
+    
+    @staticmethod
+    def _parse_stream_line(line: str) -> Optional[str]:
+        """解析 SSE 数据行，返回回复文本片段（不含思考过程）；遇到结束标记时返回 None"""
+        if not line.startswith("data:"):
+            return ""
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return None
+        try:
+            chunk = json.loads(data)
+            delta = chunk["choices"][0].get("delta", {})
+            return delta.get("content", "") or ""
+        except (ValueError, KeyError, IndexError):
+            return ""
     
     def chat(
         self,
@@ -54,51 +133,48 @@ class SparkServiceHTTP:
             AI回复文本
         """
         try:
-            # 构建消息
-            messages = []
-            
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-            
-            if history:
-                messages.extend(history)
-            
-            messages.append({"role": "user", "content": user_input})
-            
-            # 请求体
-            payload = {
-                "model": self.model,
-                "messages": messages,
-                "temperature": temperature,
-                "max_tokens": max_tokens
-            }
-            
-            # 请求头
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {self.api_password}"
-            }
-            
-            # 发送请求
-            response = requests.post(
-                self.api_url,
-                json=payload,
-                headers=headers,
-                timeout=60
+            payload, headers = self._build_request(
+                user_input, system_prompt, history, temperature, max_tokens
             )
             
-            if response.status_code == 200:
-                data = response.json()
-                content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
-                return content
-            else:
-                error_msg = f"HTTP {response.status_code}: {response.text}"
-                logger.error(f"Spark API error: {error_msg}")
-                return f"抱歉，AI服务暂时不可用: {error_msg}"
+            # 发送请求（复用连接池中的长连接）
+            response = self.http.post(self.api_url, json=payload, headers=headers)
+            return self._parse_response(response)
                 
         except Exception as e:
             logger.error(f"Spark API exception: {e}")
             return f"抱歉，AI服务暂时不可用: {str(e)}"
+    
+    def chat_stream(
+        self,
+        user_input: str,
+        system_prompt: str = None,
+        history: List[Dict[str, str]] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2048
+    ) -> Generator[str, None, None]:
+        """
+        流式调用讯飞星火 HTTP API，参数同 chat
+        
+        与 chat 不同，请求失败时直接抛出异常，由调用方决定降级方式。
+        
+        Yields:
+            AI回复的文本片段
+        """
+        payload, headers = self._build_request(
+            user_input, system_prompt, history, temperature, max_tokens, stream=True
+        )
+        
+        with self.http.stream("POST", self.api_url, json=payload, headers=headers) as response:
+            if response.status_code != 200:
+                response.read()
+                raise RuntimeError(f"HTTP {response.status_code}: {response.text}")
+            for line in response.iter_lines():
+                content = self._parse_stream_line(line)
+                if content is None:
+                    break
+                if content:
+                    yield content
 
 
 # 创建全局实例
@@ -1,17 +1,26 @@
 """
 流式语音识别服务
 前端实时采集音频流 → WebSocket传输 → faster-whisper实时识别
+
+识别流程：
+1. 每个连接一个 StreamingRecognizer，音频写入预分配的 int16 环形缓冲（无临时文件、无 bytes 拼接）
+2. 每积累一定时长的新音频，对滑动窗口做一次识别，推送部分结果（partial）
+3. 窗口过长时，把除最后一段外的识别结果固定下来，窗口起点前移
+4. 识别在专用线程池中执行，不阻塞事件循环；线程池大小即每个进程的并发上限，
+   识别任务繁忙时跳过部分结果（不积压），最终结果总会等待执行
+
+模型通过 ASRModel 接口注入，测试时可替换为桩模型。
 """
 
 import asyncio
 import logging
-import tempfile
 import os
-import wave
-import io
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import AsyncGenerator, Awaitable, Callable, List, Optional, Union
+
 import numpy as np
-from typing import Optional, Callable, AsyncGenerator
-from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
@@ -24,89 +33,390 @@ except ImportError:
     logger.warning("faster-whisper 未安装，请运行: pip install faster-whisper")
 
 
+AudioInput = Union[bytes, bytearray, memoryview, np.ndarray]
+
+
+@dataclass
+class ASRSegment:
+    """识别出的一段文本（时间相对于送入的音频起点，单位：秒）"""
+    start: float
+    end: float
+    text: str
+
+
+class ASRModel(ABC):
+    """识别模型接口：输入 float32 单声道音频（-1~1），返回分段结果"""
+
+    @abstractmethod
+    def transcribe(self, audio: np.ndarray, sample_rate: int) -> List[ASRSegment]:
+        """识别一段音频"""
+
+
+class WhisperASRModel(ASRModel):
+    """faster-whisper 模型（直接传入 NumPy 数组，不写临时文件）"""
+
+    def __init__(self, model_size: str = "tiny", num_workers: int = 1):
+        self.model = WhisperModel(
+            model_size,
+            device="cpu",  # 或 "cuda" 如果有GPU
+            compute_type="int8",  # 量化以提高速度
+            num_workers=num_workers,  # 允许多个线程同时识别
+        )
+
+    def transcribe(self, audio: np.ndarray, sample_rate: int) -> List[ASRSegment]:
+        if sample_rate != 16000:
+            # Whisper 需要 16kHz 输入，简单线性插值重采样
+            target_length = int(len(audio) * 16000 / sample_rate)
+            audio = np.interp(
+                np.linspace(0, len(audio) - 1, target_length), np.arange(len(audio)), audio
+            ).astype(np.float32)
+
+        segments, info = self.model.transcribe(
+            audio,
+            language="zh",
+            beam_size=5,
+            vad_filter=True,  # 启用 VAD 过滤静音
+            vad_parameters=dict(
+                min_silence_duration_ms=500,
+            ),
+        )
+        return [ASRSegment(s.start, s.end, s.text) for s in segments]
+
+
+def pcm16_to_float32(audio: AudioInput) -> np.ndarray:
+    """16-bit PCM → float32 (-1~1)"""
+    if isinstance(audio, np.ndarray):
+        samples = audio
+    else:
+        samples = np.frombuffer(audio, dtype=np.int16)
+    if samples.dtype == np.int16:
+        return samples.astype(np.float32) / 32768.0
+    return samples.astype(np.float32, copy=False)
+
+
+class PCMRingBuffer:
+    """
+    预分配的 16-bit PCM 环形缓冲
+
+    以样本序号（从 0 开始累计）定位音频，容量满后覆盖最旧的数据。
+    """
+
+    def __init__(self, capacity_samples: int):
+        self.capacity = capacity_samples
+        self._data = np.zeros(capacity_samples, dtype=np.int16)
+        self.total_samples = 0       # 累计写入的样本数
+        self._odd_byte = b""         # 上一块数据末尾不足一个样本的字节
+
+    @property
+    def oldest_sample(self) -> int:
+        """缓冲中仍可读取的最早样本序号"""
+        return max(0, self.total_samples - self.capacity)
+
+    def append(self, audio: AudioInput) -> int:
+        """写入音频（bytes/bytearray 为 16-bit 小端 PCM，或 int16 数组），返回写入的样本数"""
+        if isinstance(audio, np.ndarray):
+            samples = audio.astype(np.int16, copy=False).ravel()
+        else:
+            data = bytes(audio)
+            if self._odd_byte:
+                data = self._odd_byte + data
+                self._odd_byte = b""
+            if len(data) % 2:
+                self._odd_byte = data[-1:]
+                data = data[:-1]
+            samples = np.frombuffer(data, dtype=np.int16)
+
+        count = len(samples)
+        if count == 0:
+            return 0
+        if count >= self.capacity:
+            samples = samples[-self.capacity:]
+            self.total_samples += count - self.capacity
+            count_to_write = self.capacity
+        else:
+            count_to_write = count
+
+        start = self.total_samples % self.capacity
+        first = min(count_to_write, self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        if first < count_to_write:
+            self._data[:count_to_write - first] = samples[first:]
+        self.total_samples += count_to_write
+        return count
+
+    def read(self, start_sample: int, end_sample: Optional[int] = None) -> np.ndarray:
+        """读取 [start_sample, end_sample) 的音频副本（int16），超出缓冲的部分被截掉"""
+        end_sample = self.total_samples if end_sample is None else min(end_sample, self.total_samples)
+        start_sample = max(start_sample, self.oldest_sample)
+        if end_sample <= start_sample:
+            return np.zeros(0, dtype=np.int16)
+
+        start = start_sample % self.capacity
+        length = end_sample - start_sample
+        if start + length <= self.capacity:
+            return self._data[start:start + length].copy()
+        return np.concatenate([self._data[start:], self._data[:start + length - self.capacity]])
+
+    def clear(self) -> None:
+        self.total_samples = 0
+        self._odd_byte = b""
+
+
+class StreamingRecognizer:
+    """
+    单个连接的增量识别器
+
+    feed() 只把音频写入环形缓冲；满足条件时在后台调度一次滑动窗口识别，
+    识别结果通过 on_partial 回调返回。finish() 返回整段话的最终结果。
+    """
+
+    def __init__(
+        self,
+        service: "StreamingASRService",
+        sample_rate: int = 16000,
+        on_partial: Optional[Callable[[str], Awaitable[None]]] = None,
+        step_seconds: float = 1.0,
+        min_window_seconds: float = 1.0,
+        max_window_seconds: float = 8.0,
+        buffer_seconds: float = 30.0,
+    ):
+        """
+        Args:
+            service: 提供模型和线程池的识别服务
+            sample_rate: 采样率
+            on_partial: 部分结果回调（协程函数），参数为 已固定文本 + 当前假设
+            step_seconds: 每积累多少秒新音频识别一次
+            min_window_seconds: 窗口达到该时长才开始识别
+            max_window_seconds: 窗口超过该时长时固定前面的分段
+            buffer_seconds: 环形缓冲容量
+        """
+        self.service = service
+        self.sample_rate = sample_rate
+        self.on_partial = on_partial
+        self.step_samples = int(step_seconds * sample_rate)
+        self.min_window_samples = int(min_window_seconds * sample_rate)
+        self.max_window_samples = int(max_window_seconds * sample_rate)
+
+        self.buffer = PCMRingBuffer(int(buffer_seconds * sample_rate))
+        self.committed_text = ""     # 已固定的文本
+        self.hypothesis = ""         # 当前窗口的识别结果
+        self._window_start = 0       # 当前窗口起点（样本序号）
+        self._last_decoded = 0       # 上次识别时的缓冲末尾
+        self._task: Optional[asyncio.Task] = None
+        self.skipped_partials = 0
+
+    @property
+    def text(self) -> str:
+        return self.committed_text + self.hypothesis
+
+    def reset(self) -> None:
+        """开始新的一段话"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
+        self.buffer.clear()
+        self.committed_text = ""
+        self.hypothesis = ""
+        self._window_start = 0
+        self._last_decoded = 0
+
+    def feed(self, audio: AudioInput) -> None:
+        """写入音频，必要时调度一次后台识别（不阻塞）"""
+        self.buffer.append(audio)
+
+        if self._task is not None and not self._task.done():
+            return  # 上一次识别尚未结束，新音频会在下一次一起识别
+        total = self.buffer.total_samples
+        if total - self._last_decoded < self.step_samples:
+            return
+        if total - self._window_start < self.min_window_samples:
+            return
+        if self.service.is_busy():
+            # 所有识别线程都在忙，跳过这次部分结果，避免积压
+            self.skipped_partials += 1
+            return
+
+        self._task = asyncio.create_task(self._decode_partial())
+
+    def _window_audio(self) -> np.ndarray:
+        # 识别太慢导致窗口起点已被覆盖时，从缓冲中最早的数据开始
+        if self._window_start < self.buffer.oldest_sample:
+            logger.warning("识别速度跟不上音频输入，丢弃部分早期音频")
+            self._window_start = self.buffer.oldest_sample
+        return self.buffer.read(self._window_start)
+
+    def _apply_segments(self, segments: List[ASRSegment], window_start: int, window_end: int) -> None:
+        """更新假设；窗口过长时固定除最后一段外的文本并前移窗口"""
+        self.hypothesis = "".join(s.text for s in segments).strip()
+        if window_end - window_start <= self.max_window_samples:
+            return
+
+        if len(segments) > 1:
+            keep_from = segments[-1].start
+            self.committed_text += "".join(s.text for s in segments[:-1]).strip()
+            self._window_start = window_start + int(keep_from * self.sample_rate)
+            self.hypothesis = segments[-1].text.strip()
+        else:
+            # 只有一段（或无语音）时整体固定
+            self.committed_text += self.hypothesis
+            self._window_start = window_end
+            self.hypothesis = ""
+
+    async def _decode_partial(self) -> None:
+        audio = self._window_audio()
+        window_start = self._window_start
+        window_end = window_start + len(audio)
+        self._last_decoded = window_end
+
+        try:
+            segments = await self.service.transcribe_segments_async(audio, self.sample_rate)
+        except Exception as e:
+            logger.error(f"部分结果识别失败: {e}")
+            return
+
+        self._apply_segments(segments, window_start, window_end)
+        if self.on_partial and self.text:
+            try:
+                await self.on_partial(self.text)
+            except Exception as e:
+                logger.error(f"推送部分结果失败: {e}")
+
+    async def finish(self) -> str:
+        """等待进行中的识别，识别剩余音频，返回整段话的最终结果"""
+        if self._task is not None and not self._task.done():
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+        audio = self._window_audio()
+        if len(audio) >= self.sample_rate // 4:  # 至少0.25秒
+            try:
+                segments = await self.service.transcribe_segments_async(audio, self.sample_rate)
+                self.hypothesis = "".join(s.text for s in segments).strip()
+            except Exception as e:
+                logger.error(f"最终结果识别失败: {e}")
+
+        return self.text.strip()
+
+
 class StreamingASRService:
     """流式语音识别服务"""
-    
-    def __init__(self):
-        self.model: Optional[WhisperModel] = None
+
+    def __init__(self, model: Optional[ASRModel] = None, max_concurrency: Optional[int] = None):
+        """
+        Args:
+            model: 识别模型，为 None 时按需加载 faster-whisper（测试时可传入桩模型）
+            max_concurrency: 每个进程同时进行的识别数上限（识别线程数）
+        """
+        self.model: Optional[ASRModel] = model
         self.model_size = "tiny"  # tiny/base/small/medium/large
-        self.is_initialized = False
-        
+        self.is_initialized = model is not None
+        self.max_concurrency = max_concurrency or int(os.getenv("ASR_MAX_CONCURRENCY", "2"))
+
+        # 专用识别线程池，不占用事件循环和默认线程池
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="asr")
+        self._active = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
     def init_model(self) -> bool:
         """初始化 Whisper 模型"""
+        if self.is_initialized:
+            return True
+
         if not HAS_FASTER_WHISPER:
             logger.error("faster-whisper 未安装")
             return False
-            
-        if self.is_initialized:
-            return True
-            
+
         try:
             logger.info(f"正在加载 Whisper 模型: {self.model_size}")
-            self.model = WhisperModel(
-                self.model_size,
-                device="cpu",  # 或 "cuda" 如果有GPU
-                compute_type="int8"  # 量化以提高速度
-            )
+            self.model = WhisperASRModel(self.model_size, num_workers=self.max_concurrency)
             self.is_initialized = True
             logger.info("Whisper 模型加载成功")
             return True
         except Exception as e:
             logger.error(f"Whisper 模型加载失败: {e}")
             return False
-    
-    def transcribe_audio(self, audio_data: bytes, sample_rate: int = 16000) -> str:
+
+    @property
+    def is_available(self) -> bool:
+        return self.is_initialized or HAS_FASTER_WHISPER
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """识别并发信号量（按事件循环创建）"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    def is_busy(self) -> bool:
+        """识别线程是否已全部占用"""
+        return self._active >= self.max_concurrency
+
+    def transcribe_segments(self, audio: AudioInput, sample_rate: int = 16000) -> List[ASRSegment]:
+        """同步识别，返回分段结果（音频可为 16-bit PCM 字节、int16 或 float32 数组）"""
+        if not self.is_initialized:
+            if not self.init_model():
+                return []
+        return self.model.transcribe(pcm16_to_float32(audio), sample_rate)
+
+    async def transcribe_segments_async(self, audio: AudioInput, sample_rate: int = 16000) -> List[ASRSegment]:
+        """在识别线程池中识别，受并发上限约束"""
+        loop = asyncio.get_running_loop()
+        semaphore = self._get_semaphore()
+        await semaphore.acquire()
+        self._active += 1
+
+        def release(_):
+            self._active -= 1
+            semaphore.release()
+
+        future = loop.run_in_executor(self._executor, self.transcribe_segments, audio, sample_rate)
+        # 调用方取消时线程仍在运行，等线程真正结束才释放名额
+        future.add_done_callback(release)
+        return await asyncio.shield(future)
+
+    def transcribe_audio(self, audio_data: AudioInput, sample_rate: int = 16000) -> str:
         """
-        识别音频数据
-        
+        识别音频数据（同步，勿在事件循环中直接调用）
+
         Args:
             audio_data: PCM 音频数据 (16-bit, mono)
             sample_rate: 采样率
-            
+
         Returns:
             识别的文本
         """
-        if not self.is_initialized:
-            if not self.init_model():
-                return ""
-        
         try:
-            # 将音频数据转换为临时 WAV 文件
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
-                temp_path = f.name
-                
-                # 写入 WAV 格式
-                with wave.open(f, 'wb') as wav:
-                    wav.setnchannels(1)  # 单声道
-                    wav.setsampwidth(2)  # 16-bit
-                    wav.setframerate(sample_rate)
-                    wav.writeframes(audio_data)
-            
-            # 使用 faster-whisper 识别
-            segments, info = self.model.transcribe(
-                temp_path,
-                language="zh",
-                beam_size=5,
-                vad_filter=True,  # 启用 VAD 过滤静音
-                vad_parameters=dict(
-                    min_silence_duration_ms=500,
-                ),
-            )
-            
-            # 收集所有文本
-            text = "".join([segment.text for segment in segments])
-            
-            # 清理临时文件
-            os.unlink(temp_path)
-            
-            return text.strip()
-            
+            segments = self.transcribe_segments(audio_data, sample_rate)
+            return "".join(segment.text for segment in segments).strip()
+        except Exception as e:
+            logger.error(f"语音识别失败: {e}")
+            return ""
+
+    async def transcribe_audio_async(self, audio_data: AudioInput, sample_rate: int = 16000) -> str:
+        """异步识别音频数据（在识别线程池中执行）"""
+        try:
+            segments = await self.transcribe_segments_async(audio_data, sample_rate)
+            return "".join(segment.text for segment in segments).strip()
         except Exception as e:
             logger.error(f"语音识别失败: {e}")
             return ""
-    
+
+    def create_recognizer(
+        self,
+        sample_rate: int = 16000,
+        on_partial: Optional[Callable[[str], Awaitable[None]]] = None,
+        **kwargs,
+    ) -> StreamingRecognizer:
+        """创建一个连接使用的增量识别器"""
+        return StreamingRecognizer(self, sample_rate=sample_rate, on_partial=on_partial, **kwargs)
+
     async def transcribe_stream(
-        self, 
+        self,
         audio_chunks: AsyncGenerator[bytes, None],
         sample_rate: int = 16000,
         chunk_duration: float = 2.0,  # 每2秒识别一次
@@ -115,53 +425,46 @@ class StreamingASRService:
     ) -> str:
         """
         流式识别音频
-        
+
         Args:
             audio_chunks: 音频数据流
             sample_rate: 采样率
             chunk_duration: 每次识别的时长(秒)
             on_partial: 部分结果回调
             on_final: 最终结果回调
-            
+
         Returns:
             完整识别文本
         """
         if not self.is_initialized:
             if not self.init_model():
                 return ""
-        
-        buffer = b""
-        chunk_size = int(sample_rate * 2 * chunk_duration)  # 16-bit = 2 bytes per sample
-        all_text = []
-        
+
+        async def emit_partial(text: str):
+            if on_partial:
+                on_partial(text)
+
+        recognizer = self.create_recognizer(
+            sample_rate, on_partial=emit_partial, step_seconds=chunk_duration
+        )
+
         try:
             async for chunk in audio_chunks:
-                buffer += chunk
-                
-                # 当缓冲区足够大时进行识别
-                if len(buffer) >= chunk_size:
-                    text = self.transcribe_audio(buffer, sample_rate)
-                    if text:
-                        all_text.append(text)
-                        if on_partial:
-                            on_partial(text)
-                    buffer = b""  # 清空缓冲区
-            
-            # 处理剩余数据
-            if len(buffer) > sample_rate:  # 至少0.5秒
-                text = self.transcribe_audio(buffer, sample_rate)
-                if text:
-                    all_text.append(text)
-            
-            final_text = "".join(all_text)
-            if on_final and final_text:
-                on_final(final_text)
-                
-            return final_text
-            
+                recognizer.feed(chunk)
         except Exception as e:
             logger.error(f"流式识别失败: {e}")
-            return "".join(all_text)
+
+        final_text = await recognizer.finish()
+        if on_final and final_text:
+            on_final(final_text)
+
+        return final_text
+
+    def get_stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "active": self._active,
+        }
 
 
 # 全局实例
@@ -0,0 +1,285 @@
+"""
+语音合成音频缓存
+================
+
+以 (文本, 语音, 语速, 音量) 的哈希为键缓存 TTS 生成的 MP3。
+
+特点：
+1. 内容寻址：相同参数的文本只合成一次，音频ID即缓存键，/voice/audio/{id} 接口无需改动
+2. 两级缓存：磁盘按总大小做 LRU 淘汰，内存保存最近使用的热点音频
+3. 固定短语（唤醒应答、自动化场景播报）可以固定在缓存中，不被淘汰和过期清理
+4. 线程安全
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class TTSAudioCache:
+    """内容哈希 → MP3 音频 的两级 LRU 缓存"""
+
+    def __init__(
+        self,
+        directory: Path,
+        max_disk_bytes: int = 512 * 1024 * 1024,
+        max_memory_bytes: int = 32 * 1024 * 1024,
+        suffix: str = ".mp3"
+    ):
+        """
+        初始化缓存
+
+        Args:
+            directory: 音频文件目录（已有文件按修改时间恢复 LRU 顺序）
+            max_disk_bytes: 磁盘缓存总大小上限
+            max_memory_bytes: 内存热点缓存总大小上限
+            suffix: 音频文件后缀
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self.suffix = suffix
+
+        self._lock = threading.Lock()
+        # 键 → 文件大小，按最近使用排序（末尾最新）
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+        # 键 → 音频数据，按最近使用排序
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._pinned: Set[str] = set()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._load_index()
+
+    @staticmethod
+    def make_key(text: str, voice: str, rate: str, volume: str) -> str:
+        """根据文本和语音参数生成缓存键"""
+        raw = f"{voice}\x00{rate}\x00{volume}\x00{text}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.suffix}"
+
+    def _load_index(self) -> None:
+        """扫描目录，按修改时间（每次命中会更新）恢复 LRU 顺序"""
+        entries = []
+        for file in self.directory.glob(f"*{self.suffix}"):
+            try:
+                stat = file.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, file.stem, stat.st_size))
+        entries.sort()
+        for _, key, size in entries:
+            self._disk[key] = size
+            self._disk_bytes += size
+        with self._lock:
+            self._evict_disk()
+        if entries:
+            logger.info(f"TTS 缓存已加载: {len(self._disk)} 个音频, {self._disk_bytes / 1024 / 1024:.1f} MB")
+
+    # ------------------------------------------------------------------
+    # 读取
+    # ------------------------------------------------------------------
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        """读取音频数据，未命中返回 None"""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                if key in self._disk:
+                    self._disk.move_to_end(key)
+                self.memory_hits += 1
+                return data
+            on_disk = key in self._disk
+
+        if on_disk:
+            try:
+                data = self.path(key).read_bytes()
+            except OSError:
+                data = None
+            if data is not None:
+                with self._lock:
+                    self._touch(key)
+                    self._remember(key, data)
+                    self.disk_hits += 1
+                return data
+            self._forget(key)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def get_path(self, key: str) -> Optional[Path]:
+        """获取音频文件路径，未命中返回 None"""
+        path = self.path(key)
+        with self._lock:
+            if key not in self._disk:
+                self.misses += 1
+                return None
+        if not path.exists():
+            # 文件被外部删除
+            self._forget(key)
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self._touch(key)
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+            else:
+                self.disk_hits += 1
+        return path
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._disk
+
+    # ------------------------------------------------------------------
+    # 写入
+    # ------------------------------------------------------------------
+
+    def put(self, key: str, data: bytes) -> Path:
+        """写入音频（先写临时文件再改名，并发读取不会读到半个文件）"""
+        path = self.path(key)
+        tmp_path = path.with_name(f".{key}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            old_size = self._disk.pop(key, None)
+            if old_size is not None:
+                self._disk_bytes -= old_size
+            self._disk[key] = len(data)
+            self._disk_bytes += len(data)
+            self._remember(key, data)
+            self._evict_disk()
+        return path
+
+    def pin(self, keys: Iterable[str]) -> None:
+        """固定音频，不参与 LRU 淘汰和过期清理"""
+        with self._lock:
+            self._pinned.update(keys)
+
+    def is_pinned(self, key: str) -> bool:
+        with self._lock:
+            return key in self._pinned
+
+    def remove(self, key: str) -> bool:
+        """删除音频，返回是否删除（固定的音频不删除）"""
+        if Path(key).name != key:
+            return False
+        with self._lock:
+            if key in self._pinned:
+                return False
+        self._forget(key)
+        try:
+            self.path(key).unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
+    def remove_older_than(self, max_age_seconds: float) -> int:
+        """删除超过指定时间未使用的音频（固定的除外），返回删除数量"""
+        cutoff = time.time() - max_age_seconds
+        with self._lock:
+            candidates = [key for key in self._disk if key not in self._pinned]
+        removed = 0
+        for key in candidates:
+            try:
+                if self.path(key).stat().st_mtime >= cutoff:
+                    continue
+            except OSError:
+                pass
+            self.remove(key)
+            removed += 1
+        if removed:
+            logger.info(f"清理过期音频 {removed} 个")
+        return removed
+
+    # ------------------------------------------------------------------
+    # 内部（除 _forget 外，调用方持有锁）
+    # ------------------------------------------------------------------
+
+    def _touch(self, key: str) -> None:
+        """更新最近使用时间（文件修改时间用于重启后恢复 LRU 顺序）"""
+        if key in self._disk:
+            self._disk.move_to_end(key)
+        try:
+            os.utime(self.path(key))
+        except OSError:
+            pass
+
+    def _remember(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_memory_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= len(old)
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.max_memory_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _evict_disk(self) -> None:
+        if self._disk_bytes <= self.max_disk_bytes:
+            return
+        for key in list(self._disk):
+            if self._disk_bytes <= self.max_disk_bytes:
+                break
+            if key in self._pinned:
+                continue
+            size = self._disk.pop(key)
+            self._disk_bytes -= size
+            data = self._memory.pop(key, None)
+            if data is not None:
+                self._memory_bytes -= len(data)
+            try:
+                self.path(key).unlink()
+            except OSError:
+                pass
+            self.evictions += 1
+
+    def _forget(self, key: str) -> None:
+        with self._lock:
+            size = self._disk.pop(key, None)
+            if size is not None:
+                self._disk_bytes -= size
+            data = self._memory.pop(key, None)
+            if data is not None:
+                self._memory_bytes -= len(data)
+
+    # ------------------------------------------------------------------
+    # 状态
+    # ------------------------------------------------------------------
+
+    def get_stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._disk),
+                "disk_mb": round(self._disk_bytes / 1024 / 1024, 2),
+                "memory_entries": len(self._memory),
+                "memory_mb": round(self._memory_bytes / 1024 / 1024, 2),
+                "pinned": len(self._pinned),
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+            }
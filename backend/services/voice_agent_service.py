@@ -12,7 +12,8 @@
 import logging
 import asyncio
 import re
-from typing import Dict, Optional, Tuple, Any
+import threading
+from typing import AsyncGenerator, Callable, Dict, Optional, Tuple, Any
 from dataclasses import dataclass
 from enum import Enum
 
@@ -29,11 +30,15 @@ except ImportError:
 # 导入多Agent服务
 try:
     from services.agents.multi_agent_service import multi_agent_service
+    from services.agents.base_agent import LLMStreamCancelled
     HAS_MULTI_AGENT = True
 except ImportError:
     HAS_MULTI_AGENT = False
     multi_agent_service = None
 
+    class LLMStreamCancelled(Exception):
+        pass
+
 # 导入自动化服务
 try:
     from services.automation_service import automation_service
@@ -293,6 +298,14 @@ class VoiceAgentService:
     整合语音交互与多Agent系统，提供完整的语音对话能力。
     """
     
+    # 只说唤醒词时的应答
+    WAKE_REPLY = "我在呢，有什么可以帮您的吗？"
+    
+    # 流式播报：第一句在逗号处断句的最少字数（越小首句越早开始播报）
+    FIRST_CLAUSE_CHARS = 6
+    # 流式播报：同时合成的句子数
+    TTS_PARALLEL_SENTENCES = 3
+    
     def __init__(self):
         self.wake_word_detector = WakeWordDetector()
         self.emotion_analyzer = VoiceEmotionAnalyzer()
@@ -302,38 +315,12 @@ class VoiceAgentService:
         self.is_awake = False  # 是否已唤醒
         self.awake_timeout = 30  # 唤醒后保持激活的时间（秒）
         self.last_interaction_time = 0
-    
-    async def process_voice_input(
-        self,
-        audio_data: bytes,
-        user_id: str = "default",
-        user_role: str = "elderly",
-        voice_style: str = "default",
-        require_wake_word: bool = False
-    ) -> Dict[str, Any]:
-        """
-        处理语音输入（完整流程）
-        
-        流程：语音 → ASR → 唤醒词检测 → 情感分析 → 多Agent处理 → TTS
         
-        Args:
-            audio_data: 音频二进制数据
-            user_id: 用户ID
-            user_role: 用户角色 (elderly/children/community)
-            voice_style: 语音风格
-            require_wake_word: 是否需要唤醒词
-            
-        Returns:
-            {
-                "text": 识别的文本,
-                "response": AI回复文本,
-                "audio_url": TTS音频URL,
-                "emotion": 识别的情感,
-                "agent": 处理的智能体,
-                "wake_word_detected": 是否检测到唤醒词
-            }
-        """
-        result = {
+        # 被打断后仍在后台执行的回复生成任务
+        self._pending_replies: set = set()
+    
+    def _new_result(self) -> Dict[str, Any]:
+        return {
             "success": False,
             "text": "",
             "response": "",
@@ -345,11 +332,12 @@ class VoiceAgentService:
             "wake_word_detected": False,
             "wake_word": None
         }
-        
-        # 1. 语音识别 (ASR)
+    
+    async def _recognize(self, audio_data: bytes, result: Dict[str, Any]) -> Optional[str]:
+        """语音识别 (ASR)，失败时在 result 中写入错误并返回 None"""
         if not HAS_VOICE or voice_service is None:
             result["error"] = "语音服务不可用"
-            return result
+            return None
         
         try:
             text = await voice_service.speech_to_text(audio_data)
@@ -357,21 +345,43 @@ class VoiceAgentService:
             
             if not text.strip():
                 result["error"] = "未检测到语音"
-                return result
+                return None
+            return text
                 
         except Exception as e:
             logger.error(f"ASR失败: {e}")
             result["error"] = f"语音识别失败: {str(e)}"
-            return result
+            return None
+    
+    async def _respond(
+        self,
+        text: str,
+        result: Dict[str, Any],
+        user_id: str,
+        user_role: str,
+        require_wake_word: bool,
+        on_delta: Optional[Callable[[str], None]] = None
+    ) -> Optional[VoiceEmotion]:
+        """
+        根据识别文本生成回复，写入 result["response"]
+        
+        流程：唤醒词检测 → 情感分析 → 自动化场景 / 控制命令 / 多Agent处理
+        
+        Args:
+            on_delta: 接收大模型流式输出的回调（仅单智能体回复会逐段回调，在工作线程中执行）
         
-        # 2. 唤醒词检测
+        Returns:
+            用于调整播报语音的用户情感（只有唤醒词或执行自动化场景时为 None：
+            固定播报内容不随情感调整，与 get_fixed_phrases 预合成的缓存一致）
+        """
+        # 1. 唤醒词检测
         is_wake, wake_word = self.wake_word_detector.detect(text)
         result["wake_word_detected"] = is_wake
         result["wake_word"] = wake_word
         
         if require_wake_word and not is_wake and not self.is_awake:
             result["error"] = "请先说唤醒词（如：小康小康）"
-            return result
+            return None
         
         # 如果检测到唤醒词，激活状态
         if is_wake:
@@ -384,22 +394,16 @@ class VoiceAgentService:
             
             # 如果只有唤醒词，返回问候
             if not text.strip():
-                result["response"] = "我在呢，有什么可以帮您的吗？"
+                result["response"] = self.WAKE_REPLY
                 result["success"] = True
-                # 生成TTS
-                audio_id, _ = await voice_service.text_to_speech(
-                    result["response"],
-                    **self.voice_settings.get_voice_settings(voice_style)
-                )
-                result["audio_url"] = f"/api/v1/voice/audio/{audio_id}"
-                return result
+                return None
         
-        # 3. 情感分析
+        # 2. 情感分析
         emotion, emotion_conf = self.emotion_analyzer.analyze(text)
         result["emotion"] = emotion.value
         result["emotion_confidence"] = emotion_conf
         
-        # 4. 自动化场景匹配（优先级最高）
+        # 3. 自动化场景匹配（优先级最高）
         if HAS_AUTOMATION and automation_service:
             matched_scene = automation_service.match_scene(text)
             if matched_scene:
@@ -417,30 +421,18 @@ class VoiceAgentService:
                     result["success"] = True
                     
                     logger.info(f"执行自动化场景: {matched_scene.name}")
-                    
-                    # 生成TTS
-                    if result["response"]:
-                        voice_params = self.voice_settings.get_voice_settings(voice_style, emotion)
-                        audio_id, _ = await voice_service.text_to_speech(
-                            result["response"],
-                            voice=voice_params["voice"],
-                            rate=voice_params["rate"],
-                            volume=voice_params["volume"]
-                        )
-                        result["audio_url"] = f"/api/v1/voice/audio/{audio_id}"
-                    
-                    return result
+                    return None
                     
                 except Exception as e:
                     logger.error(f"自动化场景执行失败: {e}")
         
-        # 5. 意图识别（判断是否为控制命令）
+        # 4. 意图识别（判断是否为控制命令）
         from services.agents.intent_recognizer import intent_recognizer
         intent_result = intent_recognizer.recognize(text)
         intent_type = intent_result.intent.value
         result["intent"] = intent_result.to_dict()
         
-        # 6. 如果是控制命令，走控制逻辑
+        # 5. 如果是控制命令，走控制逻辑
         if intent_type.startswith("control_"):
             try:
                 from services.voice_control_service import voice_control_service
@@ -461,14 +453,16 @@ class VoiceAgentService:
                 logger.error(f"控制命令处理失败: {e}")
                 result["response"] = "抱歉，控制命令执行失败，请再试一次"
         
-        # 7. 非控制命令，走多Agent处理
+        # 6. 非控制命令，走多Agent处理（同步调用大模型，放到线程中执行）
         elif HAS_MULTI_AGENT and multi_agent_service:
             try:
-                agent_result = multi_agent_service.process(
+                agent_result = await asyncio.to_thread(
+                    multi_agent_service.process,
                     user_input=text,
                     user_id=user_id,
                     user_role=user_role,
-                    mode="auto"
+                    mode="auto",
+                    on_delta=on_delta
                 )
                 
                 result["response"] = agent_result.get("response", "")
@@ -477,13 +471,55 @@ class VoiceAgentService:
                 result["is_control"] = False
                 result["success"] = True
                 
+            except LLMStreamCancelled:
+                raise
             except Exception as e:
                 logger.error(f"多Agent处理失败: {e}")
                 result["response"] = "抱歉，我暂时无法处理您的请求，请稍后再试。"
         else:
             result["response"] = "AI服务暂时不可用"
         
-        # 5. TTS语音合成（根据情感调整语音）
+        return emotion
+    
+    async def process_voice_input(
+        self,
+        audio_data: bytes,
+        user_id: str = "default",
+        user_role: str = "elderly",
+        voice_style: str = "default",
+        require_wake_word: bool = False
+    ) -> Dict[str, Any]:
+        """
+        处理语音输入（完整流程）
+        
+        流程：语音 → ASR → 唤醒词检测 → 情感分析 → 多Agent处理 → TTS
+        
+        Args:
+            audio_data: 音频二进制数据
+            user_id: 用户ID
+            user_role: 用户角色 (elderly/children/community)
+            voice_style: 语音风格
+            require_wake_word: 是否需要唤醒词
+            
+        Returns:
+            {
+                "text": 识别的文本,
+                "response": AI回复文本,
+                "audio_url": TTS音频URL,
+                "emotion": 识别的情感,
+                "agent": 处理的智能体,
+                "wake_word_detected": 是否检测到唤醒词
+            }
+        """
+        result = self._new_result()
+        
+        text = await self._recognize(audio_data, result)
+        if text is None:
+            return result
+        
+        emotion = await self._respond(text, result, user_id, user_role, require_wake_word)
+        
+        # TTS语音合成（根据情感调整语音）
         if result["response"]:
             try:
                 voice_params = self.voice_settings.get_voice_settings(
@@ -504,6 +540,166 @@ class VoiceAgentService:
         
         return result
     
+    async def process_voice_input_stream(
+        self,
+        audio_data: Optional[bytes] = None,
+        text: Optional[str] = None,
+        user_id: str = "default",
+        user_role: str = "elderly",
+        voice_style: str = "default",
+        require_wake_word: bool = False,
+        cancel_event: Optional[asyncio.Event] = None
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        流式处理语音输入：边生成回复边逐句合成播报
+        
+        大模型流式输出 → 增量分句 → 逐句并发TTS（按顺序输出）→ 音频块
+        第一句凑够 FIRST_CLAUSE_CHARS 个字即开始合成，不等待完整回复。
+        
+        Args:
+            audio_data: 音频二进制数据（与 text 二选一）
+            text: 已识别的文本（如浏览器端语音识别的结果）
+            cancel_event: 置位后立即停止生成和播报（用户打断）
+        
+        Yields:
+            - {"type": "recognized", "text": 识别的文本}
+            - {"type": "sentence", "index": 序号, "text": 句子}  开始播报一句
+            - {"type": "audio", "index": 序号, "data": MP3音频字节}
+            - {"type": "done", "interrupted": 是否被打断, "result": 与 process_voice_input 相同的结果（无 audio_url）}
+        """
+        result = self._new_result()
+        cancel_event = cancel_event or asyncio.Event()
+        
+        if not HAS_VOICE or voice_service is None:
+            result["error"] = "语音服务不可用"
+            yield {"type": "done", "interrupted": False, "result": result}
+            return
+        
+        if text is None:
+            text = await self._recognize(audio_data, result)
+            if text is None:
+                yield {"type": "done", "interrupted": False, "result": result}
+                return
+        result["text"] = text
+        yield {"type": "recognized", "text": text}
+        
+        loop = asyncio.get_running_loop()
+        deltas: asyncio.Queue = asyncio.Queue()
+        cancelled = threading.Event()
+        
+        def on_delta(delta: str) -> None:
+            # 在大模型调用线程中执行：被打断后中止生成
+            if cancelled.is_set():
+                raise LLMStreamCancelled()
+            loop.call_soon_threadsafe(deltas.put_nowait, delta)
+        
+        # 播报语音在第一句合成时确定（此时情感分析已完成）
+        emotion_holder: Dict[str, Optional[VoiceEmotion]] = {"emotion": None}
+        pipeline = voice_service.create_tts_pipeline(
+            max_parallel=self.TTS_PARALLEL_SENTENCES,
+            params=lambda: self.voice_settings.get_voice_settings(voice_style, emotion_holder["emotion"])
+        )
+        
+        async def respond() -> None:
+            try:
+                emotion_holder["emotion"] = await self._respond(
+                    text, result, user_id, user_role, require_wake_word, on_delta=on_delta
+                )
+            except LLMStreamCancelled:
+                pass
+            except Exception as e:
+                logger.error(f"流式回复生成失败: {e}")
+                result["error"] = str(e)
+            finally:
+                deltas.put_nowait(None)
+        
+        async def feed() -> None:
+            chunker = voice_service.create_sentence_chunker(first_clause_chars=self.FIRST_CLAUSE_CHARS)
+            streamed = False
+            try:
+                while True:
+                    delta = await deltas.get()
+                    if delta is None:
+                        break
+                    if not streamed:
+                        # 第一段输出前情感分析已完成
+                        emotion_holder["emotion"] = VoiceEmotion(result["emotion"])
+                        streamed = True
+                    for sentence in chunker.feed(delta):
+                        pipeline.add(sentence)
+                
+                # 自动化/控制命令/多智能体等非流式回复，整段分句播报
+                if not streamed and result["response"]:
+                    for sentence in chunker.feed(result["response"]):
+                        pipeline.add(sentence)
+                for sentence in chunker.flush():
+                    pipeline.add(sentence)
+            finally:
+                pipeline.close()
+        
+        async def watch_cancel() -> None:
+            await cancel_event.wait()
+            cancelled.set()
+            pipeline.cancel()
+        
+        respond_task = asyncio.create_task(respond())
+        # 被打断时不等待大模型返回，保留引用直到调用线程结束
+        self._pending_replies.add(respond_task)
+        respond_task.add_done_callback(self._pending_replies.discard)
+        feed_task = asyncio.create_task(feed())
+        cancel_task = asyncio.create_task(watch_cancel())
+        finished = False
+        try:
+            async for event in pipeline.stream():
+                if cancel_event.is_set():
+                    break
+                yield event
+            finished = not cancel_event.is_set()
+        finally:
+            cancelled.set()
+            cancel_task.cancel()
+            if not finished:
+                # 大模型调用线程在下一段输出时中止；非流式调用在后台执行完毕后丢弃
+                pipeline.cancel()
+                feed_task.cancel()
+        
+        if finished:
+            await feed_task
+        yield {"type": "done", "interrupted": not finished, "result": result}
+    
+    def get_fixed_phrases(self, voice_styles: Optional[list] = None) -> list:
+        """
+        需要预合成的固定播报内容：唤醒应答、自动化场景播报
+        
+        每条内容按整段（process_voice_input）和流式分句（process_voice_input_stream）两种方式登记，
+        语音参数与实际播报时相同（固定播报内容不随情感调整）。
+        
+        Args:
+            voice_styles: 预合成的语音风格，默认全部风格
+        """
+        styles = voice_styles or list(self.voice_settings.VOICE_RECOMMENDATIONS)
+        texts = [self.WAKE_REPLY]
+        if HAS_AUTOMATION and automation_service:
+            for scene in automation_service.scenes.values():
+                speak_texts = [action.speak_text for action in scene.actions if action.speak_text]
+                texts.append(" ".join(speak_texts) or f"正在执行{scene.name}")
+        
+        items = []
+        for style in styles:
+            params = self.voice_settings.get_voice_settings(style)
+            voice = {"voice": params["voice"], "rate": params["rate"], "volume": params["volume"]}
+            for text in texts:
+                chunker = voice_service.create_sentence_chunker(first_clause_chars=self.FIRST_CLAUSE_CHARS)
+                for sentence in [text] + chunker.feed(text) + chunker.flush():
+                    items.append({"text": sentence, **voice})
+        return items
+    
+    async def warm_tts_cache(self, voice_styles: Optional[list] = None) -> Dict[str, int]:
+        """预合成固定播报内容，之后重复播报不再调用语音合成"""
+        if not HAS_VOICE or voice_service is None:
+            return {"total": 0, "synthesized": 0, "failed": 0}
+        return await voice_service.warm_cache(self.get_fixed_phrases(voice_styles))
+    
     async def text_to_speech_with_emotion(
         self,
         text: str,
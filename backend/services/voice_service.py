@@ -7,15 +7,21 @@ import tempfile
 import re
 import io
 from pathlib import Path
-from typing import Optional, Tuple, List, AsyncGenerator
+from typing import Optional, Tuple, List, AsyncGenerator, AsyncIterator, Callable, Dict, Any
 import edge_tts
 
 logger = logging.getLogger(__name__)
 
+from services.tts_cache import TTSAudioCache
+
 # 音频文件存储目录
 AUDIO_DIR = Path("./audio_cache")
 AUDIO_DIR.mkdir(exist_ok=True)
 
+# TTS 缓存容量（MB）：磁盘 LRU 上限 / 内存热点上限
+TTS_CACHE_MAX_MB = int(os.getenv("TTS_CACHE_MAX_MB", "512"))
+TTS_CACHE_MEMORY_MB = int(os.getenv("TTS_CACHE_MEMORY_MB", "32"))
+
 # 尝试导入 FunASR (SenseVoice)
 try:
     from funasr import AutoModel
@@ -25,6 +31,153 @@ except ImportError:
     logger.warning("funasr 未安装，ASR 功能不可用。请运行: pip install funasr")
 
 
+class SentenceChunker:
+    """
+    增量分句器
+    
+    逐段喂入大模型的流式输出，凑够一句就立即返回，供逐句合成语音。
+    分句规则与 VoiceService.split_sentences 相同：句末标点处断句，
+    逗号/顿号处在累积超过 min_clause_chars 个字时断句。
+    """
+    
+    SENTENCE_ENDS = "。！？；!?;\n"
+    CLAUSE_ENDS = "，、,"
+    
+    def __init__(self, min_clause_chars: int = 15, first_clause_chars: Optional[int] = None):
+        """
+        Args:
+            min_clause_chars: 逗号处断句的最少字数
+            first_clause_chars: 第一句在逗号处断句的最少字数（调小可以更早开始播报）
+        """
+        self.min_clause_chars = min_clause_chars
+        self.first_clause_chars = first_clause_chars if first_clause_chars is not None else min_clause_chars
+        self._buffer = ""
+        self._scanned = 0  # 缓冲区中已检查过的位置
+        self._emitted = 0  # 已输出的句数
+    
+    def feed(self, text: str) -> List[str]:
+        """追加文本，返回新凑齐的句子"""
+        self._buffer += text
+        sentences = []
+        start = 0
+        for i in range(self._scanned, len(self._buffer)):
+            char = self._buffer[i]
+            if char in self.SENTENCE_ENDS:
+                pass
+            elif char in self.CLAUSE_ENDS:
+                threshold = self.first_clause_chars if self._emitted == 0 else self.min_clause_chars
+                if i + 1 - start <= threshold:
+                    continue
+            else:
+                continue
+            sentence = self._buffer[start:i + 1].strip()
+            start = i + 1
+            if sentence:
+                sentences.append(sentence)
+                self._emitted += 1
+        self._buffer = self._buffer[start:]
+        self._scanned = len(self._buffer)
+        return sentences
+    
+    def flush(self) -> List[str]:
+        """输出缓冲区中剩余的文本"""
+        rest = self._buffer.strip()
+        self._buffer = ""
+        self._scanned = 0
+        if not rest:
+            return []
+        self._emitted += 1
+        return [rest]
+
+
+class SentenceTTSPipeline:
+    """
+    逐句语音合成流水线
+    
+    句子到达后立即开始合成，最多 max_parallel 句同时合成；
+    输出严格按句子顺序，当前句的音频边合成边输出，后面的句子先缓存。
+    """
+    
+    def __init__(
+        self,
+        synthesize: Callable[[str], AsyncIterator[bytes]],
+        max_parallel: int = 3,
+        min_chunk_bytes: int = 4096
+    ):
+        """
+        Args:
+            synthesize: 单句合成函数，返回音频字节流
+            max_parallel: 同时合成的句子数
+            min_chunk_bytes: 合并后输出的最小音频块大小（句末不足时也会输出）
+        """
+        self._synthesize = synthesize
+        self._semaphore = asyncio.Semaphore(max_parallel)
+        self.min_chunk_bytes = min_chunk_bytes
+        # 按顺序排队的句子：(序号, 文本, 音频块队列)，None 表示不再有新句子
+        self._sentences: asyncio.Queue = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self._count = 0
+        self._closed = False
+    
+    def add(self, text: str) -> None:
+        """加入一句并立即开始合成"""
+        if self._closed:
+            return
+        chunks: asyncio.Queue = asyncio.Queue()
+        self._tasks.append(asyncio.create_task(self._run(text, chunks)))
+        self._sentences.put_nowait((self._count, text, chunks))
+        self._count += 1
+    
+    def close(self) -> None:
+        """不再加入新句子，已加入的句子输出完后 stream 结束"""
+        if not self._closed:
+            self._closed = True
+            self._sentences.put_nowait(None)
+    
+    def cancel(self) -> None:
+        """取消全部合成任务（打断播报）"""
+        for task in self._tasks:
+            task.cancel()
+        self.close()
+    
+    async def _run(self, text: str, chunks: asyncio.Queue) -> None:
+        try:
+            async with self._semaphore:
+                async for data in self._synthesize(text):
+                    chunks.put_nowait(data)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"逐句TTS失败({text[:20]}): {e}")
+        finally:
+            chunks.put_nowait(None)
+    
+    async def stream(self) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        按顺序输出事件：
+        - {"type": "sentence", "index": 序号, "text": 句子}
+        - {"type": "audio", "index": 序号, "data": 音频字节}
+        """
+        while True:
+            item = await self._sentences.get()
+            if item is None:
+                return
+            index, text, chunks = item
+            yield {"type": "sentence", "index": index, "text": text}
+            
+            pending = bytearray()
+            while True:
+                data = await chunks.get()
+                if data is None:
+                    break
+                pending += data
+                if len(pending) >= self.min_chunk_bytes:
+                    yield {"type": "audio", "index": index, "data": bytes(pending)}
+                    pending = bytearray()
+            if pending:
+                yield {"type": "audio", "index": index, "data": bytes(pending)}
+
+
 class VoiceService:
     """语音服务类 - 支持语音识别和语音合成"""
     
@@ -38,10 +191,24 @@ class VoiceService:
         "yunyang": "zh-CN-YunyangNeural",        # 男声，新闻播报
     }
     
+    # 预合成时同时进行的合成数
+    WARM_CONCURRENCY = 4
+    
     def __init__(self):
         """初始化语音服务"""
         self.default_voice = "xiaoxiao"  # 默认使用温柔女声，适合老年人
         self.asr_model = None
+        
+        # 合成结果按 (文本, 语音, 语速, 音量) 缓存，音频ID即缓存键
+        self.tts_cache = TTSAudioCache(
+            AUDIO_DIR,
+            max_disk_bytes=TTS_CACHE_MAX_MB * 1024 * 1024,
+            max_memory_bytes=TTS_CACHE_MEMORY_MB * 1024 * 1024,
+        )
+        # 正在合成的缓存键 → 结果，相同内容的并发请求只合成一次
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.synthesis_count = 0
+        
         self._init_asr()
     
     def _init_asr(self):
@@ -65,6 +232,85 @@ class VoiceService:
             logger.error(f"ASR 模型加载失败: {e}")
             self.asr_model = None
     
+    def _voice_name(self, voice: Optional[str]) -> str:
+        return self.VOICES.get(voice or self.default_voice, self.VOICES["xiaoxiao"])
+    
+    async def _synthesize_stream(
+        self, text: str, voice_name: str, rate: str, volume: str
+    ) -> AsyncGenerator[bytes, None]:
+        """调用 Edge-TTS 合成，逐块返回音频（不经过缓存）"""
+        communicate = edge_tts.Communicate(
+            text=text,
+            voice=voice_name,
+            rate=rate,
+            volume=volume
+        )
+        self.synthesis_count += 1
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                yield chunk["data"]
+    
+    def _begin_synthesis(self, key: str) -> Optional[asyncio.Future]:
+        """登记一次合成；已有相同内容在合成时返回其结果 Future，否则返回 None"""
+        future = self._inflight.get(key)
+        if future is not None:
+            return future
+        self._inflight[key] = asyncio.get_running_loop().create_future()
+        return None
+    
+    def _end_synthesis(self, key: str, data: Optional[bytes] = None, error: BaseException = None) -> None:
+        """结束合成：成功时写入缓存，并通知等待相同内容的请求"""
+        future = self._inflight.pop(key, None)
+        if data is not None:
+            self.tts_cache.put(key, data)
+        if future is None or future.done():
+            return
+        if data is not None:
+            future.set_result(data)
+        elif isinstance(error, Exception):
+            future.set_exception(error)
+            future.exception()  # 没有等待者时不报 "exception was never retrieved"
+        else:
+            future.cancel()
+    
+    async def _synthesize_and_store(self, key: str, text: str, voice_name: str, rate: str, volume: str) -> bytes:
+        """合成并写入缓存；相同内容正在合成时等待其结果"""
+        pending = self._begin_synthesis(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        
+        try:
+            audio = io.BytesIO()
+            async for chunk in self._synthesize_stream(text, voice_name, rate, volume):
+                audio.write(chunk)
+            data = audio.getvalue()
+        except BaseException as e:
+            self._end_synthesis(key, error=e)
+            raise
+        self._end_synthesis(key, data)
+        return data
+    
+    async def synthesize_cached(
+        self,
+        text: str,
+        voice: str = None,
+        rate: str = "+0%",
+        volume: str = "+10%"
+    ) -> Tuple[str, bytes]:
+        """
+        合成语音并缓存，重复内容直接返回缓存
+        
+        Returns:
+            (audio_id, audio_data): 缓存键（即音频ID）和 MP3 数据
+        """
+        voice_name = self._voice_name(voice)
+        key = self.tts_cache.make_key(text, voice_name, rate, volume)
+        
+        data = self.tts_cache.get_bytes(key)
+        if data is None:
+            data = await self._synthesize_and_store(key, text, voice_name, rate, volume)
+        return key, data
+    
     async def text_to_speech(
         self,
         text: str,
@@ -75,6 +321,8 @@ class VoiceService:
         """
         文本转语音 (TTS)
         
+        相同文本和语音参数只合成一次，音频ID由内容决定。
+        
         Args:
             text: 要转换的文本
             voice: 语音类型 (xiaoxiao/xiaoyi/yunjian/yunxi/yunxia/yunyang)
@@ -85,25 +333,16 @@ class VoiceService:
             (audio_id, audio_path): 音频ID和文件路径
         """
         try:
-            # 选择语音
-            voice_name = self.VOICES.get(voice or self.default_voice, self.VOICES["xiaoxiao"])
-            
-            # 生成唯一文件名
-            audio_id = str(uuid.uuid4())
-            audio_path = AUDIO_DIR / f"{audio_id}.mp3"
+            voice_name = self._voice_name(voice)
+            key = self.tts_cache.make_key(text, voice_name, rate, volume)
+            audio_path = self.tts_cache.get_path(key)
             
-            # 使用 Edge-TTS 生成语音
-            communicate = edge_tts.Communicate(
-                text=text,
-                voice=voice_name,
-                rate=rate,
-                volume=volume
-            )
-            
-            await communicate.save(str(audio_path))
+            if audio_path is None:
+                await self._synthesize_and_store(key, text, voice_name, rate, volume)
+                audio_path = self.tts_cache.path(key)
+                logger.info(f"TTS 生成成功: {key}, 文本长度: {len(text)}")
             
-            logger.info(f"TTS 生成成功: {audio_id}, 文本长度: {len(text)}")
-            return audio_id, str(audio_path)
+            return key, str(audio_path)
             
         except Exception as e:
             logger.error(f"TTS 生成失败: {e}")
@@ -113,25 +352,42 @@ class VoiceService:
         """
         将文本分割成句子（用于流式播放）
         """
-        # 按中文标点分割
-        sentences = re.split(r'([。！？；，、])', text)
-        
-        # 合并标点和句子
-        result = []
-        current = ""
-        for i, part in enumerate(sentences):
-            current += part
-            # 遇到句末标点，或者当前累积超过15个字，就分割
-            if part in '。！？；' or (part in '，、' and len(current) > 15):
-                if current.strip():
-                    result.append(current.strip())
-                current = ""
-        
-        if current.strip():
-            result.append(current.strip())
+        # 遇到句末标点，或者在逗号处累积超过15个字，就分割
+        chunker = SentenceChunker()
+        result = chunker.feed(text) + chunker.flush()
         
         # 如果没有分割出来，返回原文
         return result if result else [text]
+    
+    def create_sentence_chunker(self, first_clause_chars: Optional[int] = None) -> SentenceChunker:
+        """创建增量分句器（用于大模型流式输出边生成边播报）"""
+        return SentenceChunker(first_clause_chars=first_clause_chars)
+    
+    def create_tts_pipeline(
+        self,
+        voice: str = None,
+        rate: str = "+0%",
+        volume: str = "+10%",
+        max_parallel: int = 3,
+        params: Callable[[], Dict[str, str]] = None
+    ) -> SentenceTTSPipeline:
+        """
+        创建逐句语音合成流水线
+        
+        Args:
+            voice/rate/volume: 语音参数，同 text_to_speech
+            max_parallel: 同时合成的句子数
+            params: 可选，每句合成前调用，返回 {"voice", "rate", "volume"} 覆盖上面的参数
+        """
+        def synthesize(text: str) -> AsyncIterator[bytes]:
+            settings = {"voice": voice, "rate": rate, "volume": volume}
+            if params is not None:
+                settings.update(params())
+            return self.text_to_speech_stream(
+                text, voice=settings["voice"], rate=settings["rate"], volume=settings["volume"]
+            )
+        
+        return SentenceTTSPipeline(synthesize, max_parallel=max_parallel)
 
     async def text_to_speech_stream(
         self,
@@ -141,22 +397,35 @@ class VoiceService:
         volume: str = "+10%"
     ) -> AsyncGenerator[bytes, None]:
         """
-        流式TTS - 直接返回音频字节流（不保存文件）
+        流式TTS - 直接返回音频字节流（不生成音频文件URL）
+        
+        命中缓存时一次返回完整音频；未命中时边合成边返回，完整合成后写入缓存。
         """
         try:
-            voice_name = self.VOICES.get(voice or self.default_voice, self.VOICES["xiaoxiao"])
+            voice_name = self._voice_name(voice)
+            key = self.tts_cache.make_key(text, voice_name, rate, volume)
             
-            communicate = edge_tts.Communicate(
-                text=text,
-                voice=voice_name,
-                rate=rate,
-                volume=volume
-            )
+            data = self.tts_cache.get_bytes(key)
+            if data is not None:
+                yield data
+                return
+            
+            pending = self._begin_synthesis(key)
+            if pending is not None:
+                yield await asyncio.shield(pending)
+                return
             
-            # 流式返回音频数据
-            async for chunk in communicate.stream():
-                if chunk["type"] == "audio":
-                    yield chunk["data"]
+            audio = io.BytesIO()
+            try:
+                # 流式返回音频数据
+                async for chunk in self._synthesize_stream(text, voice_name, rate, volume):
+                    audio.write(chunk)
+                    yield chunk
+            except BaseException as e:
+                # 包括调用方中途停止读取（被打断），不完整的音频不缓存
+                self._end_synthesis(key, error=e)
+                raise
+            self._end_synthesis(key, audio.getvalue())
                     
         except Exception as e:
             logger.error(f"流式TTS失败: {e}")
@@ -170,31 +439,62 @@ class VoiceService:
         volume: str = "+10%"
     ) -> bytes:
         """
-        快速TTS - 直接返回音频字节（不保存文件）
-        比 text_to_speech 快，因为不写入磁盘
+        快速TTS - 直接返回音频字节（不返回文件路径）
+        重复内容从内存缓存返回，不重新合成
         """
         try:
-            voice_name = self.VOICES.get(voice or self.default_voice, self.VOICES["xiaoxiao"])
-            
-            communicate = edge_tts.Communicate(
-                text=text,
-                voice=voice_name,
-                rate=rate,
-                volume=volume
-            )
-            
-            # 收集所有音频数据
-            audio_data = io.BytesIO()
-            async for chunk in communicate.stream():
-                if chunk["type"] == "audio":
-                    audio_data.write(chunk["data"])
-            
-            return audio_data.getvalue()
+            _, data = await self.synthesize_cached(text, voice, rate, volume)
+            return data
                     
         except Exception as e:
             logger.error(f"快速TTS失败: {e}")
             raise
     
+    async def warm_cache(
+        self,
+        items: List[Dict[str, str]],
+        pin: bool = True
+    ) -> Dict[str, int]:
+        """
+        预合成固定短语（如唤醒应答、自动化场景播报），之后的请求直接命中缓存
+        
+        Args:
+            items: [{"text", "voice", "rate", "volume"}, ...]
+            pin: 是否固定在缓存中，不被淘汰和过期清理
+        
+        Returns:
+            {"total": 短语数, "synthesized": 新合成数, "failed": 失败数}
+        """
+        semaphore = asyncio.Semaphore(self.WARM_CONCURRENCY)
+        unique = {}
+        for item in items:
+            params = (item["text"], item.get("voice"), item.get("rate", "+0%"), item.get("volume", "+10%"))
+            if params[0].strip():
+                unique[self.tts_cache.make_key(params[0], self._voice_name(params[1]), *params[2:])] = params
+        
+        stats = {"total": len(unique), "synthesized": 0, "failed": 0}
+        
+        async def warm(key: str, params: Tuple[str, Optional[str], str, str]) -> None:
+            if key in self.tts_cache:
+                return
+            async with semaphore:
+                try:
+                    await self.synthesize_cached(*params)
+                    stats["synthesized"] += 1
+                except Exception as e:
+                    stats["failed"] += 1
+                    logger.warning(f"预合成失败({params[0][:20]}): {e}")
+        
+        if pin:
+            self.tts_cache.pin(unique)
+        await asyncio.gather(*(warm(key, params) for key, params in unique.items()))
+        logger.info(f"TTS 预合成完成: {stats}")
+        return stats
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """TTS 缓存统计"""
+        return {**self.tts_cache.get_stats(), "synthesized": self.synthesis_count}
+    
     async def speech_to_text(self, audio_data: bytes, language: str = "zh") -> str:
         """
         语音转文本 (ASR) - 使用 SenseVoice
@@ -263,18 +563,8 @@ class VoiceService:
         }
     
     def cleanup_old_audio(self, max_age_hours: int = 24):
-        """清理过期的音频文件"""
-        import time
-        current_time = time.time()
-        max_age_seconds = max_age_hours * 3600
-        
-        for audio_file in AUDIO_DIR.glob("*.mp3"):
-            if current_time - audio_file.stat().st_mtime > max_age_seconds:
-                try:
-                    audio_file.unlink()
-                    logger.info(f"清理过期音频: {audio_file.name}")
-                except Exception as e:
-                    logger.warning(f"清理音频失败: {e}")
+        """清理长时间未使用的音频文件（预合成的固定短语除外）"""
+        self.tts_cache.remove_older_than(max_age_hours * 3600)
 
 
 # 全局语音服务实例
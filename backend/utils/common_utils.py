@@ -1,6 +1,7 @@
 """通用工具类"""
 from typing import Any, Dict, List, Optional, Union
 from datetime import datetime, date
+import calendar
 import uuid
 import re
 from decimal import Decimal
@@ -358,6 +359,22 @@ class DateUtils:
         end_time = datetime.combine(end_date, datetime.max.time())
         
         return start_time, end_time
+    
+    @staticmethod
+    def add_months(value: Union[datetime, date], months: int) -> Union[datetime, date]:
+        """加减月份（日历运算），目标月份没有该日时取月末，如 1月31日 + 1个月 = 2月28/29日
+        
+        Args:
+            value: 日期或时间（保留时分秒和时区）
+            months: 月数，可为负数
+            
+        Returns:
+            与 value 同类型的日期或时间
+        """
+        month_index = value.year * 12 + value.month - 1 + months
+        year, month = divmod(month_index, 12)
+        month += 1
+        return value.replace(year=year, month=month, day=min(value.day, calendar.monthrange(year, month)[1]))
 
 
 # 添加缺失的导入
@@ -72,7 +72,7 @@ class JWTUtils:
         if expires_delta:
             expire = datetime.utcnow() + expires_delta
         else:
-            expire = datetime.utcnow() + timedelta(minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES)
+            expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         
         to_encode.update({"exp": expire})
         encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
@@ -153,7 +153,7 @@ class TokenManager:
             dict: 包含访问令牌和刷新令牌的字典
         """
         # 创建访问令牌
-        access_token_expires = timedelta(minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES)
+        access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = JWTUtils.create_access_token(
             data={"sub": user_id, "role": role, "username": username}, 
             expires_delta=access_token_expires
@@ -199,7 +199,7 @@ class TokenManager:
             raise jwt.JWTError("无效的刷新令牌")
         
         # 创建新的访问令牌
-        access_token_expires = timedelta(minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES)
+        access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = JWTUtils.create_access_token(
             data={"sub": user_id, "role": role, "username": username},
             expires_delta=access_token_expires
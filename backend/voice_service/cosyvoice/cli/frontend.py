@@ -12,6 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 from functools import partial
+from collections import OrderedDict
+import hashlib
+import threading
 import onnxruntime
 import torch
 import numpy as np
@@ -42,7 +45,8 @@ class CosyVoiceFrontEnd:
                  speech_tokenizer_model: str,
                  spk2info: str = '',
                  instruct: bool = False,
-                 allowed_special: str = 'all'):
+                 allowed_special: str = 'all',
+                 prompt_cache_size: int = 64):
         self.tokenizer = get_tokenizer()
         self.feat_extractor = feat_extractor
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
@@ -59,6 +63,11 @@ class CosyVoiceFrontEnd:
             self.spk2info = {}
         self.instruct = instruct
         self.allowed_special = allowed_special
+        self.resample_22050 = torchaudio.transforms.Resample(orig_freq=16000, new_freq=22050)
+        # prompt wav sha1 -> speech feat/token and speaker embedding, most recently used last
+        self.prompt_cache = OrderedDict()
+        self.prompt_cache_size = prompt_cache_size
+        self.prompt_cache_lock = threading.Lock()
         self.inflect_parser = inflect.engine()
         self.use_ttsfrd = use_ttsfrd
         if self.use_ttsfrd:
@@ -108,6 +117,27 @@ class CosyVoiceFrontEnd:
         speech_feat_len = torch.tensor([speech_feat.shape[1]], dtype=torch.int32).to(self.device)
         return speech_feat, speech_feat_len
 
+    def _extract_prompt_feature(self, prompt_speech_16k):
+        speech = prompt_speech_16k.detach().cpu().contiguous()
+        key = hashlib.sha1(str(tuple(speech.shape)).encode() + speech.numpy().tobytes()).hexdigest()
+        with self.prompt_cache_lock:
+            feature = self.prompt_cache.get(key)
+            if feature is not None:
+                self.prompt_cache.move_to_end(key)
+                return feature
+        speech_feat, speech_feat_len = self._extract_speech_feat(self.resample_22050(prompt_speech_16k))
+        speech_token, speech_token_len = self._extract_speech_token(prompt_speech_16k)
+        embedding = self._extract_spk_embedding(prompt_speech_16k)
+        feature = {'speech_feat': speech_feat, 'speech_feat_len': speech_feat_len,
+                   'speech_token': speech_token, 'speech_token_len': speech_token_len,
+                   'embedding': embedding}
+        if self.prompt_cache_size > 0:
+            with self.prompt_cache_lock:
+                self.prompt_cache[key] = feature
+                while len(self.prompt_cache) > self.prompt_cache_size:
+                    self.prompt_cache.popitem(last=False)
+        return feature
+
     def text_normalize(self, text, split=True):
         text = text.strip()
         if contains_chinese(text):
@@ -145,10 +175,10 @@ class CosyVoiceFrontEnd:
     def frontend_zero_shot(self, tts_text, prompt_text, prompt_speech_16k):
         tts_text_token, tts_text_token_len = self._extract_text_token(tts_text)
         prompt_text_token, prompt_text_token_len = self._extract_text_token(prompt_text)
-        prompt_speech_22050 = torchaudio.transforms.Resample(orig_freq=16000, new_freq=22050)(prompt_speech_16k)
-        speech_feat, speech_feat_len = self._extract_speech_feat(prompt_speech_22050)
-        speech_token, speech_token_len = self._extract_speech_token(prompt_speech_16k)
-        embedding = self._extract_spk_embedding(prompt_speech_16k)
+        prompt_feature = self._extract_prompt_feature(prompt_speech_16k)
+        speech_feat, speech_feat_len = prompt_feature['speech_feat'], prompt_feature['speech_feat_len']
+        speech_token, speech_token_len = prompt_feature['speech_token'], prompt_feature['speech_token_len']
+        embedding = prompt_feature['embedding']
         model_input = {'text': tts_text_token, 'text_len': tts_text_token_len,
                        'prompt_text': prompt_text_token, 'prompt_text_len': prompt_text_token_len,
                        'llm_prompt_speech_token': speech_token, 'llm_prompt_speech_token_len': speech_token_len,
@@ -176,10 +206,10 @@ class CosyVoiceFrontEnd:
         return model_input
 
     def frontend_vc(self, source_speech_16k, prompt_speech_16k):
-        prompt_speech_token, prompt_speech_token_len = self._extract_speech_token(prompt_speech_16k)
-        prompt_speech_22050 = torchaudio.transforms.Resample(orig_freq=16000, new_freq=22050)(prompt_speech_16k)
-        prompt_speech_feat, prompt_speech_feat_len = self._extract_speech_feat(prompt_speech_22050)
-        embedding = self._extract_spk_embedding(prompt_speech_16k)
+        prompt_feature = self._extract_prompt_feature(prompt_speech_16k)
+        prompt_speech_token, prompt_speech_token_len = prompt_feature['speech_token'], prompt_feature['speech_token_len']
+        prompt_speech_feat, prompt_speech_feat_len = prompt_feature['speech_feat'], prompt_feature['speech_feat_len']
+        embedding = prompt_feature['embedding']
         source_speech_token, source_speech_token_len = self._extract_speech_token(source_speech_16k)
         model_input = {'source_speech_token': source_speech_token, 'source_speech_token_len': source_speech_token_len,
                        'flow_prompt_speech_token': prompt_speech_token, 'flow_prompt_speech_token_len': prompt_speech_token_len,
@@ -0,0 +1,153 @@
+# Copyright (c) 2024 Alibaba Inc (authors: Xiang Lyu)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Inference scheduler for the fastapi runtime server.
+
+Requests are queued and dispatched in small batches. Within a batch,
+requests with identical inputs (same mode, text, speaker or prompt audio)
+are coalesced into a single inference whose audio chunks are fanned out to
+every waiting client; the remaining jobs run concurrently on a bounded
+thread pool, off the event loop. CosyVoiceModel keeps per-request state
+keyed by uuid, so concurrent calls into it are safe, and jobs that share a
+prompt wav reuse the prompt features cached by CosyVoiceFrontEnd.
+"""
+import asyncio
+import hashlib
+import io
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from cosyvoice.utils.file_utils import load_wav
+
+_END = object()
+
+
+class QueueFullError(Exception):
+    """Raised when the scheduler queue is full, the server answers 503."""
+
+
+class InferenceJob:
+
+    def __init__(self, mode, kwargs, prompt_wav=None):
+        self.mode = mode
+        self.kwargs = kwargs
+        self.prompt_wav = prompt_wav
+        self.prompt_hash = hashlib.sha1(prompt_wav).hexdigest() if prompt_wav is not None else None
+        self.subscribers = []
+
+    @property
+    def key(self):
+        return (self.mode, self.prompt_hash) + tuple(sorted(self.kwargs.items()))
+
+
+class InferenceScheduler:
+
+    def __init__(self, cosyvoice, max_concurrency=4, max_batch_size=16, batch_window_ms=10, max_queue_size=256):
+        self.cosyvoice = cosyvoice
+        self.max_concurrency = max_concurrency
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window_ms / 1000
+        self.max_queue_size = max_queue_size
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='cosyvoice')
+        self.queue = None
+        self.slots = None
+        self.loop = None
+        self.dispatcher = None
+        self.stats = {'requests': 0, 'coalesced': 0, 'batches': 0, 'jobs': 0, 'rejected': 0, 'failed': 0}
+
+    def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self.slots = asyncio.Semaphore(self.max_concurrency)
+        self.dispatcher = self.loop.create_task(self._dispatch())
+
+    async def stop(self):
+        if self.dispatcher is not None:
+            self.dispatcher.cancel()
+            try:
+                await self.dispatcher
+            except asyncio.CancelledError:
+                pass
+        self.executor.shutdown(wait=False)
+
+    async def stream(self, mode, prompt_wav=None, **kwargs):
+        """Queue a request and yield int16 pcm bytes as they are synthesized."""
+        job = InferenceJob(mode, kwargs, prompt_wav)
+        output = asyncio.Queue()
+        job.subscribers.append(output)
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.stats['rejected'] += 1
+            raise QueueFullError('inference queue is full')
+        self.stats['requests'] += 1
+        while True:
+            item = await output.get()
+            if item is _END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    async def _dispatch(self):
+        while True:
+            batch = [await self.queue.get()]
+            deadline = self.loop.time() + self.batch_window
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - self.loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self.stats['batches'] += 1
+
+            # coalesce identical requests into one job, run the rest concurrently
+            jobs = {}
+            for job in batch:
+                if job.key in jobs:
+                    jobs[job.key].subscribers.extend(job.subscribers)
+                    self.stats['coalesced'] += 1
+                else:
+                    jobs[job.key] = job
+            for job in jobs.values():
+                await self.slots.acquire()
+                self.stats['jobs'] += 1
+                future = self.loop.run_in_executor(self.executor, self._run, job)
+                future.add_done_callback(lambda _: self.slots.release())
+
+    def _count_failed(self):
+        self.stats['failed'] += 1
+
+    def _publish(self, job, item):
+        for subscriber in job.subscribers:
+            self.loop.call_soon_threadsafe(subscriber.put_nowait, item)
+
+    def _run(self, job):
+        start_time = time.time()
+        try:
+            kwargs = dict(job.kwargs)
+            if job.prompt_wav is not None:
+                kwargs['prompt_speech_16k'] = load_wav(io.BytesIO(job.prompt_wav), 16000)
+            for i in getattr(self.cosyvoice, 'inference_{}'.format(job.mode))(**kwargs):
+                self._publish(job, (i['tts_speech'].numpy() * (2 ** 15)).astype(np.int16).tobytes())
+            self._publish(job, _END)
+            logging.info('{} job for {} clients done in {:.3f}s'.format(job.mode, len(job.subscribers), time.time() - start_time))
+        except Exception as e:
+            # stats are only touched on the event loop thread
+            self.loop.call_soon_threadsafe(self._count_failed)
+            logging.error('{} job failed: {}'.format(job.mode, e))
+            self._publish(job, e)
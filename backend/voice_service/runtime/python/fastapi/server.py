@@ -16,16 +16,15 @@ import sys
 import argparse
 import logging
 logging.getLogger('matplotlib').setLevel(logging.WARNING)
-from fastapi import FastAPI, UploadFile, Form, File
+from fastapi import FastAPI, UploadFile, Form, File, HTTPException
 from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
-import numpy as np
 ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
 sys.path.append('{}/../../..'.format(ROOT_DIR))
 sys.path.append('{}/../../../third_party/Matcha-TTS'.format(ROOT_DIR))
 from cosyvoice.cli.cosyvoice import CosyVoice
-from cosyvoice.utils.file_utils import load_wav
+from scheduler import InferenceScheduler, QueueFullError
 
 app = FastAPI()
 # set cross region allowance
@@ -35,38 +34,63 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"])
+scheduler = None
 
 
-def generate_data(model_output):
-    for i in model_output:
-        tts_audio = (i['tts_speech'].numpy() * (2 ** 15)).astype(np.int16).tobytes()
-        yield tts_audio
+@app.on_event("startup")
+async def start_scheduler():
+    scheduler.start()
+
+
+@app.on_event("shutdown")
+async def stop_scheduler():
+    await scheduler.stop()
+
+
+async def stream_response(mode, **kwargs):
+    model_output = scheduler.stream(mode, **kwargs)
+    try:
+        # wait for the first chunk so that a full queue or a failed job is reported as an http error
+        first = await model_output.__anext__()
+    except StopAsyncIteration:
+        first = b''
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        # nothing has been sent yet, so the failure can still be reported as an http error
+        logging.error('{} request failed before the first chunk: {}'.format(mode, e))
+        raise HTTPException(status_code=500, detail='{} inference failed: {}'.format(mode, e))
+
+    async def generate_data():
+        yield first
+        async for tts_audio in model_output:
+            yield tts_audio
+    return StreamingResponse(generate_data())
 
 
 @app.get("/inference_sft")
 async def inference_sft(tts_text: str = Form(), spk_id: str = Form()):
-    model_output = cosyvoice.inference_sft(tts_text, spk_id)
-    return StreamingResponse(generate_data(model_output))
+    return await stream_response('sft', tts_text=tts_text, spk_id=spk_id)
 
 
 @app.get("/inference_zero_shot")
 async def inference_zero_shot(tts_text: str = Form(), prompt_text: str = Form(), prompt_wav: UploadFile = File()):
-    prompt_speech_16k = load_wav(prompt_wav.file, 16000)
-    model_output = cosyvoice.inference_zero_shot(tts_text, prompt_text, prompt_speech_16k)
-    return StreamingResponse(generate_data(model_output))
+    return await stream_response('zero_shot', tts_text=tts_text, prompt_text=prompt_text, prompt_wav=await prompt_wav.read())
 
 
 @app.get("/inference_cross_lingual")
 async def inference_cross_lingual(tts_text: str = Form(), prompt_wav: UploadFile = File()):
-    prompt_speech_16k = load_wav(prompt_wav.file, 16000)
-    model_output = cosyvoice.inference_cross_lingual(tts_text, prompt_speech_16k)
-    return StreamingResponse(generate_data(model_output))
+    return await stream_response('cross_lingual', tts_text=tts_text, prompt_wav=await prompt_wav.read())
 
 
 @app.get("/inference_instruct")
 async def inference_instruct(tts_text: str = Form(), spk_id: str = Form(), instruct_text: str = Form()):
-    model_output = cosyvoice.inference_instruct(tts_text, spk_id, instruct_text)
-    return StreamingResponse(generate_data(model_output))
+    return await stream_response('instruct', tts_text=tts_text, spk_id=spk_id, instruct_text=instruct_text)
+
+
+@app.get("/scheduler_stats")
+async def scheduler_stats():
+    return scheduler.stats
 
 
 if __name__ == '__main__':
@@ -78,6 +102,32 @@ if __name__ == '__main__':
                         type=str,
                         default='iic/CosyVoice-300M',
                         help='local path or modelscope repo id')
+    parser.add_argument('--max_concurrency',
+                        type=int,
+                        default=4,
+                        help='number of inference jobs running at the same time')
+    parser.add_argument('--max_batch_size',
+                        type=int,
+                        default=16,
+                        help='max requests collected into one dispatch batch')
+    parser.add_argument('--batch_window_ms',
+                        type=int,
+                        default=10,
+                        help='time to wait for more requests before dispatching a batch')
+    parser.add_argument('--max_queue_size',
+                        type=int,
+                        default=256,
+                        help='queued requests beyond this are rejected with 503')
+    parser.add_argument('--prompt_cache_size',
+                        type=int,
+                        default=64,
+                        help='number of prompt wavs whose features are cached')
     args = parser.parse_args()
     cosyvoice = CosyVoice(args.model_dir)
+    cosyvoice.frontend.prompt_cache_size = args.prompt_cache_size
+    scheduler = InferenceScheduler(cosyvoice,
+                                   max_concurrency=args.max_concurrency,
+                                   max_batch_size=args.max_batch_size,
+                                   batch_window_ms=args.batch_window_ms,
+                                   max_queue_size=args.max_queue_size)
     uvicorn.run(app, host="0.0.0.0", port=args.port)
@@ -147,7 +147,9 @@ export function useRealtimeVoice(): UseRealtimeVoiceReturn {
     
     try {
       console.log('🔌 连接 WebSocket:', WS_URL);
-      const ws = new WebSocket(WS_URL);
+      // 携带登录令牌，老人用户可接收本人的提醒推送
+      const token = localStorage.getItem('token');
+      const ws = new WebSocket(token ? `${WS_URL}?token=${encodeURIComponent(token)}` : WS_URL);
       
       ws.onopen = () => {
         console.log('✅ WebSocket 已连接');